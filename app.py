@@ -2,7 +2,10 @@
 Sistema Experto de Evaluación de Riesgo de Proveedores
 Aplicación principal usando Streamlit
 """
-from engine import MotorEvaluacionRiesgo, DatosProveedor
+import sqlite3
+
+from engine import (evaluar_proveedor_versionado, registro_reglas, vigilante_reglas, SesionEvaluacion,
+                    historial_evaluaciones)
 import streamlit as st
 
 # Importar componentes de la carpeta ui
@@ -25,6 +28,51 @@ st.set_page_config(
 st.markdown(get_custom_css(), unsafe_allow_html=True)
 
 
+# ========== EVALUACIÓN INCREMENTAL ==========
+def evaluar_en_sesion(datos, version=None):
+    """
+    Evalúa reutilizando la sesión incremental del usuario: tras la primera
+    evaluación, mover un control solo redispara las reglas del campo cambiado.
+    Las reglas son las de `version` (por defecto, la vigente del registro
+    compartido); si se publica otra, la sesión se rehace con ella
+    """
+    # Filtrar datos para el motor (excluir nombre y fecha_evaluacion)
+    datos_motor = {
+        k: v for k, v in datos.items()
+        if k not in ['nombre', 'fecha_evaluacion']
+    }
+
+    version = version or registro_reglas().fijar()
+    try:
+        sesion = st.session_state.get('sesion')
+        if sesion is None or st.session_state.get('version_sesion') != version.id:
+            sesion = st.session_state['sesion'] = SesionEvaluacion(datos_motor, version.evaluador.motor_cls)
+            st.session_state['version_sesion'] = version.id
+            resultado = sesion.resultado()
+        else:
+            resultado = sesion.actualizar(datos_motor)
+    except Exception:
+        # Datos que el motor rechaza: resultado 'ERROR' de la caché versionada
+        st.session_state.pop('sesion', None)
+        return evaluar_proveedor_versionado(datos_motor)
+    resultado['version_reglas'] = version.id
+    return resultado
+
+
+# ========== HISTORIAL ==========
+def registrar_en_historial(resultado, datos):
+    """
+    Guarda la evaluación en el historial persistente para poder auditarla
+    después de recargar la página; un fallo de la base no interrumpe la app
+    """
+    if resultado.get('riesgo_final') == 'ERROR':
+        return
+    try:
+        historial_evaluaciones().registrar(resultado, datos, id_proveedor=datos.get('nombre') or None)
+    except sqlite3.Error as e:
+        st.warning(f"No se pudo guardar la evaluación en el historial: {e}")
+
+
 # ========== FUNCIÓN PRINCIPAL ==========
 def main():
     """Función principal de la aplicación"""
@@ -35,35 +83,35 @@ def main():
     # Mostrar formulario en el sidebar
     datos = formulario_proveedor()
 
+    # Una sola versión de las reglas para toda la página: la evaluación, los
+    # puntos de inflexión y la simulación usan las mismas aunque se publique otra
+    version = registro_reglas().fijar()
+    vigilante = vigilante_reglas()
+    if vigilante is not None and vigilante.error is not None:
+        st.sidebar.warning(
+            f"No se pudieron recargar las reglas de {vigilante.ruta} ({vigilante.error}); "
+            f"sigue vigente la versión {version.numero} ({version.origen})."
+        )
+
     # Botón de evaluación en el sidebar
     if st.sidebar.button("🚀 Evaluar Proveedor", type="primary", use_container_width=True):
-        # Crear motor de evaluación
-        motor = MotorEvaluacionRiesgo()
-        motor.reset()
-        
-        # Filtrar datos para el motor (excluir nombre y fecha_evaluacion)
-        datos_motor = {
-            k: v for k, v in datos.items() 
-            if k not in ['nombre', 'fecha_evaluacion']
-        }
-        
-        # Declarar hechos y ejecutar motor
-        motor.declare(DatosProveedor(**datos_motor))
-        
         with st.spinner("Evaluando proveedor..."):
-            motor.run()
+            resultado = evaluar_en_sesion(datos, version)
         
-        # Obtener y guardar resultados en session_state
-        resultado = motor.obtener_resultado()
+        # Guardar resultados en session_state y en el historial
         st.session_state['resultado'] = resultado
         st.session_state['datos'] = datos
+        registrar_en_historial(resultado, datos)
         
         # Mostrar resultados
-        mostrar_resultados(resultado, datos)
+        mostrar_resultados(resultado, datos, version.evaluador)
 
-    # Si ya hay resultados en session_state, mostrarlos
+    # Si ya hay resultados, actualizarlos con los valores actuales del formulario
     elif 'resultado' in st.session_state:
-        mostrar_resultados(st.session_state['resultado'], st.session_state['datos'])
+        resultado = evaluar_en_sesion(datos, version)
+        st.session_state['resultado'] = resultado
+        st.session_state['datos'] = datos
+        mostrar_resultados(resultado, datos, version.evaluador)
 
     # Si no hay resultados, mostrar página de inicio
     else:
@@ -0,0 +1,4 @@
+"""
+Benchmarks de rendimiento del motor de inferencia
+Se ejecutan como módulos desde la raíz del proyecto: python -m benchmarks.<nombre>
+"""
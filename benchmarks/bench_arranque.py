@@ -0,0 +1,69 @@
+"""
+Benchmark: arranque en frío de la base de conocimiento
+
+Compara, en procesos nuevos, el tiempo hasta tener un evaluador listo
+importando knowledge y engine frente a cargar el archivo declarativo, con
+y sin el artefacto compilado en caché.
+
+Uso:
+    python -m benchmarks.bench_arranque [--repeticiones 10]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ESCENARIOS = {
+    'knowledge+engine': (
+        "import engine, knowledge\n"
+        "from engine.conocimiento import evaluador_conocimiento\n"
+        "evaluador_conocimiento()\n"
+    ),
+    'declarativo': (
+        "from engine.declarativo import cargar_reglas\n"
+        "cargar_reglas(usar_cache=False)\n"
+    ),
+    'declarativo+cache': (
+        "import sys\n"
+        "from engine.declarativo import cargar_reglas\n"
+        "cargar_reglas(directorio_cache=sys.argv[1])\n"
+    )
+}
+
+
+def medir_arranque(codigo, repeticiones, *argumentos):
+    """Tiempos en milisegundos de un intérprete nuevo que ejecuta `codigo`"""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        subprocess.run([sys.executable, '-c', codigo, *argumentos], cwd=RAIZ, check=True)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return tiempos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeticiones', type=int, default=10, help="Procesos por escenario")
+    args = parser.parse_args()
+
+    vacio = statistics.median(medir_arranque("pass", args.repeticiones))
+    print(f"{'intérprete':<18} mediana={vacio:8.1f} ms")
+
+    with tempfile.TemporaryDirectory() as directorio_cache:
+        # Primera carga fuera de la medición para dejar el artefacto en caché
+        medir_arranque(ESCENARIOS['declarativo+cache'], 1, directorio_cache)
+        for nombre, codigo in ESCENARIOS.items():
+            tiempos = medir_arranque(codigo, args.repeticiones, directorio_cache)
+            mediana = statistics.median(tiempos)
+            print(f"{nombre:<18} mediana={mediana:8.1f} ms  sin intérprete={mediana - vacio:8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Benchmark: reevaluar una cartera desde CSV frente al archivo binario proyectado en memoria
+
+Uso:
+    python -m benchmarks.bench_binario [--n 1000000] [--tamano-bloque 1000000]
+"""
+
+import argparse
+import os
+import resource
+import tempfile
+import time
+
+from engine.binario import abrir_binario, convertir_binario
+from engine.flujo import evaluar_columnas, leer_bloques
+from engine.registro import registro_reglas
+from benchmarks.sintetico import GeneradorProveedores
+
+
+def reportar(nombre: str, filas: int, segundos: float):
+    print(f"{nombre:<22} {filas:>10,} filas  {segundos:>7.2f} s  {filas / segundos:>12,.0f} filas/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--n', type=int, default=1_000_000, help="Proveedores de la cartera")
+    parser.add_argument('--tamano-bloque', type=int, default=1_000_000, help="Filas evaluadas a la vez")
+    args = parser.parse_args()
+
+    version = registro_reglas().fijar()
+    with tempfile.TemporaryDirectory() as directorio:
+        csv = os.path.join(directorio, 'cartera.csv')
+        binario = os.path.join(directorio, 'cartera.prov')
+        GeneradorProveedores(semilla=23).escribir(csv, args.n)
+
+        inicio = time.perf_counter()
+        convertir_binario(csv, binario)
+        reportar("conversión", args.n, time.perf_counter() - inicio)
+
+        inicio = time.perf_counter()
+        for bloque in leer_bloques(csv, 'csv', args.tamano_bloque):
+            evaluar_columnas(bloque, version)
+        reportar("CSV", args.n, time.perf_counter() - inicio)
+
+        inicio = time.perf_counter()
+        for tabla in abrir_binario(binario).bloques(args.tamano_bloque):
+            tabla.evaluar(version)
+        reportar("binario (memmap)", args.n, time.perf_counter() - inicio)
+
+        print(f"tamaño CSV {os.path.getsize(csv) / 2**20:,.0f} MB, binario {os.path.getsize(binario) / 2**20:,.0f} MB, "
+              f"memoria máxima {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:,.0f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,25 @@
+"""
+Benchmark: latencia del motor de inferencia frente al evaluador compilado
+
+Uso:
+    python -m benchmarks.bench_compilado [--n 2000]
+"""
+
+import argparse
+
+from engine import evaluar_proveedor, evaluar_proveedor_compilado
+from engine.reglas import MOTOR_INFERENCIA
+from benchmarks.bench_pool import medir, reportar
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--n', type=int, default=2000, help="Evaluaciones por backend")
+    args = parser.parse_args()
+
+    reportar(f"motor {MOTOR_INFERENCIA}", medir(evaluar_proveedor, args.n))
+    reportar("compilado", medir(evaluar_proveedor_compilado, args.n))
+
+
+if __name__ == '__main__':
+    main()
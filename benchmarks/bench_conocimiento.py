@@ -0,0 +1,30 @@
+"""
+Benchmark: reglas de knowledge/ interpretadas frente al evaluador compilado
+
+Uso:
+    python -m benchmarks.bench_conocimiento [--n 2000]
+"""
+
+import argparse
+
+from engine.conocimiento import evaluador_conocimiento
+from benchmarks.bench_pool import medir, reportar
+from benchmarks.sintetico import GeneradorProveedores
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--n', type=int, default=2000, help="Evaluaciones por backend")
+    args = parser.parse_args()
+
+    evaluador = evaluador_conocimiento()
+    proveedores = list(GeneradorProveedores(semilla=1).proveedores(args.n))
+    siguiente = iter(proveedores * 2).__next__
+
+    reportar("interpretado", medir(lambda _: evaluador.evaluar_referencia(siguiente()), args.n))
+    reportar("compilado", medir(lambda _: evaluador.evaluar(siguiente()), args.n))
+    print(f"estadísticas: {evaluador.estadisticas}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+Benchmark: inserción por lotes y consultas del historial de evaluaciones en SQLite
+
+Uso:
+    python -m benchmarks.bench_historial [--n 500000] [--tamano-bloque 100000]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from engine.flujo import evaluar_columnas, leer_bloques
+from engine.historial import HistorialEvaluaciones
+from engine.registro import registro_reglas
+from benchmarks.sintetico import GeneradorProveedores
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--n', type=int, default=500_000, help="Evaluaciones insertadas")
+    parser.add_argument('--tamano-bloque', type=int, default=100_000, help="Filas por executemany")
+    parser.add_argument('--consultas', type=int, default=1000, help="Consultas por proveedor")
+    args = parser.parse_args()
+
+    version = registro_reglas().fijar()
+    with tempfile.TemporaryDirectory() as directorio:
+        csv = os.path.join(directorio, 'cartera.csv')
+        GeneradorProveedores(semilla=24).escribir(csv, args.n)
+        bloques = []
+        for bloque in leer_bloques(csv, 'csv', args.tamano_bloque):
+            # Un identificador por proveedor para las consultas
+            bloque['id'] = 'P' + bloque['fila'].astype(str)
+            bloques.append((bloque, evaluar_columnas(bloque, version)))
+
+        with HistorialEvaluaciones(os.path.join(directorio, 'historial.sqlite3')) as historial:
+            inicio = time.perf_counter()
+            for bloque, columnas in bloques:
+                historial.registrar_bloque(bloque, columnas, origen=csv)
+            segundos = time.perf_counter() - inicio
+            print(f"inserción   {args.n:>10,} filas  {segundos:>6.2f} s  {args.n / segundos:>10,.0f} filas/s")
+
+            ids = [f'P{i * 7919 % args.n}' for i in range(args.consultas)]
+            inicio = time.perf_counter()
+            for id_proveedor in ids:
+                historial.historial_proveedor(id_proveedor)
+            milisegundos = (time.perf_counter() - inicio) / args.consultas * 1000
+            print(f"consulta por proveedor  {milisegundos:.3f} ms")
+
+            inicio = time.perf_counter()
+            altos = historial.consultar(riesgo='ALTO', limite=1000)
+            print(f"consulta por riesgo     {(time.perf_counter() - inicio) * 1000:.3f} ms ({len(altos)} filas)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark: reevaluación incremental de una cartera en la que cambia una fracción de proveedores
+
+Uso:
+    python -m benchmarks.bench_incremental [--n 1000000] [--cambios 0.05] [--formato-salida npz]
+    python -m benchmarks.bench_incremental --n 100000 --backend compilado
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from engine.binario import INICIO_REGISTROS, DTYPE_PROVEEDOR, abrir_binario, convertir_binario
+from engine.flujo import evaluar_archivo
+from engine.incremental import reevaluar_archivo
+from engine.registro import registro_reglas
+from benchmarks.sintetico import GeneradorProveedores
+
+
+def modificar(binario: str, fraccion: float, semilla: int) -> int:
+    """Cambia la liquidez de una fracción de los proveedores del archivo binario"""
+    filas = len(abrir_binario(binario))
+    registros = np.memmap(binario, dtype=DTYPE_PROVEEDOR, mode='r+', offset=INICIO_REGISTROS, shape=(filas,))
+    elegidas = np.random.default_rng(semilla).choice(filas, int(filas * fraccion), replace=False)
+    registros['liquidez_corriente'][elegidas] = np.round(registros['liquidez_corriente'][elegidas] + 0.37, 2)
+    registros.flush()
+    del registros
+    return len(elegidas)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--n', type=int, default=1_000_000, help="Proveedores de la cartera")
+    parser.add_argument('--cambios', type=float, default=0.05, help="Fracción de proveedores que cambia")
+    parser.add_argument('--tamano-bloque', type=int, default=250_000, help="Filas por bloque")
+    parser.add_argument('--formato-salida', default='npz', help="Formato de los resultados (npz, jsonl, csv...)")
+    parser.add_argument('--backend', default='vectorizado', help="vectorizado o compilado")
+    args = parser.parse_args()
+
+    version = registro_reglas().fijar()
+    with tempfile.TemporaryDirectory() as directorio:
+        csv = os.path.join(directorio, 'cartera.csv')
+        binario = os.path.join(directorio, 'cartera.prov')
+        estado = os.path.join(directorio, 'estado')
+        salida = os.path.join(directorio, f'resultados.{args.formato_salida}')
+        GeneradorProveedores(semilla=25).escribir(csv, args.n)
+        convertir_binario(csv, binario)
+        opciones = dict(formato_salida=args.formato_salida, tamano_bloque=args.tamano_bloque,
+                        backend=args.backend, version=version)
+
+        def limpiar():
+            if os.path.isdir(salida):
+                shutil.rmtree(salida)
+
+        inicio = time.perf_counter()
+        evaluar_archivo(binario, salida, **opciones)
+        completa = time.perf_counter() - inicio
+        print(f"{'evaluación completa':<28} {completa:>7.2f} s")
+
+        limpiar()
+        r = reevaluar_archivo(binario, salida, estado, **opciones)
+        print(f"{'incremental sin estado':<28} {r['segundos']:>7.2f} s  ({r['evaluadas']:,} evaluados)")
+
+        for semilla, (nombre, solo_cambios) in enumerate((('cartera completa', False), ('solo cambios', True))):
+            cambiados = modificar(binario, args.cambios, semilla)
+            limpiar()
+            r = reevaluar_archivo(binario, salida, estado, solo_cambios=solo_cambios, **opciones)
+            assert r['evaluadas'] == cambiados
+            print(f"{f'incremental, {nombre}':<28} {r['segundos']:>7.2f} s  "
+                  f"({r['evaluadas']:,} evaluados, {r['reutilizadas']:,} reutilizados, "
+                  f"{completa / r['segundos']:.1f}x)")
+        tamano = sum(os.path.getsize(os.path.join(estado, nombre)) for nombre in os.listdir(estado))
+        print(f"estado {tamano / 2**20:,.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
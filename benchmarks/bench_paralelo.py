@@ -0,0 +1,40 @@
+"""
+Benchmark: escalamiento de evaluar_lote_paralelo con 1/2/4/N procesos
+
+Uso:
+    python -m benchmarks.bench_paralelo [--n 5000] [--bloque 256]
+"""
+
+import argparse
+import os
+import time
+
+from engine.lote import evaluar_lote_paralelo
+from benchmarks.bench_pool import PROVEEDOR
+
+
+def medir(n, procesos, tamano_bloque):
+    """Devuelve proveedores por segundo evaluando n copias del proveedor de prueba"""
+    proveedores = (PROVEEDOR for _ in range(n))
+    inicio = time.perf_counter()
+    total = sum(1 for _ in evaluar_lote_paralelo(proveedores, procesos, tamano_bloque))
+    return total / (time.perf_counter() - inicio)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--n', type=int, default=5000, help="Proveedores por medición")
+    parser.add_argument('--bloque', type=int, default=256, help="Tamaño de bloque por tarea")
+    args = parser.parse_args()
+
+    nucleos = os.cpu_count() or 1
+    base = None
+    for procesos in sorted({1, 2, 4, nucleos}):
+        velocidad = medir(args.n, procesos, args.bloque)
+        base = base or velocidad
+        print(f"procesos={procesos:<3} {velocidad:9.0f} proveedores/s  "
+              f"aceleración={velocidad / base:5.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark: latencia de evaluar_proveedor con y sin pool de motores
+
+Uso:
+    python -m benchmarks.bench_pool [--n 500]
+"""
+
+import argparse
+import statistics
+import time
+
+from engine.inference_engine import (
+    MotorEvaluacionRiesgo, DatosProveedor, POOL_MOTORES, evaluar_proveedor
+)
+
+
+PROVEEDOR = {
+    'liquidez_corriente': 1.3,
+    'endeudamiento': 0.55,
+    'rentabilidad': 0.08,
+    'historial_pagos': 75,
+    'certificacion_calidad': False,
+    'tiempo_mercado': 3,
+    'capacidad_produccion': 60,
+    'tasa_defectos': 4,
+    'cumplimiento_entregas': 88,
+    'cumplimiento_legal': True,
+    'industria': 'manufactura',
+    'certificacion_ambiental': False,
+    'seguros_vigentes': True,
+    'calificacion_mercado': 3.8,
+    'quejas_clientes': 8,
+    'referencias_positivas': 3
+}
+
+
+def evaluar_sin_pool(datos):
+    """Comportamiento anterior: un motor nuevo por evaluación"""
+    motor = MotorEvaluacionRiesgo()
+    motor.reset()
+    motor.declare(DatosProveedor(**datos))
+    motor.run()
+    return motor.obtener_resultado()
+
+
+def medir(funcion, n):
+    """Devuelve las latencias en milisegundos de n llamadas"""
+    latencias = []
+    for _ in range(n):
+        inicio = time.perf_counter()
+        funcion(PROVEEDOR)
+        latencias.append((time.perf_counter() - inicio) * 1000)
+    return latencias
+
+
+def reportar(nombre, latencias):
+    ordenadas = sorted(latencias)
+    p95 = ordenadas[int(len(ordenadas) * 0.95) - 1]
+    print(f"{nombre:<12} media={statistics.mean(latencias):7.3f} ms  "
+          f"p50={statistics.median(latencias):7.3f} ms  p95={p95:7.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--n', type=int, default=500, help="Evaluaciones por modo")
+    args = parser.parse_args()
+
+    assert evaluar_sin_pool(PROVEEDOR)['puntuacion'] == evaluar_proveedor(PROVEEDOR)['puntuacion']
+
+    POOL_MOTORES.reiniciar_estadisticas()
+    reportar("sin pool", medir(evaluar_sin_pool, args.n))
+    reportar("con pool", medir(evaluar_proveedor, args.n))
+    print(f"estadísticas del pool: {POOL_MOTORES.estadisticas()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,382 @@
+"""
+Generador de proveedores sintéticos para benchmarks y pruebas de carga
+Genera carteras de millones de proveedores por bloques vectorizados, con
+distribuciones y correlaciones configurables, y las escribe en CSV, JSONL o
+.npy sin mantenerlas enteras en memoria
+
+Uso:
+    python -m benchmarks.sintetico --n 1000000 --salida cartera.csv [--semilla 0]
+"""
+
+import argparse
+import json
+import random
+import time
+from statistics import NormalDist
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from knowledge import CERTIFICACIONES_RECONOCIDAS, INDUSTRIAS
+
+
+# Distribución de cada campo que leen MotorEvaluacionRiesgo y las reglas de
+# knowledge/. Los ratios siguen las unidades del motor (endeudamiento y
+# rentabilidad como fracción, porcentajes de 0 a 100). Tipos:
+# - normal: media, desviacion            - lognormal: mediana, sigma
+# - bernoulli: p                          - poisson: media
+# - categorica: valores, pesos opcionales - conjunto: valores, p (cada elemento)
+# - derivado: calculado a partir de otros campos en _derivar()
+# Las normales y lognormales admiten 'minimo', 'maximo' y 'decimales'.
+DISTRIBUCIONES_CAMPOS = {
+    # Financieros
+    'liquidez_corriente': {'tipo': 'lognormal', 'mediana': 1.4, 'sigma': 0.45, 'minimo': 0.05, 'decimales': 2},
+    'endeudamiento': {'tipo': 'normal', 'media': 0.5, 'desviacion': 0.18, 'minimo': 0.0, 'maximo': 1.0, 'decimales': 3},
+    'rentabilidad': {'tipo': 'normal', 'media': 0.06, 'desviacion': 0.08, 'minimo': -0.5, 'maximo': 0.5, 'decimales': 3},
+    'historial_pagos': {'tipo': 'normal', 'media': 82, 'desviacion': 14, 'minimo': 0, 'maximo': 100, 'decimales': 0},
+    # Operacionales
+    'certificacion_calidad': {'tipo': 'bernoulli', 'p': 0.6},
+    'certificaciones_calidad': {'tipo': 'conjunto', 'valores': CERTIFICACIONES_RECONOCIDAS, 'p': 0.12},
+    'tiempo_mercado': {'tipo': 'lognormal', 'mediana': 7.0, 'sigma': 0.8, 'minimo': 0.1, 'maximo': 80, 'decimales': 1},
+    'anos_operacion': {'tipo': 'derivado'},
+    'capacidad_produccion': {'tipo': 'normal', 'media': 70, 'desviacion': 15, 'minimo': 0, 'maximo': 100, 'decimales': 0},
+    'demanda_estimada': {'tipo': 'derivado'},
+    'tasa_defectos': {'tipo': 'lognormal', 'mediana': 2.5, 'sigma': 0.7, 'minimo': 0, 'maximo': 100, 'decimales': 1},
+    'cumplimiento_entregas': {'tipo': 'normal', 'media': 88, 'desviacion': 9, 'minimo': 0, 'maximo': 100, 'decimales': 0},
+    'industria': {'tipo': 'categorica', 'valores': INDUSTRIAS},
+    # Legales
+    'cumplimiento_legal': {'tipo': 'bernoulli', 'p': 0.9},
+    'certificacion_ambiental': {'tipo': 'bernoulli', 'p': 0.4},
+    'seguros_vigentes': {'tipo': 'bernoulli', 'p': 0.85},
+    'licencias_vigentes': {'tipo': 'bernoulli', 'p': 0.92},
+    'certificado_tributario': {'tipo': 'bernoulli', 'p': 0.88},
+    'cumplimiento_laboral': {'tipo': 'bernoulli', 'p': 0.9},
+    'demandas_legales': {'tipo': 'poisson', 'media': 0.4},
+    # Reputacionales y ESG
+    'calificacion_mercado': {'tipo': 'normal', 'media': 3.7, 'desviacion': 0.6, 'minimo': 1.0, 'maximo': 5.0, 'decimales': 1},
+    'quejas_clientes': {'tipo': 'poisson', 'media': 4.0},
+    'referencias_positivas': {'tipo': 'poisson', 'media': 4.0},
+    'incidentes_seguridad': {'tipo': 'poisson', 'media': 0.3},
+    'practicas_eticas': {'tipo': 'bernoulli', 'p': 0.85},
+    'responsabilidad_ambiental': {'tipo': 'bernoulli', 'p': 0.6}
+}
+
+# Correlaciones entre las variables latentes normales de los campos normal,
+# lognormal y bernoulli (cópula gaussiana)
+CORRELACIONES_DEFECTO = {
+    ('liquidez_corriente', 'endeudamiento'): -0.6,
+    ('liquidez_corriente', 'historial_pagos'): 0.5,
+    ('endeudamiento', 'historial_pagos'): -0.4,
+    ('rentabilidad', 'liquidez_corriente'): 0.3,
+    ('tasa_defectos', 'cumplimiento_entregas'): -0.4,
+    ('certificacion_calidad', 'tasa_defectos'): -0.3,
+    ('calificacion_mercado', 'cumplimiento_entregas'): 0.4,
+    ('cumplimiento_legal', 'licencias_vigentes'): 0.5,
+    ('cumplimiento_legal', 'practicas_eticas'): 0.4,
+    ('certificacion_ambiental', 'responsabilidad_ambiental'): 0.6
+}
+
+_LATENTES = ('normal', 'lognormal', 'bernoulli')
+
+
+def _dtype_campo(campo: str, distribucion: Dict[str, Any]):
+    """Tipo NumPy de un campo en el formato .npy"""
+    tipo = distribucion['tipo']
+    if tipo == 'bernoulli':
+        return '?'
+    if tipo == 'poisson' or campo == 'anos_operacion':
+        return '<i4'
+    if tipo == 'categorica':
+        return 'u1'
+    if tipo == 'conjunto':
+        return '<u4'
+    return '<f8'
+
+
+class GeneradorProveedores:
+    """
+    Generador vectorizado y reproducible de carteras de proveedores.
+
+    Cada bloque se genera con NumPy de una vez: las variables latentes de los
+    campos correlacionados salen de una normal multivariante (factor de
+    Cholesky de la matriz de correlaciones) y se transforman a la marginal de
+    cada campo. La misma semilla y tamaño de bloque producen siempre la
+    misma cartera.
+    """
+
+    def __init__(self, distribuciones: Optional[Dict[str, Dict[str, Any]]] = None,
+                 correlaciones: Optional[Dict[Tuple[str, str], float]] = None,
+                 semilla: Optional[int] = 0):
+        """
+        Args:
+            distribuciones: Distribución por campo; se combina con DISTRIBUCIONES_CAMPOS
+                (un valor None elimina el campo)
+            correlaciones: Correlación por par de campos (por defecto, CORRELACIONES_DEFECTO)
+            semilla: Semilla del generador (None para no reproducible)
+
+        Raises:
+            ValueError: Si la matriz de correlaciones no es definida positiva o
+                cita campos sin variable latente
+        """
+        combinadas = dict(DISTRIBUCIONES_CAMPOS)
+        for campo, distribucion in (distribuciones or {}).items():
+            if distribucion is None:
+                combinadas.pop(campo, None)
+            else:
+                combinadas[campo] = distribucion
+        self.distribuciones = combinadas
+        self.semilla = semilla
+        self._rng = np.random.default_rng(semilla)
+
+        self.latentes = [c for c, d in combinadas.items() if d['tipo'] in _LATENTES]
+        indices = {campo: i for i, campo in enumerate(self.latentes)}
+        matriz = np.eye(len(self.latentes))
+        correlaciones = CORRELACIONES_DEFECTO if correlaciones is None else correlaciones
+        for (a, b), rho in correlaciones.items():
+            if a not in indices or b not in indices:
+                if a in combinadas and b in combinadas:
+                    raise ValueError(f"La correlación {a}-{b} requiere campos normal, lognormal o bernoulli")
+                continue
+            matriz[indices[a], indices[b]] = matriz[indices[b], indices[a]] = rho
+        try:
+            self._cholesky = np.linalg.cholesky(matriz)
+        except np.linalg.LinAlgError:
+            raise ValueError("La matriz de correlaciones no es definida positiva")
+
+        self._umbrales = {
+            campo: NormalDist().inv_cdf(min(max(d['p'], 1e-12), 1 - 1e-12))
+            for campo, d in combinadas.items() if d['tipo'] == 'bernoulli'
+        }
+
+    @property
+    def campos(self) -> List[str]:
+        """Campos generados, en orden"""
+        return list(self.distribuciones)
+
+    def dtype(self) -> np.dtype:
+        """
+        Tipo estructurado del formato .npy
+
+        industria se guarda como código (índice en su lista de valores) y
+        certificaciones_calidad como máscara de bits sobre la suya.
+        """
+        return np.dtype([(c, _dtype_campo(c, d)) for c, d in self.distribuciones.items()])
+
+    # ========== GENERACIÓN ==========
+
+    @staticmethod
+    def _acotar(valores: np.ndarray, distribucion: Dict[str, Any]) -> np.ndarray:
+        if 'minimo' in distribucion or 'maximo' in distribucion:
+            valores = np.clip(valores, distribucion.get('minimo', -np.inf), distribucion.get('maximo', np.inf))
+        if 'decimales' in distribucion:
+            valores = np.round(valores, distribucion['decimales'])
+        return valores
+
+    def _derivar(self, bloque: Dict[str, np.ndarray], n: int):
+        """Campos que dependen de otros para ser coherentes entre sí"""
+        if 'anos_operacion' in self.distribuciones and 'tiempo_mercado' in bloque:
+            bloque['anos_operacion'] = np.floor(bloque['tiempo_mercado']).astype(np.int32)
+        if 'demanda_estimada' in self.distribuciones and 'capacidad_produccion' in bloque:
+            # Holgura capacidad/demanda alrededor de 1.2: cubre las tres reglas de capacidad
+            holgura = np.exp(self._rng.normal(np.log(1.2), 0.3, n))
+            bloque['demanda_estimada'] = np.round(bloque['capacidad_produccion'] / holgura, 1)
+
+    def bloque(self, n: int) -> Dict[str, np.ndarray]:
+        """
+        Genera n proveedores en forma de columnas
+
+        Returns:
+            Dict campo -> np.ndarray. industria contiene códigos y
+            certificaciones_calidad máscaras de bits (ver a_registros)
+        """
+        columnas: Dict[str, np.ndarray] = {}
+        latentes = self._rng.standard_normal((n, len(self.latentes))) @ self._cholesky.T
+
+        for j, campo in enumerate(self.latentes):
+            distribucion = self.distribuciones[campo]
+            z = latentes[:, j]
+            tipo = distribucion['tipo']
+            if tipo == 'normal':
+                columnas[campo] = self._acotar(distribucion['media'] + distribucion['desviacion'] * z, distribucion)
+            elif tipo == 'lognormal':
+                valores = distribucion['mediana'] * np.exp(distribucion['sigma'] * z)
+                columnas[campo] = self._acotar(valores, distribucion)
+            else:
+                columnas[campo] = z < self._umbrales[campo]
+
+        for campo, distribucion in self.distribuciones.items():
+            tipo = distribucion['tipo']
+            if tipo == 'poisson':
+                columnas[campo] = self._rng.poisson(distribucion['media'], n).astype(np.int32)
+            elif tipo == 'categorica':
+                pesos = distribucion.get('pesos')
+                if pesos is not None:
+                    pesos = np.asarray(pesos, dtype=float) / np.sum(pesos)
+                columnas[campo] = self._rng.choice(len(distribucion['valores']), n, p=pesos).astype(np.uint8)
+            elif tipo == 'conjunto':
+                presentes = self._rng.random((n, len(distribucion['valores']))) < distribucion['p']
+                pesos_bits = (1 << np.arange(len(distribucion['valores']), dtype=np.uint32))
+                columnas[campo] = (presentes * pesos_bits).sum(axis=1).astype(np.uint32)
+
+        self._derivar(columnas, n)
+        return {campo: columnas[campo] for campo in self.distribuciones if campo in columnas}
+
+    def bloques(self, n: int, tamano_bloque: int = 100_000) -> Iterator[Dict[str, np.ndarray]]:
+        """Genera n proveedores en bloques de columnas de como mucho tamano_bloque"""
+        if tamano_bloque < 1:
+            raise ValueError("El tamaño de bloque debe ser al menos 1")
+        restantes = n
+        while restantes > 0:
+            cantidad = min(tamano_bloque, restantes)
+            yield self.bloque(cantidad)
+            restantes -= cantidad
+
+    # ========== CONVERSIÓN ==========
+
+    def _decodificar(self, bloque: Dict[str, np.ndarray]) -> Dict[str, list]:
+        """Columnas con los valores que espera el motor (textos, listas, bool y números de Python)"""
+        columnas = {}
+        for campo, valores in bloque.items():
+            distribucion = self.distribuciones[campo]
+            if distribucion['tipo'] == 'categorica':
+                columnas[campo] = np.asarray(distribucion['valores'], dtype=object)[valores].tolist()
+            elif distribucion['tipo'] == 'conjunto':
+                opciones = distribucion['valores']
+                mascaras, inversa = np.unique(valores, return_inverse=True)
+                listas = [[opciones[i] for i in range(len(opciones)) if m >> i & 1] for m in mascaras.tolist()]
+                columnas[campo] = [list(listas[i]) for i in inversa.reshape(-1).tolist()]
+            else:
+                columnas[campo] = valores.tolist()
+        return columnas
+
+    def a_registros(self, bloque: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+        """Convierte un bloque de columnas en diccionarios listos para evaluar_proveedor"""
+        columnas = self._decodificar(bloque)
+        campos = list(columnas)
+        return [dict(zip(campos, fila)) for fila in zip(*columnas.values())]
+
+    def proveedores(self, n: int, tamano_bloque: int = 100_000) -> Iterator[Dict[str, Any]]:
+        """Genera n proveedores como diccionarios, bloque a bloque"""
+        for bloque in self.bloques(n, tamano_bloque):
+            yield from self.a_registros(bloque)
+
+    def a_estructurado(self, bloque: Dict[str, np.ndarray]) -> np.ndarray:
+        """Convierte un bloque de columnas en un arreglo estructurado con dtype()"""
+        registros = np.empty(len(next(iter(bloque.values()))), dtype=self.dtype())
+        for campo, valores in bloque.items():
+            registros[campo] = valores
+        return registros
+
+    # ========== ESCRITURA ==========
+
+    def escribir(self, ruta: str, n: int, formato: Optional[str] = None,
+                 tamano_bloque: int = 100_000) -> int:
+        """
+        Escribe n proveedores en un fichero, bloque a bloque
+
+        Args:
+            ruta: Fichero de salida
+            n: Número de proveedores
+            formato: 'csv', 'jsonl' o 'npy' (por defecto, la extensión de la ruta)
+            tamano_bloque: Proveedores generados y escritos a la vez
+
+        Returns:
+            int: Número de proveedores escritos
+        """
+        formato = (formato or ruta.rsplit('.', 1)[-1]).lower()
+        if formato == 'npy':
+            salida = np.lib.format.open_memmap(ruta, mode='w+', dtype=self.dtype(), shape=(n,))
+            inicio = 0
+            for bloque in self.bloques(n, tamano_bloque):
+                registros = self.a_estructurado(bloque)
+                salida[inicio:inicio + len(registros)] = registros
+                inicio += len(registros)
+            salida.flush()
+            del salida
+            return n
+
+        if formato not in ('csv', 'jsonl'):
+            raise ValueError(f"Formato no soportado: {formato} (use csv, jsonl o npy)")
+
+        import pandas as pd
+
+        escritos = 0
+        with open(ruta, 'w', encoding='utf-8', newline='') as fichero:
+            for bloque in self.bloques(n, tamano_bloque):
+                columnas = self._decodificar(bloque)
+                if formato == 'csv':
+                    if 'certificaciones_calidad' in columnas:
+                        columnas['certificaciones_calidad'] = ['|'.join(c) for c in columnas['certificaciones_calidad']]
+                    pd.DataFrame(columnas).to_csv(fichero, header=escritos == 0, index=False)
+                else:
+                    campos = list(columnas)
+                    fichero.writelines(
+                        json.dumps(dict(zip(campos, fila)), ensure_ascii=False) + '\n'
+                        for fila in zip(*columnas.values())
+                    )
+                escritos += len(next(iter(columnas.values())))
+        return escritos
+
+
+# ========== PROVEEDORES DE LOS TESTS ==========
+
+def generar_proveedor(rng: random.Random) -> Dict[str, Any]:
+    """Proveedor aleatorio que recorre umbrales, booleanos e industrias"""
+    return {
+        'liquidez_corriente': rng.choice([0.5, 0.99, 1.0, 1.2, 1.5, 2.5]),
+        'endeudamiento': rng.choice([0.3, 0.7, 0.71, 0.9]),
+        'rentabilidad': rng.choice([-0.1, 0.0, 0.12]),
+        'historial_pagos': rng.choice([40, 59, 60, 90]),
+        'certificacion_calidad': rng.choice([True, False]),
+        'tiempo_mercado': rng.choice([0.5, 2, 8]),
+        'capacidad_produccion': rng.choice([30, 50, 80]),
+        'tasa_defectos': rng.choice([2, 5, 5.5, 12]),
+        'cumplimiento_entregas': rng.choice([50, 70, 95]),
+        'cumplimiento_legal': rng.choice([True, False]),
+        'industria': rng.choice(['manufactura', 'servicios', 'tecnologia', 'Manufactura']),
+        'certificacion_ambiental': rng.choice([True, False]),
+        'seguros_vigentes': rng.choice([True, False]),
+        'calificacion_mercado': rng.choice([2.0, 3.0, 4.5]),
+        'quejas_clientes': rng.choice([0, 10, 11, 30]),
+        'referencias_positivas': rng.choice([0, 2, 6])
+    }
+
+
+def proveedores_sinteticos(n: int, semilla: Optional[int] = 0) -> Iterator[Dict[str, Any]]:
+    """
+    Genera n proveedores con los campos y valores frontera de los tests de paridad
+
+    Args:
+        n: Número de proveedores
+        semilla: Semilla del generador (None para no reproducible)
+
+    Yields:
+        Dict con los datos de un proveedor
+    """
+    rng = random.Random(semilla)
+    for _ in range(n):
+        yield generar_proveedor(rng)
+
+
+def lista_proveedores(n: int, semilla: Optional[int] = 0) -> List[Dict[str, Any]]:
+    """Igual que proveedores_sinteticos pero materializado en una lista"""
+    return list(proveedores_sinteticos(n, semilla))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--n', type=int, default=1_000_000, help="Número de proveedores")
+    parser.add_argument('--salida', required=True, help="Fichero .csv, .jsonl o .npy")
+    parser.add_argument('--formato', choices=['csv', 'jsonl', 'npy'], help="Formato (por defecto, la extensión)")
+    parser.add_argument('--semilla', type=int, default=0, help="Semilla del generador")
+    parser.add_argument('--bloque', type=int, default=100_000, help="Proveedores por bloque")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    escritos = GeneradorProveedores(semilla=args.semilla).escribir(args.salida, args.n, args.formato, args.bloque)
+    segundos = time.perf_counter() - inicio
+    print(f"{escritos} proveedores escritos en {args.salida} ({segundos:.1f} s, {escritos / segundos:,.0f} proveedores/s)")
+
+
+if __name__ == '__main__':
+    main()
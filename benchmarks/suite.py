@@ -0,0 +1,269 @@
+"""
+Suite de benchmarks: latencia, rendimiento por lotes, memoria y arranque
+
+Mide sobre proveedores sintéticos la latencia p50/p95/p99 de una evaluación,
+los proveedores por segundo de cada backend, el pico de memoria (RSS y
+tracemalloc) por cada 10k proveedores y el tiempo de un `import engine` en
+frío, y guarda todo en JSON para comparar ejecuciones. El backend 'motor'
+usa el motor de inferencia elegido con MOTOR_INFERENCIA (nativo o experta).
+
+Uso:
+    python -m benchmarks.suite [--n 10000] [--n-latencia 2000] [--salida bench.json]
+    python -m benchmarks.suite --comparar anterior.json [--salida actual.json]
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+from benchmarks.sintetico import lista_proveedores
+from engine.reglas import MOTOR_INFERENCIA
+
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BACKENDS = ('motor', 'compilado', 'tabla', 'vectorizado')
+
+
+# ========== BACKENDS ==========
+
+def _funcion_unitaria(backend: str) -> Callable[[Dict[str, Any]], Any]:
+    """Función que evalúa un proveedor con el backend indicado"""
+    if backend == 'motor':
+        from engine import evaluar_proveedor
+        return evaluar_proveedor
+    if backend == 'compilado':
+        from engine import evaluar_proveedor_compilado
+        return evaluar_proveedor_compilado
+    if backend == 'tabla':
+        from engine import tabla_decision
+        return tabla_decision().consultar
+    raise ValueError(f"El backend {backend} no evalúa proveedores sueltos")
+
+
+def _evaluar_lote(backend: str, proveedores: List[Dict[str, Any]]) -> Any:
+    """Evalúa un lote completo con el backend indicado y conserva todos los resultados"""
+    if backend == 'motor':
+        from engine import evaluar_lote
+        return list(evaluar_lote(proveedores))
+    if backend == 'vectorizado':
+        import pandas as pd
+        from engine import evaluar_dataframe
+        return evaluar_dataframe(pd.DataFrame(proveedores))
+    funcion = _funcion_unitaria(backend)
+    return [funcion(datos) for datos in proveedores]
+
+
+# ========== MEDICIONES ==========
+
+def percentiles(latencias_ms: List[float]) -> Dict[str, float]:
+    """Media y percentiles 50/95/99 de una lista de latencias"""
+    ordenadas = sorted(latencias_ms)
+
+    def percentil(p):
+        return ordenadas[min(len(ordenadas) - 1, max(0, int(round(p / 100 * len(ordenadas))) - 1))]
+
+    return {
+        'media_ms': statistics.mean(ordenadas),
+        'p50_ms': percentil(50),
+        'p95_ms': percentil(95),
+        'p99_ms': percentil(99)
+    }
+
+
+def medir_latencia(backend: str, proveedores: List[Dict[str, Any]]) -> Dict[str, float]:
+    """Latencia de una evaluación, tras un calentamiento"""
+    funcion = _funcion_unitaria(backend)
+    for datos in proveedores[:50]:
+        funcion(datos)
+
+    latencias = []
+    for datos in proveedores:
+        inicio = time.perf_counter()
+        funcion(datos)
+        latencias.append((time.perf_counter() - inicio) * 1000)
+    return percentiles(latencias)
+
+
+def medir_rendimiento(backend: str, proveedores: List[Dict[str, Any]]) -> Dict[str, float]:
+    """Proveedores por segundo evaluando el lote completo"""
+    _evaluar_lote(backend, proveedores[:50])
+    inicio = time.perf_counter()
+    resultados = _evaluar_lote(backend, proveedores)
+    segundos = time.perf_counter() - inicio
+    total = len(resultados['riesgo_final']) if isinstance(resultados, dict) else len(resultados)
+    return {'proveedores': total, 'segundos': segundos, 'proveedores_por_s': total / segundos}
+
+
+def _memoria_en_proceso(backend: str, n: int, semilla: int) -> Dict[str, float]:
+    """Se ejecuta en un proceso nuevo para que el pico de RSS sea solo el del lote"""
+    import resource
+
+    proveedores = lista_proveedores(n, semilla)
+    _evaluar_lote(backend, proveedores[:10])
+    rss_base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    tracemalloc.start()
+    resultados = _evaluar_lote(backend, proveedores)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del resultados
+
+    # ru_maxrss está en KB en Linux y en bytes en macOS
+    escala = 1 if sys.platform == 'darwin' else 1024
+    rss_pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        'rss_pico_mb': rss_pico * escala / 2**20,
+        'rss_incremento_mb': (rss_pico - rss_base) * escala / 2**20,
+        'tracemalloc_pico_mb': pico / 2**20
+    }
+
+
+def medir_memoria(backend: str, n: int, semilla: int) -> Dict[str, float]:
+    """Pico de memoria de un lote de n proveedores con sus resultados, escalado a 10k proveedores"""
+    contexto = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=1, mp_context=contexto) as ejecutor:
+        memoria = ejecutor.submit(_memoria_en_proceso, backend, n, semilla).result()
+
+    factor = 10_000 / n
+    memoria['rss_incremento_mb_por_10k'] = memoria['rss_incremento_mb'] * factor
+    memoria['tracemalloc_pico_mb_por_10k'] = memoria['tracemalloc_pico_mb'] * factor
+    return memoria
+
+
+def medir_importacion(repeticiones: int = 5, modulo: str = 'engine') -> Dict[str, float]:
+    """Tiempo de importar el paquete en un intérprete nuevo (mediana de las repeticiones)"""
+    codigo = (
+        "import time; inicio = time.perf_counter(); "
+        f"import {modulo}; "
+        "print(time.perf_counter() - inicio)"
+    )
+    tiempos = []
+    for _ in range(repeticiones):
+        salida = subprocess.run([sys.executable, '-c', codigo], cwd=RAIZ, check=True,
+                                capture_output=True, text=True)
+        tiempos.append(float(salida.stdout.strip().splitlines()[-1]) * 1000)
+    return {'modulo': modulo, 'mediana_ms': statistics.median(tiempos), 'minimo_ms': min(tiempos)}
+
+
+# ========== SUITE ==========
+
+def ejecutar(n: int, n_latencia: int, backends: List[str], semilla: int = 0,
+             memoria: bool = True) -> Dict[str, Any]:
+    """
+    Ejecuta la suite completa
+
+    Returns:
+        Dict serializable a JSON con metadatos y resultados por backend
+    """
+    proveedores = lista_proveedores(n, semilla)
+    resultados: Dict[str, Any] = {
+        'metadatos': {
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'plataforma': platform.platform(),
+            'cpus': os.cpu_count(),
+            'motor_inferencia': MOTOR_INFERENCIA,
+            'n': n,
+            'n_latencia': n_latencia,
+            'semilla': semilla
+        },
+        'importacion': medir_importacion(),
+        'backends': {}
+    }
+
+    for backend in backends:
+        medidas: Dict[str, Any] = {}
+        if backend != 'vectorizado':
+            medidas['latencia'] = medir_latencia(backend, proveedores[:n_latencia])
+        medidas['rendimiento'] = medir_rendimiento(backend, proveedores)
+        if memoria:
+            medidas['memoria'] = medir_memoria(backend, n, semilla)
+        resultados['backends'][backend] = medidas
+    return resultados
+
+
+def _aplanar(resultados: Dict[str, Any], prefijo: str = '') -> Dict[str, float]:
+    """Métricas numéricas con su ruta como clave ('backends.motor.latencia.p50_ms')"""
+    planas = {}
+    for clave, valor in resultados.items():
+        ruta = f"{prefijo}{clave}"
+        if isinstance(valor, dict):
+            planas.update(_aplanar(valor, ruta + '.'))
+        elif isinstance(valor, (int, float)) and not isinstance(valor, bool):
+            planas[ruta] = valor
+    return planas
+
+
+def comparar(actual: Dict[str, Any], anterior: Dict[str, Any]) -> List[str]:
+    """Líneas con el cambio relativo de cada métrica común a las dos ejecuciones"""
+    planas_actual = _aplanar({k: v for k, v in actual.items() if k != 'metadatos'})
+    planas_anterior = _aplanar({k: v for k, v in anterior.items() if k != 'metadatos'})
+    lineas = []
+    for ruta, valor in planas_actual.items():
+        previo = planas_anterior.get(ruta)
+        if previo:
+            lineas.append(f"{ruta:<60} {previo:12.4f} -> {valor:12.4f}  ({(valor - previo) / previo:+.1%})")
+    return lineas
+
+
+def reportar(resultados: Dict[str, Any]):
+    """Imprime un resumen legible de los resultados"""
+    importacion = resultados['importacion']
+    print(f"import {importacion['modulo']}: {importacion['mediana_ms']:.1f} ms (mediana)")
+    for backend, medidas in resultados['backends'].items():
+        linea = f"{backend:<12}"
+        if 'latencia' in medidas:
+            latencia = medidas['latencia']
+            linea += (f" p50={latencia['p50_ms']:.3f} ms p95={latencia['p95_ms']:.3f} ms "
+                      f"p99={latencia['p99_ms']:.3f} ms")
+        linea += f"  {medidas['rendimiento']['proveedores_por_s']:10.0f} proveedores/s"
+        if 'memoria' in medidas:
+            memoria = medidas['memoria']
+            linea += (f"  tracemalloc={memoria['tracemalloc_pico_mb_por_10k']:.1f} MB/10k "
+                      f"RSS+={memoria['rss_incremento_mb_por_10k']:.1f} MB/10k")
+        print(linea)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--n', type=int, default=10_000, help="Proveedores del lote de rendimiento y memoria")
+    parser.add_argument('--n-latencia', type=int, default=2000, help="Evaluaciones para los percentiles de latencia")
+    parser.add_argument('--backends', default=','.join(BACKENDS), help="Backends separados por comas")
+    parser.add_argument('--semilla', type=int, default=0, help="Semilla de los proveedores sintéticos")
+    parser.add_argument('--sin-memoria', action='store_true', help="Omite la medición de memoria")
+    parser.add_argument('--salida', help="Fichero JSON donde guardar los resultados")
+    parser.add_argument('--comparar', help="JSON de una ejecución anterior con el que comparar")
+    args = parser.parse_args()
+
+    backends = [b.strip() for b in args.backends.split(',') if b.strip()]
+    desconocidos = set(backends) - set(BACKENDS)
+    if desconocidos:
+        parser.error(f"backends desconocidos: {', '.join(sorted(desconocidos))}")
+
+    resultados = ejecutar(args.n, min(args.n_latencia, args.n), backends, args.semilla, not args.sin_memoria)
+    reportar(resultados)
+
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as fichero:
+            json.dump(resultados, fichero, indent=2, ensure_ascii=False)
+        print(f"resultados guardados en {args.salida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as fichero:
+            anterior = json.load(fichero)
+        print("\n".join(comparar(resultados, anterior)))
+
+
+if __name__ == '__main__':
+    main()
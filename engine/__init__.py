@@ -1,13 +1,113 @@
 """
 Paquete del motor de inferencia
+
+Al cargar el paquete solo se importan el motor de inferencia y su pool; el resto
+de módulos (evaluador compilado, backends con NumPy y pandas, explicaciones,
+simulación...) se importan la primera vez que se usa uno de sus nombres, de
+modo que un proceso que solo puntúa proveedores arranca sin pandas.
 """
 
-from .inference_engine import MotorEvaluacionRiesgo, DatosProveedor, Conclusion, evaluar_proveedor
-from .explicador import ExplicadorDecisiones
+import importlib
+
+from .inference_engine import MotorEvaluacionRiesgo, DatosProveedor, Conclusion, evaluar_proveedor, POOL_MOTORES
+from .pool import PoolMotores
+
+# Nombre público -> submódulo que lo define, importado bajo demanda
+_PEREZOSOS = {
+    'evaluar_lote': 'lote',
+    'evaluar_lote_paralelo': 'lote',
+    'EvaluadorCompilado': 'compilado',
+    'evaluar_proveedor_compilado': 'compilado',
+    'evaluar_dataframe': 'vectorizado',
+    'CacheResultados': 'cache',
+    'evaluar_proveedor_cacheado': 'cache',
+    'TablaDecision': 'tabla_decision',
+    'tabla_decision': 'tabla_decision',
+    'campos_sin_efecto': 'tabla_decision',
+    'SesionEvaluacion': 'sesion',
+    'analizar_sensibilidad': 'sensibilidad',
+    'simular_proveedor': 'montecarlo',
+    'PerfiladorMotor': 'perfilado',
+    'NivelRiesgo': 'compacto',
+    'ResultadoCompacto': 'compacto',
+    'CodificadorResultados': 'compacto',
+    'CODIFICADOR_RESULTADOS': 'compacto',
+    'ExplicadorDecisiones': 'explicador',
+    'EvaluadorConocimiento': 'conocimiento',
+    'evaluar_conocimiento': 'conocimiento',
+    'cargar_reglas': 'declarativo',
+    'cargar_reglas_motor': 'declarativo',
+    'RegistroReglas': 'registro',
+    'CacheVersionada': 'registro',
+    'registro_reglas': 'registro',
+    'vigilante_reglas': 'registro',
+    'cache_reglas': 'registro',
+    'evaluar_proveedor_versionado': 'registro',
+    'evaluar_archivo': 'flujo',
+    'EscritorColumnar': 'columnar',
+    'leer_columnar': 'columnar',
+    'convertir_binario': 'binario',
+    'abrir_binario': 'binario',
+    'HistorialEvaluaciones': 'historial',
+    'historial_evaluaciones': 'historial',
+    'reevaluar_archivo': 'incremental'
+}
+
+
+def __getattr__(nombre):
+    submodulo = _PEREZOSOS.get(nombre)
+    if submodulo is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+    valor = getattr(importlib.import_module(f".{submodulo}", __name__), nombre)
+    globals()[nombre] = valor
+    return valor
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_PEREZOSOS))
+
 
 __all__ = [
     'MotorEvaluacionRiesgo',
     'DatosProveedor',
     'Conclusion',
-    'ExplicadorDecisiones'
+    'ExplicadorDecisiones',
+    'PoolMotores',
+    'POOL_MOTORES',
+    'evaluar_lote',
+    'evaluar_lote_paralelo',
+    'EvaluadorCompilado',
+    'evaluar_proveedor_compilado',
+    'evaluar_dataframe',
+    'CacheResultados',
+    'evaluar_proveedor_cacheado',
+    'TablaDecision',
+    'tabla_decision',
+    'campos_sin_efecto',
+    'SesionEvaluacion',
+    'analizar_sensibilidad',
+    'simular_proveedor',
+    'PerfiladorMotor',
+    'NivelRiesgo',
+    'ResultadoCompacto',
+    'CodificadorResultados',
+    'CODIFICADOR_RESULTADOS',
+    'EvaluadorConocimiento',
+    'evaluar_conocimiento',
+    'cargar_reglas',
+    'cargar_reglas_motor',
+    'RegistroReglas',
+    'CacheVersionada',
+    'registro_reglas',
+    'vigilante_reglas',
+    'cache_reglas',
+    'evaluar_proveedor_versionado',
+    'evaluar_archivo',
+    'EscritorColumnar',
+    'leer_columnar',
+    'convertir_binario',
+    'abrir_binario',
+    'HistorialEvaluaciones',
+    'historial_evaluaciones',
+    'reevaluar_archivo'
 ]
\ No newline at end of file
@@ -0,0 +1,117 @@
+"""
+Línea de comandos del motor de evaluación de riesgo
+
+Uso:
+    python -m engine evaluar proveedores.csv resultados.jsonl [--tamano-bloque 50000]
+    python -m engine evaluar - - --formato-entrada jsonl --formato-salida csv < entrada > salida
+    python -m engine evaluar proveedores.csv resultados.parquet   (npz si no hay pyarrow)
+    python -m engine convertir proveedores.csv cartera.prov
+    python -m engine evaluar cartera.prov resultados.parquet --tamano-bloque 1000000
+    python -m engine evaluar proveedores.csv resultados.jsonl --historial historial.sqlite3
+    python -m engine evaluar cartera.prov resultados.npz --incremental estado/ [--solo-cambios]
+    python -m engine evaluar proveedores.csv resultados.jsonl --reglas knowledge/reglas_motor.json
+"""
+
+import argparse
+import sqlite3
+import sys
+
+from .flujo import BACKENDS_FLUJO, FORMATOS, FORMATOS_ENTRADA, FORMATOS_SALIDA, evaluar_archivo
+
+
+def _mostrar_progreso(filas: int, segundos: float):
+    tasa = filas / segundos if segundos > 0 else 0.0
+    print(f"\r{filas:>12,} filas  {tasa:>10,.0f} filas/s", end='', file=sys.stderr, flush=True)
+
+
+def main(argumentos=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m engine', description=__doc__.splitlines()[1])
+    comandos = parser.add_subparsers(dest='comando', required=True)
+
+    evaluar = comandos.add_parser('evaluar', aliases=['evaluate'],
+                                  help="Evalúa un archivo CSV/JSONL de proveedores en flujo")
+    evaluar.add_argument('entrada', help="Archivo .csv, .jsonl o .prov (binario) de proveedores "
+                                         "('-' = entrada estándar)")
+    evaluar.add_argument('salida', help="Archivo .jsonl, .csv o .parquet, o directorio .npz de resultados "
+                                        "('-' = salida estándar)")
+    evaluar.add_argument('--formato-entrada', choices=FORMATOS_ENTRADA, help="Por defecto, según la extensión")
+    evaluar.add_argument('--formato-salida', choices=FORMATOS_SALIDA,
+                         help="Por defecto, según la extensión; columnar = parquet si hay pyarrow, si no npz")
+    evaluar.add_argument('--tamano-bloque', type=int, default=50_000,
+                         help="Filas por bloque; la memoria usada es proporcional (defecto: 50000)")
+    evaluar.add_argument('--backend', choices=BACKENDS_FLUJO, default='vectorizado',
+                         help="vectorizado (el más rápido) o compilado (fila a fila)")
+    evaluar.add_argument('--historial', metavar='BASE',
+                         help="Base SQLite donde guardar también cada evaluación (se crea si no existe)")
+    evaluar.add_argument('--incremental', metavar='ESTADO',
+                         help="Evalúa solo los proveedores que cambiaron desde la ejecución que guardó "
+                              "ESTADO (directorio, se crea si no existe) y reutiliza el resto")
+    evaluar.add_argument('--solo-cambios', action='store_true',
+                         help="Con --incremental, escribe solo los proveedores evaluados en esta ejecución")
+    evaluar.add_argument('--reglas', metavar='ARCHIVO',
+                         help="Archivo de reglas en formato 'motor' (.json/.toml) que se publica en el "
+                              "registro antes de evaluar (por defecto, las reglas vigentes)")
+    evaluar.add_argument('--silencioso', action='store_true', help="No mostrar el progreso")
+
+    convertir = comandos.add_parser('convertir', aliases=['convert'],
+                                    help="Convierte un CSV/JSONL de proveedores al archivo binario .prov")
+    convertir.add_argument('entrada', help="Archivo .csv o .jsonl de proveedores")
+    convertir.add_argument('salida', help="Archivo binario de proveedores (.prov)")
+    convertir.add_argument('--formato-entrada', choices=FORMATOS, help="Por defecto, según la extensión")
+    args = parser.parse_args(argumentos)
+
+    if args.comando in ('convertir', 'convert'):
+        return _convertir(args)
+    if args.solo_cambios and not args.incremental:
+        parser.error("--solo-cambios necesita --incremental")
+
+    historial = None
+    try:
+        if args.historial:
+            from .historial import HistorialEvaluaciones
+            historial = HistorialEvaluaciones(args.historial)
+        version = None
+        if args.reglas:
+            from .registro import registro_reglas
+            version = registro_reglas().recargar(args.reglas)
+        opciones = dict(tamano_bloque=args.tamano_bloque, backend=args.backend, version=version,
+                        progreso=None if args.silencioso else _mostrar_progreso, historial=historial)
+        if args.incremental:
+            from .incremental import reevaluar_archivo
+            estadisticas = reevaluar_archivo(args.entrada, args.salida, args.incremental, args.formato_entrada,
+                                             args.formato_salida, solo_cambios=args.solo_cambios, **opciones)
+        else:
+            estadisticas = evaluar_archivo(args.entrada, args.salida, args.formato_entrada, args.formato_salida,
+                                           **opciones)
+    except (OSError, ValueError, TypeError, sqlite3.Error) as e:
+        print(f"\nError: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if historial is not None:
+            historial.cerrar()
+
+    if not args.silencioso:
+        print(f"\n{estadisticas['filas']:,} proveedores evaluados en {estadisticas['segundos']:.2f} s "
+              f"({estadisticas['filas_por_segundo']:,.0f} filas/s, reglas {estadisticas['version_reglas']})",
+              file=sys.stderr)
+        if args.incremental:
+            print(f"{estadisticas['evaluadas']:,} evaluados ({estadisticas['nuevas']:,} nuevos), "
+                  f"{estadisticas['reutilizadas']:,} sin cambios", file=sys.stderr)
+    return 0
+
+
+def _convertir(args) -> int:
+    from .binario import convertir_binario
+
+    try:
+        estadisticas = convertir_binario(args.entrada, args.salida, args.formato_entrada)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    print(f"{estadisticas['filas']:,} proveedores convertidos a {args.salida} "
+          f"({len(estadisticas['industrias'])} industrias)", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
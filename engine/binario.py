@@ -0,0 +1,379 @@
+"""
+Archivo binario de proveedores
+Formato de ancho fijo con un registro NumPy estructurado por proveedor que
+se abre con np.memmap: las reglas se evalúan sobre vistas de las columnas
+del archivo sin leerlo a memoria ni crear un dict por proveedor. Los
+identificadores (id, nombre...) van detrás de los registros como textos
+con desplazamientos
+"""
+
+import json
+import os
+import shutil
+import struct
+import tempfile
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .columnar import _textos
+from .flujo import COLUMNAS_ID, TIPOS_CAMPOS, completar_columnas, detectar_formato, evaluar_columnas, leer_bloques
+from .registro import VersionReglas
+from .vectorizado import ColumnaReglas, evaluar_mascaras, mascaras_columnas
+
+
+# Tipo de cada campo en el registro: números float64 (NaN = ausente),
+# booleanos int8 (-1 = ausente) e industria como código de categoría int16
+# (-1 = ausente). Los float64 van primero para que todos queden alineados.
+_TIPOS_BINARIOS = {'numero': '<f8', 'texto': '<i2', 'booleano': 'i1'}
+
+DTYPE_PROVEEDOR = np.dtype(
+    [(campo, _TIPOS_BINARIOS[tipo])
+     for orden in ('numero', 'texto', 'booleano')
+     for campo, tipo in TIPOS_CAMPOS.items() if tipo == orden],
+    align=True
+)
+
+MAGIA = b'PROVEEDORES-BIN\n'
+
+VERSION_FORMATO = 2
+
+# Prefijo de tamaño fijo: MAGIA, versión del formato y posición y longitud
+# del pie. El pie (JSON con el esquema, las filas, las industrias y dónde
+# están los identificadores) va al final del archivo porque las industrias
+# solo se conocen al terminar la conversión: su número no está limitado y
+# los registros empiezan siempre en INICIO_REGISTROS, alineados
+_PREFIJO = struct.Struct('<16sI4xQQ')
+INICIO_REGISTROS = 64
+
+AUSENTE = -1
+
+
+def _alinear(f, alineacion: int = 8):
+    """Rellena con ceros hasta la siguiente posición múltiplo de alineacion"""
+    f.write(b'\0' * (-f.tell() % alineacion))
+
+
+def _pie(filas: int, industrias: List[str], identificadores: Dict[str, Dict[str, int]]) -> bytes:
+    esquema = {
+        'version_formato': VERSION_FORMATO,
+        'campos': [[campo, DTYPE_PROVEEDOR.fields[campo][0].str] for campo in DTYPE_PROVEEDOR.names],
+        'tamano_registro': DTYPE_PROVEEDOR.itemsize,
+        'inicio_registros': INICIO_REGISTROS,
+        'filas': filas,
+        'industrias': industrias,
+        'identificadores': identificadores
+    }
+    return json.dumps(esquema, ensure_ascii=False).encode('utf-8')
+
+
+def leer_cabecera(ruta: str) -> Dict[str, Any]:
+    """
+    Esquema de un archivo binario de proveedores (guardado en su pie)
+
+    Raises:
+        ValueError: Si no es un archivo binario de proveedores o su esquema no coincide con DTYPE_PROVEEDOR
+    """
+    with open(ruta, 'rb') as f:
+        prefijo = f.read(_PREFIJO.size)
+        if len(prefijo) != _PREFIJO.size or not prefijo.startswith(MAGIA):
+            raise ValueError(f"{ruta} no es un archivo binario de proveedores")
+        _, version, posicion, longitud = _PREFIJO.unpack(prefijo)
+        if version != VERSION_FORMATO:
+            raise ValueError(f"Versión de formato no soportada: {version!r}")
+        f.seek(posicion)
+        pie = f.read(longitud)
+    if len(pie) != longitud:
+        raise ValueError(f"{ruta} está incompleto")
+    esquema = json.loads(pie.decode('utf-8'))
+    if np.dtype([tuple(campo) for campo in esquema['campos']], align=True) != DTYPE_PROVEEDOR:
+        raise ValueError("El esquema del archivo no coincide con DTYPE_PROVEEDOR")
+    return esquema
+
+
+# ========== CONVERSIÓN ==========
+
+class _Industrias:
+    """Códigos de industria estables en todo el archivo"""
+
+    def __init__(self):
+        self.valores: List[str] = []
+        self._codigos: Dict[str, int] = {}
+
+    def codificar(self, serie: pd.Series) -> np.ndarray:
+        codigos, unicos = pd.factorize(serie, use_na_sentinel=True)
+        traduccion = np.array([self._codigo(str(v)) for v in unicos] + [AUSENTE], dtype=np.int16)
+        return traduccion[codigos]
+
+    def _codigo(self, valor: str) -> int:
+        codigo = self._codigos.get(valor)
+        if codigo is None:
+            codigo = self._codigos[valor] = len(self.valores)
+            if codigo > np.iinfo(np.int16).max:
+                raise ValueError("Demasiadas industrias distintas para códigos int16")
+            self.valores.append(valor)
+        return codigo
+
+
+class _EscritorTextos:
+    """
+    Columna de identificadores durante la conversión, en archivos temporales
+
+    Se guarda como en Arrow: los textos UTF-8 seguidos, el desplazamiento
+    (int64) en que acaba cada uno y un int8 que indica si está presente.
+    """
+
+    def __init__(self, ausentes_previos: int = 0):
+        """
+        Args:
+            ausentes_previos: Filas ya convertidas, que no tenían la columna
+        """
+        self.desplazamientos = tempfile.TemporaryFile()
+        self.presentes = tempfile.TemporaryFile()
+        self.textos = tempfile.TemporaryFile()
+        self.bytes = 0
+        np.zeros(1, dtype='<i8').tofile(self.desplazamientos)
+        self.escribir(np.full(ausentes_previos, None, dtype=object))
+
+    def escribir(self, valores: np.ndarray):
+        """Añade los textos de un bloque (None = ausente)"""
+        codificados = [b'' if v is None else v.encode('utf-8') for v in valores]
+        longitudes = np.fromiter(map(len, codificados), dtype=np.int64, count=len(codificados))
+        (self.bytes + np.cumsum(longitudes)).astype('<i8').tofile(self.desplazamientos)
+        np.array([v is not None for v in valores], dtype=np.int8).tofile(self.presentes)
+        self.textos.write(b''.join(codificados))
+        self.bytes += int(longitudes.sum())
+
+    def volcar(self, f) -> Dict[str, int]:
+        """Copia la columna al archivo binario; devuelve dónde quedó cada parte"""
+        posiciones = {}
+        for parte in ('desplazamientos', 'presentes', 'textos'):
+            _alinear(f)
+            posiciones[parte] = f.tell()
+            temporal = getattr(self, parte)
+            temporal.seek(0)
+            shutil.copyfileobj(temporal, f)
+        posiciones['bytes'] = self.bytes
+        return posiciones
+
+    def cerrar(self):
+        for parte in (self.desplazamientos, self.presentes, self.textos):
+            parte.close()
+
+
+def codificar_bloque(bloque: pd.DataFrame, industrias: _Industrias) -> np.ndarray:
+    """Registros DTYPE_PROVEEDOR de un bloque ya convertido por coercionar_bloque()"""
+    registros = np.empty(len(bloque), dtype=DTYPE_PROVEEDOR)
+    for campo, tipo in TIPOS_CAMPOS.items():
+        if campo not in bloque.columns:
+            registros[campo] = np.nan if tipo == 'numero' else AUSENTE
+        elif tipo == 'numero':
+            registros[campo] = bloque[campo].to_numpy(dtype=np.float64)
+        elif tipo == 'booleano':
+            codigos, unicos = pd.factorize(bloque[campo], use_na_sentinel=True)
+            traduccion = np.array([int(bool(v)) for v in unicos] + [AUSENTE], dtype=np.int8)
+            registros[campo] = traduccion[codigos]
+        else:
+            registros[campo] = industrias.codificar(bloque[campo])
+    return registros
+
+
+def convertir_binario(entrada: str, salida: str, formato: Optional[str] = None,
+                      tamano_bloque: int = 100_000) -> Dict[str, Any]:
+    """
+    Convierte un CSV/JSONL de proveedores al formato binario
+
+    Los valores se convierten igual que en la evaluación en flujo (un valor
+    no convertible cuenta como campo ausente). Las columnas de COLUMNAS_ID
+    se guardan como texto, igual que las lee el CSV. El archivo se escribe
+    con otro nombre y se renombra al terminar, así que nunca queda a medias.
+
+    Args:
+        entrada: Ruta del CSV/JSONL de proveedores
+        salida: Ruta del archivo binario (se sobrescribe)
+        formato: 'csv' o 'jsonl' (por defecto, según la extensión)
+        tamano_bloque: Filas convertidas a la vez
+
+    Returns:
+        Dict con filas, industrias e identificadores (columnas de COLUMNAS_ID guardadas)
+    """
+    formato = detectar_formato(entrada, formato)
+    industrias = _Industrias()
+    identificadores: Dict[str, _EscritorTextos] = {}
+    filas = 0
+    temporal = salida + '.tmp'
+    try:
+        with open(temporal, 'wb') as f:
+            f.write(b'\0' * INICIO_REGISTROS)
+            for bloque in leer_bloques(entrada, formato, tamano_bloque):
+                codificar_bloque(bloque, industrias).tofile(f)
+                for columna in COLUMNAS_ID:
+                    if columna in bloque.columns and columna not in identificadores:
+                        identificadores[columna] = _EscritorTextos(filas)
+                for columna, textos in identificadores.items():
+                    textos.escribir(_textos(bloque[columna]) if columna in bloque.columns
+                                    else np.full(len(bloque), None, dtype=object))
+                filas += len(bloque)
+
+            posiciones = {columna: identificadores[columna].volcar(f)
+                          for columna in COLUMNAS_ID if columna in identificadores}
+            pie = _pie(filas, industrias.valores, posiciones)
+            posicion = f.tell()
+            f.write(pie)
+            f.seek(0)
+            f.write(_PREFIJO.pack(MAGIA, VERSION_FORMATO, posicion, len(pie)))
+        os.replace(temporal, salida)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+    finally:
+        for textos in identificadores.values():
+            textos.cerrar()
+    return {'filas': filas, 'industrias': list(industrias.valores), 'identificadores': list(posiciones)}
+
+
+# ========== LECTURA Y EVALUACIÓN ==========
+
+class TextosArchivo:
+    """Columna de identificadores de un archivo binario, proyectada en memoria"""
+
+    def __init__(self, ruta: str, filas: int, posiciones: Dict[str, int]):
+        """
+        Args:
+            ruta: Archivo binario de proveedores
+            filas: Filas del archivo
+            posiciones: Entrada de la columna en el 'identificadores' del esquema
+        """
+        self.desplazamientos = np.memmap(ruta, dtype='<i8', mode='r', offset=posiciones['desplazamientos'],
+                                         shape=(filas + 1,)).view(np.ndarray)
+        self.presentes = np.memmap(ruta, dtype=np.int8, mode='r', offset=posiciones['presentes'],
+                                   shape=(filas,)).view(np.ndarray)
+        self.textos = (np.memmap(ruta, dtype=np.uint8, mode='r', offset=posiciones['textos'],
+                                 shape=(posiciones['bytes'],)).view(np.ndarray)
+                       if posiciones['bytes'] else np.empty(0, dtype=np.uint8))
+
+    def valores(self, desde: int, hasta: int) -> np.ndarray:
+        """Textos de las filas [desde, hasta) con None en los ausentes"""
+        desplazamientos = self.desplazamientos[desde:hasta + 1]
+        base = int(desplazamientos[0])
+        datos = self.textos[base:int(desplazamientos[-1])].tobytes()
+        limites = (desplazamientos - base).tolist()
+        return np.array([datos[a:b].decode('utf-8') if presente else None
+                         for a, b, presente in zip(limites, limites[1:], self.presentes[desde:hasta].tolist())],
+                        dtype=object)
+
+
+class TablaProveedores:
+    """
+    Registros de un archivo binario proyectados en memoria (o una porción).
+
+    registros es un array estructurado sobre el np.memmap del archivo;
+    columnas_reglas() y bloques() devuelven vistas, así que evaluar no copia
+    los datos de entrada: el sistema operativo pagina el archivo según se
+    recorre.
+    """
+
+    def __init__(self, registros: np.ndarray, industrias: List[str], inicio: int = 0,
+                 identificadores: Optional[Dict[str, TextosArchivo]] = None):
+        """
+        Args:
+            registros: Array con dtype DTYPE_PROVEEDOR
+            industrias: Categorías de los códigos de industria
+            inicio: Fila del archivo del primer registro
+            identificadores: Columnas de COLUMNAS_ID del archivo completo, por nombre
+        """
+        self.registros = registros
+        self.industrias = industrias
+        self.inicio = inicio
+        self.identificadores = identificadores or {}
+
+    def __len__(self) -> int:
+        return len(self.registros)
+
+    @property
+    def filas(self) -> np.ndarray:
+        """Posición de cada registro en el archivo"""
+        return np.arange(self.inicio, self.inicio + len(self.registros), dtype=np.int64)
+
+    def columnas_reglas(self) -> Dict[str, ColumnaReglas]:
+        """ColumnaReglas de cada campo sobre vistas de los registros (sin copiarlos)"""
+        columnas = {}
+        for campo, tipo in TIPOS_CAMPOS.items():
+            valores = self.registros[campo]
+            if tipo == 'numero':
+                columnas[campo] = ColumnaReglas(valores, ~np.isnan(valores))
+            elif tipo == 'booleano':
+                columnas[campo] = ColumnaReglas(valores, valores != AUSENTE, (False, True))
+            else:
+                columnas[campo] = ColumnaReglas(valores, valores != AUSENTE, self.industrias)
+        return columnas
+
+    def bloques(self, tamano_bloque: int) -> Iterator['TablaProveedores']:
+        """Porciones consecutivas de hasta tamano_bloque registros (vistas)"""
+        if tamano_bloque < 1:
+            raise ValueError("El tamaño de bloque debe ser al menos 1")
+        for desde in range(0, len(self.registros), tamano_bloque):
+            yield TablaProveedores(self.registros[desde:desde + tamano_bloque], self.industrias,
+                                   self.inicio + desde, self.identificadores)
+
+    def identificacion(self) -> pd.DataFrame:
+        """'fila' y las columnas de COLUMNAS_ID del archivo, como la identificación de evaluar_columnas()"""
+        columnas = {'fila': self.filas}
+        for columna, textos in self.identificadores.items():
+            columnas[columna] = textos.valores(self.inicio, self.inicio + len(self))
+        return pd.DataFrame(columnas, index=pd.RangeIndex(self.inicio, self.inicio + len(self)))
+
+    def a_dataframe(self) -> pd.DataFrame:
+        """
+        Decodifica los registros al DataFrame que produce leer_bloques()
+
+        Copia los datos; solo hace falta para backends que evalúan fila a fila.
+        """
+        df = self.identificacion()
+        categorias = np.array(list(self.industrias) + [None], dtype=object)
+        for campo, tipo in TIPOS_CAMPOS.items():
+            valores = self.registros[campo]
+            if tipo == 'numero':
+                df[campo] = valores.astype(np.float64)
+            elif tipo == 'booleano':
+                presentes = valores != AUSENTE
+                df[campo] = valores.astype(bool) if presentes.all() else np.where(presentes, valores == 1, None)
+            else:
+                df[campo] = categorias[np.where(valores == AUSENTE, len(self.industrias), valores)]
+        return df
+
+    def evaluar(self, version: VersionReglas, backend: str = 'vectorizado') -> Dict[str, Any]:
+        """
+        Evalúa los registros con una versión de reglas
+
+        Returns:
+            Dict con el formato de engine.flujo.evaluar_columnas()
+        """
+        if backend != 'vectorizado':
+            return evaluar_columnas(self.a_dataframe(), version, backend)
+        evaluador = version.evaluador
+        identificacion = self.identificacion()
+        resultado = evaluar_mascaras(
+            mascaras_columnas(len(self), self.columnas_reglas(), evaluador), evaluador, identificacion.index
+        )
+        return completar_columnas(resultado, identificacion, version)
+
+
+def abrir_binario(ruta: str) -> TablaProveedores:
+    """
+    Proyecta en memoria un archivo binario de proveedores (solo lectura)
+
+    Returns:
+        TablaProveedores sobre todos los registros del archivo
+    """
+    esquema = leer_cabecera(ruta)
+    filas = esquema['filas']
+    if filas == 0:
+        return TablaProveedores(np.empty(0, dtype=DTYPE_PROVEEDOR), esquema['industrias'])
+    registros = np.memmap(ruta, dtype=DTYPE_PROVEEDOR, mode='r', offset=INICIO_REGISTROS,
+                          shape=(filas,)).view(np.ndarray)
+    identificadores = {columna: TextosArchivo(ruta, filas, posiciones)
+                       for columna, posiciones in esquema['identificadores'].items()}
+    return TablaProveedores(registros, esquema['industrias'], identificadores=identificadores)
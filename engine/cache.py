@@ -0,0 +1,177 @@
+"""
+Caché de resultados de evaluación
+LRU con expiración opcional delante de evaluar_proveedor
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from .inference_engine import evaluar_proveedor
+from .compilado import EVALUADOR_COMPILADO
+
+
+# Marca para campos ausentes en la clave (distinta de cualquier valor real)
+_AUSENTE = object()
+
+
+def campos_reglas(evaluador=EVALUADOR_COMPILADO) -> tuple:
+    """Campos de DatosProveedor que leen las reglas, en orden estable"""
+    campos = []
+    for perfil in evaluador.perfiles:
+        for campo, _, _, _ in perfil.comprobaciones:
+            if campo not in campos:
+                campos.append(campo)
+    return tuple(campos)
+
+
+def copiar_resultado(resultado: Dict[str, Any]) -> Dict[str, Any]:
+    """Copia un resultado de evaluación sin compartir listas ni diccionarios internos"""
+    copia = dict(resultado)
+    for clave, valor in resultado.items():
+        if isinstance(valor, list):
+            # En nivel 'ids' las explicaciones y alertas son tuplas inmutables
+            copia[clave] = [dict(elemento) if isinstance(elemento, dict) else elemento for elemento in valor]
+        elif isinstance(valor, dict):
+            copia[clave] = dict(valor)
+    return copia
+
+
+class CacheResultados:
+    """
+    Caché LRU de resultados indexada por los campos que leen las reglas.
+
+    La clave se forma solo con los valores de los campos relevantes, así que
+    'nombre', 'fecha_evaluacion' y cualquier otro campo que ninguna regla lee
+    no fragmentan la caché. Los resultados se copian al guardarlos y al
+    devolverlos para que quien llama no pueda alterar las entradas.
+    Los resultados 'ERROR' no se guardan.
+    """
+
+    def __init__(self, funcion: Callable[[Dict[str, Any]], Dict[str, Any]] = evaluar_proveedor,
+                 capacidad: int = 4096, ttl: Optional[float] = None,
+                 campos: Optional[Iterable[str]] = None):
+        """
+        Args:
+            funcion: Función de evaluación a memorizar
+            capacidad: Número máximo de resultados guardados
+            ttl: Segundos de vida de cada entrada (None = sin expiración)
+            campos: Campos que forman la clave (por defecto, los que leen las reglas)
+        """
+        if capacidad < 1:
+            raise ValueError("La capacidad de la caché debe ser al menos 1")
+
+        self.funcion = funcion
+        self.capacidad = capacidad
+        self.ttl = ttl
+        self.campos = tuple(campos) if campos is not None else campos_reglas()
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+        self.expirados = 0
+
+    def clave(self, datos_proveedor: Dict[str, Any]) -> Optional[tuple]:
+        """
+        Clave canónica de un proveedor, o None si no se puede memorizar
+
+        Returns:
+            Tupla con los valores de los campos relevantes en orden fijo
+        """
+        if not isinstance(datos_proveedor, dict):
+            return None
+        clave = tuple(datos_proveedor.get(campo, _AUSENTE) for campo in self.campos)
+        try:
+            hash(clave)
+        except TypeError:
+            return None
+        return clave
+
+    def __call__(self, datos_proveedor: Dict[str, Any]) -> Dict[str, Any]:
+        """Evalúa un proveedor usando la caché"""
+        clave = self.clave(datos_proveedor)
+        if clave is None:
+            return self.funcion(datos_proveedor)
+
+        ahora = time.monotonic()
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None:
+                expira, resultado = entrada
+                if expira is None or expira > ahora:
+                    self._entradas.move_to_end(clave)
+                    self.aciertos += 1
+                    return copiar_resultado(resultado)
+                del self._entradas[clave]
+                self.expirados += 1
+            self.fallos += 1
+
+        resultado = self.funcion(datos_proveedor)
+        if resultado.get('riesgo_final') == 'ERROR':
+            return resultado
+        self._guardar(clave, resultado, ahora)
+        return resultado
+
+    def _guardar(self, clave: tuple, resultado: Dict[str, Any], ahora: float):
+        """Guarda un resultado recién calculado y desaloja los más antiguos si no cabe"""
+        expira = ahora + self.ttl if self.ttl is not None else None
+        with self._lock:
+            if not self._vigente(clave, resultado):
+                return
+            self._entradas[clave] = (expira, copiar_resultado(resultado))
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.capacidad:
+                self._entradas.popitem(last=False)
+                self.desalojos += 1
+
+    def _vigente(self, clave: tuple, resultado: Dict[str, Any]) -> bool:
+        """Si un resultado recién calculado se puede guardar (se llama con el lock tomado)"""
+        return True
+
+    def limpiar(self):
+        """Elimina todas las entradas (los contadores se conservan)"""
+        with self._lock:
+            self._entradas.clear()
+
+    def estadisticas(self) -> Dict[str, float]:
+        """
+        Contadores de uso de la caché
+
+        Returns:
+            Dict con aciertos, fallos, tasa de aciertos, desalojos, expirados y tamaño
+        """
+        with self._lock:
+            total = self.aciertos + self.fallos
+            return {
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'tasa_aciertos': self.aciertos / total if total else 0.0,
+                'desalojos': self.desalojos,
+                'expirados': self.expirados,
+                'tamano': len(self._entradas),
+                'capacidad': self.capacidad
+            }
+
+
+_CACHE_PROVEEDORES = None
+_LOCK_CACHE_PROVEEDORES = threading.Lock()
+
+
+def __getattr__(nombre: str):
+    """
+    evaluar_proveedor_cacheado: caché compartida delante de evaluar_proveedor
+
+    Se crea en el primer uso como CacheVersionada del registro compartido
+    (el registro importa este módulo): la clave incluye la versión de reglas
+    y al publicar otra se descartan las entradas de la anterior.
+    """
+    global _CACHE_PROVEEDORES
+    if nombre != 'evaluar_proveedor_cacheado':
+        raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+    with _LOCK_CACHE_PROVEEDORES:
+        if _CACHE_PROVEEDORES is None:
+            from .registro import CacheVersionada, registro_reglas
+            _CACHE_PROVEEDORES = CacheVersionada(registro_reglas(), funcion=evaluar_proveedor)
+    return _CACHE_PROVEEDORES
@@ -0,0 +1,341 @@
+"""
+Resultados de evaluación por columnas
+Guarda los resultados de la evaluación en flujo como columnas tipadas
+(riesgo, puntuación y una columna booleana por regla) con alertas y factores
+críticos codificados con diccionario: Parquet si pyarrow está instalado y,
+si no, un directorio con una parte .npz por bloque
+"""
+
+import glob
+import json
+import os
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .registro import VersionReglas
+
+
+# 'columnar' elige Parquet si pyarrow está disponible y, si no, npz
+FORMATOS_COLUMNARES = ('columnar', 'parquet', 'npz')
+
+VERSION_ESQUEMA = 1
+
+# Archivo del directorio npz con los diccionarios y el número de partes escritas
+ESQUEMA_NPZ = 'esquema.json'
+
+# Prefijo de la columna booleana de cada regla (regla_RF-001...)
+PREFIJO_REGLA = 'regla_'
+
+# Columnas codificadas con diccionario y tipo de sus códigos
+DICCIONARIOS = {
+    'riesgo_final': np.int8,
+    'recomendacion': np.int8,
+    'alertas': np.int32,
+    'factores_criticos': np.int32
+}
+
+# Separador de las alertas o factores de una fila en el valor del diccionario
+SEPARADOR = '|'
+
+# Clave de los metadatos del archivo Parquet con el esquema
+_METADATOS_PARQUET = b'evaluador_riesgo'
+
+_PYARROW = None
+
+
+def _pyarrow():
+    """Módulos (pyarrow, pyarrow.parquet), o None si pyarrow no está instalado"""
+    global _PYARROW
+    if _PYARROW is None:
+        try:
+            import pyarrow
+            import pyarrow.parquet
+            _PYARROW = (pyarrow, pyarrow.parquet)
+        except ImportError:
+            _PYARROW = ()
+    return _PYARROW or None
+
+
+def formato_columnar(formato: str = 'columnar') -> str:
+    """
+    Formato concreto ('parquet' o 'npz') de un formato columnar
+
+    Raises:
+        ValueError: Si se pide 'parquet' sin pyarrow o el formato no es columnar
+    """
+    if formato not in FORMATOS_COLUMNARES:
+        raise ValueError(f"Formato no columnar: {formato!r} (use {', '.join(FORMATOS_COLUMNARES)})")
+    if formato == 'columnar':
+        return 'parquet' if _pyarrow() else 'npz'
+    if formato == 'parquet' and not _pyarrow():
+        raise ValueError("El formato parquet necesita pyarrow (use 'npz' o 'columnar')")
+    return formato
+
+
+class _Diccionario:
+    """Valores de una columna codificada, con códigos estables entre bloques"""
+
+    def __init__(self, tipo):
+        self.tipo = tipo
+        self.valores: List[str] = []
+        self._codigos: Dict[str, int] = {}
+
+    def codigo(self, valor: str) -> int:
+        codigo = self._codigos.get(valor)
+        if codigo is None:
+            codigo = len(self.valores)
+            if codigo > np.iinfo(self.tipo).max:
+                raise ValueError(f"Demasiados valores distintos para códigos {np.dtype(self.tipo).name}")
+            self._codigos[valor] = codigo
+            self.valores.append(valor)
+        return codigo
+
+    def codificar(self, unicos: Sequence[str], inversa: np.ndarray) -> np.ndarray:
+        """Códigos globales de las filas a partir de sus valores distintos y la posición de cada fila en ellos"""
+        traduccion = np.array([self.codigo(valor) for valor in unicos], dtype=self.tipo)
+        return traduccion[inversa] if len(traduccion) else np.empty(len(inversa), dtype=self.tipo)
+
+
+def _combinaciones(matriz: pd.DataFrame):
+    """
+    Combinaciones distintas de columnas activas de una matriz booleana
+
+    Returns:
+        (textos con las etiquetas activas unidas por SEPARADOR, posición de cada fila en ellos)
+    """
+    valores = matriz.to_numpy()
+    etiquetas = list(matriz.columns)
+    if not etiquetas:
+        return [''], np.zeros(len(valores), dtype=np.intp)
+    if len(etiquetas) < 63:
+        # Cada fila como un entero (un bit por columna): np.unique ordena una sola columna
+        codigos = valores.astype(np.int64) @ (np.int64(1) << np.arange(len(etiquetas), dtype=np.int64))
+        unicas, inversa = np.unique(codigos, return_inverse=True)
+        activas = (unicas[:, None] >> np.arange(len(etiquetas)) & 1).astype(bool)
+    else:
+        codigos = np.packbits(valores, axis=1, bitorder='little')
+        unicas, inversa = np.unique(codigos, axis=0, return_inverse=True)
+        activas = np.unpackbits(unicas, axis=1, count=len(etiquetas), bitorder='little').astype(bool)
+    textos = [SEPARADOR.join(e for e, activa in zip(etiquetas, fila) if activa) for fila in activas]
+    return textos, inversa.reshape(-1)
+
+
+def _textos(serie: pd.Series) -> np.ndarray:
+    """Identificadores como texto, con None en los ausentes"""
+    valores = serie.to_numpy(dtype=object)
+    return np.array([None if v is None or v != v else str(v) for v in valores], dtype=object)
+
+
+class EscritorColumnar:
+    """
+    Escribe resultados de evaluar_columnas() por columnas, bloque a bloque.
+
+    Cada bloque se vuelca en cuanto llega: un grupo de filas del archivo
+    Parquet o una parte parte-NNNNN.npz del directorio npz, cuyo esquema.json
+    se reescribe tras cada parte; la memoria usada no crece con el archivo.
+    Los diccionarios son globales, así que un código significa lo mismo en
+    todos los bloques.
+
+    Columnas: fila, las de identificación del primer bloque, riesgo_final,
+    puntuacion, recomendacion, total_reglas_activadas, una booleana por regla
+    (regla_<código>), alertas, factores_criticos y version_reglas. alertas y
+    factores_criticos valen las etiquetas activas de la fila unidas por '|'.
+    """
+
+    def __init__(self, ruta: str, version: VersionReglas, formato: str = 'columnar'):
+        """
+        Args:
+            ruta: Archivo Parquet o directorio npz de salida (se sobrescribe)
+            version: Versión de reglas que evalúa los bloques
+            formato: 'parquet', 'npz' o 'columnar' (Parquet si hay pyarrow)
+        """
+        self.ruta = ruta
+        self.formato = formato_columnar(formato)
+        self.version = version.id
+        self.reglas = [perfil.codigo for perfil in version.evaluador.perfiles]
+        self.diccionarios = {columna: _Diccionario(tipo) for columna, tipo in DICCIONARIOS.items()}
+        self.columnas_id: Optional[List[str]] = None
+        self.partes = 0
+        self.filas = 0
+        self._parquet = None
+        if self.formato == 'npz':
+            os.makedirs(ruta, exist_ok=True)
+            for obsoleta in glob.glob(os.path.join(ruta, 'parte-*.npz')):
+                os.remove(obsoleta)
+            self._escribir_esquema()
+
+    def escribir(self, bloque: Dict[str, Any]):
+        """Codifica y vuelca un bloque de resultados de evaluar_columnas()"""
+        identificacion = bloque['identificacion']
+        if self.columnas_id is None:
+            self.columnas_id = [c for c in identificacion.columns if c != 'fila']
+        reglas = bloque['reglas_activadas']
+        if list(reglas.columns) != self.reglas:
+            raise ValueError("El bloque no se evaluó con las reglas de la versión del escritor")
+
+        columnas = {'fila': identificacion['fila'].to_numpy(dtype=np.int64)}
+        for columna in self.columnas_id:
+            columnas[columna] = (_textos(identificacion[columna]) if columna in identificacion.columns
+                                 else np.full(len(identificacion), None, dtype=object))
+        for columna in ('riesgo_final', 'recomendacion'):
+            inversa, unicos = pd.factorize(bloque[columna])
+            columnas[columna] = self.diccionarios[columna].codificar([str(v) for v in unicos], inversa)
+        columnas['puntuacion'] = bloque['puntuacion'].to_numpy(dtype=np.int16)
+        columnas['total_reglas_activadas'] = bloque['total_reglas_activadas'].to_numpy(dtype=np.int16)
+        columnas['reglas'] = reglas.to_numpy(dtype=bool)
+        for columna in ('alertas', 'factores_criticos'):
+            columnas[columna] = self.diccionarios[columna].codificar(*_combinaciones(bloque[columna]))
+
+        if self.formato == 'npz':
+            self._escribir_npz(columnas)
+        else:
+            self._escribir_parquet(columnas)
+        self.partes += 1
+        self.filas += len(identificacion)
+
+    # ---------- npz ----------
+
+    def _escribir_npz(self, columnas: Dict[str, np.ndarray]):
+        arrays = {}
+        for nombre, valores in columnas.items():
+            if nombre in self.columnas_id:
+                nulos = np.array([v is None for v in valores], dtype=bool)
+                arrays[f'id:{nombre}'] = np.where(nulos, '', valores).astype(str)
+                arrays[f'nulos:{nombre}'] = nulos
+            else:
+                arrays[nombre] = valores
+        np.savez(os.path.join(self.ruta, f'parte-{self.partes:05d}.npz'), **arrays)
+        self._escribir_esquema(self.partes + 1, self.filas + len(columnas['fila']))
+
+    def _escribir_esquema(self, partes: int = 0, filas: int = 0):
+        """Reescribe esquema.json de forma atómica: un lector nunca ve partes sin diccionario"""
+        esquema = {
+            'version_esquema': VERSION_ESQUEMA,
+            'version_reglas': self.version,
+            'reglas': self.reglas,
+            'columnas_id': self.columnas_id or [],
+            'diccionarios': {columna: d.valores for columna, d in self.diccionarios.items()},
+            'partes': partes,
+            'filas': filas
+        }
+        ruta = os.path.join(self.ruta, ESQUEMA_NPZ)
+        temporal = ruta + '.tmp'
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(esquema, f, ensure_ascii=False)
+        os.replace(temporal, ruta)
+
+    # ---------- Parquet ----------
+
+    def _tabla_parquet(self, columnas: Dict[str, np.ndarray]):
+        pa, _ = _pyarrow()
+        arrays = {'fila': pa.array(columnas['fila'], pa.int64())}
+        for columna in self.columnas_id:
+            arrays[columna] = pa.array(columnas[columna], pa.string())
+        for columna in ('riesgo_final', 'puntuacion', 'recomendacion', 'total_reglas_activadas'):
+            arrays[columna] = self._arrow(columna, columnas[columna])
+        for j, codigo in enumerate(self.reglas):
+            arrays[PREFIJO_REGLA + codigo] = pa.array(columnas['reglas'][:, j], pa.bool_())
+        for columna in ('alertas', 'factores_criticos'):
+            arrays[columna] = self._arrow(columna, columnas[columna])
+        arrays['version_reglas'] = pa.DictionaryArray.from_arrays(
+            pa.array(np.zeros(len(columnas['fila']), dtype=np.int8)), pa.array([self.version], pa.string())
+        )
+        return pa.table(arrays)
+
+    def _arrow(self, columna: str, valores: np.ndarray):
+        pa, _ = _pyarrow()
+        diccionario = self.diccionarios.get(columna)
+        if diccionario is None:
+            return pa.array(valores)
+        return pa.DictionaryArray.from_arrays(pa.array(valores), pa.array(diccionario.valores, pa.string()))
+
+    def _escribir_parquet(self, columnas: Dict[str, np.ndarray]):
+        _, pq = _pyarrow()
+        tabla = self._tabla_parquet(columnas)
+        if self._parquet is None:
+            metadatos = {_METADATOS_PARQUET: json.dumps({
+                'version_esquema': VERSION_ESQUEMA, 'version_reglas': self.version,
+                'reglas': self.reglas, 'columnas_id': self.columnas_id
+            }, ensure_ascii=False).encode('utf-8')}
+            self._parquet = pq.ParquetWriter(self.ruta, tabla.schema.with_metadata(metadatos))
+        self._parquet.write_table(tabla.replace_schema_metadata(self._parquet.schema.metadata))
+
+    def cerrar(self):
+        """Termina el archivo Parquet (o deja el esquema npz final)"""
+        if self.formato == 'npz':
+            return
+        if self._parquet is None:
+            # Sin filas: se escribe un archivo vacío con el esquema
+            self.columnas_id = self.columnas_id or []
+            vacias = {
+                'fila': np.empty(0, dtype=np.int64),
+                **{c: np.empty(0, dtype=object) for c in self.columnas_id},
+                **{c: np.empty(0, dtype=t) for c, t in DICCIONARIOS.items()},
+                'puntuacion': np.empty(0, dtype=np.int16),
+                'total_reglas_activadas': np.empty(0, dtype=np.int16),
+                'reglas': np.empty((0, len(self.reglas)), dtype=bool)
+            }
+            self._escribir_parquet(vacias)
+        self._parquet.close()
+
+
+def leer_columnar(ruta: str, columnas: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    Carga en pandas unos resultados escritos por EscritorColumnar
+
+    Las columnas codificadas con diccionario se devuelven como categóricas
+    (sin decodificar fila a fila) y las reglas como columnas booleanas.
+
+    Args:
+        ruta: Archivo Parquet o directorio npz
+        columnas: Columnas a cargar (por defecto, todas)
+
+    Returns:
+        pd.DataFrame con una fila por proveedor, en el orden de la entrada
+    """
+    if not os.path.isdir(ruta):
+        if not _pyarrow():
+            raise ValueError("Leer Parquet necesita pyarrow")
+        _, pq = _pyarrow()
+        tabla = pq.read_table(ruta, columns=list(columnas) if columnas is not None else None)
+        return tabla.to_pandas()
+
+    with open(os.path.join(ruta, ESQUEMA_NPZ), encoding='utf-8') as f:
+        esquema = json.load(f)
+    if esquema.get('version_esquema') != VERSION_ESQUEMA:
+        raise ValueError(f"Versión de esquema no soportada: {esquema.get('version_esquema')!r}")
+
+    # Solo las partes registradas en el esquema (una parte a medio escribir se ignora)
+    partes = [np.load(os.path.join(ruta, f'parte-{i:05d}.npz')) for i in range(esquema['partes'])]
+
+    def unir(clave: str, tipo, forma=()) -> np.ndarray:
+        if not partes:
+            return np.empty((0,) + forma, dtype=tipo)
+        return np.concatenate([parte[clave] for parte in partes])
+
+    def categorica(columna: str) -> pd.Categorical:
+        return pd.Categorical.from_codes(unir(columna, DICCIONARIOS[columna]),
+                                         categories=esquema['diccionarios'][columna])
+
+    datos = {'fila': unir('fila', np.int64)}
+    for columna in esquema['columnas_id']:
+        valores = unir(f'id:{columna}', str).astype(object)
+        valores[unir(f'nulos:{columna}', bool)] = None
+        datos[columna] = valores
+    datos['riesgo_final'] = categorica('riesgo_final')
+    datos['puntuacion'] = unir('puntuacion', np.int16)
+    datos['recomendacion'] = categorica('recomendacion')
+    datos['total_reglas_activadas'] = unir('total_reglas_activadas', np.int16)
+    reglas = unir('reglas', bool, (len(esquema['reglas']),))
+    for j, codigo in enumerate(esquema['reglas']):
+        datos[PREFIJO_REGLA + codigo] = reglas[:, j]
+    datos['alertas'] = categorica('alertas')
+    datos['factores_criticos'] = categorica('factores_criticos')
+    datos['version_reglas'] = pd.Categorical.from_codes(
+        np.zeros(len(datos['fila']), dtype=np.int8), categories=[esquema['version_reglas']]
+    )
+
+    df = pd.DataFrame(datos)
+    return df[list(columnas)] if columnas is not None else df
@@ -0,0 +1,262 @@
+"""
+Representación compacta de resultados
+Guarda un resultado como nivel de riesgo, puntuación y máscaras de bits de
+reglas, alertas y factores, con un formato binario de ancho fijo
+"""
+
+import struct
+from datetime import datetime
+from enum import IntEnum
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from .compilado import EVALUADOR_COMPILADO, EvaluadorCompilado
+from .plantillas import renderizar_explicacion
+from .tabla_decision import tabla_decision
+
+
+class NivelRiesgo(IntEnum):
+    """Nivel de riesgo final de una evaluación"""
+    BAJO = 0
+    MEDIO = 1
+    ALTO = 2
+
+
+# Segundos del día reservados para "sin marca de tiempo"
+SIN_MARCA = 0xFFFFFFFF
+
+
+class ResultadoCompacto:
+    """
+    Resultado de una evaluación en unos pocos enteros.
+
+    reglas, alertas y factores son máscaras de bits sobre el orden fijo de
+    CodificadorResultados (reglas en el orden de evaluador.perfiles).
+    segundos es la hora de la evaluación en segundos desde medianoche.
+    """
+
+    __slots__ = ('riesgo', 'puntuacion', 'reglas', 'alertas', 'factores', 'segundos')
+
+    def __init__(self, riesgo: NivelRiesgo, puntuacion: int, reglas: int = 0,
+                 alertas: int = 0, factores: int = 0, segundos: int = SIN_MARCA):
+        self.riesgo = NivelRiesgo(riesgo)
+        self.puntuacion = int(puntuacion)
+        self.reglas = int(reglas)
+        self.alertas = int(alertas)
+        self.factores = int(factores)
+        self.segundos = int(segundos)
+
+    @property
+    def total_reglas_activadas(self) -> int:
+        """Número de reglas activadas"""
+        return bin(self.reglas).count('1')
+
+    def _campos(self) -> tuple:
+        return (self.riesgo, self.puntuacion, self.reglas, self.alertas, self.factores, self.segundos)
+
+    def __eq__(self, otro) -> bool:
+        if not isinstance(otro, ResultadoCompacto):
+            return NotImplemented
+        return self._campos() == otro._campos()
+
+    def __hash__(self) -> int:
+        return hash(self._campos())
+
+    def __repr__(self) -> str:
+        return (f"ResultadoCompacto(riesgo={self.riesgo.name}, puntuacion={self.puntuacion}, "
+                f"reglas={self.reglas:#x}, alertas={self.alertas:#x}, factores={self.factores:#x})")
+
+
+def _bits(elementos: Iterable, orden: List) -> int:
+    """Máscara con un bit por elemento según su posición en `orden`"""
+    mascara = 0
+    for elemento in elementos:
+        mascara |= 1 << orden.index(elemento)
+    return mascara
+
+
+class CodificadorResultados:
+    """
+    Conversión entre resultados en diccionario, ResultadoCompacto y bytes.
+
+    Las posiciones de los bits dependen de la base de reglas, así que los
+    registros solo deben decodificarse con un codificador de la misma firma.
+    Los textos de las explicaciones no se guardan: se regeneran desde las
+    plantillas y los parámetros numéricos de cada regla son los valores de
+    los campos del proveedor, que se pasan al convertir de vuelta.
+    """
+
+    # reglas, alertas, factores (uint64), segundos (uint32), puntuación (int16),
+    # riesgo (uint8) y un byte de relleno: 32 bytes por resultado
+    FORMATO = struct.Struct('<QQQIhBx')
+    DTYPE = np.dtype([
+        ('reglas', '<u8'), ('alertas', '<u8'), ('factores', '<u8'),
+        ('segundos', '<u4'), ('puntuacion', '<i2'), ('riesgo', 'u1'), ('relleno', 'u1')
+    ])
+
+    def __init__(self, evaluador: EvaluadorCompilado = EVALUADOR_COMPILADO):
+        """
+        Args:
+            evaluador: Evaluador compilado que fija el orden de reglas, alertas y factores
+        """
+        self.evaluador = evaluador
+        self.firma = evaluador.firma
+        self.tabla = tabla_decision(evaluador)
+        perfiles = evaluador.perfiles
+
+        self.codigos = [perfil.codigo for perfil in perfiles]
+        self.alertas = []
+        self.factores = []
+        for perfil in perfiles:
+            for alerta in perfil.alertas:
+                if alerta not in self.alertas:
+                    self.alertas.append(alerta)
+            for factor in perfil.factores:
+                if factor not in self.factores:
+                    self.factores.append(factor)
+
+        if max(len(self.codigos), len(self.alertas), len(self.factores)) > 64:
+            raise ValueError("El formato compacto admite como máximo 64 reglas, alertas y factores")
+
+        self._alertas_regla = [_bits(p.alertas, self.alertas) for p in perfiles]
+        self._factores_regla = [_bits(p.factores, self.factores) for p in perfiles]
+
+    # ========== DICCIONARIO <-> COMPACTO ==========
+
+    def _de_mascara(self, reglas: int, segundos: int = SIN_MARCA) -> ResultadoCompacto:
+        """Resultado compacto de un conjunto de reglas activadas"""
+        riesgo, puntuacion = self.tabla.resultado_mascara(reglas)[:2]
+        alertas = factores = 0
+        for j in range(len(self.codigos)):
+            if reglas >> j & 1:
+                alertas |= self._alertas_regla[j]
+                factores |= self._factores_regla[j]
+        return ResultadoCompacto(NivelRiesgo[riesgo], puntuacion, reglas, alertas, factores, segundos)
+
+    def evaluar(self, datos_proveedor: Dict[str, Any]) -> ResultadoCompacto:
+        """Evalúa un proveedor directamente en forma compacta, sin generar el diccionario"""
+        ahora = datetime.now()
+        reglas = self.tabla.mascara_reglas(datos_proveedor)
+        segundos = ahora.hour * 3600 + ahora.minute * 60 + ahora.second if reglas else SIN_MARCA
+        return self._de_mascara(reglas, segundos)
+
+    def compactar(self, resultado: Dict[str, Any]) -> ResultadoCompacto:
+        """
+        Convierte un resultado de obtener_resultado() (nivel 'full' o 'ids')
+
+        Raises:
+            ValueError: Si el resultado es 'ERROR' o se evaluó con nivel 'none'
+                (no registra qué reglas se activaron)
+        """
+        if resultado['riesgo_final'] not in NivelRiesgo.__members__:
+            raise ValueError(f"El riesgo '{resultado['riesgo_final']}' no tiene representación compacta")
+
+        codigos = [exp['regla'].split(':')[0] if isinstance(exp, dict) else exp[0]
+                   for exp in resultado['explicaciones']]
+        if len(codigos) != resultado['total_reglas_activadas']:
+            raise ValueError("El resultado no incluye las reglas activadas (nivel de explicación 'none')")
+
+        segundos = SIN_MARCA
+        marca = resultado.get('marca_tiempo')
+        if marca is not None:
+            segundos = marca.hour * 3600 + marca.minute * 60 + marca.second
+        elif resultado['explicaciones'] and isinstance(resultado['explicaciones'][0], dict):
+            horas, minutos, segs = map(int, resultado['explicaciones'][0]['timestamp'].split(':'))
+            segundos = horas * 3600 + minutos * 60 + segs
+
+        return ResultadoCompacto(
+            NivelRiesgo[resultado['riesgo_final']],
+            resultado['puntuacion'],
+            _bits(codigos, self.codigos),
+            _bits(((a['nivel'], a['mensaje']) if isinstance(a, dict) else tuple(a)
+                   for a in resultado['alertas']), self.alertas),
+            _bits(resultado['factores_criticos'], self.factores),
+            segundos
+        )
+
+    def a_dict(self, compacto: ResultadoCompacto,
+               datos_proveedor: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Reconstruye el diccionario de obtener_resultado() en nivel 'full'
+
+        Las explicaciones, alertas y factores salen en el orden de las reglas
+        del evaluador (en experta el orden de activación entre reglas de la
+        misma prioridad no es significativo).
+
+        Args:
+            compacto: Resultado compacto
+            datos_proveedor: Datos del proveedor; necesarios si alguna regla
+                activada cita valores del proveedor en su texto
+
+        Returns:
+            Dict con el mismo formato que evaluar_proveedor
+        """
+        riesgo, _, recomendacion, _, _, _ = self.tabla.resultado_mascara(compacto.reglas)
+        hora = None
+        if compacto.segundos != SIN_MARCA:
+            horas, resto = divmod(compacto.segundos, 3600)
+            hora = f"{horas:02d}:{resto // 60:02d}:{resto % 60:02d}"
+
+        explicaciones, alertas, factores = [], [], []
+        for j, perfil in enumerate(self.evaluador.perfiles):
+            if not compacto.reglas >> j & 1:
+                continue
+            parametros = {}
+            for campo, _, _, variable in perfil.comprobaciones:
+                if variable is not None:
+                    if datos_proveedor is None:
+                        raise ValueError(f"La regla {perfil.codigo} necesita los datos del proveedor para su texto")
+                    parametros[variable] = datos_proveedor[campo]
+            explicaciones.append(renderizar_explicacion(perfil.codigo, perfil.impacto, parametros, hora))
+            alertas.extend({'nivel': nivel, 'mensaje': mensaje} for nivel, mensaje in perfil.alertas)
+            factores.extend(perfil.factores)
+
+        return {
+            'riesgo_final': compacto.riesgo.name,
+            'puntuacion': compacto.puntuacion,
+            'recomendacion': recomendacion,
+            'explicaciones': explicaciones,
+            'alertas': alertas,
+            'factores_criticos': factores,
+            'total_reglas_activadas': len(explicaciones)
+        }
+
+    # ========== FORMATO BINARIO ==========
+
+    def codificar(self, compacto: ResultadoCompacto) -> bytes:
+        """Registro binario de 32 bytes"""
+        return self.FORMATO.pack(compacto.reglas, compacto.alertas, compacto.factores,
+                                 compacto.segundos, compacto.puntuacion, compacto.riesgo)
+
+    def decodificar(self, registro: bytes) -> ResultadoCompacto:
+        """Inverso de codificar()"""
+        reglas, alertas, factores, segundos, puntuacion, riesgo = self.FORMATO.unpack(registro)
+        return ResultadoCompacto(riesgo, puntuacion, reglas, alertas, factores, segundos)
+
+    def codificar_lote(self, compactos: Iterable[ResultadoCompacto]) -> np.ndarray:
+        """
+        Arreglo estructurado de NumPy con un registro por resultado
+
+        Su .tobytes() es la concatenación de los registros de codificar(), de
+        modo que un millón de resultados ocupa 32 MB.
+        """
+        compactos = list(compactos)
+        registros = np.zeros(len(compactos), dtype=self.DTYPE)
+        for nombre in ('reglas', 'alertas', 'factores', 'segundos', 'puntuacion', 'riesgo'):
+            registros[nombre] = [getattr(c, nombre) for c in compactos]
+        return registros
+
+    def decodificar_lote(self, registros) -> List[ResultadoCompacto]:
+        """Inverso de codificar_lote(); acepta el arreglo o sus bytes"""
+        if isinstance(registros, (bytes, bytearray, memoryview)):
+            registros = np.frombuffer(registros, dtype=self.DTYPE)
+        return [
+            ResultadoCompacto(int(r['riesgo']), int(r['puntuacion']), int(r['reglas']),
+                              int(r['alertas']), int(r['factores']), int(r['segundos']))
+            for r in registros
+        ]
+
+
+# Codificador de las reglas de MotorEvaluacionRiesgo
+CODIFICADOR_RESULTADOS = CodificadorResultados()
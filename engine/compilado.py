@@ -0,0 +1,345 @@
+"""
+Evaluador compilado de las reglas del motor de inferencia
+Compila las reglas @Rule de MotorEvaluacionRiesgo en una tabla plana de
+predicados y evalúa un proveedor sin pasar por la red Rete de experta
+"""
+
+import hashlib
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from .reglas import (Fact, Rule, ConditionalElement, AND, OR, NOT, compilar_restriccion, reglas_de_clase,
+                     _LITERAL, _PREDICADO)
+
+from .inference_engine import MotorEvaluacionRiesgo, DatosProveedor, _resultado_error
+from .plantillas import NIVELES_EXPLICACION
+
+
+def _compilar_patron(patron: Fact) -> Tuple[type, tuple]:
+    """Compila un patrón de hecho en (tipo de hecho, comprobaciones)"""
+    comprobaciones = []
+    for campo, restriccion in patron.items():
+        comprobaciones.extend(compilar_restriccion(campo, restriccion))
+    return type(patron), tuple(comprobaciones)
+
+
+def _comprobar(comprobaciones: tuple, hecho, contexto: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Aplica las comprobaciones a un hecho
+
+    Returns:
+        Contexto ampliado con las variables ligadas, o None si no coincide
+    """
+    for campo, tipo, valor, variable in comprobaciones:
+        if campo not in hecho:
+            return None
+        actual = hecho[campo]
+        if tipo is _LITERAL:
+            if not valor == actual:
+                return None
+        elif tipo is _PREDICADO:
+            if not valor(actual):
+                return None
+        if variable is not None:
+            if variable in contexto and contexto[variable] != actual:
+                return None
+            contexto = dict(contexto, **{variable: actual})
+    return contexto
+
+
+# Nodos de una condición compilada
+_HECHO = 'hecho'
+_Y = 'and'
+_O = 'or'
+_NO = 'not'
+
+
+def _compilar_condicion(elementos) -> tuple:
+    """
+    Compila una conjunción de elementos condicionales en un árbol de nodos
+
+    Soporta patrones de hecho y los elementos AND, OR y NOT usados por
+    MotorEvaluacionRiesgo.
+    """
+    nodos = []
+    for elemento in elementos:
+        if isinstance(elemento, Fact):
+            nodos.append((_HECHO,) + _compilar_patron(elemento))
+        elif isinstance(elemento, AND):
+            nodos.append((_Y, _compilar_condicion(elemento)))
+        elif isinstance(elemento, OR):
+            nodos.append((_O, tuple(_compilar_condicion((rama,)) for rama in elemento)))
+        elif isinstance(elemento, NOT):
+            nodos.append((_NO, _compilar_condicion(elemento)))
+        else:
+            raise TypeError(f"Elemento condicional no soportado: {elemento!r}")
+    return tuple(nodos)
+
+
+def _contextos(nodos: tuple, hechos: Dict[type, list], contexto: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Enumera las combinaciones de hechos que satisfacen una condición compilada
+
+    Cada contexto devuelto equivale a una activación de experta.
+    """
+    contextos = [contexto]
+    for nodo in nodos:
+        siguientes = []
+        for ctx in contextos:
+            if nodo[0] is _HECHO:
+                for hecho in hechos.get(nodo[1], ()):
+                    nuevo = _comprobar(nodo[2], hecho, ctx)
+                    if nuevo is not None:
+                        siguientes.append(nuevo)
+            elif nodo[0] is _Y:
+                siguientes.extend(_contextos(nodo[1], hechos, ctx))
+            elif nodo[0] is _O:
+                for rama in nodo[1]:
+                    siguientes.extend(_contextos(rama, hechos, ctx))
+            elif not _contextos(nodo[1], hechos, ctx):
+                siguientes.append(ctx)
+        contextos = siguientes
+    return contextos
+
+
+class _EstadoEvaluacion:
+    """
+    Estado de una evaluación compilada
+
+    Reutiliza los métodos de MotorEvaluacionRiesgo que solo leen y escriben
+    este estado, de modo que los textos, impactos y decisiones son los mismos
+    que produce el motor experta.
+    """
+
+    __slots__ = ('explicaciones', 'alertas', 'puntuacion_total', 'riesgo_final',
+                 'recomendacion', 'factores_criticos', 'total_reglas', 'marca_tiempo',
+                 '_nivel_explicacion', 'conclusiones')
+
+    _reiniciar_estado = MotorEvaluacionRiesgo._reiniciar_estado
+    registrar_explicacion = MotorEvaluacionRiesgo.registrar_explicacion
+    registrar_alerta = MotorEvaluacionRiesgo.registrar_alerta
+    evaluar_puntuacion_final = MotorEvaluacionRiesgo.evaluar_puntuacion_final
+    obtener_resultado = MotorEvaluacionRiesgo.obtener_resultado
+
+    def __init__(self, nivel_explicacion: str = 'full'):
+        self._nivel_explicacion = nivel_explicacion
+        self._reiniciar_estado()
+        self.conclusiones = []
+
+    def declare(self, *hechos):
+        """Registra las conclusiones declaradas por las reglas"""
+        for hecho in hechos:
+            if hecho not in self.conclusiones:
+                self.conclusiones.append(hecho)
+
+
+class PerfilRegla(NamedTuple):
+    """Efectos de una regla de datos, obtenidos al ejecutar su cuerpo una vez"""
+    nombre: str
+    codigo: str
+    comprobaciones: tuple
+    impacto: int
+    alertas: tuple
+    factores: tuple
+    conclusiones: tuple
+
+
+def _perfilar(comprobaciones: tuple, regla: Rule) -> PerfilRegla:
+    """
+    Ejecuta el cuerpo de una regla sobre un estado vacío para registrar sus efectos
+
+    Las variables ligadas solo se usan para dar formato al texto de la
+    explicación, así que basta con un valor numérico cualquiera.
+    """
+    estado = _EstadoEvaluacion('ids')
+    variables = {variable: 0 for _, _, _, variable in comprobaciones if variable is not None}
+    regla._wrapped(estado, **_argumentos(regla, variables))
+
+    nombre = regla._wrapped.__name__
+    codigo = estado.explicaciones[0][0] if estado.explicaciones else nombre
+    return PerfilRegla(
+        nombre=nombre,
+        codigo=codigo,
+        comprobaciones=comprobaciones,
+        impacto=100 - estado.puntuacion_total,
+        alertas=tuple(estado.alertas),
+        factores=tuple(estado.factores_criticos),
+        conclusiones=tuple(estado.conclusiones)
+    )
+
+
+def _firma_valor(valor) -> str:
+    """Representación estable de un valor de comprobación (los predicados por su código)"""
+    codigo = getattr(valor, '__code__', None)
+    if codigo is not None:
+        return repr((codigo.co_code, codigo.co_consts))
+    return repr(valor)
+
+
+def _argumentos(regla: Rule, contexto: Dict[str, Any]) -> Dict[str, Any]:
+    """Filtra las variables ligadas a los parámetros de la regla, como hace experta"""
+    if regla._wrapped_args:
+        return {k: v for k, v in contexto.items() if k in regla._wrapped_args}
+    return contexto
+
+
+class EvaluadorCompilado:
+    """
+    Backend alternativo que evalúa las reglas de MotorEvaluacionRiesgo sin experta.
+
+    Las reglas cuyos patrones solo leen DatosProveedor se compilan a una
+    tabla plana de comprobaciones sobre el diccionario del proveedor. Las
+    reglas de decisión (las que leen Conclusion) se evalúan después sobre las
+    conclusiones declaradas: solo modifican riesgo_final y recomendacion, así
+    que el resultado no depende del orden en que experta las intercale.
+
+    Los textos, impactos y decisiones se obtienen ejecutando las mismas
+    funciones de las reglas, por lo que obtener_resultado() coincide con el
+    motor experta. El orden de las listas sigue el orden de declaración de
+    las reglas; en experta ese orden depende del hash de los nodos Rete y
+    puede variar entre procesos.
+    """
+
+    # Resultados con el formato de MotorEvaluacionRiesgo (riesgo_final, alertas...)
+    formato_resultado = 'motor'
+
+    def __init__(self, motor_cls: type = MotorEvaluacionRiesgo):
+        """
+        Args:
+            motor_cls: Clase de motor (MotorEvaluacionRiesgo o subclase) a compilar
+        """
+        self.motor_cls = motor_cls
+        self.reglas_datos = []
+        self.reglas_decision = []
+
+        for regla in reglas_de_clase(motor_cls):
+            if all(isinstance(p, Fact) and type(p) is DatosProveedor for p in regla):
+                comprobaciones = tuple(
+                    c for patron in regla for c in _compilar_patron(patron)[1]
+                )
+                self.reglas_datos.append((comprobaciones, regla))
+            else:
+                self.reglas_decision.append((_compilar_condicion(regla), regla))
+
+        self.perfiles = [_perfilar(c, r) for c, r in self.reglas_datos]
+        self.firma = self._calcular_firma()
+
+    def evaluar(self, datos_proveedor: Dict[str, Any], nivel_explicacion: str = 'full') -> Dict[str, Any]:
+        """
+        Evalúa un proveedor; los errores se propagan igual que en experta
+
+        Args:
+            datos_proveedor: Diccionario con los datos del proveedor
+            nivel_explicacion: 'none', 'ids' o 'full' (ver MotorEvaluacionRiesgo)
+
+        Returns:
+            Dict con el mismo formato que MotorEvaluacionRiesgo.obtener_resultado()
+        """
+        if nivel_explicacion not in NIVELES_EXPLICACION:
+            raise ValueError(f"Nivel de explicación no válido: {nivel_explicacion!r}")
+
+        datos = self._validar(datos_proveedor)
+        estado = _EstadoEvaluacion(nivel_explicacion)
+
+        for comprobaciones, regla in self.reglas_datos:
+            contexto = _comprobar(comprobaciones, datos, {})
+            if contexto is not None:
+                regla._wrapped(estado, **_argumentos(regla, contexto))
+
+        if estado.conclusiones:
+            self._aplicar_decisiones(estado, {DatosProveedor: [datos]})
+
+        return estado.obtener_resultado()
+
+    def decidir(self, conclusiones, puntuacion_total: int) -> Tuple[str, str]:
+        """
+        Aplica las reglas de decisión y la puntuación final a un conjunto de conclusiones
+
+        Permite a los evaluadores por lotes reutilizar exactamente la misma
+        lógica de decisión sin volver a ejecutar las reglas de datos.
+
+        Args:
+            conclusiones: Hechos Conclusion declarados por las reglas de datos
+            puntuacion_total: Puntuación acumulada antes de la decisión final
+
+        Returns:
+            Tupla (riesgo_final, recomendacion)
+        """
+        estado = _EstadoEvaluacion()
+        estado.puntuacion_total = puntuacion_total
+        estado.declare(*conclusiones)
+        if estado.conclusiones:
+            self._aplicar_decisiones(estado, {})
+        estado.evaluar_puntuacion_final()
+        return estado.riesgo_final, estado.recomendacion
+
+    def _aplicar_decisiones(self, estado: _EstadoEvaluacion, hechos: Dict[type, list]):
+        """Dispara las reglas de decisión sobre las conclusiones del estado"""
+        for conclusion in estado.conclusiones:
+            hechos.setdefault(type(conclusion), []).append(conclusion)
+        for condicion, regla in self.reglas_decision:
+            for contexto in _contextos(condicion, hechos, {}):
+                regla._wrapped(estado, **_argumentos(regla, contexto))
+
+    def _calcular_firma(self) -> str:
+        """
+        Huella de la base de reglas compilada
+
+        Cambia si cambia cualquier umbral, literal, impacto o efecto de una
+        regla, por lo que sirve para invalidar estructuras derivadas.
+        """
+        partes = []
+        for perfil in self.perfiles:
+            partes.append(repr((
+                perfil.codigo,
+                [(campo, tipo, _firma_valor(valor), variable)
+                 for campo, tipo, valor, variable in perfil.comprobaciones],
+                perfil.impacto, perfil.alertas, perfil.factores,
+                [sorted(c.items()) for c in perfil.conclusiones]
+            )))
+        for condicion, regla in self.reglas_decision:
+            partes.append(repr((regla._wrapped.__name__, condicion, _firma_valor(regla._wrapped))))
+        return hashlib.sha256("\n".join(partes).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _validar(datos_proveedor) -> Dict[str, Any]:
+        """Aplica las mismas validaciones que experta al declarar el hecho"""
+        if type(datos_proveedor) is not dict:
+            # Produce el mismo error que DatosProveedor(**datos) en evaluar_proveedor
+            datos_proveedor = dict(DatosProveedor(**datos_proveedor))
+
+        for clave, valor in datos_proveedor.items():
+            if isinstance(valor, ConditionalElement):
+                raise TypeError("Declared facts cannot contain conditional elements")
+            if "__" in str(clave).strip('__'):
+                raise KeyError("Cannot declare facts containing double underscores as keys.")
+
+        return datos_proveedor
+
+
+# Evaluador compartido de las reglas de MotorEvaluacionRiesgo
+EVALUADOR_COMPILADO = EvaluadorCompilado()
+
+
+def evaluar_proveedor_compilado(datos_proveedor: Dict[str, Any], nivel_explicacion: str = 'full') -> Dict[str, Any]:
+    """
+    Equivalente a evaluar_proveedor usando el evaluador compilado
+
+    Evalúa con la versión vigente del registro compartido, igual que
+    evaluar_proveedor (al principio, EVALUADOR_COMPILADO).
+
+    Args:
+        datos_proveedor: Diccionario con los datos del proveedor
+        nivel_explicacion: 'none', 'ids' o 'full' (ver MotorEvaluacionRiesgo)
+
+    Returns:
+        Dict con los resultados y 'version_reglas', o el resultado 'ERROR' si la evaluación falla
+    """
+    from .registro import registro_reglas
+
+    if nivel_explicacion not in NIVELES_EXPLICACION:
+        raise ValueError(f"Nivel de explicación no válido: {nivel_explicacion!r}")
+
+    try:
+        return registro_reglas().fijar().evaluar(datos_proveedor, nivel_explicacion)
+    except Exception as e:
+        return _resultado_error(e)
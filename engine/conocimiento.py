@@ -0,0 +1,533 @@
+"""
+Evaluador compilado de la base de conocimiento
+Compila las reglas de REGLAS_FINANCIERAS, REGLAS_OPERACIONALES, REGLAS_LEGALES
+y REGLAS_REPUTACIONALES en una sola función de Python: los umbrales se pliegan
+como constantes, cada campo del proveedor se lee una vez y las reglas
+compuestas reutilizan el resultado de las reglas que las componen
+"""
+
+import ast
+import builtins
+import hashlib
+import importlib
+import re
+from typing import Any, Callable, Dict, List, Mapping, NamedTuple, Optional, Tuple
+
+from .plantillas import NIVELES_EXPLICACION
+
+
+# Diccionarios de reglas de knowledge/ que se compilan, en orden de evaluación
+BASES_CONOCIMIENTO = (
+    ('reglas_financieras', 'REGLAS_FINANCIERAS'),
+    ('reglas_operacionales', 'REGLAS_OPERACIONALES'),
+    ('reglas_legales', 'REGLAS_LEGALES'),
+    ('reglas_reputacionales', 'REGLAS_REPUTACIONALES')
+)
+
+# Llamadas que se pueden plegar en tiempo de compilación si sus argumentos son constantes
+_FUNCIONES_PURAS = {'float', 'int', 'abs', 'min', 'max', 'round', 'len', 'str', 'bool'}
+
+# Nodos que introducen variables propias; la regla se llama sin compilar
+_NODOS_NO_SOPORTADOS = (ast.Lambda, ast.ListComp, ast.SetComp, ast.DictComp,
+                        ast.GeneratorExp, ast.NamedExpr, ast.Await, ast.Yield, ast.YieldFrom)
+
+# Tipos de valor que se pueden escribir como constante en el código generado
+_TIPOS_CONSTANTE = (bool, int, float, str, type(None))
+
+
+class _Falta:
+    """Marca de campo ausente al leer un campo con varios valores por defecto"""
+
+    def __repr__(self):
+        return '_FALTA'
+
+
+_FALTA = _Falta()
+
+
+class ReglaConocimiento(NamedTuple):
+    """
+    Regla de la base de conocimiento lista para compilar
+
+    expresion es el cuerpo de la condición como árbol de ast con el
+    proveedor en la variable `parametro`; None si la regla no se puede
+    compilar y se llama a `condicion` tal cual.
+    """
+    nombre: str
+    categoria: str
+    severidad: str
+    impacto: int
+    descripcion: str
+    justificacion: str
+    condicion: Callable[[Dict[str, Any]], Any]
+    expresion: Optional[ast.expr]
+    parametro: str
+    espacio: Mapping[str, Any]
+
+
+# ========== EXTRACCIÓN DE LAS CONDICIONES ==========
+
+_ARBOLES_FUENTE: Dict[str, Optional[ast.Module]] = {}
+
+
+def _arbol_fuente(archivo: str) -> Optional[ast.Module]:
+    """Árbol sintáctico de un archivo fuente, leído una sola vez"""
+    if archivo not in _ARBOLES_FUENTE:
+        try:
+            with open(archivo, encoding='utf-8') as f:
+                _ARBOLES_FUENTE[archivo] = ast.parse(f.read(), archivo)
+        except (OSError, SyntaxError, ValueError):
+            _ARBOLES_FUENTE[archivo] = None
+    return _ARBOLES_FUENTE[archivo]
+
+
+def _lambda_de(funcion: Callable) -> Optional[ast.Lambda]:
+    """
+    Nodo Lambda que definió una función, si se puede identificar sin ambigüedad
+
+    Se busca en el archivo de la función un lambda en la misma línea y con
+    los mismos parámetros; si hay varios candidatos no se compila.
+    """
+    codigo = getattr(funcion, '__code__', None)
+    if codigo is None or funcion.__name__ != '<lambda>':
+        return None
+    arbol = _arbol_fuente(codigo.co_filename)
+    if arbol is None:
+        return None
+
+    parametros = list(codigo.co_varnames[:codigo.co_argcount])
+    candidatos = [
+        nodo for nodo in ast.walk(arbol)
+        if isinstance(nodo, ast.Lambda) and nodo.lineno == codigo.co_firstlineno
+        and [a.arg for a in nodo.args.args] == parametros
+    ]
+    if len(candidatos) != 1 or len(parametros) != 1:
+        return None
+    return candidatos[0]
+
+
+def reglas_de_diccionario(reglas: Mapping[str, Dict[str, Any]]) -> List[ReglaConocimiento]:
+    """Convierte un diccionario REGLAS_* en reglas listas para compilar"""
+    convertidas = []
+    for nombre, regla in reglas.items():
+        condicion = regla['condicion']
+        nodo = _lambda_de(condicion)
+        convertidas.append(ReglaConocimiento(
+            nombre=nombre,
+            categoria=regla.get('categoria', ''),
+            severidad=regla.get('severidad', ''),
+            impacto=regla.get('impacto', 0),
+            descripcion=regla.get('descripcion', ''),
+            justificacion=regla.get('justificacion', ''),
+            condicion=condicion,
+            expresion=nodo.body if nodo is not None else None,
+            parametro=nodo.args.args[0].arg if nodo is not None else '',
+            espacio=getattr(condicion, '__globals__', {})
+        ))
+    return convertidas
+
+
+def reglas_base_conocimiento() -> List[ReglaConocimiento]:
+    """Reglas de los cuatro diccionarios de knowledge/, en el orden de BASES_CONOCIMIENTO"""
+    reglas = []
+    for modulo, nombre in BASES_CONOCIMIENTO:
+        diccionario = getattr(importlib.import_module(f"knowledge.{modulo}"), nombre)
+        reglas.extend(reglas_de_diccionario(diccionario))
+    return reglas
+
+
+# ========== TRANSFORMACIONES ==========
+
+class _Plegador(ast.NodeTransformer):
+    """
+    Sustituye por constantes las subexpresiones que no dependen del proveedor
+
+    Son las búsquedas de umbrales (UMBRALES_FINANCIEROS['liquidez']['excelente']),
+    la aritmética entre constantes y llamadas puras como float('inf').
+    """
+
+    def __init__(self, parametro: str, espacio: Mapping[str, Any]):
+        self.parametro = parametro
+        self.espacio = espacio
+        self.libres = set()
+
+    def _es_constante(self, nodo: ast.AST) -> bool:
+        for hijo in ast.walk(nodo):
+            if isinstance(hijo, ast.Name):
+                if hijo.id == self.parametro:
+                    return False
+                if hijo.id not in self.espacio and not hasattr(builtins, hijo.id):
+                    return False
+            elif isinstance(hijo, ast.Call):
+                if not (isinstance(hijo.func, ast.Name) and hijo.func.id in _FUNCIONES_PURAS
+                        and hijo.func.id not in self.espacio):
+                    return False
+            elif isinstance(hijo, _NODOS_NO_SOPORTADOS):
+                return False
+        return True
+
+    def visit(self, nodo):
+        if isinstance(nodo, ast.expr) and not isinstance(nodo, ast.Constant) and self._es_constante(nodo):
+            try:
+                valor = eval(compile(ast.Expression(nodo), '<plegado>', 'eval'), dict(self.espacio))
+            except Exception:
+                valor = None
+            else:
+                if isinstance(valor, _TIPOS_CONSTANTE):
+                    return ast.copy_location(ast.Constant(valor), nodo)
+        nodo = self.generic_visit(nodo)
+        if isinstance(nodo, ast.Name) and nodo.id != self.parametro and not hasattr(builtins, nodo.id):
+            self.libres.add(nodo.id)
+        return nodo
+
+
+class _Lecturas:
+    """
+    Lecturas deduplicadas de los campos del proveedor para todas las reglas
+
+    Cada `datos.get(campo, defecto)` con un campo constante y un valor por
+    defecto literal se sustituye por una variable local. Un campo se busca
+    una sola vez en el diccionario aunque las reglas usen varios valores por
+    defecto.
+    """
+
+    def __init__(self):
+        self.campos: Dict[Any, List[str]] = {}
+        self.llamadas = 0
+
+    def _variable(self, campo, indice: Optional[int]) -> str:
+        base = f"_v{list(self.campos).index(campo)}_" + re.sub(r'\W', '_', str(campo))
+        return base if indice is None else f"{base}_{indice}"
+
+    def sustituir(self, expresion: ast.expr, parametro: str) -> ast.expr:
+        """Sustituye las lecturas del proveedor y renombra el parámetro a `datos`"""
+        lecturas = self
+
+        class _Sustituidor(ast.NodeTransformer):
+            def visit_Call(self, nodo):
+                func = nodo.func
+                if (isinstance(func, ast.Attribute) and func.attr == 'get'
+                        and isinstance(func.value, ast.Name) and func.value.id == parametro
+                        and not nodo.keywords and 1 <= len(nodo.args) <= 2
+                        and isinstance(nodo.args[0], ast.Constant)
+                        and all(_es_literal(a) for a in nodo.args[1:])):
+                    defecto = ast.unparse(nodo.args[1]) if len(nodo.args) == 2 else 'None'
+                    lecturas.llamadas += 1
+                    variable = lecturas.registrar(nodo.args[0].value, defecto)
+                    return ast.copy_location(ast.Name(variable, ast.Load()), nodo)
+                return self.generic_visit(nodo)
+
+            def visit_Name(self, nodo):
+                if nodo.id == parametro:
+                    return ast.copy_location(ast.Name('datos', nodo.ctx), nodo)
+                return nodo
+
+        return _Sustituidor().visit(expresion)
+
+    def registrar(self, campo, defecto: str) -> str:
+        """Variable con el valor del campo (o `defecto`, código fuente literal, si falta)"""
+        defectos = self.campos.setdefault(campo, [])
+        if defecto not in defectos:
+            defectos.append(defecto)
+        return self._variable(campo, defectos.index(defecto))
+
+    def sentencias(self) -> List[str]:
+        """Código que lee cada campo una vez y aplica sus valores por defecto"""
+        lineas = []
+        for campo, defectos in self.campos.items():
+            if len(defectos) == 1:
+                lineas.append(f"{self._variable(campo, 0)} = _get({campo!r}, {defectos[0]})")
+                continue
+            crudo = self._variable(campo, None)
+            lineas.append(f"{crudo} = _get({campo!r}, _FALTA)")
+            for i, defecto in enumerate(defectos):
+                lineas.append(f"{self._variable(campo, i)} = {defecto} if {crudo} is _FALTA else {crudo}")
+        return lineas
+
+
+def _es_literal(nodo: ast.expr) -> bool:
+    """Constante o literal de contenedor (p. ej. []) que se puede reescribir en el código generado"""
+    try:
+        ast.literal_eval(nodo)
+    except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+        return False
+    return True
+
+
+class _Reutilizador(ast.NodeTransformer):
+    """Sustituye las subexpresiones iguales a la condición de otra regla por su resultado"""
+
+    def __init__(self, condiciones: Dict[str, str], propia: str):
+        self.condiciones = condiciones
+        self.propia = propia
+        self.usadas = set()
+
+    def visit(self, nodo):
+        if isinstance(nodo, ast.expr):
+            variable = self.condiciones.get(ast.dump(nodo))
+            if variable is not None and variable != self.propia:
+                self.usadas.add(variable)
+                return ast.copy_location(ast.Name(variable, ast.Load()), nodo)
+        return self.generic_visit(nodo)
+
+
+def _variable_regla(nombre: str) -> str:
+    return 'r_' + re.sub(r'\W', '_', nombre)
+
+
+# ========== EVALUADOR ==========
+
+class EvaluadorConocimiento:
+    """
+    Evaluador compilado de las reglas de la base de conocimiento.
+
+    Al construirse genera una función que recibe el diccionario del
+    proveedor y devuelve el valor de verdad de cada regla:
+
+    - Los umbrales (UMBRALES_*, CRITERIOS_*) y las operaciones entre
+      constantes quedan plegados en el código.
+    - Cada campo se lee con una sola búsqueda en el diccionario y se
+      comparte entre todas las reglas que lo usan.
+    - Una subexpresión igual a la condición completa de otra regla
+      (p. ej. los componentes de crisis_legal o proveedor_confiable) usa el
+      resultado ya calculado de esa regla en vez de repetir la comparación.
+
+    Las reglas cuya condición no es un lambda identificable, o que usa
+    nombres que no se pueden plegar, se llaman sin compilar. La semántica es
+    la de las condiciones originales, incluidos los valores por defecto de
+    cada datos.get() y los errores que lanzan con datos de tipo inesperado.
+
+    La puntuación parte de 100 y resta el impacto de cada regla activada
+    (las reglas positivas tienen impacto negativo), acotada a 0-100.
+    """
+
+    # Resultados propios (riesgo, impacto_total...), distintos de los del motor
+    formato_resultado = 'conocimiento'
+
+    def __init__(self, reglas: Optional[List[ReglaConocimiento]] = None):
+        """
+        Args:
+            reglas: Reglas a compilar (por defecto, las de reglas_base_conocimiento())
+        """
+        self.reglas = reglas_base_conocimiento() if reglas is None else list(reglas)
+        nombres = [regla.nombre for regla in self.reglas]
+        repetidos = sorted({nombre for nombre in nombres if nombres.count(nombre) > 1})
+        if repetidos:
+            raise ValueError(f"Reglas repetidas en la base de conocimiento: {', '.join(repetidos)}")
+
+        fuente, estadisticas, externas = self._generar()
+        self._instalar(fuente, estadisticas, externas, compile(fuente, '<base_conocimiento>', 'exec'))
+
+    @classmethod
+    def desde_artefacto(cls, reglas: List[ReglaConocimiento], artefacto: Dict[str, Any]) -> 'EvaluadorConocimiento':
+        """
+        Reconstruye un evaluador a partir de artefacto() sin volver a compilar
+
+        Args:
+            reglas: Las mismas reglas, en el mismo orden, con las que se generó
+            artefacto: Dict devuelto por artefacto() (se puede serializar con marshal)
+        """
+        evaluador = cls.__new__(cls)
+        evaluador.reglas = list(reglas)
+        evaluador._instalar(artefacto['fuente'], artefacto['estadisticas'],
+                            artefacto['externas'], artefacto['codigo'])
+        return evaluador
+
+    def artefacto(self) -> Dict[str, Any]:
+        """Código generado y compilado, con lo necesario para desde_artefacto()"""
+        return {
+            'fuente': self.fuente,
+            'estadisticas': dict(self.estadisticas),
+            'externas': list(self._externas),
+            'codigo': self._codigo
+        }
+
+    def _instalar(self, fuente: str, estadisticas: Dict[str, int], externas: List[int], codigo):
+        """Ejecuta el código generado y prepara la evaluación"""
+        self.fuente = fuente
+        self.estadisticas = estadisticas
+        self._externas = externas
+        self._codigo = codigo
+        espacio = {'_FALTA': _FALTA, '_CONDICIONES': [self.reglas[i].condicion for i in externas]}
+        exec(codigo, espacio)
+        self._evaluar_condiciones = espacio['evaluar_condiciones']
+        self.firma = hashlib.sha256(fuente.encode('utf-8')).hexdigest()
+
+    def _generar(self) -> Tuple[str, Dict[str, int], List[int]]:
+        """
+        Código fuente de evaluar_condiciones(datos), estadísticas de la
+        compilación e índices de las reglas que se llaman sin compilar
+        """
+        lecturas = _Lecturas()
+        expresiones: Dict[str, Optional[ast.expr]] = {}
+        for regla in self.reglas:
+            expresion = regla.expresion
+            if expresion is not None:
+                plegador = _Plegador(regla.parametro, regla.espacio)
+                expresion = plegador.visit(_copiar(expresion))
+                if plegador.libres or any(isinstance(n, _NODOS_NO_SOPORTADOS) for n in ast.walk(expresion)):
+                    expresion = None
+                else:
+                    expresion = lecturas.sustituir(expresion, regla.parametro)
+            expresiones[regla.nombre] = expresion
+
+        # Condición completa de cada regla -> variable con su resultado
+        condiciones = {}
+        for regla in self.reglas:
+            expresion = expresiones[regla.nombre]
+            if expresion is not None:
+                condiciones.setdefault(ast.dump(expresion), _variable_regla(regla.nombre))
+
+        codigo, dependencias, externas = {}, {}, []
+        reutilizadas = 0
+        for i, regla in enumerate(self.reglas):
+            variable = _variable_regla(regla.nombre)
+            expresion = expresiones[regla.nombre]
+            if expresion is None:
+                codigo[variable] = f"_CONDICIONES[{len(externas)}](datos)"
+                externas.append(i)
+                dependencias[variable] = set()
+                continue
+            igual = condiciones[ast.dump(expresion)]
+            if igual != variable:
+                codigo[variable] = igual
+                dependencias[variable] = {igual}
+                reutilizadas += 1
+                continue
+            reutilizador = _Reutilizador(condiciones, variable)
+            expresion = reutilizador.visit(expresion)
+            reutilizadas += len(reutilizador.usadas)
+            codigo[variable] = ast.unparse(expresion)
+            dependencias[variable] = reutilizador.usadas
+
+        variables = [_variable_regla(regla.nombre) for regla in self.reglas]
+        lineas = ["def evaluar_condiciones(datos):", "    _get = datos.get"]
+        lineas.extend(f"    {linea}" for linea in lecturas.sentencias())
+        lineas.extend(f"    {variable} = {codigo[variable]}" for variable in _orden_dependencias(variables, dependencias))
+        lineas.append(f"    return ({', '.join(variables)},)")
+
+        estadisticas = {
+            'reglas': len(self.reglas),
+            'sin_compilar': len(externas),
+            'lecturas_originales': lecturas.llamadas,
+            'campos_leidos': len(lecturas.campos),
+            'condiciones_reutilizadas': reutilizadas
+        }
+        return "\n".join(lineas) + "\n", estadisticas, externas
+
+    # ---------- evaluación ----------
+
+    def condiciones(self, datos_proveedor: Dict[str, Any]) -> tuple:
+        """Valor de cada condición, en el orden de self.reglas"""
+        return self._evaluar_condiciones(datos_proveedor)
+
+    def evaluar(self, datos_proveedor: Dict[str, Any], nivel_explicacion: str = 'full') -> Dict[str, Any]:
+        """
+        Evalúa un proveedor con todas las reglas de la base de conocimiento
+
+        Args:
+            datos_proveedor: Diccionario con los datos del proveedor
+            nivel_explicacion: 'none' (sin explicaciones), 'ids' (tuplas
+                (regla, impacto)) o 'full' (diccionarios con la justificación)
+
+        Returns:
+            Dict con riesgo, puntuacion, impacto_total, impacto_por_categoria,
+            explicaciones y total_reglas_activadas
+        """
+        if nivel_explicacion not in NIVELES_EXPLICACION:
+            raise ValueError(f"Nivel de explicación no válido: {nivel_explicacion!r}")
+        return self._resultado(self._evaluar_condiciones(datos_proveedor), nivel_explicacion)
+
+    def evaluar_referencia(self, datos_proveedor: Dict[str, Any], nivel_explicacion: str = 'full') -> Dict[str, Any]:
+        """Igual que evaluar() llamando a las condiciones originales una por una"""
+        if nivel_explicacion not in NIVELES_EXPLICACION:
+            raise ValueError(f"Nivel de explicación no válido: {nivel_explicacion!r}")
+        valores = tuple(regla.condicion(datos_proveedor) for regla in self.reglas)
+        return self._resultado(valores, nivel_explicacion)
+
+    def _resultado(self, valores: tuple, nivel_explicacion: str) -> Dict[str, Any]:
+        impacto_total = 0
+        por_categoria: Dict[str, int] = {}
+        explicaciones = []
+        activadas = 0
+        for regla, valor in zip(self.reglas, valores):
+            if not valor:
+                continue
+            activadas += 1
+            impacto_total += regla.impacto
+            por_categoria[regla.categoria] = por_categoria.get(regla.categoria, 0) + regla.impacto
+            if nivel_explicacion == 'full':
+                explicaciones.append({
+                    'regla': regla.nombre,
+                    'categoria': regla.categoria,
+                    'severidad': regla.severidad,
+                    'descripcion': regla.descripcion,
+                    'impacto': regla.impacto,
+                    'justificacion': regla.justificacion
+                })
+            elif nivel_explicacion == 'ids':
+                explicaciones.append((regla.nombre, regla.impacto))
+
+        puntuacion = max(0, min(100, 100 - impacto_total))
+        if puntuacion >= 80:
+            riesgo = 'BAJO'
+        elif puntuacion >= 60:
+            riesgo = 'MEDIO'
+        else:
+            riesgo = 'ALTO'
+
+        return {
+            'riesgo': riesgo,
+            'puntuacion': puntuacion,
+            'impacto_total': impacto_total,
+            'impacto_por_categoria': por_categoria,
+            'explicaciones': explicaciones,
+            'total_reglas_activadas': activadas
+        }
+
+
+def _copiar(nodo: ast.expr) -> ast.expr:
+    """Copia profunda de un árbol de ast (las transformaciones lo modifican)"""
+    return ast.parse(ast.unparse(nodo), mode='eval').body
+
+
+def _orden_dependencias(variables: List[str], dependencias: Dict[str, set]) -> List[str]:
+    """Orden de cálculo que respeta las dependencias y, si no, el orden de las reglas"""
+    orden, hechas = [], set()
+
+    def visitar(variable):
+        if variable in hechas:
+            return
+        hechas.add(variable)
+        for dependencia in sorted(dependencias[variable], key=variables.index):
+            visitar(dependencia)
+        orden.append(variable)
+
+    for variable in variables:
+        visitar(variable)
+    return orden
+
+
+_EVALUADOR_CONOCIMIENTO = None
+
+
+def evaluador_conocimiento() -> EvaluadorConocimiento:
+    """Evaluador compartido de la base de conocimiento, compilado en el primer uso"""
+    global _EVALUADOR_CONOCIMIENTO
+    if _EVALUADOR_CONOCIMIENTO is None:
+        _EVALUADOR_CONOCIMIENTO = EvaluadorConocimiento()
+    return _EVALUADOR_CONOCIMIENTO
+
+
+def evaluar_conocimiento(datos_proveedor: Dict[str, Any], nivel_explicacion: str = 'full') -> Dict[str, Any]:
+    """
+    Evalúa un proveedor con las reglas de knowledge/ compiladas
+
+    Args:
+        datos_proveedor: Diccionario con los datos del proveedor
+        nivel_explicacion: 'none', 'ids' o 'full' (ver EvaluadorConocimiento.evaluar)
+
+    Returns:
+        Dict con el resultado de EvaluadorConocimiento.evaluar
+    """
+    return evaluador_conocimiento().evaluar(datos_proveedor, nivel_explicacion)
@@ -0,0 +1,562 @@
+"""
+Base de conocimiento declarativa
+Carga las reglas desde un archivo JSON o TOML (umbrales con nombre y
+condiciones escritas como expresiones sobre `datos`), las compila con
+EvaluadorConocimiento y guarda el código compilado en disco, indexado por el
+hash del contenido del archivo, para que un reinicio no vuelva a compilar.
+Los archivos con formato 'motor' declaran en cambio las reglas de datos de
+MotorEvaluacionRiesgo y se compilan con EvaluadorCompilado
+"""
+
+import ast
+import builtins
+import copyreg
+import hashlib
+import json
+import marshal
+import os
+import sys
+import tempfile
+import threading
+from typing import Any, Callable, Dict, List, Mapping, Optional, Union
+
+from .compilado import EvaluadorCompilado
+from .conocimiento import EvaluadorConocimiento, ReglaConocimiento, reglas_base_conocimiento
+from .inference_engine import MotorEvaluacionRiesgo, DatosProveedor, Conclusion
+from .reglas import Fact, Rule, MATCH, P, reglas_de_clase
+
+
+# Archivo declarativo equivalente a los diccionarios REGLAS_* de knowledge/
+RUTA_BASE_DECLARADA = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'knowledge', 'base_conocimiento.json'
+)
+
+# Reglas de datos de MotorEvaluacionRiesgo en formato declarativo 'motor'
+RUTA_REGLAS_MOTOR = os.path.join(os.path.dirname(RUTA_BASE_DECLARADA), 'reglas_motor.json')
+
+# Cambia cuando cambia el código generado o el formato del artefacto: invalida las cachés
+VERSION_ARTEFACTO = 1
+
+# Funciones que pueden usar las condiciones, además de datos.get()
+FUNCIONES_PERMITIDAS = {
+    nombre: getattr(builtins, nombre)
+    for nombre in ('len', 'isinstance', 'list', 'dict', 'str', 'int', 'float', 'bool', 'abs', 'min', 'max', 'round')
+}
+
+_NODOS_PERMITIDOS = (
+    ast.Expression, ast.BoolOp, ast.And, ast.Or, ast.UnaryOp, ast.Not, ast.USub, ast.UAdd,
+    ast.BinOp, ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod,
+    ast.Compare, ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.In, ast.NotIn, ast.Is, ast.IsNot,
+    ast.IfExp, ast.Call, ast.Attribute, ast.Subscript, ast.Name, ast.Load, ast.Constant,
+    ast.List, ast.Tuple
+)
+
+_CAMPOS_REGLA = ('descripcion', 'condicion', 'impacto', 'categoria', 'severidad', 'justificacion')
+
+# Condiciones de campo del formato 'motor': comparaciones sin llamadas ni atributos
+_NODOS_PERMITIDOS_MOTOR = (
+    ast.Expression, ast.BoolOp, ast.And, ast.Or, ast.UnaryOp, ast.Not, ast.USub, ast.UAdd,
+    ast.Compare, ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.In, ast.NotIn,
+    ast.Name, ast.Load, ast.Constant, ast.List, ast.Tuple
+)
+
+_CAMPOS_REGLA_MOTOR = ('codigo', 'descripcion', 'campos', 'impacto', 'alertas', 'factores', 'conclusiones')
+
+
+class _CondicionDeclarada:
+    """Condición de un archivo declarativo como función; se compila en la primera llamada"""
+
+    def __init__(self, texto: str, espacio: Mapping[str, Any]):
+        self.texto = texto
+        self.espacio = espacio
+        self._funcion: Optional[Callable] = None
+
+    def __call__(self, datos):
+        if self._funcion is None:
+            self._funcion = eval(compile(f"lambda datos: ({self.texto})", '<condicion>', 'eval'),
+                                 dict(self.espacio))
+        return self._funcion(datos)
+
+    def __repr__(self):
+        return f"<condición {self.texto!r}>"
+
+
+# ========== LECTURA Y VALIDACIÓN ==========
+
+def leer_definicion(ruta: str) -> Dict[str, Any]:
+    """
+    Lee un archivo de reglas .json o .toml
+
+    Returns:
+        Dict con 'umbrales' (opcional) y 'reglas'
+    """
+    with open(ruta, 'rb') as f:
+        contenido = f.read()
+    return _decodificar(contenido, ruta)
+
+
+def _decodificar(contenido: bytes, ruta: str) -> Dict[str, Any]:
+    extension = os.path.splitext(ruta)[1].lower()
+    if extension == '.json':
+        return json.loads(contenido.decode('utf-8'))
+    if extension == '.toml':
+        import tomllib
+        return tomllib.loads(contenido.decode('utf-8'))
+    raise ValueError(f"Formato de reglas no soportado: {extension or ruta!r} (use .json o .toml)")
+
+
+def _espacio(umbrales: Mapping[str, Any]) -> Dict[str, Any]:
+    """Nombres visibles para las condiciones: los umbrales y las funciones permitidas"""
+    espacio = dict(umbrales)
+    espacio['__builtins__'] = FUNCIONES_PERMITIDAS
+    return espacio
+
+
+def _validar_condicion(nombre: str, texto: Any, umbrales: Mapping[str, Any]) -> ast.expr:
+    """Árbol de la condición de una regla, si solo usa construcciones permitidas"""
+    if not isinstance(texto, str):
+        raise ValueError(f"La condición de la regla {nombre!r} debe ser un texto")
+    try:
+        arbol = ast.parse(texto.strip(), f'<regla {nombre}>', mode='eval')
+    except SyntaxError as e:
+        raise ValueError(f"Condición inválida en la regla {nombre!r}: {e.msg}") from None
+
+    for nodo in ast.walk(arbol):
+        if not isinstance(nodo, _NODOS_PERMITIDOS):
+            raise ValueError(f"Construcción no permitida en la regla {nombre!r}: {type(nodo).__name__}")
+        if isinstance(nodo, ast.Name) and nodo.id != 'datos' and nodo.id not in umbrales \
+                and nodo.id not in FUNCIONES_PERMITIDAS:
+            raise ValueError(f"Nombre desconocido en la regla {nombre!r}: {nodo.id}")
+        if isinstance(nodo, ast.Attribute) and not (
+                nodo.attr == 'get' and isinstance(nodo.value, ast.Name) and nodo.value.id == 'datos'):
+            raise ValueError(f"Solo se permite el atributo datos.get en la regla {nombre!r}")
+        if isinstance(nodo, ast.Call):
+            if nodo.keywords:
+                raise ValueError(f"Argumentos con nombre no permitidos en la regla {nombre!r}")
+            funcion = nodo.func
+            if not isinstance(funcion, ast.Attribute) and not (
+                    isinstance(funcion, ast.Name) and funcion.id in FUNCIONES_PERMITIDAS):
+                raise ValueError(f"Llamada no permitida en la regla {nombre!r}: {ast.unparse(funcion)}")
+    return arbol.body
+
+
+def reglas_declaradas(definicion: Mapping[str, Any]) -> List[ReglaConocimiento]:
+    """
+    Valida una definición declarativa y la convierte en reglas listas para compilar
+
+    Args:
+        definicion: Dict con 'umbrales' (nombre -> valor) y 'reglas'
+            (nombre -> descripcion, condicion, impacto, categoria, severidad,
+            justificacion)
+
+    Raises:
+        ValueError: Si la definición o alguna condición no es válida
+    """
+    umbrales = definicion.get('umbrales', {})
+    reglas = definicion.get('reglas')
+    if not isinstance(umbrales, dict) or not isinstance(reglas, dict) or not reglas:
+        raise ValueError("La definición debe tener una tabla 'reglas' no vacía y 'umbrales' opcional")
+    conflictos = sorted(set(umbrales) & (set(FUNCIONES_PERMITIDAS) | {'datos'}))
+    if conflictos:
+        raise ValueError(f"Nombres de umbral reservados: {', '.join(conflictos)}")
+
+    espacio = _espacio(umbrales)
+    convertidas = []
+    for nombre, regla in reglas.items():
+        if not isinstance(regla, dict):
+            raise ValueError(f"La regla {nombre!r} debe ser una tabla")
+        desconocidos = sorted(set(regla) - set(_CAMPOS_REGLA))
+        if desconocidos:
+            raise ValueError(f"Campos desconocidos en la regla {nombre!r}: {', '.join(desconocidos)}")
+        impacto = regla.get('impacto', 0)
+        if isinstance(impacto, bool) or not isinstance(impacto, int):
+            raise ValueError(f"El impacto de la regla {nombre!r} debe ser un entero")
+
+        texto = regla.get('condicion')
+        convertidas.append(ReglaConocimiento(
+            nombre=nombre,
+            categoria=regla.get('categoria', ''),
+            severidad=regla.get('severidad', ''),
+            impacto=impacto,
+            descripcion=regla.get('descripcion', ''),
+            justificacion=regla.get('justificacion', ''),
+            condicion=_CondicionDeclarada(texto, espacio),
+            expresion=_validar_condicion(nombre, texto, umbrales),
+            parametro='datos',
+            espacio=espacio
+        ))
+    return convertidas
+
+
+# ========== CACHÉ DEL CÓDIGO COMPILADO ==========
+
+def _ruta_cache(ruta: str, firma: str, directorio_cache: Optional[str]) -> str:
+    directorio = directorio_cache or os.path.join(os.path.dirname(os.path.abspath(ruta)), '__pycache__')
+    base = os.path.basename(ruta)
+    return os.path.join(directorio, f"{base}.{firma}.{sys.implementation.cache_tag}.reglas")
+
+
+def _leer_cache(ruta_cache: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(ruta_cache, 'rb') as f:
+            artefacto = marshal.load(f)
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if not isinstance(artefacto, dict) or artefacto.get('version') != VERSION_ARTEFACTO:
+        return None
+    return artefacto
+
+
+def _escribir_cache(ruta_cache: str, artefacto: Dict[str, Any]):
+    """Escribe el artefacto de forma atómica y borra los de versiones anteriores del archivo"""
+    directorio = os.path.dirname(ruta_cache)
+    sufijo = f".{sys.implementation.cache_tag}.reglas"
+    # '<archivo de reglas>.' sin la firma: identifica los artefactos del mismo archivo
+    prefijo = os.path.basename(ruta_cache)[:-len(sufijo)].rsplit('.', 1)[0] + '.'
+    temporal = None
+    try:
+        os.makedirs(directorio, exist_ok=True)
+        with tempfile.NamedTemporaryFile('wb', dir=directorio, delete=False, suffix='.tmp') as f:
+            temporal = f.name
+            marshal.dump(artefacto, f)
+        os.replace(temporal, ruta_cache)
+    except Exception:
+        # La caché es opcional: si no se puede escribir (sin permisos, disco
+        # lleno, un valor que marshal no admite) se compila en cada arranque
+        if temporal is not None:
+            try:
+                os.remove(temporal)
+            except OSError:
+                pass
+        return
+
+    for nombre in os.listdir(directorio):
+        anterior = os.path.join(directorio, nombre)
+        if nombre.startswith(prefijo) and nombre.endswith(sufijo) and anterior != ruta_cache:
+            try:
+                os.remove(anterior)
+            except OSError:
+                pass
+
+
+def _reglas_de_artefacto(artefacto: Dict[str, Any]) -> List[ReglaConocimiento]:
+    espacio = _espacio(artefacto['umbrales'])
+    return [
+        ReglaConocimiento(nombre, categoria, severidad, impacto, descripcion, justificacion,
+                          _CondicionDeclarada(texto, espacio), None, 'datos', espacio)
+        for nombre, categoria, severidad, impacto, descripcion, justificacion, texto in artefacto['reglas']
+    ]
+
+
+def cargar_reglas(ruta: str = RUTA_BASE_DECLARADA, directorio_cache: Optional[str] = None,
+                  usar_cache: bool = True) -> EvaluadorConocimiento:
+    """
+    Evaluador compilado de un archivo de reglas declarativo
+
+    Si existe un artefacto en caché para el mismo contenido (hash SHA-256)
+    se reconstruye el evaluador sin leer la definición ni compilar; si no,
+    se compila y se guarda el artefacto.
+
+    Args:
+        ruta: Archivo .json o .toml con la definición de las reglas
+        directorio_cache: Directorio de la caché (por defecto, __pycache__
+            junto al archivo de reglas)
+        usar_cache: False para compilar siempre sin leer ni escribir la caché
+
+    Returns:
+        EvaluadorConocimiento listo para evaluar proveedores
+    """
+    with open(ruta, 'rb') as f:
+        contenido = f.read()
+    ruta_cache = _ruta_cache(ruta, hashlib.sha256(contenido).hexdigest(), directorio_cache)
+
+    if usar_cache:
+        artefacto = _leer_cache(ruta_cache)
+        if artefacto is not None:
+            return EvaluadorConocimiento.desde_artefacto(_reglas_de_artefacto(artefacto), artefacto)
+
+    definicion = _decodificar(contenido, ruta)
+    evaluador = EvaluadorConocimiento(reglas_declaradas(definicion))
+    if usar_cache:
+        artefacto = evaluador.artefacto()
+        artefacto['version'] = VERSION_ARTEFACTO
+        artefacto['umbrales'] = definicion.get('umbrales', {})
+        artefacto['reglas'] = [
+            (r.nombre, r.categoria, r.severidad, r.impacto, r.descripcion, r.justificacion, r.condicion.texto)
+            for r in evaluador.reglas
+        ]
+        _escribir_cache(ruta_cache, artefacto)
+    return evaluador
+
+
+# ========== REGLAS DEL MOTOR ==========
+
+class _ClaseMotorDeclarada(type(MotorEvaluacionRiesgo)):
+    """
+    Metaclase de los motores generados con motor_declarado()
+
+    Una clase creada en tiempo de ejecución no se puede importar por nombre;
+    se serializa con su definición (ver copyreg más abajo) para que los
+    procesos trabajadores de evaluar_lote_paralelo reconstruyan la misma
+    clase.
+    """
+
+
+_MOTORES_DECLARADOS: Dict[str, type] = {}
+_LOCK_MOTORES = threading.Lock()
+
+
+def _es_regla_de_datos(regla) -> bool:
+    """Si la regla solo lee DatosProveedor (las que sustituye el formato 'motor')"""
+    return all(isinstance(p, Fact) and type(p) is DatosProveedor for p in regla)
+
+
+def _validar_condicion_campo(nombre: str, campo: str, variable: str, texto: Any,
+                             umbrales: Mapping[str, Any]) -> str:
+    """
+    Lambda de la condición de un campo, con los umbrales sustituidos por su valor
+
+    Los umbrales quedan como constantes del código del predicado, que es de
+    donde la tabla de decisión lee los puntos de corte.
+    """
+    if not isinstance(texto, str):
+        raise ValueError(f"La condición de '{campo}' en la regla {nombre!r} debe ser un texto")
+    try:
+        arbol = ast.parse(texto.strip(), f'<regla {nombre}>', mode='eval')
+    except SyntaxError as e:
+        raise ValueError(f"Condición inválida en la regla {nombre!r}: {e.msg}") from None
+
+    for nodo in ast.walk(arbol):
+        if not isinstance(nodo, _NODOS_PERMITIDOS_MOTOR):
+            raise ValueError(f"Construcción no permitida en la regla {nombre!r}: {type(nodo).__name__}")
+        if isinstance(nodo, ast.Name) and nodo.id != variable and nodo.id not in umbrales:
+            raise ValueError(f"Nombre desconocido en la regla {nombre!r}: {nodo.id}")
+
+    class _Sustituir(ast.NodeTransformer):
+        def visit_Name(self, nodo):
+            if nodo.id in umbrales:
+                return ast.copy_location(ast.Constant(umbrales[nodo.id]), nodo)
+            return nodo
+
+    expresion = _Sustituir().visit(arbol).body
+    return f"lambda {variable}: ({ast.unparse(expresion)})"
+
+
+def _patron_declarado(nombre: str, campos: Any, umbrales: Mapping[str, Any]) -> Dict[str, Any]:
+    """Restricciones de DatosProveedor de una regla: literales o MATCH.variable & P(condición)"""
+    if not isinstance(campos, dict) or not campos:
+        raise ValueError(f"La regla {nombre!r} debe tener una tabla 'campos' no vacía")
+
+    patron = {}
+    for campo, restriccion in campos.items():
+        if not campo.isidentifier() or '__' in campo:
+            raise ValueError(f"Campo no válido en la regla {nombre!r}: {campo!r}")
+        if not isinstance(restriccion, dict):
+            if not isinstance(restriccion, (bool, int, float, str)):
+                raise ValueError(f"El valor de '{campo}' en la regla {nombre!r} debe ser un literal o una tabla")
+            patron[campo] = restriccion
+            continue
+        variable = restriccion.get('variable')
+        if set(restriccion) - {'variable', 'condicion'} or not isinstance(variable, str) \
+                or not variable.isidentifier() or variable.startswith('_') or variable in umbrales:
+            raise ValueError(
+                f"La restricción de '{campo}' en la regla {nombre!r} necesita 'variable' (identificador "
+                "que no sea un umbral) y 'condicion' opcional"
+            )
+        if 'condicion' in restriccion:
+            codigo = _validar_condicion_campo(nombre, campo, variable, restriccion['condicion'], umbrales)
+            predicado = eval(compile(codigo, f'<regla {nombre}>', 'eval'), {'__builtins__': {}})
+            patron[campo] = getattr(MATCH, variable) & P(predicado)
+        else:
+            patron[campo] = getattr(MATCH, variable)
+    return patron
+
+
+def _efectos_declarados(nombre: str, regla: Mapping[str, Any]) -> tuple:
+    """Código, impacto, alertas, factores y conclusiones de una regla, validados"""
+    codigo = regla.get('codigo', nombre)
+    impacto = regla.get('impacto', 0)
+    alertas = regla.get('alertas', [])
+    factores = regla.get('factores', [])
+    conclusiones = regla.get('conclusiones', [])
+
+    if not isinstance(codigo, str):
+        raise ValueError(f"El código de la regla {nombre!r} debe ser un texto")
+    if isinstance(impacto, bool) or not isinstance(impacto, int):
+        raise ValueError(f"El impacto de la regla {nombre!r} debe ser un entero")
+    if not isinstance(alertas, list) or not all(
+            isinstance(a, list) and len(a) == 2 and all(isinstance(t, str) for t in a) for a in alertas):
+        raise ValueError(f"Las alertas de la regla {nombre!r} deben ser pares [nivel, mensaje]")
+    if not isinstance(factores, list) or not all(isinstance(f, str) for f in factores):
+        raise ValueError(f"Los factores de la regla {nombre!r} deben ser textos")
+    if not isinstance(conclusiones, list) or not all(
+            isinstance(c, dict) and c and all(k.isidentifier() and '__' not in k and isinstance(v, str)
+                                              for k, v in c.items())
+            for c in conclusiones):
+        raise ValueError(f"Las conclusiones de la regla {nombre!r} deben ser tablas de textos")
+    return (codigo, impacto, tuple(tuple(a) for a in alertas), tuple(factores),
+            tuple(dict(c) for c in conclusiones))
+
+
+def _cuerpo_regla(nombre: str, descripcion: str, codigo: str, impacto: int, alertas: tuple,
+                  factores: tuple, conclusiones: tuple) -> Callable:
+    """Cuerpo de una regla declarada, con los mismos efectos que las reglas escritas a mano"""
+    def cuerpo(self, **variables):
+        self.registrar_explicacion(codigo, impacto, **variables)
+        for nivel, mensaje in alertas:
+            self.registrar_alerta(nivel, mensaje)
+        for conclusion in conclusiones:
+            self.declare(Conclusion(**conclusion))
+        self.factores_criticos.extend(factores)
+
+    cuerpo.__name__ = cuerpo.__qualname__ = nombre
+    cuerpo.__doc__ = descripcion
+    return cuerpo
+
+
+def motor_declarado(definicion: Mapping[str, Any]) -> type:
+    """
+    Clase de motor con las reglas de datos de una definición en formato 'motor'
+
+    La clase hereda de MotorEvaluacionRiesgo las reglas de decisión final y
+    el cálculo de la puntuación; sus reglas de datos (las que solo leen
+    DatosProveedor) son exactamente las declaradas. La misma definición
+    devuelve siempre la misma clase.
+
+    Args:
+        definicion: Dict con 'formato': 'motor', 'umbrales' (nombre -> valor)
+            y 'reglas' (nombre -> codigo, descripcion, campos, impacto,
+            alertas, factores, conclusiones)
+
+    Returns:
+        Subclase de MotorEvaluacionRiesgo
+
+    Raises:
+        ValueError: Si la definición o alguna regla no es válida
+    """
+    if definicion.get('formato') != 'motor':
+        raise ValueError("La definición no tiene formato 'motor'")
+    umbrales = definicion.get('umbrales', {})
+    reglas = definicion.get('reglas')
+    if not isinstance(umbrales, dict) or not isinstance(reglas, dict) or not reglas:
+        raise ValueError("La definición debe tener una tabla 'reglas' no vacía y 'umbrales' opcional")
+    for umbral, valor in umbrales.items():
+        if not umbral.isidentifier() or isinstance(valor, bool) or not isinstance(valor, (int, float, str)):
+            raise ValueError(f"El umbral {umbral!r} debe ser un número o un texto con nombre de identificador")
+
+    clave = hashlib.sha256(json.dumps(definicion, sort_keys=True).encode('utf-8')).hexdigest()
+    with _LOCK_MOTORES:
+        if clave in _MOTORES_DECLARADOS:
+            return _MOTORES_DECLARADOS[clave]
+
+    # Las reglas de datos heredadas se anulan: solo quedan las declaradas
+    de_datos = {r._wrapped.__name__ for r in reglas_de_clase(MotorEvaluacionRiesgo) if _es_regla_de_datos(r)}
+    espacio: Dict[str, Any] = dict.fromkeys(de_datos)
+    for nombre, regla in reglas.items():
+        if not isinstance(regla, dict):
+            raise ValueError(f"La regla {nombre!r} debe ser una tabla")
+        desconocidos = sorted(set(regla) - set(_CAMPOS_REGLA_MOTOR))
+        if desconocidos:
+            raise ValueError(f"Campos desconocidos en la regla {nombre!r}: {', '.join(desconocidos)}")
+        if not nombre.isidentifier() or nombre.startswith('_') or (
+                hasattr(MotorEvaluacionRiesgo, nombre) and nombre not in de_datos):
+            raise ValueError(f"Nombre de regla no válido: {nombre!r}")
+
+        patron = _patron_declarado(nombre, regla.get('campos'), umbrales)
+        cuerpo = _cuerpo_regla(nombre, regla.get('descripcion', ''), *_efectos_declarados(nombre, regla))
+        espacio[nombre] = Rule(DatosProveedor(**patron))(cuerpo)
+
+    espacio['__module__'] = __name__
+    espacio['__doc__'] = "Motor con reglas de datos declaradas en formato 'motor'"
+    espacio['definicion'] = json.loads(json.dumps(definicion))
+    motor_cls = _ClaseMotorDeclarada(f"MotorDeclarado_{clave[:12]}", (MotorEvaluacionRiesgo,), espacio)
+
+    with _LOCK_MOTORES:
+        return _MOTORES_DECLARADOS.setdefault(clave, motor_cls)
+
+
+copyreg.pickle(_ClaseMotorDeclarada, lambda motor_cls: (motor_declarado, (motor_cls.definicion,)))
+
+
+def cargar_reglas_motor(ruta: str = RUTA_REGLAS_MOTOR) -> EvaluadorCompilado:
+    """
+    Evaluador compilado de un archivo de reglas en formato 'motor'
+
+    Args:
+        ruta: Archivo .json o .toml con la definición de las reglas
+
+    Returns:
+        EvaluadorCompilado de la clase de motor_declarado(); su motor_cls
+        también sirve para evaluar con experta o el motor nativo
+    """
+    return EvaluadorCompilado(motor_declarado(leer_definicion(ruta)))
+
+
+def cargar_evaluador(ruta: str, **opciones) -> Union[EvaluadorCompilado, EvaluadorConocimiento]:
+    """
+    Evaluador de un archivo de reglas según su formato
+
+    Args:
+        ruta: Archivo .json o .toml
+        **opciones: directorio_cache, usar_cache (solo para bases de conocimiento)
+
+    Returns:
+        EvaluadorCompilado si el archivo declara 'formato': 'motor'; si no,
+        EvaluadorConocimiento (ver cargar_reglas)
+    """
+    definicion = leer_definicion(ruta)
+    if isinstance(definicion, dict) and definicion.get('formato') == 'motor':
+        return EvaluadorCompilado(motor_declarado(definicion))
+    return cargar_reglas(ruta, **opciones)
+
+
+# ========== EXPORTACIÓN ==========
+
+def exportar_base_conocimiento(ruta: str = RUTA_BASE_DECLARADA,
+                               reglas: Optional[List[ReglaConocimiento]] = None) -> Dict[str, Any]:
+    """
+    Escribe en JSON la definición declarativa de reglas de knowledge/
+
+    Las condiciones se guardan como expresiones sobre `datos` y los
+    diccionarios globales que usan (UMBRALES_*, CRITERIOS_*) como umbrales.
+
+    Args:
+        ruta: Archivo .json de destino
+        reglas: Reglas a exportar (por defecto, reglas_base_conocimiento())
+
+    Returns:
+        Dict con la definición escrita
+
+    Raises:
+        ValueError: Si alguna condición no es un lambda exportable
+    """
+    reglas = reglas_base_conocimiento() if reglas is None else reglas
+    umbrales: Dict[str, Any] = {}
+    definidas: Dict[str, Dict[str, Any]] = {}
+
+    for regla in reglas:
+        if regla.expresion is None:
+            raise ValueError(f"La condición de la regla {regla.nombre!r} no se puede exportar")
+        expresion = ast.parse(ast.unparse(regla.expresion), mode='eval').body
+        for nodo in ast.walk(expresion):
+            if not isinstance(nodo, ast.Name):
+                continue
+            if nodo.id == regla.parametro:
+                nodo.id = 'datos'
+            elif nodo.id in regla.espacio and nodo.id not in FUNCIONES_PERMITIDAS:
+                umbrales[nodo.id] = regla.espacio[nodo.id]
+        definidas[regla.nombre] = {
+            'descripcion': regla.descripcion,
+            'condicion': ast.unparse(expresion),
+            'impacto': regla.impacto,
+            'categoria': regla.categoria,
+            'severidad': regla.severidad,
+            'justificacion': regla.justificacion
+        }
+
+    definicion = {'umbrales': umbrales, 'reglas': definidas}
+    reglas_declaradas(definicion)
+    with open(ruta, 'w', encoding='utf-8') as f:
+        json.dump(definicion, f, ensure_ascii=False, indent=2)
+        f.write('\n')
+    return definicion
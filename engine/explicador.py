@@ -3,8 +3,14 @@ Módulo de explicación para trazabilidad de decisiones
 Proporciona explicaciones legibles sobre cómo el sistema llegó a sus conclusiones
 """
 
-from typing import List, Dict, Any
-import pandas as pd
+from typing import List, Dict, Any, Optional, TYPE_CHECKING
+
+from .plantillas import renderizar_explicaciones, renderizar_resultado
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from .compilado import EvaluadorCompilado
 
 
 class ExplicadorDecisiones:
@@ -13,6 +19,19 @@ class ExplicadorDecisiones:
     del sistema experto
     """
     
+    @staticmethod
+    def completar_textos(resultado: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Genera los textos de un resultado evaluado con nivel de explicación 'ids'
+        
+        Args:
+            resultado: Resultado de la evaluación (cualquier nivel)
+            
+        Returns:
+            Dict con explicaciones y alertas completas, como en el nivel 'full'
+        """
+        return renderizar_resultado(resultado)
+    
     @staticmethod
     def generar_resumen_ejecutivo(resultado: Dict[str, Any]) -> str:
         """
@@ -45,7 +64,7 @@ class ExplicadorDecisiones:
         return resumen
     
     @staticmethod
-    def generar_explicacion_detallada(explicaciones: List[Dict[str, Any]]) -> pd.DataFrame:
+    def generar_explicacion_detallada(explicaciones: List[Dict[str, Any]]) -> 'pd.DataFrame':
         """
         Convierte las explicaciones en un DataFrame para visualización
         
@@ -55,10 +74,13 @@ class ExplicadorDecisiones:
         Returns:
             pd.DataFrame: DataFrame con las explicaciones
         """
+        # pandas solo se carga cuando se pide la tabla de explicaciones
+        import pandas as pd
+        
         if not explicaciones:
             return pd.DataFrame(columns=['Regla', 'Razonamiento', 'Impacto', 'Hora'])
         
-        df = pd.DataFrame(explicaciones)
+        df = pd.DataFrame(renderizar_explicaciones(explicaciones))
         df = df.rename(columns={
             'regla': 'Regla',
             'razonamiento': 'Razonamiento',
@@ -88,7 +110,7 @@ class ExplicadorDecisiones:
         narrativa = "### 🔍 Cadena de Razonamiento\n\n"
         narrativa += "El sistema evaluó al proveedor siguiendo esta secuencia:\n\n"
         
-        for i, exp in enumerate(explicaciones, 1):
+        for i, exp in enumerate(renderizar_explicaciones(explicaciones), 1):
             narrativa += f"**{i}. {exp['regla']}** _(Impacto: -{exp['impacto']} puntos)_\n"
             narrativa += f"   {exp['razonamiento']}\n\n"
         
@@ -148,6 +170,44 @@ Aunque no hay factores críticos, se recomienda:
         
         return plan
     
+    @staticmethod
+    def generar_puntos_inflexion(datos_proveedor: Dict[str, Any],
+                                 evaluador: Optional['EvaluadorCompilado'] = None) -> str:
+        """
+        Genera el análisis de sensibilidad: qué valor de cada atributo
+        cambiaría el nivel de riesgo o la puntuación
+        
+        Args:
+            datos_proveedor: Datos del proveedor evaluado
+            evaluador: Evaluador compilado con el que se evaluó (por defecto,
+                el de MotorEvaluacionRiesgo)
+            
+        Returns:
+            str: Sección con los puntos de inflexión
+        """
+        from .sensibilidad import analizar_sensibilidad
+        
+        analisis = analizar_sensibilidad(datos_proveedor, evaluador)
+        
+        seccion = "### 🎯 Puntos de Inflexión\n\n"
+        
+        if not analisis['puntos']:
+            seccion += "Ningún cambio en un solo atributo altera el nivel de riesgo ni la puntuación.\n"
+        else:
+            seccion += "Cambios en un solo atributo (manteniendo el resto) que alterarían la evaluación:\n\n"
+            for punto in analisis['puntos']:
+                icono = "🔺" if punto['cambia_riesgo'] else "▫️"
+                seccion += f"- {icono} {punto['descripcion']} (valor actual: {punto['valor_actual']})\n"
+        
+        if analisis['campos_sin_efecto']:
+            seccion += (
+                f"\n_Sin puntos de inflexión posibles para {', '.join(analisis['campos_sin_efecto'])}: "
+                "sus reglas comparan el campo con una función en lugar de usar P() y no pueden "
+                "activarse, así que ningún valor de estos campos cambia la evaluación._\n"
+            )
+        
+        return seccion
+    
     @staticmethod
     def generar_metricas_visuales(resultado: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -159,6 +219,8 @@ Aunque no hay factores críticos, se recomienda:
         Returns:
             Dict con datos para gráficos
         """
+        resultado = renderizar_resultado(resultado)
+        
         # Distribución de impacto por categoría
         categorias = {'Financiero': 0, 'Operacional': 0, 'Legal': 0, 'Reputacional': 0}
         
@@ -197,6 +259,8 @@ Aunque no hay factores críticos, se recomienda:
         Returns:
             str: Informe completo en markdown
         """
+        resultado = renderizar_resultado(resultado)
+        
         informe = "# 📋 INFORME DE EVALUACIÓN DE RIESGO DE PROVEEDOR\n\n"
         informe += f"**Proveedor:** {datos_proveedor.get('nombre', 'No especificado')}\n"
         informe += f"**Fecha de Evaluación:** {datos_proveedor.get('fecha_evaluacion', 'N/A')}\n"
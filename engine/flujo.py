@@ -0,0 +1,501 @@
+"""
+Evaluación de archivos de proveedores en flujo
+Lee CSV o JSONL por bloques, convierte cada campo al tipo que espera
+DatosProveedor, evalúa el bloque con el backend vectorizado y escribe los
+resultados en JSONL o CSV sin acumular el archivo en memoria
+"""
+
+import json
+import sys
+import time
+from datetime import datetime
+from itertools import islice
+from typing import Any, Callable, Dict, Iterator, List, Optional, TextIO
+
+import numpy as np
+import pandas as pd
+
+from .compilado import EvaluadorCompilado
+from .registro import VersionReglas, registro_reglas
+from .vectorizado import evaluar_dataframe
+
+
+# Tipo de cada campo de DatosProveedor que leen las reglas del motor
+TIPOS_CAMPOS = {
+    'liquidez_corriente': 'numero',
+    'endeudamiento': 'numero',
+    'rentabilidad': 'numero',
+    'historial_pagos': 'numero',
+    'certificacion_calidad': 'booleano',
+    'tiempo_mercado': 'numero',
+    'capacidad_produccion': 'numero',
+    'tasa_defectos': 'numero',
+    'cumplimiento_entregas': 'numero',
+    'cumplimiento_legal': 'booleano',
+    'industria': 'texto',
+    'certificacion_ambiental': 'booleano',
+    'seguros_vigentes': 'booleano',
+    'calificacion_mercado': 'numero',
+    'quejas_clientes': 'numero',
+    'referencias_positivas': 'numero'
+}
+
+# Textos aceptados como booleanos (sin distinguir mayúsculas); el resto cuenta como campo ausente
+_BOOLEANOS = {
+    'true': True, 'verdadero': True, 'si': True, 'sí': True, 'yes': True, 't': True, 's': True, 'y': True, '1': True,
+    '1.0': True,
+    'false': False, 'falso': False, 'no': False, 'f': False, 'n': False, '0': False, '0.0': False
+}
+
+FORMATOS = ('csv', 'jsonl')
+
+# La entrada admite además el archivo binario de engine.binario (.prov)
+FORMATOS_ENTRADA = FORMATOS + ('binario',)
+
+# La salida admite además los formatos por columnas de engine.columnar
+FORMATOS_SALIDA = FORMATOS + ('columnar', 'parquet', 'npz')
+
+# Columnas de los datos de entrada que identifican al proveedor en la salida
+COLUMNAS_ID = ('id', 'id_proveedor', 'nombre')
+
+COLUMNAS_RESULTADO = ('riesgo_final', 'puntuacion', 'recomendacion', 'total_reglas_activadas',
+                      'reglas_activadas', 'factores_criticos', 'version_reglas')
+
+BACKENDS_FLUJO = ('vectorizado', 'compilado')
+
+
+def detectar_formato(ruta: str, formato: Optional[str] = None, formatos: tuple = FORMATOS) -> str:
+    """
+    Formato indicado o deducido de la extensión (.csv, .jsonl, .ndjson, .prov, .npz)
+
+    .parquet se deduce como 'columnar': Parquet si pyarrow está instalado y
+    npz si no.
+    """
+    if formato is None:
+        extension = ruta.rstrip('/\\').rsplit('.', 1)[-1].lower() if '.' in ruta else ''
+        formato = {'ndjson': 'jsonl', 'prov': 'binario', 'parquet': 'columnar'}.get(extension, extension)
+    if formato not in formatos:
+        raise ValueError(f"Formato no soportado: {formato or ruta!r} (use {', '.join(formatos)})")
+    return formato
+
+
+# ========== LECTURA ==========
+
+def coercionar_bloque(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convierte las columnas de los campos del motor a su tipo
+
+    Los números se leen con pd.to_numeric y los booleanos con los textos de
+    _BOOLEANOS; un valor vacío o que no se puede convertir queda como NaN o
+    None, que las reglas tratan igual que un campo ausente. industria se
+    conserva tal cual (las reglas distinguen mayúsculas). Las demás columnas
+    no se modifican.
+    """
+    for campo, tipo in TIPOS_CAMPOS.items():
+        if campo not in df.columns:
+            continue
+        serie = df[campo]
+        if tipo == 'numero':
+            if serie.dtype == bool:
+                serie = serie.astype(np.int64)
+            df[campo] = pd.to_numeric(serie, errors='coerce').astype(np.float64)
+        elif tipo == 'booleano':
+            if serie.dtype == bool:
+                continue
+            # Pocos valores distintos por columna: se traduce cada uno una vez
+            codigos, unicos = pd.factorize(serie, use_na_sentinel=True)
+            traducidos = np.array([_BOOLEANOS.get(str(v).strip().lower()) for v in unicos] + [None], dtype=object)
+            valores = traducidos[codigos]
+            # Sin ausentes la columna es booleana; con ausentes, objeto con None
+            df[campo] = valores.astype(bool) if all(v is not None for v in valores) else valores
+        else:
+            df[campo] = serie.astype(object).where(serie.notna(), None)
+    return df
+
+
+def leer_bloques(entrada, formato: str, tamano_bloque: int = 50_000) -> Iterator[pd.DataFrame]:
+    """
+    Lee un archivo de proveedores por bloques de filas ya convertidas
+
+    Args:
+        entrada: Ruta o archivo de texto abierto
+        formato: 'csv' o 'jsonl'
+        tamano_bloque: Filas por bloque (la memoria usada es proporcional)
+
+    Yields:
+        pd.DataFrame con hasta tamano_bloque filas y columna 'fila' (posición en la entrada)
+    """
+    if tamano_bloque < 1:
+        raise ValueError("El tamaño de bloque debe ser al menos 1")
+    inicio = 0
+    for bloque in (_bloques_csv if formato == 'csv' else _bloques_jsonl)(entrada, tamano_bloque):
+        bloque.index = pd.RangeIndex(inicio, inicio + len(bloque))
+        bloque.insert(0, 'fila', bloque.index.to_numpy())
+        inicio += len(bloque)
+        yield coercionar_bloque(bloque)
+
+
+def _bloques_csv(entrada, tamano_bloque: int) -> Iterator[pd.DataFrame]:
+    # El lector de pandas convierte los números en C; los booleanos, textos e
+    # identificadores se leen como texto y coercionar_bloque termina la conversión
+    como_texto = {campo: str for campo, tipo in TIPOS_CAMPOS.items() if tipo != 'numero'}
+    como_texto.update((columna, str) for columna in COLUMNAS_ID)
+    with pd.read_csv(entrada, chunksize=tamano_bloque, dtype=como_texto, keep_default_na=False,
+                     na_values=[''], encoding='utf-8') as lector:
+        yield from lector
+
+
+def _bloques_jsonl(entrada, tamano_bloque: int) -> Iterator[pd.DataFrame]:
+    archivo = open(entrada, encoding='utf-8') if isinstance(entrada, str) else entrada
+    try:
+        numero = 0
+        while True:
+            lineas = list(islice(archivo, tamano_bloque))
+            if not lineas:
+                return
+            registros = []
+            for linea in lineas:
+                numero += 1
+                if not linea.strip():
+                    continue
+                try:
+                    registro = json.loads(linea)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"Línea {numero}: JSON inválido ({e.msg})") from None
+                if not isinstance(registro, dict):
+                    raise ValueError(f"Línea {numero}: se esperaba un objeto JSON")
+                registros.append(registro)
+            if registros:
+                yield pd.DataFrame.from_records(registros)
+    finally:
+        if archivo is not entrada:
+            archivo.close()
+
+
+# ========== EVALUACIÓN ==========
+
+def _listas_por_fila(matriz: np.ndarray, etiquetas: List[str]) -> np.ndarray:
+    """
+    Lista de etiquetas activas de cada fila de una matriz booleana
+
+    Se construye una lista por combinación distinta de columnas activas y
+    se comparte entre las filas que la tienen.
+    """
+    n = len(matriz)
+    if n == 0 or not etiquetas:
+        vacias = np.empty(n, dtype=object)
+        for i in range(n):
+            vacias[i] = []
+        return vacias
+    codigos = np.packbits(matriz, axis=1, bitorder='little')
+    unicas, inversa = np.unique(codigos, axis=0, return_inverse=True)
+    listas = np.empty(len(unicas), dtype=object)
+    for i, fila in enumerate(np.unpackbits(unicas, axis=1, count=len(etiquetas), bitorder='little')):
+        listas[i] = [etiqueta for etiqueta, activa in zip(etiquetas, fila) if activa]
+    return listas[inversa.reshape(-1)]
+
+
+def _etiquetas(perfiles, atributo: str) -> list:
+    """Valores distintos de un atributo de los perfiles, en orden de aparición"""
+    etiquetas = []
+    for perfil in perfiles:
+        for valor in getattr(perfil, atributo):
+            if valor not in etiquetas:
+                etiquetas.append(valor)
+    return etiquetas
+
+
+def _derivar(activadas: np.ndarray, perfiles, etiquetas: list, atributo: str) -> np.ndarray:
+    """Matriz booleana de etiquetas (alertas o factores) que declaran las reglas activadas"""
+    banderas = np.zeros((len(activadas), len(etiquetas)), dtype=bool)
+    for j, perfil in enumerate(perfiles):
+        for valor in getattr(perfil, atributo):
+            banderas[:, etiquetas.index(valor)] |= activadas[:, j]
+    return banderas
+
+
+def texto_alerta(alerta: tuple) -> str:
+    """Etiqueta de una alerta (nivel, mensaje) en la salida por columnas"""
+    return f"{alerta[0]}: {alerta[1]}"
+
+
+def evaluar_columnas(bloque: pd.DataFrame, version: VersionReglas, backend: str = 'vectorizado') -> Dict[str, Any]:
+    """
+    Evalúa un bloque ya convertido y devuelve los resultados por columnas
+
+    Returns:
+        Dict con:
+        - identificacion: pd.DataFrame con 'fila' y las COLUMNAS_ID presentes
+        - riesgo_final, puntuacion, recomendacion, total_reglas_activadas (pd.Series)
+        - reglas_activadas: pd.DataFrame booleano con una columna por código de regla
+        - factores_criticos: pd.DataFrame booleano con una columna por factor crítico
+        - alertas: pd.DataFrame booleano con una columna por alerta ('NIVEL: mensaje')
+        - version_reglas: id de la versión que evaluó el bloque
+    """
+    evaluador = version.evaluador
+    perfiles = evaluador.perfiles
+
+    if backend == 'vectorizado':
+        resultado = evaluar_dataframe(bloque, evaluador)
+    elif backend == 'compilado':
+        codigos = [p.codigo for p in perfiles]
+        factores = _etiquetas(perfiles, 'factores')
+        activadas = np.zeros((len(bloque), len(codigos)), dtype=bool)
+        filas = []
+        for i, registro in enumerate(bloque.to_dict('records')):
+            # Los valores vacíos o no convertibles cuentan como campo ausente
+            datos = {k: v for k, v in registro.items()
+                     if k != 'fila' and v is not None and not (isinstance(v, float) and v != v)}
+            r = evaluador.evaluar(datos, 'ids')
+            for explicacion in r['explicaciones']:
+                activadas[i, codigos.index(explicacion[0])] = True
+            filas.append((r['riesgo_final'], r['puntuacion'], r['recomendacion'], r['total_reglas_activadas']))
+        columnas = list(zip(*filas)) if filas else [[]] * 4
+        resultado = {
+            nombre: pd.Series(list(valores), index=bloque.index, dtype=dtype, name=nombre)
+            for nombre, valores, dtype in zip(COLUMNAS_RESULTADO[:4], columnas,
+                                              (object, np.int64, object, np.int64))
+        }
+        resultado['reglas_activadas'] = pd.DataFrame(activadas, index=bloque.index, columns=codigos)
+        resultado['factores_criticos'] = pd.DataFrame(
+            _derivar(activadas, perfiles, factores, 'factores'), index=bloque.index, columns=factores
+        )
+    else:
+        raise ValueError(f"Backend no válido: {backend!r} (use {', '.join(BACKENDS_FLUJO)})")
+
+    identificacion = bloque[[c for c in ('fila',) + COLUMNAS_ID if c in bloque.columns]]
+    return completar_columnas(resultado, identificacion, version)
+
+
+def completar_columnas(resultado: Dict[str, Any], identificacion: pd.DataFrame,
+                       version: VersionReglas) -> Dict[str, Any]:
+    """
+    Añade a un resultado de evaluar_dataframe() las alertas, la identificación y la versión
+
+    Returns:
+        El mismo dict, con el formato de evaluar_columnas()
+    """
+    perfiles = version.evaluador.perfiles
+    alertas = _etiquetas(perfiles, 'alertas')
+    resultado['alertas'] = pd.DataFrame(
+        _derivar(resultado['reglas_activadas'].to_numpy(), perfiles, alertas, 'alertas'),
+        index=identificacion.index, columns=[texto_alerta(a) for a in alertas]
+    )
+    resultado['identificacion'] = identificacion
+    resultado['version_reglas'] = version.id
+    return resultado
+
+
+def tabla_resultados(columnas: Dict[str, Any]) -> pd.DataFrame:
+    """
+    Resultados de evaluar_columnas() como una fila por proveedor
+
+    Returns:
+        pd.DataFrame con las columnas de identificación seguidas de
+        COLUMNAS_RESULTADO; reglas_activadas y factores_criticos son listas
+    """
+    salida = columnas['identificacion'].copy()
+    for columna in ('riesgo_final', 'puntuacion', 'recomendacion', 'total_reglas_activadas'):
+        salida[columna] = columnas[columna]
+    for columna in ('reglas_activadas', 'factores_criticos'):
+        matriz = columnas[columna]
+        salida[columna] = _listas_por_fila(matriz.to_numpy(), list(matriz.columns))
+    salida['version_reglas'] = columnas['version_reglas']
+    return salida
+
+
+def evaluar_bloque(bloque: pd.DataFrame, version: VersionReglas, backend: str = 'vectorizado') -> pd.DataFrame:
+    """
+    Evalúa un bloque ya convertido
+
+    Returns:
+        pd.DataFrame de tabla_resultados()
+    """
+    return tabla_resultados(evaluar_columnas(bloque, version, backend))
+
+
+# ========== ESCRITURA ==========
+
+class EscritorJSONL:
+    """
+    Escribe un objeto JSON por fila de resultado
+
+    Cada columna se codifica a JSON de una vez (los valores repetidos, como
+    el riesgo o las listas compartidas de reglas, una sola vez por bloque) y
+    las filas se montan con una plantilla.
+    """
+
+    def __init__(self, salida: TextIO):
+        self.salida = salida
+
+    def escribir(self, bloque: Dict[str, Any]):
+        """Escribe los resultados de evaluar_columnas()"""
+        resultados = tabla_resultados(bloque)
+        columnas = list(resultados.columns)
+        plantilla = '{{' + ', '.join(
+            json.dumps(str(c), ensure_ascii=False).replace('{', '{{').replace('}', '}}') + ': {}'
+            for c in columnas
+        ) + '}}\n'
+        codificadas = [_json_columna(resultados[c]) for c in columnas]
+        self.salida.writelines(plantilla.format(*fila) for fila in zip(*codificadas))
+
+    def cerrar(self):
+        self.salida.flush()
+
+
+def _json_columna(serie: pd.Series) -> List[str]:
+    """Valores de una columna codificados como JSON"""
+    if pd.api.types.is_bool_dtype(serie.dtype):
+        return ['true' if v else 'false' for v in serie.to_numpy()]
+    if pd.api.types.is_integer_dtype(serie.dtype):
+        return [str(v) for v in serie.tolist()]
+    codificados: Dict[Any, str] = {}
+    resultado = []
+    for valor in serie.tolist():
+        # Las listas de reglas y factores se comparten entre filas: se indexan por identidad
+        clave = id(valor) if isinstance(valor, (list, dict)) else (type(valor), valor)
+        texto = codificados.get(clave)
+        if texto is None:
+            texto = codificados[clave] = json.dumps(valor, ensure_ascii=False, default=_json_escalar)
+        resultado.append(texto)
+    return resultado
+
+
+class EscritorCSV:
+    """
+    Escribe los resultados en CSV; las listas se unen con '|' (como benchmarks.sintetico)
+
+    Las columnas de identificación se fijan con el primer bloque, como en
+    EscritorColumnar: en los siguientes, una columna que falta queda vacía
+    y una que no estaba en el primero se descarta, para que todas las filas
+    cuadren con la cabecera.
+    """
+
+    def __init__(self, salida: TextIO):
+        self.salida = salida
+        self.columnas: Optional[List[str]] = None
+
+    def escribir(self, bloque: Dict[str, Any]):
+        """Escribe los resultados de evaluar_columnas()"""
+        resultados = tabla_resultados(bloque)
+        for columna in ('reglas_activadas', 'factores_criticos'):
+            resultados[columna] = resultados[columna].map('|'.join)
+        cabecera = self.columnas is None
+        if cabecera:
+            self.columnas = list(resultados.columns)
+        else:
+            resultados = resultados.reindex(columns=self.columnas)
+        resultados.to_csv(self.salida, header=cabecera, index=False, lineterminator='\n')
+
+    def cerrar(self):
+        self.salida.flush()
+
+
+ESCRITORES = {'jsonl': EscritorJSONL, 'csv': EscritorCSV}
+
+
+def _json_escalar(valor):
+    """Convierte escalares de NumPy a tipos de JSON"""
+    if isinstance(valor, np.generic):
+        return valor.item()
+    raise TypeError(f"Tipo no serializable: {type(valor).__name__}")
+
+
+def bloques_entrada(entrada: str, formato: str, tamano_bloque: int) -> Iterator[Any]:
+    """
+    Bloques de un archivo de entrada de evaluar_archivo()
+
+    Yields:
+        pd.DataFrame de leer_bloques() o, para el formato 'binario',
+        TablaProveedores sobre la proyección en memoria del archivo
+    """
+    if formato == 'binario':
+        from .binario import abrir_binario
+
+        if entrada == '-':
+            raise ValueError("La entrada binaria necesita una ruta, no la entrada estándar")
+        return abrir_binario(entrada).bloques(tamano_bloque)
+    return leer_bloques(sys.stdin if entrada == '-' else entrada, formato, tamano_bloque)
+
+
+def abrir_escritor(salida: str, formato: str, version: VersionReglas):
+    """
+    Escritor de resultados de evaluar_archivo()
+
+    Returns:
+        (escritor, archivo abierto que hay que cerrar o None)
+    """
+    if formato in FORMATOS:
+        destino = sys.stdout if salida == '-' else open(salida, 'w', encoding='utf-8', newline='')
+        return ESCRITORES[formato](destino), destino
+    from .columnar import EscritorColumnar
+
+    if salida == '-':
+        raise ValueError("La salida por columnas necesita una ruta, no la salida estándar")
+    return EscritorColumnar(salida, version, formato), None
+
+
+def evaluar_archivo(entrada: str, salida: str, formato_entrada: Optional[str] = None,
+                    formato_salida: Optional[str] = None, tamano_bloque: int = 50_000,
+                    backend: str = 'vectorizado', version: Optional[VersionReglas] = None,
+                    progreso: Optional[Callable[[int, float], None]] = None,
+                    historial=None) -> Dict[str, Any]:
+    """
+    Evalúa un archivo de proveedores de cualquier tamaño, bloque a bloque
+
+    Args:
+        entrada: Ruta del CSV/JSONL de entrada, o '-' para la entrada estándar;
+            o un archivo binario de engine.binario, que se evalúa sobre su proyección en memoria
+        salida: Ruta del JSONL/CSV de resultados, o '-' para la salida estándar;
+            archivo Parquet o directorio npz para los formatos por columnas
+        formato_entrada: 'csv', 'jsonl' o 'binario' (por defecto, según la extensión)
+        formato_salida: 'jsonl', 'csv' o uno de engine.columnar ('columnar',
+            'parquet', 'npz'); por defecto, según la extensión
+        tamano_bloque: Filas leídas, evaluadas y escritas a la vez
+        backend: 'vectorizado' (el más rápido) o 'compilado' (fila a fila)
+        version: Versión de reglas (por defecto, la vigente en registro_reglas(),
+            fijada para todo el archivo)
+        progreso: Función que recibe (filas procesadas, segundos) tras cada bloque
+        historial: HistorialEvaluaciones donde guardar también cada evaluación
+            (datos de entrada y resultado), con la misma fecha para todo el archivo
+
+    Returns:
+        Dict con filas, segundos, filas_por_segundo y version_reglas
+    """
+    formato_entrada = detectar_formato(entrada, formato_entrada, FORMATOS_ENTRADA)
+    formato_salida = detectar_formato(salida, formato_salida, FORMATOS_SALIDA)
+    if backend not in BACKENDS_FLUJO:
+        raise ValueError(f"Backend no válido: {backend!r} (use {', '.join(BACKENDS_FLUJO)})")
+    version = version or registro_reglas().fijar()
+    if not isinstance(version.evaluador, EvaluadorCompilado):
+        raise TypeError("La evaluación de archivos necesita una versión de reglas con EvaluadorCompilado")
+
+    evaluados = ((bloque, bloque.evaluar(version, backend) if formato_entrada == 'binario'
+                  else evaluar_columnas(bloque, version, backend))
+                 for bloque in bloques_entrada(entrada, formato_entrada, tamano_bloque))
+    escritor, destino = abrir_escritor(salida, formato_salida, version)
+    filas = 0
+    inicio = time.perf_counter()
+    fecha = datetime.now().isoformat(timespec='seconds')
+    try:
+        for bloque, columnas in evaluados:
+            escritor.escribir(columnas)
+            if historial is not None:
+                # Los bloques del archivo binario se decodifican solo para guardar sus datos
+                datos = bloque if isinstance(bloque, pd.DataFrame) else bloque.a_dataframe()
+                historial.registrar_bloque(datos, columnas, fecha=fecha, origen=entrada)
+            filas += len(columnas['identificacion'])
+            if progreso is not None:
+                progreso(filas, time.perf_counter() - inicio)
+        escritor.cerrar()
+    finally:
+        if destino is not None and destino is not sys.stdout:
+            destino.close()
+
+    segundos = time.perf_counter() - inicio
+    return {
+        'filas': filas,
+        'segundos': segundos,
+        'filas_por_segundo': filas / segundos if segundos > 0 else 0.0,
+        'version_reglas': version.id
+    }
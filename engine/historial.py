@@ -0,0 +1,278 @@
+"""
+Historial persistente de evaluaciones
+Guarda en SQLite cada evaluación (datos de entrada, versión de reglas,
+riesgo, puntuación y reglas activadas) para poder auditarla sin volver a
+ejecutar el motor
+"""
+
+import math
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .columnar import SEPARADOR, _combinaciones
+from .flujo import COLUMNAS_ID, TIPOS_CAMPOS
+
+
+RUTA_HISTORIAL = os.environ.get('HISTORIAL_EVALUACIONES', 'historial_evaluaciones.sqlite3')
+
+_TIPOS_SQL = {'numero': 'REAL', 'booleano': 'INTEGER', 'texto': 'TEXT'}
+
+# Columnas de la tabla en el orden de inserción (los campos de entrada, uno por columna)
+COLUMNAS_HISTORIAL = ('id_proveedor', 'fecha', 'origen', 'version_reglas', 'riesgo_final', 'puntuacion',
+                      'reglas_activadas') + tuple(TIPOS_CAMPOS)
+
+_ESQUEMA = f"""
+CREATE TABLE IF NOT EXISTS evaluaciones (
+    id INTEGER PRIMARY KEY,
+    id_proveedor TEXT,
+    fecha TEXT NOT NULL,
+    origen TEXT NOT NULL,
+    version_reglas TEXT NOT NULL,
+    riesgo_final TEXT NOT NULL,
+    puntuacion INTEGER NOT NULL,
+    reglas_activadas TEXT NOT NULL,
+    {', '.join(f'{campo} {_TIPOS_SQL[tipo]}' for campo, tipo in TIPOS_CAMPOS.items())}
+);
+CREATE INDEX IF NOT EXISTS idx_evaluaciones_proveedor ON evaluaciones (id_proveedor, fecha);
+CREATE INDEX IF NOT EXISTS idx_evaluaciones_fecha ON evaluaciones (fecha);
+CREATE INDEX IF NOT EXISTS idx_evaluaciones_riesgo ON evaluaciones (riesgo_final, fecha);
+"""
+
+_INSERTAR = (f"INSERT INTO evaluaciones ({', '.join(COLUMNAS_HISTORIAL)}) "
+             f"VALUES ({', '.join('?' * len(COLUMNAS_HISTORIAL))})")
+
+
+def _ahora() -> str:
+    return datetime.now().isoformat(timespec='seconds')
+
+
+def _valor_sql(campo: str, valor):
+    """Valor de un campo de entrada tal como se guarda (None si falta o no es del tipo)"""
+    if valor is None or (isinstance(valor, float) and math.isnan(valor)):
+        return None
+    tipo = TIPOS_CAMPOS[campo]
+    if tipo == 'booleano':
+        return int(valor) if isinstance(valor, (bool, np.bool_)) else None
+    if tipo == 'numero':
+        return float(valor) if isinstance(valor, (int, float, np.number)) and not isinstance(valor, bool) else None
+    return str(valor)
+
+
+def _codigos_reglas(explicaciones: Sequence) -> List[str]:
+    """Códigos de regla de las explicaciones de cualquier nivel ('full', 'ids'...)"""
+    codigos = []
+    for explicacion in explicaciones:
+        if isinstance(explicacion, dict):
+            codigos.append(explicacion.get('codigo') or explicacion['regla'].split(':')[0])
+        else:
+            codigos.append(explicacion[0])
+    return codigos
+
+
+def _version_motor() -> str:
+    """Id de versión de las reglas de MotorEvaluacionRiesgo (el de la versión 1 de registro_reglas())"""
+    from .compilado import EVALUADOR_COMPILADO
+
+    return EVALUADOR_COMPILADO.firma[:16]
+
+
+def _columna_sql(campo: str, serie: pd.Series) -> list:
+    """Valores de un campo de un bloque convertido por coercionar_bloque(), listos para insertar"""
+    tipo = TIPOS_CAMPOS[campo]
+    if tipo == 'numero':
+        # SQLite guarda NaN como NULL
+        return serie.to_numpy(dtype=np.float64).tolist()
+    if tipo == 'booleano' and serie.dtype == bool:
+        return serie.to_numpy().astype(np.int64).tolist()
+    # Pocos valores distintos (booleanos con ausentes, industrias): se convierte cada uno una vez
+    codigos, unicos = pd.factorize(serie, use_na_sentinel=True)
+    traducidos = np.array([_valor_sql(campo, v) for v in unicos] + [None], dtype=object)
+    return traducidos[codigos].tolist()
+
+
+class HistorialEvaluaciones:
+    """
+    Historial de evaluaciones en una base SQLite.
+
+    La base se abre en modo WAL: los lectores (la aplicación consultando el
+    historial de un proveedor) no bloquean a quien escribe un lote. Los lotes
+    se insertan con executemany en una sola transacción. Hay índices por
+    proveedor, por fecha y por riesgo para que las consultas de auditoría
+    no recorran la tabla. Las fechas se guardan en ISO 8601, que ordena igual
+    como texto que como fecha.
+    """
+
+    def __init__(self, ruta: str = RUTA_HISTORIAL):
+        """
+        Args:
+            ruta: Archivo de la base (se crea si no existe); ':memory:' para una base temporal
+        """
+        self.ruta = ruta
+        self._lock = threading.Lock()
+        # Una conexión compartida entre hilos (Streamlit atiende cada sesión en uno) protegida por el lock
+        self._conexion = sqlite3.connect(ruta, check_same_thread=False)
+        # Páginas de 16 KiB (solo se aplica al crear la base): menos divisiones de página por lote
+        self._conexion.execute('PRAGMA page_size=16384')
+        self._conexion.execute('PRAGMA journal_mode=WAL')
+        self._conexion.execute('PRAGMA synchronous=NORMAL')
+        self._conexion.executescript(_ESQUEMA)
+
+    def cerrar(self):
+        """Cierra la conexión con la base"""
+        with self._lock:
+            self._conexion.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        self.cerrar()
+
+    # ---------- Escritura ----------
+
+    def registrar(self, resultado: Dict[str, Any], datos_proveedor: Dict[str, Any],
+                  id_proveedor: Optional[str] = None, fecha: Optional[str] = None, origen: str = 'app'):
+        """
+        Guarda una evaluación
+
+        Args:
+            resultado: Resultado del motor (cualquier nivel de explicación); si
+                no trae 'version_reglas' se usa la de MotorEvaluacionRiesgo
+            datos_proveedor: Datos evaluados
+            id_proveedor: Identificador del proveedor (por defecto, 'nombre' de los datos)
+            fecha: Fecha ISO 8601 (por defecto, ahora)
+            origen: Quién evaluó ('app', ruta del archivo del lote...)
+        """
+        if id_proveedor is None:
+            id_proveedor = next((datos_proveedor[c] for c in COLUMNAS_ID if datos_proveedor.get(c)), None)
+        fila = (
+            None if id_proveedor is None else str(id_proveedor),
+            fecha or _ahora(),
+            origen,
+            resultado.get('version_reglas') or _version_motor(),
+            resultado['riesgo_final'],
+            int(resultado['puntuacion']),
+            SEPARADOR.join(_codigos_reglas(resultado.get('explicaciones', ())))
+        ) + tuple(_valor_sql(campo, datos_proveedor.get(campo)) for campo in TIPOS_CAMPOS)
+        self.registrar_filas([fila])
+
+    def registrar_filas(self, filas: Iterable[tuple]) -> int:
+        """
+        Inserta filas ya preparadas (en el orden de COLUMNAS_HISTORIAL) en una transacción
+
+        Returns:
+            Número de filas insertadas
+        """
+        with self._lock, self._conexion:
+            cursor = self._conexion.executemany(_INSERTAR, filas)
+            return cursor.rowcount
+
+    def registrar_bloque(self, bloque: pd.DataFrame, columnas: Dict[str, Any],
+                         fecha: Optional[str] = None, origen: str = 'lote') -> int:
+        """
+        Guarda un bloque evaluado en flujo
+
+        Args:
+            bloque: Bloque de entrada convertido por coercionar_bloque()
+            columnas: Resultado de engine.flujo.evaluar_columnas() para el bloque
+            fecha: Fecha ISO 8601 del lote (por defecto, ahora)
+            origen: Quién evaluó (por ejemplo, la ruta del archivo)
+
+        Returns:
+            Número de filas insertadas
+        """
+        n = len(bloque)
+        identificacion = columnas['identificacion']
+        columna_id = next((c for c in COLUMNAS_ID if c in identificacion.columns), None)
+        ids = ([None if v is None or v != v else str(v) for v in identificacion[columna_id].tolist()]
+               if columna_id else [None] * n)
+
+        # Reglas activadas: un texto por combinación distinta, compartido entre filas
+        textos, inversa = _combinaciones(columnas['reglas_activadas'])
+        reglas = np.array(textos, dtype=object)[inversa].tolist()
+
+        constantes = [[fecha or _ahora()] * n, [origen] * n, [columnas['version_reglas']] * n]
+        campos = [_columna_sql(campo, bloque[campo]) if campo in bloque.columns else [None] * n
+                  for campo in TIPOS_CAMPOS]
+        filas = zip(ids, *constantes, columnas['riesgo_final'].tolist(),
+                    columnas['puntuacion'].astype(np.int64).tolist(), reglas, *campos)
+        return self.registrar_filas(filas)
+
+    # ---------- Consulta ----------
+
+    def _consultar(self, sql: str, parametros: tuple) -> List[Dict[str, Any]]:
+        with self._lock:
+            cursor = self._conexion.execute(sql, parametros)
+            nombres = [d[0] for d in cursor.description]
+            filas = cursor.fetchall()
+        evaluaciones = []
+        for fila in filas:
+            registro = dict(zip(nombres, fila))
+            reglas = registro['reglas_activadas']
+            registro['reglas_activadas'] = reglas.split(SEPARADOR) if reglas else []
+            registro['datos'] = {}
+            for campo, tipo in TIPOS_CAMPOS.items():
+                valor = registro.pop(campo)
+                if valor is not None:
+                    registro['datos'][campo] = bool(valor) if tipo == 'booleano' else valor
+            evaluaciones.append(registro)
+        return evaluaciones
+
+    def historial_proveedor(self, id_proveedor: str, limite: Optional[int] = 100) -> List[Dict[str, Any]]:
+        """
+        Evaluaciones de un proveedor, de la más reciente a la más antigua
+
+        Returns:
+            Lista de dicts con id, id_proveedor, fecha, origen, version_reglas,
+            riesgo_final, puntuacion, reglas_activadas (lista) y datos (dict)
+        """
+        return self._consultar(
+            "SELECT * FROM evaluaciones WHERE id_proveedor = ? ORDER BY fecha DESC, id DESC LIMIT ?",
+            (str(id_proveedor), -1 if limite is None else limite)
+        )
+
+    def consultar(self, riesgo: Optional[str] = None, desde: Optional[str] = None, hasta: Optional[str] = None,
+                  limite: Optional[int] = 1000) -> List[Dict[str, Any]]:
+        """
+        Evaluaciones filtradas por riesgo final y rango de fechas, de la más reciente a la más antigua
+
+        Args:
+            riesgo: 'BAJO', 'MEDIO', 'ALTO'... (por defecto, todos)
+            desde: Fecha ISO 8601 mínima, incluida
+            hasta: Fecha ISO 8601 máxima, excluida
+            limite: Número máximo de evaluaciones (None = todas)
+        """
+        condiciones, parametros = [], []
+        for condicion, valor in (('riesgo_final = ?', riesgo), ('fecha >= ?', desde), ('fecha < ?', hasta)):
+            if valor is not None:
+                condiciones.append(condicion)
+                parametros.append(valor)
+        donde = f"WHERE {' AND '.join(condiciones)} " if condiciones else ''
+        return self._consultar(
+            f"SELECT * FROM evaluaciones {donde}ORDER BY fecha DESC, id DESC LIMIT ?",
+            tuple(parametros) + (-1 if limite is None else limite,)
+        )
+
+    def contar(self) -> int:
+        """Número de evaluaciones guardadas"""
+        with self._lock:
+            return self._conexion.execute("SELECT COUNT(*) FROM evaluaciones").fetchone()[0]
+
+
+_HISTORIAL = None
+_LOCK_HISTORIAL = threading.Lock()
+
+
+def historial_evaluaciones() -> HistorialEvaluaciones:
+    """Historial compartido en RUTA_HISTORIAL (variable de entorno HISTORIAL_EVALUACIONES), abierto en el primer uso"""
+    global _HISTORIAL
+    with _LOCK_HISTORIAL:
+        if _HISTORIAL is None:
+            _HISTORIAL = HistorialEvaluaciones()
+    return _HISTORIAL
@@ -0,0 +1,475 @@
+"""
+Reevaluación incremental de la cartera
+Guarda una huella de cada proveedor (sus campos que leen las reglas y la
+versión de reglas) junto con sus reglas activadas; en la siguiente ejecución
+solo se evalúan los proveedores cuya huella cambió y el resto reutiliza el
+resultado anterior
+"""
+
+import hashlib
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .binario import AUSENTE, TablaProveedores, _Industrias, codificar_bloque
+from .cache import campos_reglas
+from .columnar import _textos
+from .compilado import EvaluadorCompilado
+from .flujo import (BACKENDS_FLUJO, COLUMNAS_ID, FORMATOS_ENTRADA, FORMATOS_SALIDA, TIPOS_CAMPOS,
+                    abrir_escritor, bloques_entrada, completar_columnas, detectar_formato, evaluar_columnas)
+from .registro import VersionReglas, registro_reglas
+from .vectorizado import evaluar_mascaras
+
+
+VERSION_ESTADO = 2
+
+# Archivo del directorio de estado con los metadatos y la generación vigente
+METADATOS_ESTADO = 'estado.json'
+
+# Columnas del estado: un .npy por columna y generación (claves-3.npy...)
+COLUMNAS_ESTADO = ('claves', 'huellas', 'reglas')
+
+# Cabecera .npy (versión 1.0) de tamaño fijo: se escribe al cerrar, cuando
+# ya se conoce el número de filas, y los datos quedan alineados a 64 bytes
+_CABECERA_NPY = 128
+
+
+def _mezclar(valores: np.ndarray) -> np.ndarray:
+    """
+    Finalizador de splitmix64 sobre un array uint64, en el sitio
+
+    Es biyectivo y cada bit de la entrada afecta a todos los de la salida.
+    """
+    valores ^= valores >> np.uint64(30)
+    valores *= np.uint64(0xBF58476D1CE4E5B9)
+    valores ^= valores >> np.uint64(27)
+    valores *= np.uint64(0x94D049BB133111EB)
+    valores ^= valores >> np.uint64(31)
+    return valores
+
+
+def campos_huella(evaluador: EvaluadorCompilado) -> Tuple[str, ...]:
+    """
+    Campos que forman la huella: los que leen las reglas del evaluador
+
+    Raises:
+        ValueError: Si alguna regla lee un campo que no está en TIPOS_CAMPOS
+            (su cambio no se vería en la huella)
+    """
+    campos = campos_reglas(evaluador)
+    desconocidos = [campo for campo in campos if campo not in TIPOS_CAMPOS]
+    if desconocidos:
+        raise ValueError(f"La reevaluación incremental no admite reglas sobre {', '.join(desconocidos)}")
+    return campos
+
+
+def semilla_huella(version: VersionReglas, campos: Sequence[str]) -> np.uint64:
+    """Valor inicial de las huellas: cambia con la versión de reglas, así que un cambio de reglas lo reevalúa todo"""
+    texto = f"{VERSION_ESTADO}|{version.id}|{','.join(campos)}".encode('utf-8')
+    return np.uint64(int.from_bytes(hashlib.sha256(texto).digest()[:8], 'little'))
+
+
+def huellas_registros(registros: np.ndarray, industrias: Sequence[str], campos: Sequence[str],
+                      semilla: np.uint64) -> np.ndarray:
+    """
+    Huella de 64 bits de cada registro DTYPE_PROVEEDOR
+
+    Se calcula sobre los valores ya convertidos, así que un mismo proveedor
+    tiene la misma huella leído de CSV, de JSONL o del archivo binario.
+    Cada campo se combina con la huella acumulada y se mezcla con una
+    operación biyectiva: dos registros que difieren en un solo campo nunca
+    tienen la misma huella.
+
+    Args:
+        registros: Array con dtype DTYPE_PROVEEDOR
+        industrias: Texto de cada código de industria de los registros
+        campos: Campos que forman la huella (campos_huella())
+        semilla: Valor inicial (semilla_huella())
+
+    Returns:
+        Array uint64 con una huella por registro
+    """
+    huellas = np.full(len(registros), semilla, dtype=np.uint64)
+    for campo in campos:
+        valores = registros[campo]
+        tipo = TIPOS_CAMPOS[campo]
+        if tipo == 'numero':
+            # Para las reglas -0.0 es 0.0 y todos los NaN son el mismo campo ausente
+            bits = np.where(np.isnan(valores), np.nan, valores + 0.0).view(np.uint64)
+        elif tipo == 'booleano':
+            bits = valores.astype(np.int64).view(np.uint64)
+        else:
+            # Los códigos de industria dependen del archivo: se usa el texto
+            textos = pd.util.hash_array(np.array(list(industrias), dtype=object))
+            tabla = np.append(textos, np.iinfo(np.uint64).max)
+            bits = tabla[np.where(valores == AUSENTE, len(industrias), valores)]
+        huellas ^= bits
+        _mezclar(huellas)
+    return huellas
+
+
+def claves_proveedores(identificacion: pd.DataFrame) -> np.ndarray:
+    """
+    Clave uint64 de cada proveedor: el texto de su identificador (la primera
+    de COLUMNAS_ID presente) o, si no tiene, su posición en la entrada
+    """
+    claves = _mezclar(identificacion['fila'].to_numpy().astype(np.uint64))
+    columna = next((c for c in COLUMNAS_ID if c in identificacion.columns), None)
+    if columna is not None:
+        textos = _textos(identificacion[columna])
+        presentes = pd.notna(textos)
+        if presentes.any():
+            claves[presentes] = pd.util.hash_array(textos[presentes])
+    return claves
+
+
+def _ruta_columna(ruta: str, columna: str, generacion: int) -> str:
+    return os.path.join(ruta, f'{columna}-{generacion}.npy')
+
+
+def _cabecera_npy(dtype: np.dtype, forma: tuple) -> bytes:
+    """Cabecera .npy de _CABECERA_NPY bytes para un array C contiguo"""
+    descripcion = repr({'descr': np.lib.format.dtype_to_descr(dtype), 'fortran_order': False, 'shape': forma})
+    prefijo = np.lib.format.MAGIC_PREFIX + bytes([1, 0])
+    longitud = _CABECERA_NPY - len(prefijo) - 2
+    return prefijo + longitud.to_bytes(2, 'little') + descripcion.encode('latin1').ljust(longitud - 1) + b'\n'
+
+
+class _ColumnaNpy:
+    """Archivo .npy que crece por bloques: los datos se añaden al final y la cabecera se escribe al cerrar"""
+
+    def __init__(self, ruta: str, dtype, ancho: Optional[int] = None):
+        """
+        Args:
+            ruta: Archivo .npy (se sobrescribe)
+            dtype: Tipo de los elementos
+            ancho: Columnas de un array 2D (None = 1D)
+        """
+        self.ruta = ruta
+        self.dtype = np.dtype(dtype)
+        self.ancho = ancho
+        self.filas = 0
+        self._archivo = open(ruta, 'wb')
+        self._archivo.write(b'\0' * _CABECERA_NPY)
+
+    def escribir(self, valores: np.ndarray):
+        np.ascontiguousarray(valores, dtype=self.dtype).tofile(self._archivo)
+        self.filas += len(valores)
+
+    def cerrar(self):
+        forma = (self.filas,) if self.ancho is None else (self.filas, self.ancho)
+        self._archivo.seek(0)
+        self._archivo.write(_cabecera_npy(self.dtype, forma))
+        self._archivo.close()
+
+    def descartar(self):
+        self._archivo.close()
+
+
+class EstadoIncremental:
+    """
+    Huella y reglas activadas de cada proveedor de la última evaluación.
+
+    Las reglas activadas bastan para reconstruir el resultado completo
+    (riesgo, puntuación, factores, alertas) con evaluar_mascaras(), así que
+    el estado ocupa unos 20 bytes por proveedor: clave y huella uint64 y un
+    bit por regla. Se guarda en el orden de la entrada: si la cartera
+    conserva su orden de una ejecución a otra, cada proveedor se encuentra
+    en la misma posición sin buscarlo; los que se movieron se buscan en un
+    índice ordenado que se construye solo si hace falta (el único que
+    ocupa memoria proporcional a la cartera).
+
+    En disco es un directorio con un .npy por columna, que cargar() proyecta
+    en memoria con mmap_mode='r', y estado.json, que indica la generación
+    vigente de esos archivos.
+    """
+
+    def __init__(self, version_reglas: str, codigos: Sequence[str], claves: Optional[np.ndarray] = None,
+                 huellas: Optional[np.ndarray] = None, reglas: Optional[np.ndarray] = None,
+                 generacion: int = 0):
+        """
+        Args:
+            version_reglas: Id de la versión de reglas que evaluó a los proveedores
+            codigos: Código de cada regla, en el orden de las columnas de reglas
+            claves: Clave de cada proveedor en el orden de la entrada (uint64)
+            huellas: Huella de cada proveedor (uint64)
+            reglas: Reglas activadas de cada proveedor empaquetadas con np.packbits
+            generacion: Generación de los archivos del estado en disco (0 = sin guardar)
+        """
+        self.version_reglas = version_reglas
+        self.codigos = list(codigos)
+        bytes_fila = (len(self.codigos) + 7) // 8
+        self.claves = claves if claves is not None else np.empty(0, dtype=np.uint64)
+        self.huellas = huellas if huellas is not None else np.empty(0, dtype=np.uint64)
+        self.reglas = reglas if reglas is not None else np.empty((0, bytes_fila), dtype=np.uint8)
+        self.generacion = generacion
+        self._indice = None
+
+    def __len__(self) -> int:
+        return len(self.claves)
+
+    def buscar(self, claves: np.ndarray, huellas: np.ndarray,
+               inicio: int = 0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Busca proveedores en el estado
+
+        Args:
+            claves: Claves de un bloque de la entrada
+            huellas: Huellas del bloque
+            inicio: Posición en la entrada del primer proveedor del bloque
+
+        Returns:
+            (posición de cada clave en el estado, si la clave está, si además su huella no cambió)
+        """
+        n = len(claves)
+        posiciones = np.arange(inicio, inicio + n, dtype=np.intp)
+        encontradas = np.zeros(n, dtype=bool)
+        alineadas = max(0, min(n, len(self.claves) - inicio))
+        encontradas[:alineadas] = self.claves[inicio:inicio + alineadas] == claves[:alineadas]
+
+        movidas = np.flatnonzero(~encontradas)
+        if len(movidas) and len(self.claves):
+            if self._indice is None:
+                orden = np.argsort(self.claves, kind='stable')
+                self._indice = (orden, self.claves[orden])
+            orden, ordenadas = self._indice
+            candidatas = np.minimum(np.searchsorted(ordenadas, claves[movidas]), len(ordenadas) - 1)
+            halladas = ordenadas[candidatas] == claves[movidas]
+            posiciones[movidas[halladas]] = orden[candidatas[halladas]]
+            encontradas[movidas[halladas]] = True
+
+        posiciones[~encontradas] = 0
+        sin_cambios = encontradas.copy()
+        if len(self.claves):
+            sin_cambios &= self.huellas[posiciones] == huellas
+        return posiciones, encontradas, sin_cambios
+
+    def mascaras(self, posiciones: np.ndarray) -> np.ndarray:
+        """Matriz booleana de reglas activadas de las posiciones indicadas"""
+        return np.unpackbits(self.reglas[posiciones], axis=1, count=len(self.codigos),
+                             bitorder='little').astype(bool)
+
+    @classmethod
+    def cargar(cls, ruta: str, version: VersionReglas) -> 'EstadoIncremental':
+        """
+        Estado guardado en el directorio ruta para una versión de reglas
+
+        Las columnas se proyectan en memoria (np.load con mmap_mode='r'),
+        no se leen. Si el directorio no existe o lo guardó otra versión de
+        reglas se devuelve un estado vacío (todos los proveedores se
+        evaluarán), con la generación guardada para no pisar sus archivos.
+
+        Raises:
+            ValueError: Si la ruta no es un estado de reevaluación incremental
+        """
+        codigos = [p.codigo for p in version.evaluador.perfiles]
+        if not os.path.exists(ruta):
+            return cls(version.id, codigos)
+        try:
+            with open(os.path.join(ruta, METADATOS_ESTADO), encoding='utf-8') as f:
+                metadatos = json.load(f)
+            generacion = int(metadatos['generacion'])
+            if (metadatos.get('version_estado') != VERSION_ESTADO
+                    or metadatos.get('version_reglas') != version.id or metadatos.get('codigos') != codigos):
+                return cls(version.id, codigos, generacion=generacion)
+            columnas = [np.load(_ruta_columna(ruta, columna, generacion), mmap_mode='r')
+                        for columna in COLUMNAS_ESTADO]
+        except (OSError, KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"{ruta} no es un estado de reevaluación incremental ({e})") from None
+        return cls(version.id, codigos, *columnas, generacion=generacion)
+
+
+class EscritorEstado:
+    """
+    Escribe el estado de una ejecución bloque a bloque, sin tenerlo en memoria.
+
+    Las columnas van a archivos de una generación nueva del directorio;
+    cerrar() reemplaza estado.json de una vez para que apunte a ella y borra
+    las demás generaciones. Hasta entonces el estado anterior sigue vigente
+    (y se puede seguir leyendo mientras se escribe el nuevo).
+    """
+
+    def __init__(self, ruta: str, version_reglas: str, codigos: Sequence[str], generacion: int):
+        """
+        Args:
+            ruta: Directorio del estado (se crea si no existe)
+            version_reglas: Id de la versión de reglas que evalúa
+            codigos: Código de cada regla, en el orden de las columnas de reglas
+            generacion: Generación de los archivos nuevos
+        """
+        self.ruta = ruta
+        self.version_reglas = version_reglas
+        self.codigos = list(codigos)
+        self.generacion = generacion
+        os.makedirs(ruta, exist_ok=True)
+        self._columnas = {
+            'claves': _ColumnaNpy(_ruta_columna(ruta, 'claves', generacion), np.uint64),
+            'huellas': _ColumnaNpy(_ruta_columna(ruta, 'huellas', generacion), np.uint64),
+            'reglas': _ColumnaNpy(_ruta_columna(ruta, 'reglas', generacion), np.uint8,
+                                  (len(self.codigos) + 7) // 8)
+        }
+
+    def escribir(self, claves: np.ndarray, huellas: np.ndarray, reglas: np.ndarray):
+        """Añade las claves, huellas y reglas empaquetadas de un bloque"""
+        for columna, valores in zip(COLUMNAS_ESTADO, (claves, huellas, reglas)):
+            self._columnas[columna].escribir(valores)
+
+    def cerrar(self):
+        """Termina los archivos y publica la generación nueva"""
+        for columna in self._columnas.values():
+            columna.cerrar()
+        metadatos = {'version_estado': VERSION_ESTADO, 'version_reglas': self.version_reglas,
+                     'codigos': self.codigos, 'generacion': self.generacion,
+                     'filas': self._columnas['claves'].filas}
+        destino = os.path.join(self.ruta, METADATOS_ESTADO)
+        with open(destino + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(metadatos, f, ensure_ascii=False)
+        os.replace(destino + '.tmp', destino)
+        self._borrar(lambda generacion: generacion != self.generacion)
+
+    def descartar(self):
+        """Abandona la escritura; el estado anterior sigue vigente"""
+        for columna in self._columnas.values():
+            columna.descartar()
+        self._borrar(lambda generacion: generacion == self.generacion)
+
+    def _borrar(self, condicion: Callable[[int], bool]):
+        for nombre in os.listdir(self.ruta):
+            columna, _, resto = nombre.partition('-')
+            generacion = resto[:-len('.npy')] if resto.endswith('.npy') else ''
+            if columna in COLUMNAS_ESTADO and generacion.isdigit() and condicion(int(generacion)):
+                try:
+                    os.remove(os.path.join(self.ruta, nombre))
+                except OSError:
+                    # Otro proceso aún lo tiene proyectado (Windows): se borra en la próxima ejecución
+                    pass
+
+
+def reevaluar_archivo(entrada: str, salida: str, estado: str, formato_entrada: Optional[str] = None,
+                      formato_salida: Optional[str] = None, tamano_bloque: int = 50_000,
+                      backend: str = 'vectorizado', version: Optional[VersionReglas] = None,
+                      progreso: Optional[Callable[[int, float], None]] = None,
+                      historial=None, solo_cambios: bool = False) -> Dict[str, Any]:
+    """
+    Evalúa un archivo de proveedores reutilizando los resultados de la ejecución anterior
+
+    Solo evalúa los proveedores nuevos o cuya huella cambió desde la
+    ejecución que guardó el estado; los demás toman las reglas activadas
+    guardadas. Un cambio de versión de reglas cambia todas las huellas.
+    Leer la entrada y calcular las huellas recorre todo el archivo, pero
+    cuesta mucho menos que evaluar; escribir la cartera completa también
+    crece con ella, así que con solo_cambios el tiempo depende sobre todo
+    del número de cambios. El estado se reemplaza al terminar, solo si la
+    salida se escribió completa.
+
+    Los proveedores se identifican por la primera de COLUMNAS_ID presente
+    (también en el archivo binario, que la guarda) o, si no hay, por su
+    posición en la entrada.
+
+    Args:
+        entrada, salida, formato_entrada, formato_salida, tamano_bloque,
+        backend, version, progreso: Igual que en evaluar_archivo()
+        estado: Directorio del estado (se crea si no existe)
+        historial: HistorialEvaluaciones donde guardar los proveedores evaluados
+            en esta ejecución (los reutilizados ya se guardaron al evaluarlos)
+        solo_cambios: Escribir solo los proveedores evaluados en esta
+            ejecución en lugar de toda la cartera
+
+    Returns:
+        Dict con filas, evaluadas, nuevas (evaluadas que no estaban en el
+        estado), reutilizadas, segundos, filas_por_segundo y version_reglas
+    """
+    formato_entrada = detectar_formato(entrada, formato_entrada, FORMATOS_ENTRADA)
+    formato_salida = detectar_formato(salida, formato_salida, FORMATOS_SALIDA)
+    if backend not in BACKENDS_FLUJO:
+        raise ValueError(f"Backend no válido: {backend!r} (use {', '.join(BACKENDS_FLUJO)})")
+    version = version or registro_reglas().fijar()
+    if not isinstance(version.evaluador, EvaluadorCompilado):
+        raise TypeError("La evaluación de archivos necesita una versión de reglas con EvaluadorCompilado")
+
+    evaluador = version.evaluador
+    campos = campos_huella(evaluador)
+    semilla = semilla_huella(version, campos)
+    anterior = EstadoIncremental.cargar(estado, version)
+    codigos = [p.codigo for p in evaluador.perfiles]
+    industrias = _Industrias()
+
+    bloques = bloques_entrada(entrada, formato_entrada, tamano_bloque)
+    escritor, destino = abrir_escritor(salida, formato_salida, version)
+    nuevo = EscritorEstado(estado, version.id, codigos, anterior.generacion + 1)
+    conteo = {'filas': 0, 'evaluadas': 0, 'nuevas': 0, 'reutilizadas': 0}
+    inicio = time.perf_counter()
+    fecha = datetime.now().isoformat(timespec='seconds')
+    try:
+        for bloque in bloques:
+            if isinstance(bloque, pd.DataFrame):
+                registros, nombres = codificar_bloque(bloque, industrias), industrias.valores
+                identificacion = bloque[[c for c in ('fila',) + COLUMNAS_ID if c in bloque.columns]]
+            else:
+                registros, nombres = bloque.registros, bloque.industrias
+                identificacion = bloque.identificacion()
+            claves = claves_proveedores(identificacion)
+            huellas = huellas_registros(registros, nombres, campos, semilla)
+            posiciones, encontradas, sin_cambios = anterior.buscar(claves, huellas, conteo['filas'])
+
+            activadas = np.empty((len(claves), len(codigos)), dtype=bool)
+            reutilizadas = np.flatnonzero(sin_cambios)
+            activadas[reutilizadas] = anterior.mascaras(posiciones[reutilizadas])
+            cambiadas = np.flatnonzero(~sin_cambios)
+            todas = len(cambiadas) == len(claves)
+            if len(cambiadas):
+                if isinstance(bloque, pd.DataFrame):
+                    datos = bloque if todas else bloque.iloc[cambiadas]
+                    evaluadas = evaluar_columnas(datos, version, backend)
+                else:
+                    parcial = bloque if todas else TablaProveedores(bloque.registros[cambiadas], bloque.industrias)
+                    evaluadas = parcial.evaluar(version, backend)
+                    if not todas:
+                        # Las filas sueltas no son contiguas: se identifican con las del bloque
+                        evaluadas['identificacion'] = identificacion.iloc[cambiadas]
+                    datos = parcial.a_dataframe() if historial is not None else None
+                activadas[cambiadas] = evaluadas['reglas_activadas'].to_numpy()
+                if historial is not None:
+                    historial.registrar_bloque(datos, evaluadas, fecha=fecha, origen=entrada)
+
+            # Riesgo, puntuación, factores y alertas se derivan de las reglas activadas
+            if todas:
+                escritor.escribir(evaluadas)
+            elif not solo_cambios:
+                escritor.escribir(completar_columnas(
+                    evaluar_mascaras(activadas, evaluador, identificacion.index), identificacion, version
+                ))
+            elif len(cambiadas):
+                escritor.escribir(completar_columnas(
+                    evaluar_mascaras(activadas[cambiadas], evaluador, identificacion.index[cambiadas]),
+                    identificacion.iloc[cambiadas], version
+                ))
+            nuevo.escribir(claves, huellas, np.packbits(activadas, axis=1, bitorder='little'))
+
+            conteo['filas'] += len(claves)
+            conteo['evaluadas'] += len(cambiadas)
+            conteo['nuevas'] += int(len(claves) - encontradas.sum())
+            conteo['reutilizadas'] += len(reutilizadas)
+            if progreso is not None:
+                progreso(conteo['filas'], time.perf_counter() - inicio)
+        escritor.cerrar()
+    except BaseException:
+        nuevo.descartar()
+        raise
+    finally:
+        if destino is not None and destino is not sys.stdout:
+            destino.close()
+    # Sin referencias a la generación anterior, que cerrar() borra
+    del anterior
+    nuevo.cerrar()
+
+    segundos = time.perf_counter() - inicio
+    return dict(conteo, segundos=segundos,
+                filas_por_segundo=conteo['filas'] / segundos if segundos > 0 else 0.0,
+                version_reglas=version.id)
@@ -1,11 +1,17 @@
 """
 Motor de inferencia para evaluación de riesgo de proveedores
-Utiliza experta para encadenamiento hacia adelante
+Utiliza encadenamiento hacia adelante con el lenguaje de reglas de experta
+(ver engine/reglas.py para elegir el motor nativo o experta)
 """
 
-from experta import KnowledgeEngine, Rule, Fact, MATCH, OR, AND, NOT
+from .reglas import KnowledgeEngine, Rule, Fact, MATCH, OR, AND, NOT
 from typing import List, Dict, Any
+from collections import OrderedDict
 from datetime import datetime
+import threading
+
+from .pool import PoolMotores
+from .plantillas import NIVELES_EXPLICACION, renderizar_explicaciones
 
 
 class DatosProveedor(Fact):
@@ -24,43 +30,68 @@ class MotorEvaluacionRiesgo(KnowledgeEngine):
     basándose en criterios financieros, operacionales, legales y reputacionales
     """
     
-    def __init__(self):
+    def __init__(self, nivel_explicacion: str = 'full'):
+        """
+        Args:
+            nivel_explicacion: 'none' (solo puntuación y riesgo), 'ids' (códigos
+                de regla y parámetros) o 'full' (textos completos)
+        """
         super().__init__()
+        self.nivel_explicacion = nivel_explicacion
+        self._reiniciar_estado()
+
+    @property
+    def nivel_explicacion(self) -> str:
+        """Detalle con el que se registran las explicaciones"""
+        return self._nivel_explicacion
+
+    @nivel_explicacion.setter
+    def nivel_explicacion(self, nivel: str):
+        if nivel not in NIVELES_EXPLICACION:
+            raise ValueError(f"Nivel de explicación no válido: {nivel!r} (use {', '.join(NIVELES_EXPLICACION)})")
+        self._nivel_explicacion = nivel
+
+    def _reiniciar_estado(self):
+        """Inicializa el estado mutable de la evaluación con listas nuevas"""
         self.explicaciones = []
         self.alertas = []
         self.puntuacion_total = 100
         self.riesgo_final = "NO DETERMINADO"
         self.recomendacion = ""
         self.factores_criticos = []
+        self.total_reglas = 0
+        self.marca_tiempo = None
+
+    def reset(self, **kwargs):
+        """Limpia hechos y estado de la evaluación para poder reutilizar el motor"""
+        super().reset(**kwargs)
+        self._reiniciar_estado()
         
-    def registrar_explicacion(self, regla: str, razonamiento: str, impacto: int):
-        """Registra la activación de una regla para trazabilidad"""
-        self.explicaciones.append({
-            'regla': regla,
-            'razonamiento': razonamiento,
-            'impacto': impacto,
-            'timestamp': datetime.now().strftime("%H:%M:%S")
-        })
+    def registrar_explicacion(self, codigo: str, impacto: int, **parametros):
+        """
+        Registra la activación de una regla para trazabilidad
+
+        Solo se guarda el código, el impacto y los parámetros; el texto se
+        genera desde PLANTILLAS_REGLAS cuando se pide el resultado completo.
+        """
         self.puntuacion_total -= impacto
+        self.total_reglas += 1
+        if self._nivel_explicacion != 'none':
+            if self.marca_tiempo is None:
+                self.marca_tiempo = datetime.now()
+            self.explicaciones.append((codigo, impacto, parametros))
         
     def registrar_alerta(self, nivel: str, mensaje: str):
         """Registra alertas de riesgo"""
-        self.alertas.append({
-            'nivel': nivel,
-            'mensaje': mensaje
-        })
+        if self._nivel_explicacion != 'none':
+            self.alertas.append((nivel, mensaje))
         
     # ========== REGLAS FINANCIERAS ==========
     
     @Rule(DatosProveedor(liquidez_corriente=MATCH.lc & (lambda lc: lc < 1.0)))
     def liquidez_critica(self, lc):
         """Liquidez corriente menor a 1.0 indica problemas de solvencia inmediata"""
-        self.registrar_explicacion(
-            "RF-001: Liquidez Crítica",
-            f"Ratio de liquidez corriente de {lc:.2f} está por debajo del mínimo aceptable (1.0). "
-            "El proveedor puede tener dificultades para cumplir obligaciones a corto plazo.",
-            25
-        )
+        self.registrar_explicacion("RF-001", 25, lc=lc)
         self.registrar_alerta("CRÍTICO", "Liquidez insuficiente - Alto riesgo de incumplimiento")
         self.declare(Conclusion(riesgo_financiero="ALTO"))
         self.factores_criticos.append("Liquidez crítica")
@@ -68,55 +99,33 @@ class MotorEvaluacionRiesgo(KnowledgeEngine):
     @Rule(DatosProveedor(liquidez_corriente=MATCH.lc & (lambda lc: 1.0 <= lc < 1.5)))
     def liquidez_moderada(self, lc):
         """Liquidez corriente entre 1.0 y 1.5 es aceptable pero requiere monitoreo"""
-        self.registrar_explicacion(
-            "RF-002: Liquidez Moderada",
-            f"Ratio de liquidez de {lc:.2f} es aceptable pero limitado. Se recomienda monitoreo.",
-            10
-        )
+        self.registrar_explicacion("RF-002", 10, lc=lc)
         self.declare(Conclusion(riesgo_financiero="MEDIO"))
         
     @Rule(DatosProveedor(liquidez_corriente=MATCH.lc & (lambda lc: lc >= 1.5)))
     def liquidez_saludable(self, lc):
         """Liquidez corriente mayor a 1.5 indica buena salud financiera"""
-        self.registrar_explicacion(
-            "RF-003: Liquidez Saludable",
-            f"Ratio de liquidez de {lc:.2f} es saludable. Buen indicador de solvencia.",
-            0
-        )
+        self.registrar_explicacion("RF-003", 0, lc=lc)
         self.declare(Conclusion(riesgo_financiero="BAJO"))
         
     @Rule(DatosProveedor(endeudamiento=MATCH.end & (lambda end: end > 0.7)))
     def endeudamiento_alto(self, end):
         """Endeudamiento superior al 70% es crítico"""
-        self.registrar_explicacion(
-            "RF-004: Endeudamiento Excesivo",
-            f"Nivel de endeudamiento de {end*100:.1f}% excede el límite prudente (70%). "
-            "Alta dependencia de financiamiento externo.",
-            20
-        )
+        self.registrar_explicacion("RF-004", 20, end=end)
         self.registrar_alerta("ALTO", "Endeudamiento excesivo - Riesgo de insolvencia")
         self.factores_criticos.append("Endeudamiento excesivo")
         
     @Rule(DatosProveedor(rentabilidad=MATCH.rent & (lambda rent: rent < 0)))
     def rentabilidad_negativa(self, rent):
         """Rentabilidad negativa indica pérdidas operativas"""
-        self.registrar_explicacion(
-            "RF-005: Pérdidas Operativas",
-            f"Rentabilidad negativa de {rent*100:.1f}% indica que el proveedor está operando con pérdidas. "
-            "Riesgo de discontinuidad del negocio.",
-            30
-        )
+        self.registrar_explicacion("RF-005", 30, rent=rent)
         self.registrar_alerta("CRÍTICO", "Proveedor operando con pérdidas")
         self.factores_criticos.append("Pérdidas operativas")
         
     @Rule(DatosProveedor(historial_pagos=MATCH.hp & (lambda hp: hp < 60)))
     def morosidad_alta(self, hp):
         """Tasa de pago puntual menor a 60% es inaceptable"""
-        self.registrar_explicacion(
-            "RF-006: Historial de Pagos Deficiente",
-            f"Solo {hp:.0f}% de pagos puntuales a sus proveedores. Indica problemas de flujo de caja.",
-            25
-        )
+        self.registrar_explicacion("RF-006", 25, hp=hp)
         self.registrar_alerta("ALTO", "Historial de morosidad significativo")
         self.factores_criticos.append("Morosidad recurrente")
     
@@ -125,55 +134,33 @@ class MotorEvaluacionRiesgo(KnowledgeEngine):
     @Rule(DatosProveedor(certificacion_calidad=False))
     def sin_certificacion_calidad(self):
         """Falta de certificación de calidad aumenta riesgo operacional"""
-        self.registrar_explicacion(
-            "RO-001: Sin Certificación de Calidad",
-            "El proveedor no cuenta con certificaciones de calidad (ISO 9001 u otras). "
-            "Mayor riesgo de incumplimiento de estándares.",
-            15
-        )
+        self.registrar_explicacion("RO-001", 15)
         self.declare(Conclusion(riesgo_operacional="MEDIO"))
         
     @Rule(DatosProveedor(tiempo_mercado=MATCH.tm & (lambda tm: tm < 2)))
     def proveedor_nuevo(self, tm):
         """Proveedores con menos de 2 años son de mayor riesgo"""
-        self.registrar_explicacion(
-            "RO-002: Proveedor Nuevo en el Mercado",
-            f"Solo {tm:.1f} años de operación. Falta de historial aumenta incertidumbre.",
-            15
-        )
+        self.registrar_explicacion("RO-002", 15, tm=tm)
         self.registrar_alerta("MEDIO", "Proveedor con experiencia limitada")
         
     @Rule(DatosProveedor(capacidad_produccion=MATCH.cp & (lambda cp: cp < 50)))
     def capacidad_limitada(self, cp):
         """Capacidad de producción menor a 50% indica problemas de escalabilidad"""
-        self.registrar_explicacion(
-            "RO-003: Capacidad de Producción Limitada",
-            f"Capacidad de producción al {cp:.0f}%. Riesgo de no poder atender demanda.",
-            20
-        )
+        self.registrar_explicacion("RO-003", 20, cp=cp)
         self.registrar_alerta("ALTO", "Capacidad insuficiente para escalar")
         self.factores_criticos.append("Capacidad limitada")
         
     @Rule(DatosProveedor(tasa_defectos=MATCH.td & (lambda td: td > 5)))
     def alta_tasa_defectos(self, td):
         """Tasa de defectos superior a 5% es inaceptable"""
-        self.registrar_explicacion(
-            "RO-004: Alta Tasa de Defectos",
-            f"Tasa de defectos de {td:.1f}% excede el estándar aceptable (5%). "
-            "Impacto en calidad del producto final.",
-            25
-        )
+        self.registrar_explicacion("RO-004", 25, td=td)
         self.registrar_alerta("CRÍTICO", "Control de calidad deficiente")
         self.factores_criticos.append("Problemas de calidad")
         
     @Rule(DatosProveedor(cumplimiento_entregas=MATCH.ce & (lambda ce: ce < 70)))
     def incumplimiento_entregas(self, ce):
         """Cumplimiento de entregas menor a 70% es crítico"""
-        self.registrar_explicacion(
-            "RO-005: Incumplimiento Sistemático de Entregas",
-            f"Solo {ce:.0f}% de entregas a tiempo. Afecta la cadena de suministro.",
-            25
-        )
+        self.registrar_explicacion("RO-005", 25, ce=ce)
         self.registrar_alerta("CRÍTICO", "Retrasos frecuentes en entregas")
         self.factores_criticos.append("Incumplimiento de plazos")
     
@@ -182,12 +169,7 @@ class MotorEvaluacionRiesgo(KnowledgeEngine):
     @Rule(DatosProveedor(cumplimiento_legal=False))
     def incumplimiento_legal(self):
         """Incumplimiento de normativas legales es factor crítico"""
-        self.registrar_explicacion(
-            "RL-001: Incumplimiento Legal",
-            "El proveedor tiene antecedentes de incumplimiento legal o normativo. "
-            "Riesgo reputacional y legal para la organización.",
-            30
-        )
+        self.registrar_explicacion("RL-001", 30)
         self.registrar_alerta("CRÍTICO", "Antecedentes legales problemáticos")
         self.declare(Conclusion(riesgo_legal="ALTO"))
         self.factores_criticos.append("Problemas legales")
@@ -196,23 +178,13 @@ class MotorEvaluacionRiesgo(KnowledgeEngine):
           DatosProveedor(industria="manufactura"))
     def sin_certificacion_ambiental(self):
         """Manufactura sin certificación ambiental es riesgoso"""
-        self.registrar_explicacion(
-            "RL-002: Sin Certificación Ambiental",
-            "Proveedor de manufactura sin certificaciones ambientales (ISO 14001). "
-            "Riesgo de incumplimiento normativo futuro.",
-            15
-        )
+        self.registrar_explicacion("RL-002", 15)
         self.registrar_alerta("MEDIO", "Falta certificación ambiental")
         
     @Rule(DatosProveedor(seguros_vigentes=False))
     def sin_seguros(self):
         """Falta de seguros aumenta riesgo de responsabilidad"""
-        self.registrar_explicacion(
-            "RL-003: Seguros No Vigentes",
-            "El proveedor no cuenta con seguros de responsabilidad civil vigentes. "
-            "Exposición a riesgos no cubiertos.",
-            20
-        )
+        self.registrar_explicacion("RL-003", 20)
         self.registrar_alerta("ALTO", "Sin cobertura de seguros adecuada")
         self.factores_criticos.append("Sin seguros")
     
@@ -221,35 +193,20 @@ class MotorEvaluacionRiesgo(KnowledgeEngine):
     @Rule(DatosProveedor(calificacion_mercado=MATCH.cm & (lambda cm: cm < 3.0)))
     def mala_reputacion(self, cm):
         """Calificación de mercado menor a 3.0 de 5.0 es preocupante"""
-        self.registrar_explicacion(
-            "RR-001: Reputación Deficiente",
-            f"Calificación de mercado de {cm:.1f}/5.0 indica problemas reputacionales. "
-            "Posibles conflictos con otros clientes.",
-            20
-        )
+        self.registrar_explicacion("RR-001", 20, cm=cm)
         self.registrar_alerta("ALTO", "Reputación de mercado deficiente")
         self.declare(Conclusion(riesgo_reputacional="ALTO"))
         
     @Rule(DatosProveedor(quejas_clientes=MATCH.qc & (lambda qc: qc > 10)))
     def muchas_quejas(self, qc):
         """Más de 10 quejas recientes es señal de alerta"""
-        self.registrar_explicacion(
-            "RR-002: Alto Número de Quejas",
-            f"{qc:.0f} quejas de clientes en el último año. "
-            "Indica problemas recurrentes de servicio o calidad.",
-            15
-        )
+        self.registrar_explicacion("RR-002", 15, qc=qc)
         self.registrar_alerta("MEDIO", "Múltiples quejas de clientes")
         
     @Rule(DatosProveedor(referencias_positivas=MATCH.rp & (lambda rp: rp < 2)))
     def pocas_referencias(self, rp):
         """Menos de 2 referencias positivas es insuficiente"""
-        self.registrar_explicacion(
-            "RR-003: Referencias Insuficientes",
-            f"Solo {rp:.0f} referencias positivas verificables. "
-            "Dificulta validar historial del proveedor.",
-            10
-        )
+        self.registrar_explicacion("RR-003", 10, rp=rp)
     
     # ========== REGLAS DE DECISIÓN FINAL ==========
     
@@ -289,52 +246,112 @@ class MotorEvaluacionRiesgo(KnowledgeEngine):
                 self.recomendacion = "NO APROBAR al proveedor"
                 
     def obtener_resultado(self) -> Dict[str, Any]:
-        """Retorna el resultado completo de la evaluación"""
+        """
+        Retorna el resultado de la evaluación según el nivel de explicación
+
+        En 'full' las explicaciones y alertas son diccionarios con texto; en
+        'ids' se entregan compactas (tuplas (codigo, impacto, parametros) y
+        (nivel, mensaje)) junto con la marca de tiempo, y
+        plantillas.renderizar_resultado las convierte al formato completo;
+        en 'none' ambas listas quedan vacías.
+        """
         self.evaluar_puntuacion_final()
         
-        return {
+        resultado = {
             'riesgo_final': self.riesgo_final,
             'puntuacion': max(0, self.puntuacion_total),
             'recomendacion': self.recomendacion,
             'explicaciones': self.explicaciones,
             'alertas': self.alertas,
             'factores_criticos': self.factores_criticos,
-            'total_reglas_activadas': len(self.explicaciones)
+            'total_reglas_activadas': self.total_reglas
         }
 
+        if self._nivel_explicacion == 'full':
+            resultado['explicaciones'] = renderizar_explicaciones(self.explicaciones, self.marca_tiempo)
+            resultado['alertas'] = [{'nivel': nivel, 'mensaje': mensaje} for nivel, mensaje in self.alertas]
+        else:
+            resultado['nivel_explicacion'] = self._nivel_explicacion
+            resultado['marca_tiempo'] = self.marca_tiempo
+
+        return resultado
+
+
+# Pool compartido de motores ya construidos (ver engine/pool.py)
+POOL_MOTORES = PoolMotores(MotorEvaluacionRiesgo)
+
+# Pools de otras clases de motor publicadas en el registro de reglas
+_POOLS_MOTORES = OrderedDict()
+_MAX_POOLS_MOTORES = 8
+_LOCK_POOLS = threading.Lock()
 
-def evaluar_proveedor(datos_proveedor: Dict[str, Any]) -> Dict[str, Any]:
+
+def pool_motores(motor_cls: type) -> PoolMotores:
+    """
+    Pool compartido de motores de una clase
+
+    POOL_MOTORES para MotorEvaluacionRiesgo; para otras clases (subclases o
+    motores declarados en formato 'motor') se crea uno en el primer uso y se
+    conservan los de las últimas clases usadas.
+    """
+    if motor_cls is MotorEvaluacionRiesgo:
+        return POOL_MOTORES
+    with _LOCK_POOLS:
+        pool = _POOLS_MOTORES.pop(motor_cls, None) or PoolMotores(motor_cls)
+        _POOLS_MOTORES[motor_cls] = pool
+        while len(_POOLS_MOTORES) > _MAX_POOLS_MOTORES:
+            _POOLS_MOTORES.popitem(last=False)
+    return pool
+
+
+def evaluar_proveedor(datos_proveedor: Dict[str, Any], nivel_explicacion: str = 'full') -> Dict[str, Any]:
     """
     Función de envoltura (wrapper) que recibe un diccionario de datos,
     ejecuta el motor de inferencia y retorna un diccionario de resultados.
+
+    nivel_explicacion ('none', 'ids' o 'full') controla cuánto detalle de
+    explicación se genera (ver MotorEvaluacionRiesgo.obtener_resultado).
+    Las reglas son las de la versión vigente del registro compartido
+    (engine.registro.registro_reglas) y el resultado lleva su id en
+    'version_reglas'; un resultado 'ERROR' no lo lleva.
     """
-    try:
-        # 1. Instanciar el motor
-        motor = MotorEvaluacionRiesgo()
+    from .registro import registro_reglas
+
+    if nivel_explicacion not in NIVELES_EXPLICACION:
+        raise ValueError(f"Nivel de explicación no válido: {nivel_explicacion!r}")
 
-        # 2. Resetear (limpiar hechos anteriores)
-        motor.reset()
+    version = registro_reglas().fijar()
+    try:
+        # 1-2. Tomar un motor de la versión del pool (ya construido y reseteado)
+        with pool_motores(version.evaluador.motor_cls).motor() as motor:
+            motor.nivel_explicacion = nivel_explicacion
 
-        # 3. --- CORRECCIÓN CRÍTICA ---
-        # Declarar TODOS los datos como un ÚNICO hecho con múltiples atributos
-        motor.declare(DatosProveedor(**datos_proveedor))
+            # 3. --- CORRECCIÓN CRÍTICA ---
+            # Declarar TODOS los datos como un ÚNICO hecho con múltiples atributos
+            motor.declare(DatosProveedor(**datos_proveedor))
 
-        # 4. Correr el motor (encadenamiento hacia adelante)
-        motor.run()
+            # 4. Correr el motor (encadenamiento hacia adelante)
+            motor.run()
 
-        # 5. Obtener el diccionario de resultados
-        resultado = motor.obtener_resultado()
+            # 5. Obtener el diccionario de resultados
+            resultado = motor.obtener_resultado()
 
+        resultado['version_reglas'] = version.id
         return resultado
 
     except Exception as e:
         # Manejo de errores
-        return {
-            'riesgo_final': 'ERROR',
-            'puntuacion': 0,
-            'recomendacion': 'Error en el motor de inferencia',
-            'explicaciones': [],
-            'alertas': [{'nivel': 'CRÍTICO', 'mensaje': f"Error interno del motor: {str(e)}"}],
-            'factores_criticos': ['Error de ejecución'],
-            'total_reglas_activadas': 0
-        }
\ No newline at end of file
+        return _resultado_error(e)
+
+
+def _resultado_error(error: Exception) -> Dict[str, Any]:
+    """Resultado estándar cuando el motor falla al evaluar un proveedor"""
+    return {
+        'riesgo_final': 'ERROR',
+        'puntuacion': 0,
+        'recomendacion': 'Error en el motor de inferencia',
+        'explicaciones': [],
+        'alertas': [{'nivel': 'CRÍTICO', 'mensaje': f"Error interno del motor: {str(error)}"}],
+        'factores_criticos': ['Error de ejecución'],
+        'total_reglas_activadas': 0
+    }
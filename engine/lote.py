@@ -0,0 +1,147 @@
+"""
+Evaluación por lotes de proveedores
+Procesa cualquier iterable de proveedores reutilizando un único motor,
+en el proceso actual o repartido en varios procesos
+"""
+
+import multiprocessing
+import os
+from collections import deque
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from .inference_engine import DatosProveedor, MotorEvaluacionRiesgo, _resultado_error, pool_motores
+from .plantillas import NIVELES_EXPLICACION
+from .registro import VersionReglas, registro_reglas
+
+
+def _evaluar_con_motor(motor, datos_proveedor: Dict[str, Any], version_reglas: str) -> Dict[str, Any]:
+    """Resetea el motor, evalúa un proveedor y convierte los errores en resultado 'ERROR'"""
+    try:
+        motor.reset()
+        motor.declare(DatosProveedor(**datos_proveedor))
+        motor.run()
+        resultado = motor.obtener_resultado()
+    except Exception as e:
+        return _resultado_error(e)
+    resultado['version_reglas'] = version_reglas
+    return resultado
+
+
+def evaluar_lote(proveedores: Iterable[Dict[str, Any]],
+                 nivel_explicacion: str = 'full',
+                 version: Optional[VersionReglas] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Evalúa un iterable de proveedores y entrega los resultados de forma perezosa
+
+    Se toma un solo motor del pool para todo el lote y se resetea entre filas,
+    por lo que no se reconstruye el motor por proveedor. Todo el lote usa la
+    versión de reglas vigente al empezar, aunque se publique otra, y cada
+    resultado lleva su id en 'version_reglas'. Los resultados se
+    producen en el mismo orden de entrada y no se acumulan: la memoria usada
+    no depende del tamaño del lote. Un error en una fila se reporta con el
+    mismo diccionario 'ERROR' de evaluar_proveedor sin detener el lote.
+
+    Args:
+        proveedores: Iterable de diccionarios con los datos de cada proveedor
+        nivel_explicacion: 'none', 'ids' o 'full'; en lotes grandes 'none' o
+            'ids' evitan generar textos que nadie lee
+        version: Versión de reglas (por defecto, la vigente en registro_reglas())
+
+    Yields:
+        Dict con el resultado de cada proveedor, en el orden de entrada
+    """
+    version = version or registro_reglas().fijar()
+    with pool_motores(version.evaluador.motor_cls).motor() as motor:
+        motor.nivel_explicacion = nivel_explicacion
+        for datos_proveedor in proveedores:
+            yield _evaluar_con_motor(motor, datos_proveedor, version.id)
+
+
+# ========== EJECUCIÓN EN VARIOS PROCESOS ==========
+
+# Motor propio de cada proceso trabajador, construido una sola vez, y el id
+# de la versión de reglas de su clase
+_MOTOR_TRABAJADOR = None
+_VERSION_TRABAJADOR = None
+
+
+def _inicializar_trabajador(nivel_explicacion: str = 'full', motor_cls: type = MotorEvaluacionRiesgo,
+                            version_reglas: Optional[str] = None):
+    """
+    Prepara un proceso trabajador con su motor ya construido
+
+    La clase del motor llega del proceso principal (la de la versión fijada
+    al empezar el lote), no del registro del trabajador, que podría tener
+    otra versión vigente.
+    """
+    global _MOTOR_TRABAJADOR, _VERSION_TRABAJADOR
+
+    _MOTOR_TRABAJADOR = motor_cls(nivel_explicacion)
+    _VERSION_TRABAJADOR = version_reglas
+
+
+def _evaluar_bloque(bloque: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Evalúa un bloque de proveedores dentro de un proceso trabajador"""
+    return [_evaluar_con_motor(_MOTOR_TRABAJADOR, datos, _VERSION_TRABAJADOR) for datos in bloque]
+
+
+def _bloques(proveedores: Iterable[Dict[str, Any]], tamano: int) -> Iterator[List[Dict[str, Any]]]:
+    """Divide un iterable en listas de hasta `tamano` elementos"""
+    iterador = iter(proveedores)
+    while True:
+        bloque = list(islice(iterador, tamano))
+        if not bloque:
+            return
+        yield bloque
+
+
+def evaluar_lote_paralelo(proveedores: Iterable[Dict[str, Any]],
+                          procesos: Optional[int] = None,
+                          tamano_bloque: int = 256,
+                          nivel_explicacion: str = 'full',
+                          version: Optional[VersionReglas] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Evalúa un lote repartiéndolo en bloques entre varios procesos
+
+    El motor de inferencia es Python puro y queda limitado por el GIL, así que para usar
+    todos los núcleos cada proceso trabajador construye su propio motor una
+    vez y evalúa bloques completos, con la clase de motor de la versión de
+    reglas fijada al empezar. Los resultados se entregan en el orden de
+    entrada y solo hay un número acotado de bloques en vuelo, por lo que la
+    memoria no crece con el tamaño del lote.
+
+    Args:
+        proveedores: Iterable de diccionarios con los datos de cada proveedor
+        procesos: Número de procesos trabajadores (por defecto, los núcleos disponibles)
+        tamano_bloque: Proveedores enviados a un trabajador en cada tarea
+        nivel_explicacion: 'none', 'ids' o 'full' (ver evaluar_lote)
+        version: Versión de reglas (por defecto, la vigente en registro_reglas())
+
+    Yields:
+        Dict con el resultado de cada proveedor, en el orden de entrada
+    """
+    if tamano_bloque < 1:
+        raise ValueError("El tamaño de bloque debe ser al menos 1")
+    # Antes de crear el Pool: un inicializador que falla hace que se relancen
+    # los trabajadores indefinidamente
+    if nivel_explicacion not in NIVELES_EXPLICACION:
+        raise ValueError(f"Nivel de explicación no válido: {nivel_explicacion!r}")
+
+    version = version or registro_reglas().fijar()
+    procesos = procesos or os.cpu_count() or 1
+    if procesos == 1:
+        yield from evaluar_lote(proveedores, nivel_explicacion, version)
+        return
+
+    max_en_vuelo = procesos * 2
+    with multiprocessing.Pool(procesos, initializer=_inicializar_trabajador,
+                              initargs=(nivel_explicacion, version.evaluador.motor_cls, version.id)) as pool:
+        pendientes = deque()
+        for bloque in _bloques(proveedores, tamano_bloque):
+            pendientes.append(pool.apply_async(_evaluar_bloque, (bloque,)))
+            if len(pendientes) >= max_en_vuelo:
+                yield from pendientes.popleft().get()
+
+        while pendientes:
+            yield from pendientes.popleft().get()
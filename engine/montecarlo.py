@@ -0,0 +1,171 @@
+"""
+Simulación Monte Carlo de la incertidumbre de un proveedor
+Muestrea copias perturbadas de los datos financieros y las evalúa todas a la
+vez con la tabla de decisión
+"""
+
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from .compilado import EvaluadorCompilado
+from .tabla_decision import campos_sin_efecto, tabla_decision
+
+
+# Error típico de cada indicador financiero (desviación absoluta y rango válido)
+DISTRIBUCIONES_DEFECTO = {
+    'liquidez_corriente': {'tipo': 'normal', 'desviacion': 0.2, 'minimo': 0.0},
+    'endeudamiento': {'tipo': 'normal', 'desviacion': 0.05, 'minimo': 0.0, 'maximo': 1.0},
+    'rentabilidad': {'tipo': 'normal', 'desviacion': 0.03},
+    'historial_pagos': {'tipo': 'normal', 'desviacion': 5.0, 'minimo': 0.0, 'maximo': 100.0}
+}
+
+_NIVELES = ('BAJO', 'MEDIO', 'ALTO')
+
+
+def _muestrear_campo(rng: np.random.Generator, n: int, valor: float,
+                     distribucion: Dict[str, Any]) -> np.ndarray:
+    """Genera n valores alrededor de `valor` según la distribución indicada"""
+    tipo = distribucion.get('tipo', 'normal')
+    if tipo == 'normal':
+        muestras = valor + distribucion['desviacion'] * rng.standard_normal(n)
+    elif tipo == 'uniforme':
+        ancho = distribucion['ancho']
+        muestras = rng.uniform(valor - ancho, valor + ancho, n)
+    elif tipo == 'triangular':
+        ancho = distribucion['ancho']
+        muestras = rng.triangular(valor - ancho, valor, valor + ancho, n) if ancho > 0 else np.full(n, float(valor))
+    else:
+        raise ValueError(f"Distribución desconocida: {tipo}")
+
+    if 'minimo' in distribucion or 'maximo' in distribucion:
+        muestras = np.clip(muestras, distribucion.get('minimo', -np.inf), distribucion.get('maximo', np.inf))
+    return muestras
+
+
+def muestrear_proveedor(datos_proveedor: Dict[str, Any], n: int,
+                        distribuciones: Optional[Dict[str, Dict[str, Any]]] = None,
+                        semilla: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """
+    Muestrea n copias perturbadas de los campos inciertos de un proveedor
+
+    Args:
+        datos_proveedor: Diccionario con los datos del proveedor
+        n: Número de muestras
+        distribuciones: Distribución por campo (por defecto, DISTRIBUCIONES_DEFECTO).
+            Cada una es un dict con 'tipo' ('normal', 'uniforme' o 'triangular'),
+            'desviacion' o 'ancho', y opcionalmente 'minimo' y 'maximo'
+        semilla: Semilla del generador para resultados reproducibles
+
+    Returns:
+        Dict campo -> np.ndarray con las n muestras (solo campos presentes en los datos)
+    """
+    if n < 1:
+        raise ValueError("El número de muestras debe ser al menos 1")
+
+    distribuciones = DISTRIBUCIONES_DEFECTO if distribuciones is None else distribuciones
+    rng = np.random.default_rng(semilla)
+    return {
+        campo: _muestrear_campo(rng, n, datos_proveedor[campo], distribucion)
+        for campo, distribucion in distribuciones.items()
+        if campo in datos_proveedor
+    }
+
+
+def _mascaras_muestras(tabla, datos: Dict[str, Any], muestras: Dict[str, np.ndarray], n: int) -> np.ndarray:
+    """Máscara de reglas activadas de cada muestra, buscando su celda en cada partición"""
+    fija = -1
+    mascaras = None
+    for particion in tabla.particiones:
+        valores = muestras.get(particion.campo)
+        if valores is None:
+            fija &= particion.mascara(datos)
+            continue
+
+        cortes = np.asarray(particion.cortes, dtype=float)
+        posicion = np.searchsorted(cortes, valores, side='left')
+        exacto = np.zeros(n, dtype=bool)
+        if len(cortes):
+            dentro = posicion < len(cortes)
+            exacto[dentro] = cortes[posicion[dentro]] == valores[dentro]
+        celdas = 2 * posicion + exacto
+        por_celda = np.asarray(particion.mascaras, dtype=np.uint64)[celdas]
+        mascaras = por_celda if mascaras is None else mascaras & por_celda
+
+    if mascaras is None:
+        mascaras = np.full(n, np.uint64((1 << 64) - 1))
+    return mascaras & np.uint64(fija & ((1 << 64) - 1))
+
+
+def simular_proveedor(datos_proveedor: Dict[str, Any], n: int = 100_000,
+                      distribuciones: Optional[Dict[str, Dict[str, Any]]] = None,
+                      semilla: Optional[int] = None,
+                      evaluador: Optional[EvaluadorCompilado] = None) -> Dict[str, Any]:
+    """
+    Simula la incertidumbre de los datos de un proveedor
+
+    Cada muestra se clasifica en una sola pasada vectorizada: la celda de
+    cada campo muestreado se obtiene con np.searchsorted sobre los umbrales
+    de la tabla de decisión, la intersección de máscaras da las reglas
+    activadas y el resultado se busca una vez por cada combinación distinta
+    de reglas, no por muestra.
+
+    Args:
+        datos_proveedor: Diccionario con los datos del proveedor
+        n: Número de muestras
+        distribuciones: Distribución por campo (ver muestrear_proveedor)
+        semilla: Semilla del generador para resultados reproducibles
+        evaluador: Evaluador compilado (por defecto, el de MotorEvaluacionRiesgo)
+
+    Returns:
+        Dict con:
+        - probabilidades: probabilidad de cada nivel de riesgo
+        - puntuaciones: np.ndarray con la puntuación de cada muestra
+        - distribucion_puntuacion: dict puntuación -> frecuencia relativa
+        - puntuacion_media, desviacion_puntuacion, percentiles (5, 25, 50, 75, 95)
+        - riesgo_base, puntuacion_base: resultado sin perturbar
+        - campos_sin_efecto: campos perturbados que ninguna regla activable
+          lee; si son todos, el resultado es seguro y no una probabilidad
+        - n: número de muestras
+    """
+    datos = EvaluadorCompilado._validar(datos_proveedor)
+    tabla = tabla_decision(evaluador)
+    muestras = muestrear_proveedor(datos, n, distribuciones, semilla)
+
+    probabilidades = dict.fromkeys(_NIVELES, 0.0)
+    if len(tabla.evaluador.perfiles) <= 64:
+        combinaciones, inversa = np.unique(_mascaras_muestras(tabla, datos, muestras, n), return_inverse=True)
+        inversa = inversa.reshape(-1)
+        resultados = [tabla.resultado_mascara(int(m)) for m in combinaciones]
+        puntuaciones = np.array([r[1] for r in resultados], dtype=np.int64)[inversa]
+        conteos = np.bincount(inversa, minlength=len(resultados))
+        for resultado, conteo in zip(resultados, conteos):
+            probabilidades[resultado[0]] = probabilidades.get(resultado[0], 0.0) + int(conteo) / n
+    else:
+        # Más reglas de las que caben en una máscara de 64 bits: evaluación por columnas
+        import pandas as pd
+        from .vectorizado import evaluar_dataframe
+
+        df = pd.DataFrame({campo: np.repeat(np.array([valor], dtype=object), n) for campo, valor in datos.items()})
+        for campo, valores in muestras.items():
+            df[campo] = valores
+        evaluacion = evaluar_dataframe(df, tabla.evaluador)
+        puntuaciones = evaluacion['puntuacion'].to_numpy(dtype=np.int64)
+        for nivel, conteo in evaluacion['riesgo_final'].value_counts().items():
+            probabilidades[nivel] = int(conteo) / n
+
+    base = tabla.consultar(datos)
+    valores, frecuencias = np.unique(puntuaciones, return_counts=True)
+
+    return {
+        'probabilidades': probabilidades,
+        'puntuaciones': puntuaciones,
+        'distribucion_puntuacion': {int(v): int(f) / n for v, f in zip(valores, frecuencias)},
+        'puntuacion_media': float(puntuaciones.mean()),
+        'desviacion_puntuacion': float(puntuaciones.std()),
+        'percentiles': {p: float(np.percentile(puntuaciones, p)) for p in (5, 25, 50, 75, 95)},
+        'riesgo_base': base['riesgo_final'],
+        'puntuacion_base': base['puntuacion'],
+        'campos_sin_efecto': [campo for campo in campos_sin_efecto(tabla.evaluador) if campo in muestras],
+        'n': n
+    }
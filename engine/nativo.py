@@ -0,0 +1,851 @@
+"""
+Motor de encadenamiento hacia adelante propio
+Implementa el subconjunto del lenguaje de reglas de experta que usa
+MotorEvaluacionRiesgo (Rule, Fact, MATCH, W, L, P, AND, OR, NOT y salience)
+sin la red Rete genérica ni el parche de collections
+"""
+
+import bisect
+from functools import update_wrapper
+from types import MethodType
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+# ========== LENGUAJE DE REGLAS ==========
+
+class ConditionalElement(tuple):
+    """Elemento condicional base: una tupla de sus operandos"""
+
+    def __new__(cls, *args):
+        return super().__new__(cls, args)
+
+    def __repr__(self):
+        return f"{type(self).__name__}{super().__repr__()}"
+
+
+class _Combinable:
+    """Operadores &, | y ~ entre patrones y elementos condicionales"""
+
+    def __and__(self, otro):
+        return AND(*_aplanar((self, otro), AND))
+
+    def __or__(self, otro):
+        return OR(*_aplanar((self, otro), OR))
+
+    def __invert__(self):
+        return NOT(self)
+
+
+def _aplanar(elementos, tipo) -> list:
+    """Desanida los elementos del mismo tipo (AND(AND(a, b), c) -> AND(a, b, c))"""
+    planos = []
+    for elemento in elementos:
+        if isinstance(elemento, tipo):
+            planos.extend(_aplanar(elemento, tipo))
+        else:
+            planos.append(elemento)
+    return planos
+
+
+class AND(_Combinable, ConditionalElement):
+    """Conjunción de elementos condicionales"""
+
+
+class OR(_Combinable, ConditionalElement):
+    """Disyunción: cada rama que se cumple produce su propia activación"""
+
+
+class NOT(_Combinable, ConditionalElement):
+    """Se cumple mientras ninguna combinación de hechos satisface su contenido"""
+
+
+class FieldConstraint(ConditionalElement):
+    """Restricción sobre el valor de un campo de un patrón"""
+
+    def __and__(self, otro):
+        return ANDFC(*_aplanar((self, otro), ANDFC))
+
+
+class ANDFC(FieldConstraint):
+    """
+    Conjunción de restricciones de un campo
+
+    Como en experta, un operando que no es FieldConstraint (incluido un
+    lambda suelto) se compara por igualdad literal.
+    """
+
+
+class _Ligable:
+    """Restricción que puede ligar el valor del campo a una variable"""
+
+    def __eq__(self, otro):
+        return (type(self) is type(otro) and self.__bind__ == otro.__bind__
+                and tuple.__eq__(self, otro))
+
+    def __hash__(self):
+        return hash((type(self), self.__bind__) + tuple(self))
+
+
+class L(_Ligable, FieldConstraint):
+    """Restricción literal: el campo debe ser igual al valor"""
+
+    def __new__(cls, value, __bind__=None):
+        obj = super().__new__(cls, value)
+        obj.__bind__ = __bind__
+        return obj
+
+    @property
+    def value(self):
+        return self[0]
+
+
+class W(_Ligable, FieldConstraint):
+    """Comodín: el campo solo tiene que existir"""
+
+    def __new__(cls, __bind__=None):
+        obj = super().__new__(cls)
+        obj.__bind__ = __bind__
+        return obj
+
+
+class P(_Ligable, FieldConstraint):
+    """Predicado: el campo debe cumplir la función"""
+
+    def __new__(cls, match, __bind__=None):
+        if not callable(match):
+            raise TypeError("PredicateFC needs a callable.")
+        obj = super().__new__(cls, match)
+        obj.__bind__ = __bind__
+        return obj
+
+    @property
+    def match(self):
+        return self[0]
+
+
+class _Ligador:
+    """MATCH.x equivale a W('x'): liga el valor del campo a la variable x"""
+
+    def __getattr__(self, nombre: str) -> W:
+        if nombre.startswith('__'):
+            raise AttributeError(nombre)
+        return W(nombre)
+
+
+MATCH = _Ligador()
+
+
+def _congelar(valor):
+    """Versión hashable de un valor (listas, conjuntos y diccionarios anidados)"""
+    if isinstance(valor, (list, tuple)):
+        return tuple(_congelar(v) for v in valor)
+    if isinstance(valor, (set, frozenset)):
+        return frozenset(_congelar(v) for v in valor)
+    if isinstance(valor, dict):
+        return frozenset((k, _congelar(v)) for k, v in valor.items())
+    return valor
+
+
+class Fact(_Combinable, dict):
+    """
+    Hecho de la memoria de trabajo, o patrón cuando se usa dentro de @Rule.
+
+    Igual que en experta, el identificador asignado al declararlo se guarda
+    en la clave especial '__factid__' y el hecho no admite cambios una vez
+    declarado (modify() declara una copia).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+        for indice, valor in enumerate(args):
+            self[indice] = valor
+        for clave, valor in kwargs.items():
+            self[clave] = valor
+
+    def __setitem__(self, clave, valor):
+        if self.__factid__ is not None:
+            raise RuntimeError("A fact can't be modified after declaration.")
+        super().__setitem__(clave, valor)
+
+    def update(self, valores):
+        for clave, valor in dict(valores).items():
+            self[clave] = valor
+
+    @property
+    def __factid__(self) -> Optional[int]:
+        return self.get('__factid__')
+
+    @__factid__.setter
+    def __factid__(self, valor: int):
+        dict.__setitem__(self, '__factid__', valor)
+
+    @staticmethod
+    def is_special(clave) -> bool:
+        return isinstance(clave, str) and clave.startswith('__') and clave.endswith('__')
+
+    def as_dict(self) -> Dict[Any, Any]:
+        """Datos del hecho sin las claves especiales"""
+        return {k: v for k, v in self.items() if not self.is_special(k)}
+
+    def copy(self) -> 'Fact':
+        """Copia sin declarar del hecho, del mismo tipo"""
+        copia = type(self)()
+        for clave, valor in self.as_dict().items():
+            dict.__setitem__(copia, clave, valor)
+        return copia
+
+    def has_field_constraints(self) -> bool:
+        return any(isinstance(v, ConditionalElement) for v in self.values())
+
+    def has_nested_accessor(self) -> bool:
+        return any("__" in str(k).strip('__') for k in self.keys())
+
+    def __eq__(self, otro):
+        return type(self) is type(otro) and dict.__eq__(self, otro)
+
+    def __ne__(self, otro):
+        return not self == otro
+
+    def __hash__(self):
+        # '__factid__' forma parte del diccionario, así que dos hechos iguales
+        # tienen el mismo identificador
+        return hash((type(self), self.__factid__))
+
+    def __repr__(self):
+        campos = ", ".join(repr(v) if isinstance(k, int) else f"{k}={v!r}"
+                           for k, v in self.items() if not self.is_special(k))
+        return f"{type(self).__name__}({campos})"
+
+
+class InitialFact(Fact):
+    """Hecho que reset() declara siempre; sostiene las reglas que empiezan por NOT"""
+
+
+# Indicadores de co_flags (los mismos que inspect.CO_VARARGS y inspect.CO_VARKEYWORDS)
+_CO_VARARGS = 0x04
+_CO_VARKEYWORDS = 0x08
+
+
+def _parametros(funcion) -> set:
+    """Nombres de los parámetros de la función; vacío si acepta **kwargs (recibe todo)"""
+    codigo = getattr(funcion, '__code__', None)
+    if codigo is None:
+        import inspect
+        parametros = inspect.signature(funcion).parameters.values()
+        if any(p.kind == inspect.Parameter.VAR_KEYWORD for p in parametros):
+            return set()
+        return {p.name for p in parametros}
+
+    # Sin inspect.signature: leer el objeto de código es mucho más barato al definir las reglas
+    if codigo.co_flags & _CO_VARKEYWORDS:
+        return set()
+    total = codigo.co_argcount + codigo.co_kwonlyargcount + bool(codigo.co_flags & _CO_VARARGS)
+    return set(codigo.co_varnames[:total])
+
+
+class Rule(ConditionalElement):
+    """
+    Decorador de reglas: @Rule(patrones..., salience=0)
+
+    La primera llamada recibe la función de la parte derecha; las siguientes
+    la ejecutan pasando solo las variables ligadas que la función declara.
+    """
+
+    def __new__(cls, *args, salience: int = 0):
+        obj = super().__new__(cls, *args)
+        obj._wrapped = None
+        obj._wrapped_args = set()
+        obj.salience = salience
+        return obj
+
+    def __call__(self, *args, **kwargs):
+        if self._wrapped is None:
+            if not args:
+                raise AttributeError("Mandatory function not provided.")
+            self._wrapped = args[0]
+            self._wrapped_args = _parametros(self._wrapped)
+            return update_wrapper(self, self._wrapped)
+
+        if self._wrapped_args:
+            kwargs = {k: v for k, v in kwargs.items() if k in self._wrapped_args}
+        return self._wrapped(*args, **kwargs)
+
+    def __get__(self, instancia, propietario):
+        if instancia is None:
+            return self
+        return MethodType(self, instancia)
+
+    # Cada regla es única: se compara por identidad, no por sus patrones
+    __eq__ = object.__eq__
+    __ne__ = object.__ne__
+    __hash__ = object.__hash__
+
+    def __repr__(self):
+        return f"{super().__repr__()} => {self._wrapped!r}"
+
+
+# ========== COMPILACIÓN DE LA RED ==========
+
+# Tipos de comprobación de un campo
+_LITERAL = 0
+_PREDICADO = 1
+_COMODIN = 2
+
+
+def compilador_restricciones(andfc: type, comodin: type, predicado: type, literal: type, elemento: type):
+    """
+    Función que traduce la restricción de un campo a comprobaciones (campo, tipo, valor, variable)
+
+    Recibe las clases del lenguaje de reglas (las de este módulo o las de
+    experta), así el motor nativo y engine.compilado comparten una sola
+    semántica: un valor que no es FieldConstraint (incluido un lambda
+    suelto) se compara por igualdad literal, P() evalúa el predicado y W()
+    solo exige que el campo exista.
+    """
+    def comprobaciones_campo(campo, restriccion) -> List[Tuple[Any, int, Any, Optional[str]]]:
+        if isinstance(restriccion, andfc):
+            comprobaciones = []
+            for parte in restriccion:
+                comprobaciones.extend(comprobaciones_campo(campo, parte))
+            return comprobaciones
+        if isinstance(restriccion, comodin):
+            return [(campo, _COMODIN, None, restriccion.__bind__)]
+        if isinstance(restriccion, predicado):
+            return [(campo, _PREDICADO, restriccion.match, restriccion.__bind__)]
+        if isinstance(restriccion, literal):
+            return [(campo, _LITERAL, restriccion.value, restriccion.__bind__)]
+        if isinstance(restriccion, elemento):
+            raise TypeError(f"Restricción no soportada en el campo '{campo}': {restriccion!r}")
+        return [(campo, _LITERAL, restriccion, None)]
+
+    return comprobaciones_campo
+
+
+_comprobaciones_campo = compilador_restricciones(ANDFC, W, P, L, ConditionalElement)
+
+
+def reglas_de_clase(motor_cls: type, tipo_regla: type = Rule) -> list:
+    """
+    Reglas (instancias de tipo_regla) de una clase de motor en orden de declaración, respetando sobrescrituras
+
+    Una subclase que sobrescribe una regla con otro valor (p. ej. None) la
+    elimina, igual que experta, que solo ve los atributos que son reglas.
+    """
+    reglas = {}
+    for clase in reversed(motor_cls.__mro__):
+        for nombre, valor in vars(clase).items():
+            if isinstance(valor, tipo_regla):
+                reglas[nombre] = valor
+            else:
+                reglas.pop(nombre, None)
+    return list(reglas.values())
+
+
+class _MemoriaAlfa:
+    """
+    Hechos que cumplen un patrón, con las variables que liga cada uno
+
+    Solo aplica las comprobaciones del propio patrón; la unión entre
+    patrones de una regla se hace al calcular sus activaciones. El contenido
+    de la memoria es de cada motor (KnowledgeEngine._alfa), la red solo
+    guarda el patrón y las reglas que lo leen.
+    """
+
+    __slots__ = ('tipo', 'comprobaciones', 'reglas')
+
+    def __init__(self, tipo: type, comprobaciones: tuple):
+        self.tipo = tipo
+        self.comprobaciones = comprobaciones
+        self.reglas: List[int] = []
+
+    def comprobar(self, hecho: Fact) -> Optional[Dict[str, Any]]:
+        """Variables ligadas por el patrón, o None si el hecho no lo cumple"""
+        ligadas = {}
+        for campo, tipo, valor, variable in self.comprobaciones:
+            if campo not in hecho:
+                return None
+            actual = hecho[campo]
+            if tipo is _LITERAL:
+                if not valor == actual:
+                    return None
+            elif tipo is _PREDICADO:
+                if not valor(actual):
+                    return None
+            if variable is not None:
+                if variable in ligadas and ligadas[variable] != actual:
+                    return None
+                ligadas[variable] = actual
+        return ligadas
+
+
+# Nodos de la condición de una regla
+_HECHO = 'hecho'
+_Y = 'and'
+_O = 'or'
+_NO = 'not'
+
+
+class _ReglaCompilada:
+    """Regla con su condición expresada sobre memorias alfa"""
+
+    __slots__ = ('regla', 'nombre', 'condicion')
+
+    def __init__(self, regla: Rule, condicion: tuple):
+        self.regla = regla
+        self.nombre = regla.__name__
+        self.condicion = condicion
+
+
+def _con_hecho_inicial(elementos: list) -> list:
+    """
+    Antepone InitialFact() a una conjunción que empieza por NOT o no tiene patrones
+
+    Es la misma preparación que hace experta, de modo que estas reglas
+    necesitan un reset() y sus activaciones incluyen el hecho inicial.
+    """
+    if not elementos or isinstance(elementos[0], NOT) or not any(
+            isinstance(e, (Fact, AND, OR)) for e in elementos):
+        return [InitialFact()] + elementos
+    return elementos
+
+
+class RedReglas:
+    """
+    Red de reglas de una clase de motor, compartida por todas sus instancias.
+
+    Cada patrón distinto (tipo de hecho y comprobaciones) tiene una memoria
+    alfa. Las memorias se indexan por tipo de hecho y, si el patrón tiene
+    alguna comprobación literal, por el valor de su primer campo literal:
+    al declarar un hecho solo se prueban los patrones cuyo literal coincide
+    con el valor del hecho y los que no tienen literales. En las reglas de
+    MotorEvaluacionRiesgo la mayoría de los patrones tienen un literal que
+    casi nunca coincide, así que un proveedor se compara con pocos patrones.
+    """
+
+    _por_clase: Dict[type, 'RedReglas'] = {}
+
+    def __init__(self, motor_cls: type):
+        self.memorias: List[_MemoriaAlfa] = []
+        self._ids_memoria: Dict[tuple, int] = {}
+        # tipo -> campo -> valor literal -> memorias; y tipo -> memorias sin literal
+        self.indice: Dict[type, Dict[Any, Dict[Any, List[int]]]] = {}
+        self.sin_indice: Dict[type, List[int]] = {}
+        self.reglas = [self._compilar_regla(regla) for regla in reglas_de_clase(motor_cls)]
+
+        for i, regla in enumerate(self.reglas):
+            for memoria in self._memorias_condicion(regla.condicion):
+                if i not in self.memorias[memoria].reglas:
+                    self.memorias[memoria].reglas.append(i)
+
+    @classmethod
+    def de_clase(cls, motor_cls: type) -> 'RedReglas':
+        """Red de una clase de motor, compilada una sola vez"""
+        red = cls._por_clase.get(motor_cls)
+        if red is None:
+            red = cls._por_clase[motor_cls] = cls(motor_cls)
+        return red
+
+    # ---------- compilación ----------
+
+    def _memoria(self, patron: Fact) -> int:
+        """Identificador de la memoria alfa del patrón, creándola si es nueva"""
+        comprobaciones = []
+        for campo, restriccion in patron.items():
+            if not Fact.is_special(campo):
+                comprobaciones.extend(_comprobaciones_campo(campo, restriccion))
+        comprobaciones = tuple(comprobaciones)
+        tipo = type(patron)
+
+        clave = (tipo, tuple((c, t, id(v) if t is _PREDICADO else repr(v), b)
+                             for c, t, v, b in comprobaciones))
+        memoria = self._ids_memoria.get(clave)
+        if memoria is not None:
+            return memoria
+
+        memoria = self._ids_memoria[clave] = len(self.memorias)
+        self.memorias.append(_MemoriaAlfa(tipo, comprobaciones))
+        for campo, tipo_comprobacion, valor, _ in comprobaciones:
+            if tipo_comprobacion is _LITERAL:
+                try:
+                    hash(valor)
+                except TypeError:
+                    continue
+                (self.indice.setdefault(tipo, {}).setdefault(campo, {})
+                 .setdefault(valor, []).append(memoria))
+                break
+        else:
+            self.sin_indice.setdefault(tipo, []).append(memoria)
+        return memoria
+
+    def _compilar_regla(self, regla: Rule) -> _ReglaCompilada:
+        elementos = _con_hecho_inicial(_aplanar(regla, AND))
+        return _ReglaCompilada(regla, self._compilar_conjuncion(elementos))
+
+    def _compilar_conjuncion(self, elementos) -> tuple:
+        return tuple(self._compilar_elemento(e) for e in elementos)
+
+    def _compilar_elemento(self, elemento) -> tuple:
+        if isinstance(elemento, Fact):
+            return (_HECHO, self._memoria(elemento))
+        if isinstance(elemento, AND):
+            return (_Y, self._compilar_conjuncion(_con_hecho_inicial(_aplanar(elemento, AND))))
+        if isinstance(elemento, OR):
+            ramas = []
+            for rama in _aplanar(elemento, OR):
+                if isinstance(rama, NOT):
+                    rama = AND(InitialFact(), rama)
+                ramas.append(self._compilar_conjuncion((rama,)))
+            return (_O, tuple(ramas))
+        if isinstance(elemento, NOT):
+            return (_NO, self._compilar_conjuncion(_aplanar(elemento, AND)))
+        raise TypeError(f"Elemento condicional no soportado: {elemento!r}")
+
+    def _memorias_condicion(self, nodos: tuple) -> Iterator[int]:
+        for nodo in nodos:
+            if nodo[0] is _HECHO:
+                yield nodo[1]
+            elif nodo[0] is _O:
+                for rama in nodo[1]:
+                    yield from self._memorias_condicion(rama)
+            else:
+                yield from self._memorias_condicion(nodo[1])
+
+    # ---------- emparejamiento ----------
+
+    def candidatas(self, hecho: Fact) -> List[int]:
+        """Memorias alfa que pueden aceptar el hecho según el índice"""
+        tipo = type(hecho)
+        candidatas = list(self.sin_indice.get(tipo, ()))
+        for campo, por_valor in self.indice.get(tipo, {}).items():
+            if campo not in hecho:
+                continue
+            try:
+                candidatas.extend(por_valor.get(hecho[campo], ()))
+            except TypeError:
+                # Valor no hashable: se prueban todas las memorias del campo
+                for memorias in por_valor.values():
+                    candidatas.extend(memorias)
+        return candidatas
+
+    def coincidencias(self, nodos: tuple, alfa: list, contexto: Dict[str, Any],
+                      hechos: tuple) -> List[Tuple[Dict[str, Any], tuple]]:
+        """
+        Combinaciones de hechos de las memorias alfa que cumplen una condición
+
+        Args:
+            nodos: Condición compilada de la regla
+            alfa: Contenido de las memorias alfa del motor (factid -> (hecho, variables))
+            contexto: Variables ya ligadas
+            hechos: Hechos ya usados
+
+        Returns:
+            Lista de (variables ligadas, hechos usados), una por activación
+        """
+        resultados = [(contexto, hechos)]
+        for nodo in nodos:
+            siguientes = []
+            tipo = nodo[0]
+            for ctx, usados in resultados:
+                if tipo is _HECHO:
+                    for hecho, ligadas in alfa[nodo[1]].values():
+                        nuevo = ctx
+                        for variable, valor in ligadas.items():
+                            if variable in nuevo:
+                                if nuevo[variable] != valor:
+                                    break
+                            else:
+                                if nuevo is ctx:
+                                    nuevo = dict(ctx)
+                                nuevo[variable] = valor
+                        else:
+                            siguientes.append((nuevo, usados if hecho in usados else usados + (hecho,)))
+                elif tipo is _Y:
+                    siguientes.extend(self.coincidencias(nodo[1], alfa, ctx, usados))
+                elif tipo is _O:
+                    for rama in nodo[1]:
+                        siguientes.extend(self.coincidencias(rama, alfa, ctx, usados))
+                elif not self.coincidencias(nodo[1], alfa, ctx, ()):
+                    siguientes.append((ctx, usados))
+            resultados = siguientes
+        return resultados
+
+
+# ========== MEMORIA DE TRABAJO Y AGENDA ==========
+
+class FactList(dict):
+    """
+    Hechos declarados por identificador, en orden de declaración
+
+    Como en experta, un hecho igual a otro ya declarado no se vuelve a
+    declarar, y los cambios se acumulan hasta que el motor los consume.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.last_index = 0
+        self.reference_counter: Dict[Any, int] = {}
+        self.added: List[Fact] = []
+        self.removed: List[Fact] = []
+
+    @staticmethod
+    def _clave(hecho: Fact):
+        clave = (type(hecho), _congelar(hecho.as_dict()))
+        try:
+            hash(clave)
+        except TypeError:
+            return None
+        return clave
+
+    def declare(self, hecho: Fact) -> Optional[Fact]:
+        if not isinstance(hecho, Fact):
+            raise ValueError('The fact must descend the Fact class.')
+        clave = self._clave(hecho)
+        if clave is not None and clave in self.reference_counter:
+            return None
+
+        hecho.__factid__ = self.last_index
+        self[self.last_index] = hecho
+        self.last_index += 1
+        self.added.append(hecho)
+        if clave is not None:
+            self.reference_counter[clave] = 1
+        return hecho
+
+    def retract(self, hecho_o_indice) -> int:
+        indice = hecho_o_indice if isinstance(hecho_o_indice, int) else hecho_o_indice.__factid__
+        if indice not in self:
+            raise IndexError('Fact not found.')
+        hecho = self.pop(indice)
+        self.reference_counter.pop(self._clave(hecho), None)
+        self.removed.append(hecho)
+        return indice
+
+    @property
+    def changes(self) -> Tuple[List[Fact], List[Fact]]:
+        """Hechos añadidos y retirados desde la última consulta"""
+        try:
+            return self.added, self.removed
+        finally:
+            self.added = []
+            self.removed = []
+
+
+class Activation:
+    """Regla lista para dispararse con unos hechos y variables ligadas concretos"""
+
+    __slots__ = ('rule', 'facts', 'context', 'key', '_ids')
+
+    def __init__(self, rule: Rule, facts, context: Dict[str, Any]):
+        self.rule = rule
+        self.facts = set(facts)
+        self.context = context
+        self._ids = frozenset(hecho.__factid__ for hecho in self.facts)
+        self.key = None
+
+    def __eq__(self, otra):
+        if not isinstance(otra, Activation):
+            return NotImplemented
+        return self.rule is otra.rule and self._ids == otra._ids and self.context == otra.context
+
+    def __hash__(self):
+        return hash((id(self.rule), self._ids))
+
+    def __lt__(self, otra):
+        return self.key < otra.key
+
+    def __repr__(self):
+        return f"Activation(rule={self.rule.__name__}, facts={sorted(self._ids)}, context={self.context})"
+
+
+class Agenda:
+    """Activaciones pendientes; la última de la lista es la siguiente en ejecutarse"""
+
+    def __init__(self):
+        self.activations: List[Activation] = []
+
+    def get_next(self) -> Optional[Activation]:
+        try:
+            return self.activations.pop()
+        except IndexError:
+            return None
+
+
+class DepthStrategy:
+    """
+    Resolución de conflictos de experta (y de CLIPS por defecto)
+
+    Primero la mayor salience; a igualdad, la activación con los hechos más
+    recientes (identificadores ordenados de mayor a menor y comparados
+    lexicográficamente); a igualdad de ambos, la última en llegar.
+    """
+
+    @staticmethod
+    def get_key(activacion: Activation) -> tuple:
+        return (activacion.rule.salience, sorted(activacion._ids, reverse=True))
+
+    def update_agenda(self, agenda: Agenda, added, removed):
+        activaciones = agenda.activations
+        for activacion in removed:
+            try:
+                activaciones.remove(activacion)
+            except ValueError:
+                # Ya se ejecutó
+                pass
+        for activacion in added:
+            activacion.key = self.get_key(activacion)
+            bisect.insort(activaciones, activacion)
+
+
+# ========== MOTOR ==========
+
+class KnowledgeEngine:
+    """
+    Motor de encadenamiento hacia adelante compatible con la API de experta
+    que usa el proyecto: reset, declare, retract, modify, run, halt,
+    get_activations, facts, agenda, strategy y running.
+
+    La red de reglas se compila una vez por clase; cada instancia solo
+    guarda sus hechos, el contenido de las memorias alfa y las activaciones
+    vigentes de cada regla. Al consumir cambios de hechos se actualizan las
+    memorias alfa afectadas y se recalculan las activaciones de las reglas
+    que las leen, informando las que aparecen y las que desaparecen.
+    """
+
+    __strategy__ = DepthStrategy
+
+    def __init__(self):
+        self.running = False
+        self.red = RedReglas.de_clase(type(self))
+        self.strategy = self.__strategy__()
+        self._vaciar()
+
+    def _vaciar(self):
+        """Memoria de trabajo, agenda y memorias de la red vacías"""
+        self.facts = FactList()
+        self.agenda = Agenda()
+        self._alfa: List[Dict[int, Tuple[Fact, Dict[str, Any]]]] = [{} for _ in self.red.memorias]
+        self._conjuntos: List[Dict[tuple, Activation]] = [{} for _ in self.red.reglas]
+
+    def get_rules(self) -> List[Rule]:
+        """Reglas del motor en orden de declaración"""
+        return [regla.regla for regla in self.red.reglas]
+
+    def reset(self, **kwargs):
+        """Vacía hechos y agenda y declara InitialFact()"""
+        self._vaciar()
+        self._declarar(InitialFact())
+        self.running = False
+
+    def _declarar(self, *hechos) -> Optional[Fact]:
+        for hecho in hechos:
+            if hecho.has_field_constraints():
+                raise TypeError("Declared facts cannot contain conditional elements")
+            if hecho.has_nested_accessor():
+                raise KeyError("Cannot declare facts containing double underscores as keys.")
+
+        ultimo = None
+        for hecho in hechos:
+            ultimo = self.facts.declare(hecho)
+        if not self.running:
+            self.strategy.update_agenda(self.agenda, *self.get_activations())
+        return ultimo
+
+    def declare(self, *hechos) -> Optional[Fact]:
+        """
+        Declara hechos en la memoria de trabajo
+
+        Returns:
+            El último hecho declarado, o None si ya existía uno igual
+        """
+        return self._declarar(*hechos)
+
+    def retract(self, hecho_o_indice):
+        """Retira un hecho declarado (o su identificador)"""
+        self.facts.retract(hecho_o_indice)
+        if not self.running:
+            self.strategy.update_agenda(self.agenda, *self.get_activations())
+
+    def modify(self, hecho: Fact, **cambios) -> Optional[Fact]:
+        """Retira el hecho y declara una copia con los campos cambiados"""
+        self.retract(hecho)
+        nuevo = hecho.copy()
+        nuevo.update(cambios)
+        return self.declare(nuevo)
+
+    def duplicate(self, hecho: Fact, **cambios) -> Optional[Fact]:
+        """Declara una copia del hecho con los campos cambiados"""
+        nuevo = hecho.copy()
+        nuevo.update(cambios)
+        return self.declare(nuevo)
+
+    def get_activations(self) -> Tuple[List[Activation], List[Activation]]:
+        """
+        Consume los cambios de hechos pendientes
+
+        Returns:
+            Tupla (activaciones nuevas, activaciones que dejaron de cumplirse)
+        """
+        agregados, retirados = self.facts.changes
+        if not agregados and not retirados:
+            return [], []
+
+        red = self.red
+        alfa = self._alfa
+        afectadas = set()
+
+        for hecho in retirados:
+            indice = hecho.__factid__
+            for memoria in red.candidatas(hecho):
+                if alfa[memoria].pop(indice, None) is not None:
+                    afectadas.update(red.memorias[memoria].reglas)
+
+        for hecho in agregados:
+            indice = hecho.__factid__
+            for memoria in red.candidatas(hecho):
+                ligadas = red.memorias[memoria].comprobar(hecho)
+                if ligadas is not None:
+                    alfa[memoria][indice] = (hecho, ligadas)
+                    afectadas.update(red.memorias[memoria].reglas)
+
+        nuevas, eliminadas = [], []
+        for i in sorted(afectadas):
+            self._actualizar_regla(i, nuevas, eliminadas)
+        return nuevas, eliminadas
+
+    def _actualizar_regla(self, i: int, nuevas: list, eliminadas: list):
+        """Recalcula las activaciones de una regla y anota las diferencias"""
+        compilada = self.red.reglas[i]
+        anterior = self._conjuntos[i]
+        actual = {}
+
+        for contexto, hechos in self.red.coincidencias(compilada.condicion, self._alfa, {}, ()):
+            clave = (frozenset(h.__factid__ for h in hechos), _congelar(contexto))
+            if clave in actual:
+                continue
+            activacion = anterior.get(clave)
+            if activacion is None:
+                activacion = Activation(compilada.regla, hechos, contexto)
+                nuevas.append(activacion)
+            actual[clave] = activacion
+
+        for clave, activacion in anterior.items():
+            if clave not in actual:
+                eliminadas.append(activacion)
+        self._conjuntos[i] = actual
+
+    def run(self, steps=float('inf')):
+        """Dispara activaciones de la agenda hasta agotarla (o `steps` disparos)"""
+        self.running = True
+        while steps > 0 and self.running:
+            self.strategy.update_agenda(self.agenda, *self.get_activations())
+            activacion = self.agenda.get_next()
+            if activacion is None:
+                break
+            steps -= 1
+            activacion.rule(self, **{k: v for k, v in activacion.context.items()
+                                     if not k.startswith('__')})
+        self.running = False
+
+    def halt(self):
+        """Detiene run() tras la activación en curso"""
+        self.running = False
@@ -0,0 +1,260 @@
+"""
+Perfilado opcional del motor de inferencia
+Mide por regla las activaciones, el tiempo de la parte derecha y los hechos
+coincidentes, y por motor los tiempos de construcción, reset, declare, run y
+obtener_resultado
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict
+
+from .reglas import KnowledgeEngine
+
+
+# Operaciones del motor que se cronometran, en el orden de una evaluación
+OPERACIONES_MOTOR = ('construccion', 'reset', 'declare', 'run', 'obtener_resultado')
+
+# Fases internas de run(): emparejamiento de hechos, actualización de la agenda y
+# ejecución de la parte derecha de las reglas
+FASES_RUN = ('match', 'agenda', 'rhs')
+
+
+def _acumulador() -> Dict[str, float]:
+    return {'llamadas': 0, 'total_s': 0.0, 'minimo_s': float('inf'), 'maximo_s': 0.0}
+
+
+def _acumular(acumulador: Dict[str, float], duracion: float):
+    acumulador['llamadas'] += 1
+    acumulador['total_s'] += duracion
+    if duracion < acumulador['minimo_s']:
+        acumulador['minimo_s'] = duracion
+    if duracion > acumulador['maximo_s']:
+        acumulador['maximo_s'] = duracion
+
+
+def _resumen(acumulador: Dict[str, float]) -> Dict[str, float]:
+    llamadas = acumulador['llamadas']
+    return {
+        'llamadas': llamadas,
+        'total_s': acumulador['total_s'],
+        'media_s': acumulador['total_s'] / llamadas if llamadas else 0.0,
+        'minimo_s': acumulador['minimo_s'] if llamadas else 0.0,
+        'maximo_s': acumulador['maximo_s']
+    }
+
+
+class _EstrategiaPerfilada:
+    """Envuelve la estrategia de resolución de conflictos para cronometrar la agenda"""
+
+    def __init__(self, original, estado: '_EstadoMotor'):
+        self.original = original
+        self._estado = estado
+
+    def update_agenda(self, agenda, added, removed):
+        inicio = time.perf_counter()
+        self.original.update_agenda(agenda, added, removed)
+        estado = self._estado
+        estado.perfilador._registrar_fase('agenda', time.perf_counter() - inicio)
+        if estado.motor.running and agenda.activations:
+            # La siguiente activación en ejecutarse es la última de la agenda
+            estado.pendiente = agenda.activations[-1]
+            estado.inicio_rhs = time.perf_counter()
+
+    def __getattr__(self, nombre):
+        return getattr(self.original, nombre)
+
+
+class _EstadoMotor:
+    """Activación en curso de un motor instrumentado"""
+
+    __slots__ = ('perfilador', 'motor', 'pendiente', 'inicio_rhs')
+
+    def __init__(self, perfilador: 'PerfiladorMotor', motor: KnowledgeEngine):
+        self.perfilador = perfilador
+        self.motor = motor
+        self.pendiente = None
+        self.inicio_rhs = 0.0
+
+    def cerrar_activacion(self):
+        """Atribuye el tiempo transcurrido desde que empezó la activación pendiente"""
+        if self.pendiente is not None:
+            duracion = time.perf_counter() - self.inicio_rhs
+            self.perfilador._registrar_regla(self.pendiente, duracion)
+            self.pendiente = None
+
+
+class PerfiladorMotor:
+    """
+    Recoge estadísticas de los motores que se le instrumentan.
+
+    El perfilado es opcional y no cuesta nada mientras está desactivado: la
+    clase MotorEvaluacionRiesgo no se modifica, sino que instrumentar()
+    sustituye métodos solo en la instancia indicada (reset, declare, run,
+    obtener_resultado y get_activations) y envuelve su estrategia.
+    desinstrumentar() deja el motor como estaba.
+
+    El tiempo de la parte derecha de una regla se mide desde que la agenda
+    la selecciona hasta que run() vuelve a emparejar, de modo que incluye
+    los declare() que haga la propia regla (que también cuentan en las
+    estadísticas de declare). Un mismo perfilador puede compartirse entre
+    los motores de un pool; los acumuladores están protegidos por un lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self):
+        """Pone a cero todas las estadísticas"""
+        with self._lock:
+            self._operaciones = {operacion: _acumulador() for operacion in OPERACIONES_MOTOR}
+            self._fases = {fase: _acumulador() for fase in FASES_RUN}
+            self._reglas: Dict[str, Dict[str, Any]] = {}
+
+    # ========== REGISTRO ==========
+
+    def _registrar_operacion(self, operacion: str, duracion: float):
+        with self._lock:
+            _acumular(self._operaciones[operacion], duracion)
+
+    def _registrar_fase(self, fase: str, duracion: float):
+        with self._lock:
+            _acumular(self._fases[fase], duracion)
+
+    def _registrar_regla(self, activacion, duracion: float):
+        nombre = getattr(activacion.rule, '__name__', repr(activacion.rule))
+        with self._lock:
+            regla = self._reglas.get(nombre)
+            if regla is None:
+                regla = self._reglas[nombre] = {'tiempo': _acumulador(), 'hechos': 0}
+            _acumular(regla['tiempo'], duracion)
+            regla['hechos'] += len(activacion.facts)
+            _acumular(self._fases['rhs'], duracion)
+
+    # ========== INSTRUMENTACIÓN ==========
+
+    def _cronometrar(self, operacion: str, metodo: Callable) -> Callable:
+        def cronometrado(*args, **kwargs):
+            inicio = time.perf_counter()
+            try:
+                return metodo(*args, **kwargs)
+            finally:
+                self._registrar_operacion(operacion, time.perf_counter() - inicio)
+        return cronometrado
+
+    def instrumentar(self, motor: KnowledgeEngine) -> KnowledgeEngine:
+        """
+        Activa el perfilado en un motor ya construido
+
+        Args:
+            motor: Motor de inferencia (p. ej. MotorEvaluacionRiesgo)
+
+        Returns:
+            El mismo motor, para encadenar
+        """
+        if isinstance(motor.strategy, _EstrategiaPerfilada):
+            raise ValueError("El motor ya está instrumentado")
+
+        estado = _EstadoMotor(self, motor)
+        motor.strategy = _EstrategiaPerfilada(motor.strategy, estado)
+
+        get_activations = motor.get_activations
+        run = motor.run
+
+        def get_activations_perfilado():
+            estado.cerrar_activacion()
+            inicio = time.perf_counter()
+            cambios = get_activations()
+            self._registrar_fase('match', time.perf_counter() - inicio)
+            return cambios
+
+        def run_perfilado(*args, **kwargs):
+            try:
+                return run(*args, **kwargs)
+            finally:
+                estado.cerrar_activacion()
+
+        motor.get_activations = get_activations_perfilado
+        motor.run = self._cronometrar('run', run_perfilado)
+        for operacion in ('reset', 'declare', 'obtener_resultado'):
+            if hasattr(motor, operacion):
+                setattr(motor, operacion, self._cronometrar(operacion, getattr(motor, operacion)))
+        return motor
+
+    @staticmethod
+    def desinstrumentar(motor: KnowledgeEngine) -> KnowledgeEngine:
+        """Devuelve un motor instrumentado a su comportamiento original"""
+        if isinstance(motor.strategy, _EstrategiaPerfilada):
+            motor.strategy = motor.strategy.original
+        for nombre in ('get_activations', 'run', 'reset', 'declare', 'obtener_resultado'):
+            motor.__dict__.pop(nombre, None)
+        return motor
+
+    def crear(self, fabrica: Callable[[], KnowledgeEngine]) -> KnowledgeEngine:
+        """Construye un motor cronometrando la construcción y lo instrumenta"""
+        inicio = time.perf_counter()
+        motor = fabrica()
+        self._registrar_operacion('construccion', time.perf_counter() - inicio)
+        return self.instrumentar(motor)
+
+    def fabrica(self, fabrica: Callable[[], KnowledgeEngine]) -> Callable[[], KnowledgeEngine]:
+        """
+        Fábrica de motores perfilados, p. ej. para PoolMotores
+
+        Ejemplo:
+            pool = PoolMotores(perfilador.fabrica(MotorEvaluacionRiesgo))
+        """
+        return lambda: self.crear(fabrica)
+
+    # ========== CONSULTA ==========
+
+    def estadisticas(self) -> Dict[str, Any]:
+        """
+        Estadísticas acumuladas
+
+        Returns:
+            Dict con:
+            - motor: operación -> llamadas, total_s, media_s, minimo_s, maximo_s
+            - fases: match/agenda/rhs con los mismos campos (match y agenda
+              incluyen también las actualizaciones que hace declare() fuera de run())
+            - reglas: nombre -> activaciones, tiempo_total_s, tiempo_medio_s,
+              tiempo_maximo_s y hechos_coincidentes
+        """
+        with self._lock:
+            reglas = {}
+            for nombre, regla in self._reglas.items():
+                tiempo = _resumen(regla['tiempo'])
+                reglas[nombre] = {
+                    'activaciones': tiempo['llamadas'],
+                    'tiempo_total_s': tiempo['total_s'],
+                    'tiempo_medio_s': tiempo['media_s'],
+                    'tiempo_maximo_s': tiempo['maximo_s'],
+                    'hechos_coincidentes': regla['hechos']
+                }
+            return {
+                'motor': {operacion: _resumen(a) for operacion, a in self._operaciones.items()},
+                'fases': {fase: _resumen(a) for fase, a in self._fases.items()},
+                'reglas': reglas
+            }
+
+    def reglas_dataframe(self):
+        """Estadísticas por regla como DataFrame, de más a menos tiempo total"""
+        import pandas as pd
+
+        reglas = self.estadisticas()['reglas']
+        columnas = ['activaciones', 'tiempo_total_s', 'tiempo_medio_s', 'tiempo_maximo_s', 'hechos_coincidentes']
+        df = pd.DataFrame.from_dict(reglas, orient='index', columns=columnas)
+        df.index.name = 'regla'
+        return df.sort_values('tiempo_total_s', ascending=False)
+
+    def motor_dataframe(self):
+        """Tiempos de las operaciones del motor y de las fases como DataFrame"""
+        import pandas as pd
+
+        estadisticas = self.estadisticas()
+        filas = dict(estadisticas['motor'])
+        filas.update({f"fase.{fase}": valores for fase, valores in estadisticas['fases'].items()})
+        df = pd.DataFrame.from_dict(filas, orient='index')
+        df.index.name = 'operacion'
+        return df
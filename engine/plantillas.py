@@ -0,0 +1,166 @@
+"""
+Plantillas de texto de las reglas
+Registro de títulos y razonamientos de cada regla, renderizados solo cuando
+alguien necesita leer la explicación
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+
+NIVELES_EXPLICACION = ('none', 'ids', 'full')
+
+# Título y razonamiento de cada regla; los parámetros son los valores que la
+# regla recibe del hecho DatosProveedor
+PLANTILLAS_REGLAS = {
+    # ========== REGLAS FINANCIERAS ==========
+    'RF-001': {
+        'titulo': "RF-001: Liquidez Crítica",
+        'razonamiento': "Ratio de liquidez corriente de {lc:.2f} está por debajo del mínimo aceptable (1.0). "
+                        "El proveedor puede tener dificultades para cumplir obligaciones a corto plazo."
+    },
+    'RF-002': {
+        'titulo': "RF-002: Liquidez Moderada",
+        'razonamiento': "Ratio de liquidez de {lc:.2f} es aceptable pero limitado. Se recomienda monitoreo."
+    },
+    'RF-003': {
+        'titulo': "RF-003: Liquidez Saludable",
+        'razonamiento': "Ratio de liquidez de {lc:.2f} es saludable. Buen indicador de solvencia."
+    },
+    'RF-004': {
+        'titulo': "RF-004: Endeudamiento Excesivo",
+        'razonamiento': "Nivel de endeudamiento de {end:.1%} excede el límite prudente (70%). "
+                        "Alta dependencia de financiamiento externo."
+    },
+    'RF-005': {
+        'titulo': "RF-005: Pérdidas Operativas",
+        'razonamiento': "Rentabilidad negativa de {rent:.1%} indica que el proveedor está operando con pérdidas. "
+                        "Riesgo de discontinuidad del negocio."
+    },
+    'RF-006': {
+        'titulo': "RF-006: Historial de Pagos Deficiente",
+        'razonamiento': "Solo {hp:.0f}% de pagos puntuales a sus proveedores. Indica problemas de flujo de caja."
+    },
+
+    # ========== REGLAS OPERACIONALES ==========
+    'RO-001': {
+        'titulo': "RO-001: Sin Certificación de Calidad",
+        'razonamiento': "El proveedor no cuenta con certificaciones de calidad (ISO 9001 u otras). "
+                        "Mayor riesgo de incumplimiento de estándares."
+    },
+    'RO-002': {
+        'titulo': "RO-002: Proveedor Nuevo en el Mercado",
+        'razonamiento': "Solo {tm:.1f} años de operación. Falta de historial aumenta incertidumbre."
+    },
+    'RO-003': {
+        'titulo': "RO-003: Capacidad de Producción Limitada",
+        'razonamiento': "Capacidad de producción al {cp:.0f}%. Riesgo de no poder atender demanda."
+    },
+    'RO-004': {
+        'titulo': "RO-004: Alta Tasa de Defectos",
+        'razonamiento': "Tasa de defectos de {td:.1f}% excede el estándar aceptable (5%). "
+                        "Impacto en calidad del producto final."
+    },
+    'RO-005': {
+        'titulo': "RO-005: Incumplimiento Sistemático de Entregas",
+        'razonamiento': "Solo {ce:.0f}% de entregas a tiempo. Afecta la cadena de suministro."
+    },
+
+    # ========== REGLAS LEGALES ==========
+    'RL-001': {
+        'titulo': "RL-001: Incumplimiento Legal",
+        'razonamiento': "El proveedor tiene antecedentes de incumplimiento legal o normativo. "
+                        "Riesgo reputacional y legal para la organización."
+    },
+    'RL-002': {
+        'titulo': "RL-002: Sin Certificación Ambiental",
+        'razonamiento': "Proveedor de manufactura sin certificaciones ambientales (ISO 14001). "
+                        "Riesgo de incumplimiento normativo futuro."
+    },
+    'RL-003': {
+        'titulo': "RL-003: Seguros No Vigentes",
+        'razonamiento': "El proveedor no cuenta con seguros de responsabilidad civil vigentes. "
+                        "Exposición a riesgos no cubiertos."
+    },
+
+    # ========== REGLAS REPUTACIONALES ==========
+    'RR-001': {
+        'titulo': "RR-001: Reputación Deficiente",
+        'razonamiento': "Calificación de mercado de {cm:.1f}/5.0 indica problemas reputacionales. "
+                        "Posibles conflictos con otros clientes."
+    },
+    'RR-002': {
+        'titulo': "RR-002: Alto Número de Quejas",
+        'razonamiento': "{qc:.0f} quejas de clientes en el último año. "
+                        "Indica problemas recurrentes de servicio o calidad."
+    },
+    'RR-003': {
+        'titulo': "RR-003: Referencias Insuficientes",
+        'razonamiento': "Solo {rp:.0f} referencias positivas verificables. "
+                        "Dificulta validar historial del proveedor."
+    }
+}
+
+
+def renderizar_explicacion(codigo: str, impacto: int, parametros: Dict[str, Any],
+                           marca_tiempo: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Texto completo de una regla activada a partir de su plantilla
+
+    Args:
+        codigo: Código de la regla (p. ej. 'RF-001')
+        impacto: Puntos restados por la regla
+        parametros: Valores con los que se activó la regla
+        marca_tiempo: Hora de la evaluación ya formateada
+
+    Returns:
+        Dict con regla, razonamiento, impacto y timestamp
+    """
+    plantilla = PLANTILLAS_REGLAS.get(codigo)
+    if plantilla is None:
+        titulo, razonamiento = codigo, ", ".join(f"{k}={v}" for k, v in parametros.items())
+    else:
+        titulo, razonamiento = plantilla['titulo'], plantilla['razonamiento'].format(**parametros)
+    return {
+        'regla': titulo,
+        'razonamiento': razonamiento,
+        'impacto': impacto,
+        'timestamp': marca_tiempo
+    }
+
+
+def formatear_marca_tiempo(marca_tiempo: Optional[datetime]) -> Optional[str]:
+    """Hora de una evaluación en el formato de las explicaciones"""
+    return marca_tiempo.strftime("%H:%M:%S") if marca_tiempo is not None else None
+
+
+def renderizar_explicaciones(explicaciones: List[Any],
+                             marca_tiempo: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """Convierte explicaciones compactas (codigo, impacto, parametros) en diccionarios de texto"""
+    hora = formatear_marca_tiempo(marca_tiempo)
+    return [
+        exp if isinstance(exp, dict) else renderizar_explicacion(exp[0], exp[1], exp[2], hora)
+        for exp in explicaciones
+    ]
+
+
+def renderizar_resultado(resultado: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Completa con textos un resultado evaluado con nivel 'ids'
+
+    Un resultado 'full' (o de error) se devuelve tal cual. Uno 'none' no
+    guarda qué reglas se activaron, así que queda sin explicaciones.
+
+    Returns:
+        Dict con el mismo formato que evaluar_proveedor en nivel 'full'
+    """
+    if resultado.get('nivel_explicacion', 'full') == 'full':
+        return resultado
+
+    completo = {k: v for k, v in resultado.items() if k not in ('nivel_explicacion', 'marca_tiempo')}
+    completo['explicaciones'] = renderizar_explicaciones(resultado['explicaciones'], resultado.get('marca_tiempo'))
+    completo['alertas'] = [
+        alerta if isinstance(alerta, dict) else {'nivel': alerta[0], 'mensaje': alerta[1]}
+        for alerta in resultado['alertas']
+    ]
+    return completo
@@ -0,0 +1,108 @@
+"""
+Pool de motores de inferencia reutilizables
+Evita reconstruir el motor de inferencia en cada evaluación
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List
+
+from .reglas import KnowledgeEngine
+
+
+class PoolMotores:
+    """
+    Pool acotado y seguro entre hilos de motores ya construidos.
+
+    Construir un MotorEvaluacionRiesgo con experta compila todas las reglas
+    @Rule en la red Rete, lo que cuesta mucho más que evaluar un proveedor
+    (el motor nativo compila su red una vez por clase, pero reutilizar la
+    instancia sigue ahorrando memorias y agenda). El pool
+    conserva hasta `capacidad` motores libres y los entrega reseteados
+    (hechos, agenda y estado de la evaluación limpios).
+    """
+
+    def __init__(self, fabrica: Callable[[], KnowledgeEngine], capacidad: int = 8):
+        """
+        Args:
+            fabrica: Callable que construye un motor nuevo
+            capacidad: Número máximo de motores libres que se conservan
+        """
+        if capacidad < 1:
+            raise ValueError("La capacidad del pool debe ser al menos 1")
+
+        self.capacidad = capacidad
+        self._fabrica = fabrica
+        self._libres: List[KnowledgeEngine] = []
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def adquirir(self) -> KnowledgeEngine:
+        """
+        Entrega un motor reseteado, reutilizando uno libre si existe
+
+        Returns:
+            KnowledgeEngine: Motor listo para declarar hechos
+        """
+        with self._lock:
+            if self._libres:
+                motor = self._libres.pop()
+                self.aciertos += 1
+            else:
+                motor = None
+                self.fallos += 1
+
+        # La construcción queda fuera del lock para no serializar a otros hilos
+        if motor is None:
+            motor = self._fabrica()
+
+        motor.reset()
+        return motor
+
+    def liberar(self, motor: KnowledgeEngine):
+        """Devuelve un motor al pool; se descarta si el pool está lleno"""
+        with self._lock:
+            if len(self._libres) < self.capacidad:
+                self._libres.append(motor)
+
+    @contextmanager
+    def motor(self) -> Iterator[KnowledgeEngine]:
+        """Context manager que adquiere un motor y lo devuelve al terminar"""
+        motor = self.adquirir()
+        try:
+            yield motor
+        finally:
+            self.liberar(motor)
+
+    def precalentar(self, cantidad: int = None):
+        """Construye motores por adelantado hasta `cantidad` (por defecto, la capacidad)"""
+        cantidad = self.capacidad if cantidad is None else min(cantidad, self.capacidad)
+        while True:
+            with self._lock:
+                if len(self._libres) >= cantidad:
+                    return
+            self.liberar(self._fabrica())
+
+    def estadisticas(self) -> Dict[str, float]:
+        """
+        Contadores de uso del pool
+
+        Returns:
+            Dict con aciertos, fallos, tasa de aciertos, motores libres y capacidad
+        """
+        with self._lock:
+            total = self.aciertos + self.fallos
+            return {
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'tasa_aciertos': self.aciertos / total if total else 0.0,
+                'libres': len(self._libres),
+                'capacidad': self.capacidad
+            }
+
+    def reiniciar_estadisticas(self):
+        """Pone a cero los contadores de aciertos y fallos"""
+        with self._lock:
+            self.aciertos = 0
+            self.fallos = 0
@@ -0,0 +1,425 @@
+"""
+Registro versionado de bases de reglas
+Permite publicar en caliente una base de reglas recién compilada mientras
+hay evaluaciones en curso: cada evaluación usa la versión vigente al empezar
+y su resultado indica qué versión lo produjo
+"""
+
+import os
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional
+
+from .cache import CacheResultados, campos_reglas, _AUSENTE
+from .inference_engine import _resultado_error
+
+
+def id_version(firma: str) -> str:
+    """Identificador corto de una base de reglas, estable entre procesos (prefijo de su firma)"""
+    return firma[:16]
+
+
+class VersionReglas(NamedTuple):
+    """
+    Base de reglas publicada en un RegistroReglas
+
+    El evaluador es cualquier objeto con evaluar(datos, nivel_explicacion),
+    una `firma` que identifica su contenido y un `formato_resultado` que
+    indica la forma de sus resultados (EvaluadorCompilado: 'motor',
+    EvaluadorConocimiento: 'conocimiento'); los de formato 'motor' exponen
+    además `motor_cls`, la clase de motor con la que evaluar_proveedor y los
+    lotes evalúan esa versión. La versión es inmutable:
+    publicar otra no altera las evaluaciones que ya la tienen.
+    """
+    numero: int
+    firma: str
+    evaluador: Any
+    origen: str
+    publicada: str
+
+    @property
+    def id(self) -> str:
+        """Identificador corto y estable entre procesos (ver id_version)"""
+        return id_version(self.firma)
+
+    def evaluar(self, datos_proveedor: Dict[str, Any], nivel_explicacion: str = 'full') -> Dict[str, Any]:
+        """
+        Evalúa con esta versión y anota en el resultado cuál la produjo
+
+        Returns:
+            Dict del evaluador con 'version_reglas' (id de la versión)
+        """
+        resultado = self.evaluador.evaluar(datos_proveedor, nivel_explicacion)
+        resultado['version_reglas'] = self.id
+        return resultado
+
+
+class RegistroReglas:
+    """
+    Registro de versiones de la base de reglas con intercambio atómico.
+
+    La versión vigente es una referencia que publicar() sustituye de una
+    vez: quien ya leyó `actual` (una evaluación en curso, un lote fijado con
+    fijar()) termina con esa versión aunque se publique otra entretanto.
+    Compilar la nueva base ocurre antes de publicar y fuera del lock, así que
+    las evaluaciones no se detienen mientras se compila. Todas las versiones
+    de un registro producen resultados con el mismo formato, así que quien
+    lo consume (historial, evaluación por lotes, app) no depende de cuál
+    esté vigente.
+
+    Al publicar se avisa a los suscriptores con la versión anterior y la
+    nueva, de modo que las cachés descarten solo las entradas de la versión
+    reemplazada. Se conservan las últimas `historial` versiones para poder
+    restaurarlas.
+    """
+
+    def __init__(self, evaluador, origen: str = '', historial: int = 8):
+        """
+        Args:
+            evaluador: Evaluador de la versión inicial
+            origen: Descripción de dónde salió (archivo, clase de motor...)
+            historial: Número de versiones que se conservan para restaurar
+        """
+        if historial < 1:
+            raise ValueError("El historial debe conservar al menos una versión")
+
+        self._lock = threading.Lock()
+        self._suscriptores: List[Callable[[VersionReglas, VersionReglas], None]] = []
+        self._historial = deque(maxlen=historial)
+        self._actual = self._nueva_version(1, evaluador, origen)
+        self._historial.append(self._actual)
+
+    @staticmethod
+    def _nueva_version(numero: int, evaluador, origen: str) -> VersionReglas:
+        return VersionReglas(
+            numero=numero,
+            firma=evaluador.firma,
+            evaluador=evaluador,
+            origen=origen,
+            publicada=datetime.now().isoformat(timespec='seconds')
+        )
+
+    @property
+    def actual(self) -> VersionReglas:
+        """Versión vigente (leerla no bloquea)"""
+        return self._actual
+
+    def versiones(self) -> List[VersionReglas]:
+        """Versiones conservadas, de la más antigua a la vigente"""
+        with self._lock:
+            return list(self._historial)
+
+    def publicar(self, evaluador, origen: str = '') -> VersionReglas:
+        """
+        Sustituye la versión vigente por un evaluador ya compilado
+
+        Si la firma coincide con la vigente no se crea versión nueva ni se
+        invalidan cachés.
+
+        Returns:
+            VersionReglas vigente tras la publicación
+
+        Raises:
+            TypeError: Si el evaluador produce resultados con otro formato que la versión vigente
+        """
+        with self._lock:
+            anterior = self._actual
+            formato = getattr(evaluador, 'formato_resultado', None)
+            if formato != getattr(anterior.evaluador, 'formato_resultado', None):
+                raise TypeError(
+                    f"No se puede publicar un evaluador de formato {formato!r} en un registro de formato "
+                    f"{getattr(anterior.evaluador, 'formato_resultado', None)!r} ({type(evaluador).__name__})"
+                )
+            if evaluador.firma == anterior.firma:
+                return anterior
+            nueva = self._nueva_version(anterior.numero + 1, evaluador, origen)
+            self._historial.append(nueva)
+            self._actual = nueva
+            # Dentro del lock: dos publicaciones seguidas se notifican en orden
+            for suscriptor in list(self._suscriptores):
+                suscriptor(anterior, nueva)
+        return nueva
+
+    def recargar(self, ruta: str, **opciones) -> VersionReglas:
+        """
+        Compila un archivo de reglas declarativo y lo publica
+
+        Args:
+            ruta: Archivo .json o .toml; con 'formato': 'motor' se compila con
+                EvaluadorCompilado y si no con EvaluadorConocimiento (ver
+                engine.declarativo.cargar_evaluador)
+            **opciones: directorio_cache, usar_cache
+
+        Returns:
+            VersionReglas vigente tras la publicación
+
+        Raises:
+            TypeError: Si el formato del archivo no es el de la versión vigente
+        """
+        from .declarativo import cargar_evaluador
+
+        return self.publicar(cargar_evaluador(ruta, **opciones), origen=ruta)
+
+    def vigilar(self, ruta: str, intervalo: float = 2.0, **opciones) -> 'VigilanteReglas':
+        """
+        Publica un archivo de reglas y lo vuelve a publicar cada vez que cambia
+
+        Returns:
+            VigilanteReglas ya en marcha (ver VigilanteReglas)
+        """
+        return VigilanteReglas(self, ruta, intervalo, **opciones)
+
+    def restaurar(self, numero: int) -> VersionReglas:
+        """
+        Vuelve a publicar una versión del historial
+
+        Raises:
+            KeyError: Si la versión ya no está en el historial
+        """
+        with self._lock:
+            version = next((v for v in self._historial if v.numero == numero), None)
+        if version is None:
+            raise KeyError(f"La versión {numero} no está en el historial")
+        return self.publicar(version.evaluador, origen=f"restaurada v{numero}: {version.origen}")
+
+    def suscribir(self, suscriptor: Callable[[VersionReglas, VersionReglas], None]):
+        """Registra una función que recibe (anterior, nueva) en cada publicación"""
+        with self._lock:
+            self._suscriptores.append(suscriptor)
+
+    def desuscribir(self, suscriptor: Callable[[VersionReglas, VersionReglas], None]):
+        """Deja de avisar a una función registrada con suscribir()"""
+        with self._lock:
+            self._suscriptores.remove(suscriptor)
+
+    def evaluar(self, datos_proveedor: Dict[str, Any], nivel_explicacion: str = 'full') -> Dict[str, Any]:
+        """Evalúa con la versión vigente (ver VersionReglas.evaluar)"""
+        return self._actual.evaluar(datos_proveedor, nivel_explicacion)
+
+    def fijar(self) -> VersionReglas:
+        """
+        Versión vigente para usarla en varias evaluaciones
+
+        Un lote que evalúa con la versión devuelta produce resultados
+        coherentes aunque se publique otra versión a mitad del lote.
+        """
+        return self._actual
+
+
+class VigilanteReglas:
+    """
+    Recarga en un registro un archivo de reglas cuando cambia en disco.
+
+    Un hilo de fondo compara cada `intervalo` segundos la fecha de
+    modificación y el tamaño del archivo; si cambian, llama a
+    RegistroReglas.recargar(). Para desplegar reglas basta con sustituir el
+    archivo (mejor con un renombrado atómico). Un archivo que no se puede
+    leer o compilar no se publica: sigue vigente la versión anterior y el
+    error queda en `error` hasta la siguiente recarga correcta.
+    """
+
+    def __init__(self, registro: RegistroReglas, ruta: str, intervalo: float = 2.0, **opciones):
+        """
+        Args:
+            registro: Registro donde se publican las versiones
+            ruta: Archivo de reglas .json o .toml
+            intervalo: Segundos entre comprobaciones
+            **opciones: directorio_cache, usar_cache (ver RegistroReglas.recargar)
+        """
+        if intervalo <= 0:
+            raise ValueError("El intervalo de comprobación debe ser positivo")
+
+        self.registro = registro
+        self.ruta = ruta
+        self.intervalo = intervalo
+        self.opciones = opciones
+        self.error: Optional[Exception] = None
+        self.recargas = 0
+        self._huella = None
+        self._lock = threading.Lock()
+        self._detener = threading.Event()
+
+        # La primera carga es síncrona: al volver, el archivo ya está publicado
+        self.comprobar()
+        self._hilo = threading.Thread(target=self._vigilar, name=f'vigilante-reglas:{ruta}', daemon=True)
+        self._hilo.start()
+
+    def comprobar(self) -> bool:
+        """
+        Recarga el archivo si cambió desde la última comprobación
+
+        Returns:
+            True si se publicó el archivo (aunque su firma coincida con la vigente)
+        """
+        with self._lock:
+            try:
+                estado = os.stat(self.ruta)
+            except OSError as e:
+                self.error = e
+                return False
+            huella = (estado.st_mtime_ns, estado.st_size)
+            if huella == self._huella:
+                return False
+            self._huella = huella
+            try:
+                self.registro.recargar(self.ruta, **self.opciones)
+            except Exception as e:
+                # Cualquier fallo al compilar deja la versión vigente; el hilo sigue vigilando
+                self.error = e
+                return False
+            self.error = None
+            self.recargas += 1
+            return True
+
+    def _vigilar(self):
+        while not self._detener.wait(self.intervalo):
+            self.comprobar()
+
+    def detener(self):
+        """Detiene el hilo de vigilancia (la versión publicada sigue vigente)"""
+        self._detener.set()
+        self._hilo.join()
+
+
+def _valor_clave(valor):
+    """Valor hashable para la clave; las listas (p. ej. certificaciones) se distinguen de las tuplas"""
+    if isinstance(valor, list):
+        return (list, tuple(_valor_clave(v) for v in valor))
+    return valor
+
+
+class CacheVersionada(CacheResultados):
+    """
+    Caché de resultados delante de un RegistroReglas.
+
+    La clave incluye el id de la versión que produjo el resultado; al
+    publicarse una versión nueva se eliminan solo las entradas de la versión
+    reemplazada. Un resultado calculado con una versión distinta de la de su
+    clave, o de una versión ya reemplazada (se publicó otra durante la
+    evaluación), no se guarda.
+
+    Sin `campos`, la clave usa los campos que leen las reglas de la versión
+    si el evaluador los expone (EvaluadorCompilado) y, si no, todos los
+    campos del proveedor.
+    """
+
+    def __init__(self, registro: RegistroReglas, capacidad: int = 4096, ttl: Optional[float] = None,
+                 campos: Optional[Iterable[str]] = None,
+                 funcion: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None):
+        """
+        Args:
+            registro: Registro cuya versión vigente evalúa los fallos de caché
+            capacidad: Número máximo de resultados guardados
+            ttl: Segundos de vida de cada entrada (None = sin expiración)
+            campos: Campos que forman la clave (por defecto, según la versión)
+            funcion: Función de evaluación que anota 'version_reglas' con la
+                versión vigente de `registro` (por defecto, registro.evaluar)
+        """
+        super().__init__(funcion or registro.evaluar, capacidad, ttl, campos=campos if campos is not None else ())
+        self.registro = registro
+        self._campos_fijos = campos is not None
+        self._campos_version: Dict[str, Optional[tuple]] = {}
+        self.invalidados = 0
+        registro.suscribir(self._invalidar)
+
+    def _campos(self, version: VersionReglas) -> Optional[tuple]:
+        if self._campos_fijos:
+            return self.campos
+        if version.id not in self._campos_version:
+            evaluador = version.evaluador
+            self._campos_version[version.id] = (
+                campos_reglas(evaluador) if hasattr(evaluador, 'perfiles') else None
+            )
+        return self._campos_version[version.id]
+
+    def clave(self, datos_proveedor: Dict[str, Any]) -> Optional[tuple]:
+        """Clave (id de versión, valores de los campos), o None si no se puede memorizar"""
+        if not isinstance(datos_proveedor, dict):
+            return None
+        version = self.registro.actual
+        campos = self._campos(version)
+        try:
+            if campos is None:
+                valores = tuple((campo, _valor_clave(valor)) for campo, valor in sorted(datos_proveedor.items()))
+            else:
+                valores = tuple(_valor_clave(datos_proveedor.get(campo, _AUSENTE)) for campo in campos)
+            clave = (version.id, valores)
+            hash(clave)
+        except TypeError:
+            return None
+        return clave
+
+    def _vigente(self, clave: tuple, resultado: Dict[str, Any]) -> bool:
+        # publicar() cambia la versión antes de llamar a _invalidar(), que toma
+        # el mismo lock: o se guarda antes y se invalida, o no se guarda
+        version = self.registro.actual.id
+        return clave[0] == version and resultado.get('version_reglas') == version
+
+    def _invalidar(self, anterior: VersionReglas, nueva: VersionReglas):
+        """Elimina las entradas de la versión reemplazada"""
+        with self._lock:
+            obsoletas = [clave for clave in self._entradas if clave[0] == anterior.id]
+            for clave in obsoletas:
+                del self._entradas[clave]
+            self.invalidados += len(obsoletas)
+            self._campos_version.pop(anterior.id, None)
+
+
+# Archivo de reglas en formato 'motor' que el registro compartido publica y vigila (opcional)
+ARCHIVO_REGLAS = os.environ.get('REGLAS_MOTOR') or None
+
+_REGISTRO_REGLAS = None
+_VIGILANTE_REGLAS = None
+_LOCK_REGISTRO = threading.Lock()
+
+
+def registro_reglas() -> RegistroReglas:
+    """
+    Registro compartido, creado en el primer uso con las reglas de MotorEvaluacionRiesgo
+    compiladas (EVALUADOR_COMPILADO) como versión 1
+
+    Con la variable de entorno REGLAS_MOTOR, el archivo que indica se publica
+    al crear el registro y se vuelve a publicar cada vez que cambia (ver
+    vigilante_reglas()).
+    """
+    global _REGISTRO_REGLAS, _VIGILANTE_REGLAS
+    with _LOCK_REGISTRO:
+        if _REGISTRO_REGLAS is None:
+            from .compilado import EVALUADOR_COMPILADO
+            _REGISTRO_REGLAS = RegistroReglas(EVALUADOR_COMPILADO, origen='MotorEvaluacionRiesgo')
+            if ARCHIVO_REGLAS:
+                _VIGILANTE_REGLAS = _REGISTRO_REGLAS.vigilar(ARCHIVO_REGLAS)
+    return _REGISTRO_REGLAS
+
+
+def vigilante_reglas() -> Optional[VigilanteReglas]:
+    """Vigilante del archivo REGLAS_MOTOR del registro compartido, o None si no hay archivo"""
+    registro_reglas()
+    return _VIGILANTE_REGLAS
+
+
+_CACHE_REGLAS = None
+_LOCK_CACHE = threading.Lock()
+
+
+def cache_reglas() -> CacheVersionada:
+    """CacheVersionada compartida delante de registro_reglas(), creada en el primer uso"""
+    global _CACHE_REGLAS
+    with _LOCK_CACHE:
+        if _CACHE_REGLAS is None:
+            _CACHE_REGLAS = CacheVersionada(registro_reglas())
+    return _CACHE_REGLAS
+
+
+def evaluar_proveedor_versionado(datos_proveedor: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Evalúa con la versión vigente del registro compartido a través de cache_reglas()
+
+    Returns:
+        Dict con los resultados y 'version_reglas', o el resultado 'ERROR' si la evaluación falla
+    """
+    try:
+        return cache_reglas()(datos_proveedor)
+    except Exception as e:
+        return _resultado_error(e)
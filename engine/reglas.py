@@ -0,0 +1,57 @@
+"""
+Lenguaje de reglas del motor de inferencia
+Elige la implementación de KnowledgeEngine, Rule, Fact, MATCH, AND, OR, NOT
+y de las restricciones de campo: el motor nativo de engine/nativo.py (por
+defecto) o experta, con la variable de entorno MOTOR_INFERENCIA=experta
+"""
+
+import os
+
+# Motores disponibles; el primero es el predeterminado
+MOTORES_INFERENCIA = ('nativo', 'experta')
+
+MOTOR_INFERENCIA = os.environ.get('MOTOR_INFERENCIA', MOTORES_INFERENCIA[0]).strip().lower()
+
+if MOTOR_INFERENCIA == 'nativo':
+    from .nativo import (KnowledgeEngine, Fact, InitialFact, Rule, MATCH, AND, OR, NOT,
+                         ConditionalElement, ANDFC, L, P, W)
+elif MOTOR_INFERENCIA == 'experta':
+    import fix_collections  # noqa: F401  (debe importarse antes que experta)
+    from experta import KnowledgeEngine, Fact, InitialFact, Rule, MATCH, AND, OR, NOT
+    from experta.conditionalelement import ConditionalElement
+    from experta.fieldconstraint import ANDFC, L, P, W
+else:
+    raise ImportError(f"MOTOR_INFERENCIA no válido: {MOTOR_INFERENCIA!r} "
+                      f"(use {', '.join(MOTORES_INFERENCIA)})")
+
+from .nativo import compilador_restricciones, reglas_de_clase as _reglas_de_clase, _LITERAL, _PREDICADO
+
+# Traducción de las restricciones de campo con las clases del motor elegido
+# (la implementación, compartida con el motor nativo, está en engine/nativo.py)
+compilar_restriccion = compilador_restricciones(ANDFC, W, P, L, ConditionalElement)
+
+
+def reglas_de_clase(motor_cls: type) -> list:
+    """Reglas @Rule de una clase de motor, en orden de declaración y respetando sobrescrituras"""
+    return _reglas_de_clase(motor_cls, Rule)
+
+
+__all__ = [
+    'MOTOR_INFERENCIA',
+    'MOTORES_INFERENCIA',
+    'KnowledgeEngine',
+    'Fact',
+    'InitialFact',
+    'Rule',
+    'MATCH',
+    'AND',
+    'OR',
+    'NOT',
+    'ConditionalElement',
+    'ANDFC',
+    'L',
+    'P',
+    'W',
+    'compilar_restriccion',
+    'reglas_de_clase'
+]
@@ -0,0 +1,143 @@
+"""
+Análisis de sensibilidad por atributo
+Calcula analíticamente, a partir de los umbrales de las reglas, en qué valor
+de cada campo cambiaría el nivel de riesgo o la puntuación de un proveedor
+"""
+
+from typing import Any, Dict, Optional
+
+from .compilado import EvaluadorCompilado
+from .tabla_decision import campos_sin_efecto, tabla_decision, _es_numerico, _OTRO
+
+
+_ORDEN_RIESGO = {'BAJO': 0, 'MEDIO': 1, 'ALTO': 2}
+
+
+def _efecto(actual: tuple, nuevo: tuple) -> str:
+    """Describe cómo cambia el resultado al pasar de `actual` a `nuevo`"""
+    riesgo_actual, puntuacion_actual = actual[0], actual[1]
+    riesgo, puntuacion = nuevo[0], nuevo[1]
+    diferencia = puntuacion - puntuacion_actual
+    puntos = f"puntuación {puntuacion} ({diferencia:+d})"
+
+    if riesgo != riesgo_actual:
+        sube = _ORDEN_RIESGO.get(riesgo, 0) > _ORDEN_RIESGO.get(riesgo_actual, 0)
+        return f"{'sube' if sube else 'baja'} el riesgo a {riesgo}, {puntos}"
+    return f"mantiene el riesgo {riesgo}, {puntos}"
+
+
+def _punto(campo: str, valor_actual, condicion: str, umbral, actual: tuple, nuevo: tuple) -> Dict[str, Any]:
+    """Punto de inflexión en el formato que devuelve analizar_sensibilidad"""
+    return {
+        'campo': campo,
+        'valor_actual': valor_actual,
+        'condicion': condicion,
+        'umbral': umbral,
+        'riesgo_final': nuevo[0],
+        'puntuacion': nuevo[1],
+        'cambia_riesgo': nuevo[0] != actual[0],
+        'diferencia_puntuacion': nuevo[1] - actual[1],
+        'descripcion': f"{campo} {condicion} {_efecto(actual, nuevo)}"
+    }
+
+
+def analizar_sensibilidad(datos_proveedor: Dict[str, Any],
+                          evaluador: Optional[EvaluadorCompilado] = None) -> Dict[str, Any]:
+    """
+    Puntos de inflexión de cada atributo de un proveedor
+
+    Usa la tabla de decisión: cada campo está partido en celdas por los
+    umbrales de las reglas y el resultado solo cambia al cruzar una frontera
+    entre celdas. Fijando el resto de campos, se recorren las celdas del campo
+    hacia arriba y hacia abajo desde el valor actual hasta la primera con
+    otro riesgo o puntuación; cada celda es una búsqueda en la tabla, sin
+    volver a ejecutar el motor. Para campos booleanos o de texto se prueba
+    cada valor alternativo que mencionan las reglas.
+
+    Args:
+        datos_proveedor: Diccionario con los datos del proveedor
+        evaluador: Evaluador compilado (por defecto, el de MotorEvaluacionRiesgo)
+
+    Returns:
+        Dict con riesgo_final y puntuacion actuales y 'puntos': lista de
+        puntos de inflexión (campo, valor_actual, condicion, umbral,
+        riesgo_final, puntuacion, cambia_riesgo, diferencia_puntuacion,
+        descripcion), los que cambian el riesgo primero, y
+        'campos_sin_efecto': campos cuyas reglas no pueden activarse y que
+        por tanto nunca tienen punto de inflexión
+    """
+    tabla = tabla_decision(evaluador)
+    datos = EvaluadorCompilado._validar(datos_proveedor)
+    particiones = tabla.particiones
+    mascaras = [particion.mascara(datos) for particion in particiones]
+
+    # Máscara de todos los campos salvo el i-ésimo: AND de prefijos y sufijos
+    n = len(particiones)
+    prefijos = [-1] * (n + 1)
+    sufijos = [-1] * (n + 1)
+    for i in range(n):
+        prefijos[i + 1] = prefijos[i] & mascaras[i]
+        sufijos[n - 1 - i] = sufijos[n - i] & mascaras[n - 1 - i]
+
+    actual = tabla.resultado_mascara(prefijos[n])
+    puntos = []
+
+    for i, particion in enumerate(particiones):
+        resto = prefijos[i] & sufijos[i + 1]
+        campo = particion.campo
+        if campo not in datos:
+            continue
+        valor = datos[campo]
+
+        if _es_numerico(valor) and not isinstance(valor, bool):
+            celda = particion.celda(valor)
+            cortes = particion.cortes
+
+            # Hacia arriba: la primera celda con otro resultado
+            for j in range(celda + 1, len(particion.mascaras)):
+                nuevo = tabla.resultado_mascara(resto & particion.mascaras[j])
+                if nuevo[:2] != actual[:2]:
+                    if j % 2:
+                        condicion, umbral = f">= {cortes[j // 2]:g}", cortes[j // 2]
+                    else:
+                        condicion, umbral = f"> {cortes[j // 2 - 1]:g}", cortes[j // 2 - 1]
+                    puntos.append(_punto(campo, valor, condicion, umbral, actual, nuevo))
+                    break
+
+            # Hacia abajo
+            for j in range(celda - 1, -1, -1):
+                nuevo = tabla.resultado_mascara(resto & particion.mascaras[j])
+                if nuevo[:2] != actual[:2]:
+                    if j % 2:
+                        condicion, umbral = f"<= {cortes[j // 2]:g}", cortes[j // 2]
+                    else:
+                        condicion, umbral = f"< {cortes[j // 2]:g}", cortes[j // 2]
+                    puntos.append(_punto(campo, valor, condicion, umbral, actual, nuevo))
+                    break
+        else:
+            if isinstance(valor, bool):
+                alternativas = [not valor]
+            else:
+                alternativas = [v for v in particion.literales if v != valor] + [_OTRO]
+
+            for alternativa in alternativas:
+                try:
+                    mascara = particion.mascara({campo: alternativa})
+                except Exception:
+                    # Valor que las reglas no pueden comparar: no es una alternativa válida
+                    continue
+                nuevo = tabla.resultado_mascara(resto & mascara)
+                if nuevo[:2] != actual[:2]:
+                    if alternativa is _OTRO:
+                        condicion, umbral = "con otro valor", None
+                    else:
+                        condicion, umbral = f"= {alternativa!r}", alternativa
+                    puntos.append(_punto(campo, valor, condicion, umbral, actual, nuevo))
+
+    puntos.sort(key=lambda p: (not p['cambia_riesgo'], -abs(p['diferencia_puntuacion'])))
+    return {
+        'riesgo_final': actual[0],
+        'puntuacion': actual[1],
+        'puntos': puntos,
+        'campos_sin_efecto': campos_sin_efecto(tabla.evaluador)
+    }
@@ -0,0 +1,248 @@
+"""
+Sesión de evaluación incremental
+Mantiene un motor con los datos del proveedor ya declarados y, ante un
+cambio, solo vuelve a disparar las reglas que leen los campos modificados
+"""
+
+from typing import Any, Dict, NamedTuple
+
+from .inference_engine import MotorEvaluacionRiesgo, DatosProveedor
+from .compilado import EVALUADOR_COMPILADO, EvaluadorCompilado
+from .cache import copiar_resultado
+
+
+class _Contribucion(NamedTuple):
+    """Efectos que dejó en el motor el disparo de una regla de datos"""
+    impacto: int
+    reglas: int
+    explicaciones: list
+    alertas: list
+    factores: list
+    conclusiones: list
+
+
+def _contexto(activacion) -> Dict[str, Any]:
+    """Variables ligadas de una activación, sin las referencias internas de experta"""
+    return {k: v for k, v in activacion.context.items() if not k.startswith('__')}
+
+
+def _quitar(lista: list, elementos: list):
+    """Quita de la lista cada elemento indicado (una aparición, comparando identidad)"""
+    for elemento in elementos:
+        for i, actual in enumerate(lista):
+            if actual is elemento:
+                del lista[i]
+                break
+
+
+class SesionEvaluacion:
+    """
+    Evaluación de un proveedor que se actualiza campo a campo.
+
+    La primera evaluación es la normal del motor. Después, cambiar_campos()
+    modifica el hecho DatosProveedor con modify() del motor y su red de reglas
+    informa qué activaciones desaparecen y cuáles aparecen. Las reglas de
+    datos que no leen ningún campo modificado conservan su contribución sin
+    volver a dispararse; las demás deshacen su puntuación, explicaciones,
+    alertas, factores críticos y conclusiones y se disparan de nuevo si
+    siguen cumpliéndose. Las reglas de decisión se reaplican al final sobre
+    las conclusiones vigentes.
+    """
+
+    def __init__(self, datos_proveedor: Dict[str, Any], motor_cls: type = MotorEvaluacionRiesgo):
+        """
+        Args:
+            datos_proveedor: Diccionario con los datos iniciales del proveedor
+            motor_cls: Clase del motor (MotorEvaluacionRiesgo o una subclase)
+        """
+        self.motor = motor_cls()
+        evaluador = (EVALUADOR_COMPILADO if motor_cls is MotorEvaluacionRiesgo
+                     else EvaluadorCompilado(motor_cls))
+        self._campos_regla = {
+            perfil.nombre: {campo for campo, _, _, _ in perfil.comprobaciones}
+            for perfil in evaluador.perfiles
+        }
+        self.reglas_redisparadas = 0
+        self.evaluar(datos_proveedor)
+
+    @property
+    def datos(self) -> Dict[str, Any]:
+        """Datos del proveedor declarados actualmente"""
+        return self._hecho.as_dict()
+
+    def evaluar(self, datos_proveedor: Dict[str, Any]):
+        """Evalúa desde cero con nuevos datos, descartando el estado anterior"""
+        motor = self.motor
+        motor.reset()
+
+        # Activaciones vigentes de reglas de datos con su contribución, y de
+        # reglas de decisión en el orden en que aparecieron
+        self._datos = {}
+        self._decisiones = {}
+        # Conclusiones declaradas: clave -> [hecho, reglas que la declararon]
+        self._conclusiones = {}
+
+        motor.running = True
+        try:
+            self._hecho = motor.declare(DatosProveedor(**datos_proveedor))
+            self._propagar(set(self._hecho))
+        finally:
+            motor.running = False
+
+    def cambiar_campos(self, **cambios) -> Dict[str, Any]:
+        """
+        Modifica campos del proveedor y reevalúa solo las reglas afectadas
+
+        Args:
+            **cambios: Nuevos valores por nombre de campo
+
+        Returns:
+            Dict con el resultado actualizado (mismo formato que evaluar_proveedor)
+        """
+        cambios = {campo: valor for campo, valor in cambios.items()
+                   if campo not in self._hecho or self._hecho[campo] != valor}
+        if not cambios:
+            return self.resultado()
+
+        motor = self.motor
+        anterior = self._hecho
+        motor.running = True
+        try:
+            self._hecho = motor.modify(self._hecho, **cambios)
+            self._propagar(set(cambios))
+        except Exception:
+            # El estado incremental quedó a medias: se rehace con los datos previos
+            motor.running = False
+            self.evaluar(anterior.as_dict())
+            raise
+        finally:
+            motor.running = False
+
+        return self.resultado()
+
+    def actualizar(self, datos_proveedor: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Lleva la sesión a unos datos completos, aplicando solo las diferencias
+
+        Si desaparece algún campo se reevalúa desde cero.
+        """
+        if any(campo not in datos_proveedor for campo in self._hecho):
+            self.evaluar(datos_proveedor)
+            return self.resultado()
+        return self.cambiar_campos(**datos_proveedor)
+
+    def resultado(self) -> Dict[str, Any]:
+        """Resultado de la evaluación con los datos actuales"""
+        motor = self.motor
+        motor.riesgo_final = "NO DETERMINADO"
+        motor.recomendacion = ""
+        for activacion in self._decisiones:
+            activacion.rule(motor, **_contexto(activacion))
+        return copiar_resultado(motor.obtener_resultado())
+
+    # ========== PROPAGACIÓN ==========
+
+    def _propagar(self, cambiados: set):
+        """Aplica los cambios de activaciones que informa la red de reglas hasta agotarlos"""
+        motor = self.motor
+        pendientes = []
+        while True:
+            agregadas, eliminadas = motor.get_activations()
+
+            huerfanas = {}
+            for activacion in eliminadas:
+                if activacion in self._decisiones:
+                    del self._decisiones[activacion]
+                elif activacion in self._datos:
+                    huerfanas[activacion.rule.__name__] = (activacion, self._datos.pop(activacion))
+                elif activacion in pendientes:
+                    pendientes.remove(activacion)
+
+            for activacion in agregadas:
+                if self._agregar(activacion, cambiados, huerfanas):
+                    pendientes.append(activacion)
+
+            for _, contribucion in huerfanas.values():
+                self._deshacer(contribucion)
+
+            if not pendientes:
+                if not huerfanas:
+                    return
+                continue
+
+            activacion = pendientes.pop(0)
+            self._datos[activacion] = self._disparar(activacion)
+
+    def _agregar(self, activacion, cambiados: set, huerfanas: Dict[str, tuple]) -> bool:
+        """
+        Registra una activación nueva
+
+        Returns:
+            True si es una regla de datos que hay que disparar
+        """
+        nombre = activacion.rule.__name__
+        campos = self._campos_regla.get(nombre)
+        if campos is None:
+            self._decisiones[activacion] = None
+            return False
+
+        anterior = huerfanas.get(nombre)
+        if anterior is not None and not campos & cambiados and _contexto(anterior[0]) == _contexto(activacion):
+            # La regla no lee ningún campo modificado: conserva su contribución
+            del huerfanas[nombre]
+            self._datos[activacion] = anterior[1]
+            return False
+        return True
+
+    def _disparar(self, activacion) -> _Contribucion:
+        """Ejecuta una regla de datos y registra lo que añadió al motor"""
+        motor = self.motor
+        puntuacion = motor.puntuacion_total
+        reglas = motor.total_reglas
+        n_explicaciones = len(motor.explicaciones)
+        n_alertas = len(motor.alertas)
+        n_factores = len(motor.factores_criticos)
+        declaradas = []
+
+        def declarar(*hechos):
+            ultimo = None
+            for hecho in hechos:
+                clave = (type(hecho), tuple(sorted(hecho.as_dict().items(), key=repr)))
+                ultimo = type(motor).declare(motor, hecho)
+                entrada = self._conclusiones.setdefault(clave, [ultimo, 0])
+                entrada[1] += 1
+                declaradas.append(clave)
+            return ultimo
+
+        motor.declare = declarar
+        try:
+            activacion.rule(motor, **_contexto(activacion))
+        finally:
+            del motor.declare
+
+        self.reglas_redisparadas += 1
+        return _Contribucion(
+            impacto=puntuacion - motor.puntuacion_total,
+            reglas=motor.total_reglas - reglas,
+            explicaciones=motor.explicaciones[n_explicaciones:],
+            alertas=motor.alertas[n_alertas:],
+            factores=motor.factores_criticos[n_factores:],
+            conclusiones=declaradas
+        )
+
+    def _deshacer(self, contribucion: _Contribucion):
+        """Revierte los efectos de una regla de datos que dejó de aplicarse"""
+        motor = self.motor
+        motor.puntuacion_total += contribucion.impacto
+        motor.total_reglas -= contribucion.reglas
+        _quitar(motor.explicaciones, contribucion.explicaciones)
+        _quitar(motor.alertas, contribucion.alertas)
+        _quitar(motor.factores_criticos, contribucion.factores)
+
+        for clave in contribucion.conclusiones:
+            entrada = self._conclusiones[clave]
+            entrada[1] -= 1
+            if entrada[1] == 0:
+                del self._conclusiones[clave]
+                if entrada[0] is not None:
+                    motor.retract(entrada[0])
@@ -0,0 +1,326 @@
+"""
+Tabla de decisión por particiones de intervalos
+Precompila los resultados posibles del motor según el intervalo en que cae
+cada campo, de modo que evaluar se reduce a bisecciones y una búsqueda
+"""
+
+import math
+import threading
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .compilado import EVALUADOR_COMPILADO, EvaluadorCompilado, _comprobar, _LITERAL, _PREDICADO
+
+
+_NUMERICOS = (bool, int, float, np.integer, np.floating)
+
+# Valor que no coincide con ningún literal; representa la celda "otro valor"
+_OTRO = object()
+
+# Marca de campo ausente en los datos
+_AUSENTE = object()
+
+# Valores no numéricos memorizados como máximo por campo
+_LIMITE_MEMO = 1024
+
+
+def _es_numerico(valor) -> bool:
+    return isinstance(valor, _NUMERICOS) and not (isinstance(valor, (float, np.floating)) and math.isnan(valor))
+
+
+def _cortes_predicado(predicado) -> List[float]:
+    """Constantes numéricas del predicado: los únicos puntos donde puede cambiar su valor"""
+    codigo = getattr(predicado, '__code__', None)
+    if codigo is None:
+        return []
+    return [float(c) for c in codigo.co_consts if _es_numerico(c)]
+
+
+def _sondas(cortes: List[float]) -> List[List[float]]:
+    """
+    Valores de prueba de cada celda numérica
+
+    Las celdas alternan intervalos abiertos y puntos de corte:
+    (-inf, c0), [c0], (c0, c1), [c1], ..., (ck, inf). El primer valor de cada
+    lista es el representante de la celda y el resto se usa para verificar
+    que las reglas son constantes dentro de ella.
+    """
+    if not cortes:
+        return [[0.0, -1e9, -1.0, 1.0, 1e9]]
+
+    celdas = []
+    anterior = None
+    for corte in cortes:
+        if anterior is None:
+            celdas.append([corte - 1.0, corte - 1e9, math.nextafter(corte, -math.inf)])
+        else:
+            celdas.append([(anterior + corte) / 2,
+                           math.nextafter(anterior, math.inf), math.nextafter(corte, -math.inf)])
+        celdas.append([corte])
+        anterior = corte
+    celdas.append([anterior + 1.0, math.nextafter(anterior, math.inf), anterior + 1e9])
+    return celdas
+
+
+class _ParticionCampo:
+    """Partición de un campo en celdas, con la máscara de reglas satisfechas por celda"""
+
+    def __init__(self, campo: str, reglas: List[Tuple[int, tuple]], todas: int):
+        """
+        Args:
+            campo: Nombre del campo de DatosProveedor
+            reglas: Pares (índice de regla, comprobaciones de la regla sobre este campo)
+            todas: Máscara con todas las reglas activas
+        """
+        self.campo = campo
+        self._reglas = reglas
+
+        # Ausente: falla toda regla que lee el campo
+        self.mascara_ausente = todas
+        for j, _ in reglas:
+            self.mascara_ausente &= ~(1 << j)
+        self._base = self.mascara_ausente
+        self._memo = {_AUSENTE: self.mascara_ausente}
+
+        cortes = set()
+        literales = []
+        for _, comprobaciones in reglas:
+            for _, tipo, valor, _ in comprobaciones:
+                if tipo is _PREDICADO:
+                    cortes.update(_cortes_predicado(valor))
+                elif tipo is _LITERAL:
+                    if _es_numerico(valor):
+                        cortes.add(float(valor))
+                    elif isinstance(valor, str) and valor not in literales:
+                        literales.append(valor)
+        self.cortes = sorted(cortes)
+        self.literales = literales
+
+        self.mascaras = []
+        for sondas in _sondas(self.cortes):
+            mascaras = {self.mascara_directa(v) for v in sondas}
+            if len(mascaras) != 1:
+                raise ValueError(
+                    f"Las reglas sobre '{campo}' no son constantes por intervalos de sus umbrales"
+                )
+            self.mascaras.append(mascaras.pop())
+
+        # Búsqueda directa para literales de texto, booleanos y "otro valor"
+        for valor in literales + [False, True, _OTRO]:
+            try:
+                self._memo[valor] = self.mascara_directa(valor)
+            except Exception:
+                pass
+
+    def mascara_directa(self, valor) -> int:
+        """Evalúa las comprobaciones del campo sobre un valor (puede lanzar como experta)"""
+        mascara = self._base
+        hecho = {self.campo: valor}
+        for j, comprobaciones in self._reglas:
+            if _comprobar(comprobaciones, hecho, {}) is not None:
+                mascara |= 1 << j
+        return mascara
+
+    def celda(self, valor) -> int:
+        """Índice de la celda numérica de un valor"""
+        i = bisect_left(self.cortes, valor)
+        if i < len(self.cortes) and self.cortes[i] == valor:
+            return 2 * i + 1
+        return 2 * i
+
+    def mascara(self, datos: Dict[str, Any]) -> int:
+        """Máscara de reglas satisfechas por el valor del campo en datos"""
+        valor = datos.get(self.campo, _AUSENTE)
+        try:
+            return self._memo[valor]
+        except (KeyError, TypeError):
+            pass
+        if _es_numerico(valor):
+            return self.mascaras[self.celda(valor)]
+        mascara = self.mascara_directa(valor)
+        if len(self._memo) < _LIMITE_MEMO:
+            try:
+                self._memo[valor] = mascara
+            except TypeError:
+                pass
+        return mascara
+
+    def mascaras_posibles(self) -> set:
+        """Todas las máscaras que puede producir el campo"""
+        return set(self.mascaras) | set(self._memo.values()) | {self.mascara_ausente}
+
+
+class TablaDecision:
+    """
+    Resultados precalculados del motor indexados por celdas de intervalos.
+
+    Cada regla compara un campo con constantes, así que el resultado depende
+    solo del intervalo en que cae cada campo. Para no enumerar el producto
+    cartesiano de todas las celdas (cientos de millones), la tabla se
+    factoriza en dos niveles: cada campo traduce su celda a la máscara de
+    reglas que satisface, la intersección de esas máscaras da las reglas
+    activadas, y una tabla indexada por esa máscara guarda puntuación,
+    riesgo, recomendación, reglas, alertas y factores críticos.
+    """
+
+    def __init__(self, evaluador: EvaluadorCompilado = EVALUADOR_COMPILADO):
+        """
+        Args:
+            evaluador: Evaluador compilado del que se toman reglas y decisiones
+        """
+        self.evaluador = evaluador
+        self.firma = evaluador.firma
+        perfiles = evaluador.perfiles
+        todas = (1 << len(perfiles)) - 1
+
+        por_campo = {}
+        for j, perfil in enumerate(perfiles):
+            variables = {}
+            for comprobacion in perfil.comprobaciones:
+                campo, _, _, variable = comprobacion
+                if variable is not None and variables.setdefault(variable, campo) != campo:
+                    raise ValueError(f"La regla {perfil.codigo} liga '{variable}' en varios campos")
+                por_campo.setdefault(campo, {}).setdefault(j, []).append(comprobacion)
+
+        self.particiones = [
+            _ParticionCampo(campo, [(j, tuple(c)) for j, c in reglas.items()], todas)
+            for campo, reglas in por_campo.items()
+        ]
+
+        self._lock = threading.Lock()
+        self._decisiones = {}
+        self._resultados = {}
+        alcanzables = {todas}
+        for particion in self.particiones:
+            alcanzables = {m & p for m in alcanzables for p in particion.mascaras_posibles()}
+        for mascara in alcanzables:
+            self._resultados[mascara] = self._precalcular(mascara)
+
+    @property
+    def tamano(self) -> int:
+        """Número de resultados precalculados"""
+        return len(self._resultados)
+
+    def _precalcular(self, mascara: int) -> tuple:
+        """Resultado de un conjunto de reglas activadas"""
+        perfiles = [p for j, p in enumerate(self.evaluador.perfiles) if mascara >> j & 1]
+        puntuacion_total = 100 - sum(p.impacto for p in perfiles)
+        conclusiones = []
+        for perfil in perfiles:
+            for conclusion in perfil.conclusiones:
+                if conclusion not in conclusiones:
+                    conclusiones.append(conclusion)
+
+        clave = (tuple(repr(c) for c in conclusiones), puntuacion_total)
+        if clave not in self._decisiones:
+            self._decisiones[clave] = self.evaluador.decidir(conclusiones, puntuacion_total)
+        riesgo_final, recomendacion = self._decisiones[clave]
+
+        return (
+            riesgo_final,
+            max(0, puntuacion_total),
+            recomendacion,
+            tuple(p.codigo for p in perfiles),
+            tuple(a for p in perfiles for a in p.alertas),
+            tuple(f for p in perfiles for f in p.factores)
+        )
+
+    def resultado_mascara(self, mascara: int) -> tuple:
+        """
+        Resultado precalculado de un conjunto de reglas activadas
+
+        Returns:
+            Tupla (riesgo_final, puntuacion, recomendacion, códigos de reglas,
+            alertas como pares (nivel, mensaje), factores críticos)
+        """
+        resultado = self._resultados.get(mascara)
+        if resultado is None:
+            resultado = self._precalcular(mascara)
+            with self._lock:
+                self._resultados[mascara] = resultado
+        return resultado
+
+    def mascara_reglas(self, datos_proveedor: Dict[str, Any]) -> int:
+        """Máscara de reglas activadas: una bisección o búsqueda por campo"""
+        datos = EvaluadorCompilado._validar(datos_proveedor)
+        mascara = -1
+        for particion in self.particiones:
+            mascara &= particion.mascara(datos)
+        return mascara
+
+    def consultar(self, datos_proveedor: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Resultado de un proveedor por búsqueda en la tabla
+
+        Args:
+            datos_proveedor: Diccionario con los datos del proveedor
+
+        Returns:
+            Dict con riesgo_final, puntuacion, recomendacion, reglas_activadas
+            (códigos), alertas, factores_criticos y total_reglas_activadas
+        """
+        riesgo_final, puntuacion, recomendacion, reglas, alertas, factores = \
+            self.resultado_mascara(self.mascara_reglas(datos_proveedor))
+        return {
+            'riesgo_final': riesgo_final,
+            'puntuacion': puntuacion,
+            'recomendacion': recomendacion,
+            'reglas_activadas': list(reglas),
+            'alertas': [{'nivel': nivel, 'mensaje': mensaje} for nivel, mensaje in alertas],
+            'factores_criticos': list(factores),
+            'total_reglas_activadas': len(reglas)
+        }
+
+
+def campos_sin_efecto(evaluador: Optional[EvaluadorCompilado] = None) -> List[str]:
+    """
+    Campos que leen las reglas pero cuyo valor nunca cambia el resultado
+
+    Una regla que compara un campo por igualdad con una función (un lambda
+    sin P(), como MATCH.liq & (lambda liq: liq < 1.0)) no se activa con
+    ningún valor. Si todas las reglas que leen un campo son así, el campo
+    no tiene umbrales efectivos: ni el análisis de sensibilidad ni la
+    simulación pueden encontrar un valor que altere la evaluación.
+
+    Args:
+        evaluador: Evaluador compilado (por defecto, EVALUADOR_COMPILADO)
+
+    Returns:
+        Campos en el orden en que los leen las reglas
+    """
+    evaluador = evaluador or EVALUADOR_COMPILADO
+    leidos = []
+    efectivos = set()
+    for perfil in evaluador.perfiles:
+        campos = [campo for campo, _, _, _ in perfil.comprobaciones]
+        leidos.extend(campo for campo in campos if campo not in leidos)
+        if not any(tipo is _LITERAL and callable(valor) for _, tipo, valor, _ in perfil.comprobaciones):
+            efectivos.update(campos)
+    return [campo for campo in leidos if campo not in efectivos]
+
+
+_TABLAS = {}
+_LOCK_TABLAS = threading.Lock()
+
+
+def tabla_decision(evaluador: Optional[EvaluadorCompilado] = None) -> TablaDecision:
+    """
+    Tabla de decisión de un evaluador, reconstruida si cambian sus reglas
+
+    Las tablas se guardan por la firma del evaluador: si cambia un umbral,
+    literal o impacto cambia la firma y se compila una tabla nueva.
+
+    Args:
+        evaluador: Evaluador compilado (por defecto, EVALUADOR_COMPILADO)
+
+    Returns:
+        TablaDecision vigente para esas reglas
+    """
+    evaluador = evaluador or EVALUADOR_COMPILADO
+    with _LOCK_TABLAS:
+        tabla = _TABLAS.get(evaluador.firma)
+        if tabla is None:
+            tabla = _TABLAS[evaluador.firma] = TablaDecision(evaluador)
+        return tabla
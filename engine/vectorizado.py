@@ -0,0 +1,223 @@
+"""
+Evaluación vectorizada de carteras de proveedores
+Aplica las reglas del motor como máscaras booleanas de NumPy sobre un DataFrame
+"""
+
+from typing import Any, Dict, Mapping, NamedTuple, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .compilado import EVALUADOR_COMPILADO, EvaluadorCompilado, _LITERAL, _PREDICADO
+
+
+_ESCALARES = (bool, int, float, str, np.generic)
+
+
+def _mascara_literal(columna: np.ndarray, valor) -> np.ndarray:
+    """Igualdad literal elemento a elemento, con la misma semántica que experta"""
+    if isinstance(valor, _ESCALARES):
+        return np.asarray(columna == valor, dtype=bool)
+    if columna.dtype != object:
+        # Una columna numérica o booleana nunca es igual a un objeto no escalar
+        # (es el caso de los lambdas usados como literal en las reglas numéricas)
+        return np.zeros(len(columna), dtype=bool)
+    return np.fromiter((valor == x for x in columna), dtype=bool, count=len(columna))
+
+
+def _mascara_predicado(columna: np.ndarray, predicado, candidatas: np.ndarray) -> np.ndarray:
+    """
+    Aplica un predicado a toda la columna, o elemento a elemento si no es vectorizable
+
+    Elemento a elemento solo se evalúa en las filas candidatas (campo
+    presente y regla aún activa), como experta, que no llama al predicado
+    si el hecho no tiene el campo.
+    """
+    try:
+        mascara = np.asarray(predicado(columna))
+        if mascara.dtype == bool and mascara.shape == columna.shape:
+            return mascara
+    except (TypeError, ValueError, AttributeError):
+        pass
+    mascara = np.zeros(len(columna), dtype=bool)
+    filas = np.flatnonzero(candidatas)
+    mascara[filas] = np.fromiter((bool(predicado(columna[i])) for i in filas), dtype=bool, count=len(filas))
+    return mascara
+
+
+class ColumnaReglas(NamedTuple):
+    """
+    Valores de un campo tal como los leen las máscaras de las reglas
+
+    Con `categorias`, valores son códigos enteros sobre esas categorías
+    (-1 = ausente): los literales se traducen a su código y los predicados se
+    evalúan una vez por categoría, sin decodificar fila a fila.
+    """
+    valores: np.ndarray
+    presente: np.ndarray
+    categorias: Optional[Sequence[Any]] = None
+
+
+def _mascara_categorica(columna: ColumnaReglas, tipo: int, valor) -> np.ndarray:
+    """Literal o predicado sobre una columna de códigos de categoría"""
+    if tipo is _LITERAL:
+        coincide = np.array([isinstance(valor, _ESCALARES) and valor == c for c in columna.categorias], dtype=bool)
+    else:
+        coincide = np.array([bool(valor(c)) for c in columna.categorias], dtype=bool)
+    if not coincide.any():
+        return np.zeros(len(columna.valores), dtype=bool)
+    # Los ausentes (-1) indexan la última categoría y los descarta `presente`
+    return columna.presente & coincide[columna.valores]
+
+
+def mascaras_reglas(df: pd.DataFrame, evaluador: EvaluadorCompilado = EVALUADOR_COMPILADO) -> np.ndarray:
+    """
+    Calcula qué reglas de datos se activan en cada fila
+
+    Args:
+        df: DataFrame con una columna por campo de DatosProveedor
+        evaluador: Evaluador compilado del que se toman las reglas
+
+    Returns:
+        np.ndarray booleano de forma (filas, reglas) en el orden de evaluador.perfiles
+    """
+    columnas = {}
+    for perfil in evaluador.perfiles:
+        for campo, _, _, _ in perfil.comprobaciones:
+            if campo in df.columns and campo not in columnas:
+                serie = df[campo]
+                columnas[campo] = ColumnaReglas(serie.to_numpy(), serie.notna().to_numpy())
+    return mascaras_columnas(len(df), columnas, evaluador)
+
+
+def mascaras_columnas(n: int, columnas: Mapping[str, ColumnaReglas],
+                      evaluador: EvaluadorCompilado = EVALUADOR_COMPILADO) -> np.ndarray:
+    """
+    Calcula qué reglas de datos se activan a partir de columnas ya extraídas
+
+    Args:
+        n: Número de filas
+        columnas: ColumnaReglas de cada campo disponible (las vistas no se copian)
+        evaluador: Evaluador compilado del que se toman las reglas
+
+    Returns:
+        np.ndarray booleano de forma (n, reglas) en el orden de evaluador.perfiles
+    """
+    activadas = np.ones((n, len(evaluador.perfiles)), dtype=bool)
+
+    for j, perfil in enumerate(evaluador.perfiles):
+        for campo, tipo, valor, _ in perfil.comprobaciones:
+            columna = columnas.get(campo)
+            if columna is None:
+                # Igual que un hecho sin el campo: el patrón no coincide
+                activadas[:, j] = False
+                break
+
+            if columna.categorias is not None and tipo in (_LITERAL, _PREDICADO):
+                if activadas[:, j].any():
+                    activadas[:, j] &= _mascara_categorica(columna, tipo, valor)
+            elif tipo is _LITERAL:
+                activadas[:, j] &= _mascara_literal(columna.valores, valor)
+            elif tipo is _PREDICADO:
+                activadas[:, j] &= columna.presente
+                if activadas[:, j].any():
+                    activadas[:, j] &= _mascara_predicado(columna.valores, valor, activadas[:, j])
+            else:
+                activadas[:, j] &= columna.presente
+
+    return activadas
+
+
+def evaluar_dataframe(df: pd.DataFrame,
+                      evaluador: EvaluadorCompilado = EVALUADOR_COMPILADO) -> Dict[str, Any]:
+    """
+    Evalúa todos los proveedores de un DataFrame de forma vectorizada
+
+    La puntuación es 100 menos la suma enmascarada de los impactos de cada
+    regla. El riesgo final se obtiene con la misma lógica de decisión del
+    motor (decision_riesgo_alto, decision_riesgo_medio y
+    evaluar_puntuacion_final), aplicada una vez por cada combinación
+    distinta de conclusiones y puntuación en lugar de una vez por fila.
+
+    Args:
+        df: DataFrame con una columna por campo de DatosProveedor
+        evaluador: Evaluador compilado del que se toman las reglas
+
+    Returns:
+        Dict con columnas alineadas al índice de df:
+        - riesgo_final, recomendacion, puntuacion, total_reglas_activadas (pd.Series)
+        - reglas_activadas: pd.DataFrame booleano con una columna por código de regla
+        - factores_criticos: pd.DataFrame booleano con una columna por factor crítico
+    """
+    return evaluar_mascaras(mascaras_reglas(df, evaluador), evaluador, df.index)
+
+
+def evaluar_mascaras(activadas: np.ndarray, evaluador: EvaluadorCompilado = EVALUADOR_COMPILADO,
+                     indice: Optional[pd.Index] = None) -> Dict[str, Any]:
+    """
+    Resultados de evaluar_dataframe() a partir de las reglas activadas
+
+    Args:
+        activadas: Matriz de mascaras_reglas() o mascaras_columnas()
+        evaluador: Evaluador compilado del que se toman las reglas
+        indice: Índice de las series resultantes (por defecto, RangeIndex)
+
+    Returns:
+        Dict con el mismo formato que evaluar_dataframe()
+    """
+    perfiles = evaluador.perfiles
+    n = len(activadas)
+    indice = indice if indice is not None else pd.RangeIndex(n)
+
+    impactos = np.array([p.impacto for p in perfiles], dtype=np.int64)
+    puntuacion_total = 100 - activadas.astype(np.int64) @ impactos
+
+    # Conclusiones distintas que pueden declararse y reglas que declaran cada una
+    conclusiones = []
+    for perfil in perfiles:
+        for conclusion in perfil.conclusiones:
+            if conclusion not in conclusiones:
+                conclusiones.append(conclusion)
+
+    codigo_conclusiones = np.zeros(n, dtype=np.int64)
+    for k, conclusion in enumerate(conclusiones):
+        declarada = np.zeros(n, dtype=bool)
+        for j, perfil in enumerate(perfiles):
+            if conclusion in perfil.conclusiones:
+                declarada |= activadas[:, j]
+        codigo_conclusiones |= declarada.astype(np.int64) << k
+
+    # Decisión final una vez por combinación (conclusiones, puntuación); la
+    # combinación se empaqueta en un entero para ordenar una sola columna
+    minimo = int(puntuacion_total.min()) if n else 0
+    rango = int(puntuacion_total.max()) - minimo + 1 if n else 1
+    combinaciones, inversa = np.unique(codigo_conclusiones * rango + (puntuacion_total - minimo),
+                                       return_inverse=True)
+    riesgos = np.empty(len(combinaciones), dtype=object)
+    recomendaciones = np.empty(len(combinaciones), dtype=object)
+    for i, combinacion in enumerate(combinaciones.tolist()):
+        codigo, puntuacion = divmod(combinacion, rango)
+        declaradas = [c for k, c in enumerate(conclusiones) if codigo >> k & 1]
+        riesgos[i], recomendaciones[i] = evaluador.decidir(declaradas, puntuacion + minimo)
+    inversa = inversa.reshape(-1)
+
+    codigos = [p.codigo for p in perfiles]
+    factores = []
+    for perfil in perfiles:
+        for factor in perfil.factores:
+            if factor not in factores:
+                factores.append(factor)
+    banderas = np.zeros((n, len(factores)), dtype=bool)
+    for j, perfil in enumerate(perfiles):
+        for factor in perfil.factores:
+            banderas[:, factores.index(factor)] |= activadas[:, j]
+
+    return {
+        'riesgo_final': pd.Series(riesgos[inversa], index=indice, name='riesgo_final'),
+        'puntuacion': pd.Series(np.maximum(0, puntuacion_total), index=indice, name='puntuacion'),
+        'recomendacion': pd.Series(recomendaciones[inversa], index=indice, name='recomendacion'),
+        'total_reglas_activadas': pd.Series(activadas.sum(axis=1), index=indice,
+                                            name='total_reglas_activadas'),
+        'reglas_activadas': pd.DataFrame(activadas, index=indice, columns=codigos),
+        'factores_criticos': pd.DataFrame(banderas, index=indice, columns=factores)
+    }
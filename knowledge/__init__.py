@@ -1,22 +1,52 @@
 """
 Paquete de Base de Conocimiento
 Contiene las reglas de negocio organizadas por dominio
+
+Cada módulo de reglas (con sus umbrales y diccionarios de documentación) se
+importa la primera vez que se usa uno de sus nombres.
 """
 
-from .reglas_financieras import REGLAS_FINANCIERAS, UMBRALES_FINANCIEROS
-from .reglas_operacionales import REGLAS_OPERACIONALES, UMBRALES_OPERACIONALES
-from .reglas_legales import REGLAS_LEGALES, CRITERIOS_LEGALES
-from .reglas_reputacionales import REGLAS_REPUTACIONALES, UMBRALES_REPUTACIONALES
+import importlib
+
+# Nombre público -> módulo que lo define, importado bajo demanda
+_PEREZOSOS = {
+    'REGLAS_FINANCIERAS': 'reglas_financieras',
+    'UMBRALES_FINANCIEROS': 'reglas_financieras',
+    'REGLAS_OPERACIONALES': 'reglas_operacionales',
+    'UMBRALES_OPERACIONALES': 'reglas_operacionales',
+    'CERTIFICACIONES_RECONOCIDAS': 'reglas_operacionales',
+    'INDUSTRIAS': 'reglas_operacionales',
+    'REGLAS_LEGALES': 'reglas_legales',
+    'CRITERIOS_LEGALES': 'reglas_legales',
+    'REGLAS_REPUTACIONALES': 'reglas_reputacionales',
+    'UMBRALES_REPUTACIONALES': 'reglas_reputacionales'
+}
+
+
+def __getattr__(nombre):
+    modulo = _PEREZOSOS.get(nombre)
+    if modulo is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+    valor = getattr(importlib.import_module(f".{modulo}", __name__), nombre)
+    globals()[nombre] = valor
+    return valor
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_PEREZOSOS))
+
 
 __all__ = [
     'REGLAS_FINANCIERAS',
     'UMBRALES_FINANCIEROS',
     'REGLAS_OPERACIONALES',
     'UMBRALES_OPERACIONALES',
+    'CERTIFICACIONES_RECONOCIDAS',
+    'INDUSTRIAS',
     'REGLAS_LEGALES',
     'CRITERIOS_LEGALES',
     'REGLAS_REPUTACIONALES',
     'UMBRALES_REPUTACIONALES'
 ]
 
-__version__ = '1.0.0'
\ No newline at end of file
+__version__ = '1.0.0'
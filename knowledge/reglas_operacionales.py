@@ -22,6 +22,13 @@ UMBRALES_OPERACIONALES = {
     }
 }
 
+# Sectores de actividad que se ofrecen al registrar un proveedor
+INDUSTRIAS = [
+    "Manufactura", "Servicios", "Tecnología", "Construcción", "Logística",
+    "Agricultura", "Minería", "Salud", "Educación", "Retail", "Energía",
+    "Transporte", "Finanzas", "Turismo", "Textil"
+]
+
 # Certificaciones reconocidas internacionalmente
 CERTIFICACIONES_RECONOCIDAS = [
     'ISO 9001',      # Gestión de Calidad
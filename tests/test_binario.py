@@ -0,0 +1,186 @@
+"""
+Tests del archivo binario de proveedores
+Valida la conversión desde CSV/JSONL, la proyección en memoria sin copias y
+que evaluar sobre las columnas del archivo da lo mismo que el evaluador compilado
+"""
+
+import json
+import random
+
+import numpy as np
+import pytest
+from engine.reglas import Rule, P
+
+from engine.__main__ import main
+from engine.binario import DTYPE_PROVEEDOR, abrir_binario, convertir_binario, leer_cabecera
+from engine.compilado import EvaluadorCompilado, EVALUADOR_COMPILADO
+from engine.flujo import evaluar_archivo, leer_bloques
+from engine.inference_engine import DatosProveedor, MotorEvaluacionRiesgo
+from engine.registro import VersionReglas, registro_reglas
+from engine.vectorizado import mascaras_columnas, mascaras_reglas
+from benchmarks.sintetico import generar_proveedor
+
+
+class MotorCategorias(MotorEvaluacionRiesgo):
+    """Motor de prueba con predicados sobre industria y un booleano"""
+
+    @Rule(DatosProveedor(certificacion_ambiental=False),
+          DatosProveedor(industria=P(lambda industria: industria.lower() == 'manufactura')))
+    def sin_certificacion_ambiental(self):
+        MotorEvaluacionRiesgo.sin_certificacion_ambiental._wrapped(self)
+
+    @Rule(DatosProveedor(seguros_vigentes=P(lambda seguros: seguros is False)))
+    def sin_seguros(self):
+        MotorEvaluacionRiesgo.sin_seguros._wrapped(self)
+
+
+def proveedores_con_ausentes(n, semilla):
+    """Proveedores aleatorios a los que les faltan campos al azar"""
+    rng = random.Random(semilla)
+    proveedores = []
+    for _ in range(n):
+        datos = generar_proveedor(rng)
+        proveedores.append({k: v for k, v in datos.items() if rng.random() > 0.15})
+    return proveedores
+
+
+@pytest.fixture(scope='module')
+def cartera(tmp_path_factory):
+    """JSONL de 1500 proveedores con campos e identificadores ausentes y su conversión a binario"""
+    directorio = tmp_path_factory.mktemp('binario')
+    proveedores = proveedores_con_ausentes(1500, semilla=23)
+    for i, datos in enumerate(proveedores):
+        if i % 7:
+            datos['id'] = f'P-{i:04d}'
+        if i % 5 == 0:
+            datos['nombre'] = f'Proveedor Núñez {i}'
+    jsonl = str(directorio / 'cartera.jsonl')
+    with open(jsonl, 'w', encoding='utf-8') as f:
+        for datos in proveedores:
+            f.write(json.dumps(datos, ensure_ascii=False) + '\n')
+    binario = str(directorio / 'cartera.prov')
+    estadisticas = convertir_binario(jsonl, binario, tamano_bloque=400)
+    return proveedores, jsonl, binario, estadisticas
+
+
+def test_conversion_y_proyeccion(cartera):
+    """
+    Test 1: La conversión conserva los valores, los ausentes y las industrias, y se lee con memmap
+    """
+    proveedores, jsonl, binario, estadisticas = cartera
+    tabla = abrir_binario(binario)
+
+    assert estadisticas['filas'] == len(tabla) == 1500
+    assert estadisticas['identificadores'] == ['id', 'nombre']
+    assert leer_cabecera(binario)['industrias'] == estadisticas['industrias']
+    assert sorted(tabla.industrias) == ['Manufactura', 'manufactura', 'servicios', 'tecnologia']
+    assert isinstance(tabla.registros.base, np.memmap) or isinstance(tabla.registros.base.base, np.memmap)
+    assert tabla.registros.dtype == DTYPE_PROVEEDOR
+
+    decodificado = tabla.a_dataframe().to_dict('records')
+    for datos, fila in zip(proveedores, decodificado):
+        for campo, valor in fila.items():
+            if campo == 'fila':
+                continue
+            if campo not in datos:
+                assert valor is None or valor != valor
+            else:
+                assert valor == datos[campo]
+                if isinstance(datos[campo], bool):
+                    assert isinstance(valor, bool)
+
+
+def test_columnas_sin_copias(cartera):
+    """
+    Test 2: Las columnas de las reglas son vistas del archivo y dan las mismas máscaras que un DataFrame
+    """
+    _, jsonl, binario, _ = cartera
+    tabla = abrir_binario(binario)
+    columnas = tabla.columnas_reglas()
+
+    for campo in ('liquidez_corriente', 'industria', 'seguros_vigentes'):
+        assert np.shares_memory(columnas[campo].valores, tabla.registros)
+    bloque = next(tabla.bloques(1000))
+    assert np.shares_memory(bloque.registros, tabla.registros)
+
+    df = next(leer_bloques(jsonl, 'jsonl', tamano_bloque=2000))
+    for evaluador in (EVALUADOR_COMPILADO, EvaluadorCompilado(MotorCategorias)):
+        esperadas = mascaras_reglas(df, evaluador)
+        codigos = [p.codigo for p in evaluador.perfiles]
+        # RL-002 lee industria y RL-003 un booleano: los dos se activan en alguna fila
+        assert esperadas[:, codigos.index('RL-002')].any() and esperadas[:, codigos.index('RL-003')].any()
+        assert np.array_equal(mascaras_columnas(len(tabla), columnas, evaluador), esperadas)
+
+
+def test_paridad_con_evaluador_compilado(cartera):
+    """
+    Test 3: Evaluar el binario (también con predicados sobre categorías) coincide con el evaluador compilado
+    """
+    proveedores, _, binario, _ = cartera
+    evaluador = EvaluadorCompilado(MotorCategorias)
+    version = VersionReglas(1, evaluador.firma, evaluador, 'test', '')
+    tabla = abrir_binario(binario)
+
+    resultados = [tabla_bloque.evaluar(version) for tabla_bloque in tabla.bloques(600)]
+    assert [len(r['identificacion']) for r in resultados] == [600, 600, 300]
+    assert resultados[1]['identificacion']['fila'].iloc[0] == 600
+    assert resultados[1]['identificacion']['id'].iloc[1] == 'P-0601'
+    assert resultados[1]['identificacion']['nombre'].iloc[0] == 'Proveedor Núñez 600'
+
+    for r in resultados:
+        for posicion, fila in enumerate(r['identificacion']['fila']):
+            esperado = evaluador.evaluar(proveedores[fila], 'ids')
+            assert r['riesgo_final'].iloc[posicion] == esperado['riesgo_final']
+            assert r['puntuacion'].iloc[posicion] == esperado['puntuacion']
+            activadas = r['reglas_activadas'].iloc[posicion]
+            assert set(activadas[activadas].index) == {e[0] for e in esperado['explicaciones']}
+
+
+def test_linea_de_comandos_binaria(cartera, tmp_path, capsys):
+    """
+    Test 4: python -m engine convertir y evaluar con entrada .prov dan la misma salida que el JSONL
+    """
+    _, jsonl, _, _ = cartera
+    binario = str(tmp_path / 'cartera.prov')
+    assert main(['convertir', jsonl, binario]) == 0
+    assert '1,500 proveedores' in capsys.readouterr().err
+
+    salidas = {}
+    for nombre, entrada in (('jsonl', jsonl), ('binario', binario)):
+        salidas[nombre] = str(tmp_path / f'{nombre}.jsonl')
+        evaluar_archivo(entrada, salidas[nombre], tamano_bloque=500, version=registro_reglas().fijar())
+    with open(salidas['jsonl'], encoding='utf-8') as a, open(salidas['binario'], encoding='utf-8') as b:
+        assert a.read() == b.read()
+
+    no_binario = tmp_path / 'falso.prov'
+    no_binario.write_bytes(b'no es binario')
+    assert main(['evaluar', str(no_binario), str(tmp_path / 'x.jsonl'), '--silencioso']) == 1
+    assert 'no es un archivo binario' in capsys.readouterr().err
+
+
+def test_muchas_industrias_e_identificadores(tmp_path):
+    """
+    Test 5: Miles de industrias caben en el pie, los identificadores que aparecen tarde se conservan
+    y un archivo de otra versión del formato se rechaza
+    """
+    entrada = tmp_path / 'industrias.csv'
+    lineas = ['liquidez_corriente,industria'] + [f'{i % 3},industria número {i}' for i in range(2000)]
+    entrada.write_text('\n'.join(lineas) + '\n', encoding='utf-8')
+    binario = str(tmp_path / 'industrias.prov')
+    assert len(convertir_binario(str(entrada), binario)['industrias']) == 2000
+    tabla = abrir_binario(binario)
+    assert tabla.industrias[1999] == 'industria número 1999'
+    assert tabla.registros.ctypes.data % 8 == 0
+
+    jsonl = tmp_path / 'ids.jsonl'
+    jsonl.write_text('{"liquidez_corriente": 1}\n' * 3 + '{"id": "A-7", "nombre": ""}\n{"nombre": "Ñandú"}\n',
+                     encoding='utf-8')
+    convertir_binario(str(jsonl), binario, tamano_bloque=2)
+    identificacion = abrir_binario(binario).identificacion()
+    assert identificacion['id'].fillna('-').tolist() == ['-', '-', '-', 'A-7', '-']
+    assert identificacion['nombre'].fillna('-').tolist() == ['-', '-', '-', '', 'Ñandú']
+
+    antiguo = tmp_path / 'antiguo.prov'
+    antiguo.write_bytes(b'PROVEEDORES-BIN\n' + b'{"version_formato": 1}'.ljust(4080))
+    with pytest.raises(ValueError, match='Versión de formato'):
+        abrir_binario(str(antiguo))
@@ -0,0 +1,103 @@
+"""
+Tests de la caché de resultados
+Valida claves canónicas, aislamiento de resultados, desalojo LRU y expiración
+"""
+
+from engine import CacheResultados, evaluar_proveedor
+from tests.test_pool import PROVEEDOR_RIESGOSO, PROVEEDOR_EXCELENTE
+
+
+class FuncionContada:
+    """Envuelve evaluar_proveedor contando las llamadas reales"""
+
+    def __init__(self):
+        self.llamadas = 0
+
+    def __call__(self, datos):
+        self.llamadas += 1
+        return evaluar_proveedor(datos)
+
+
+def test_clave_ignora_nombre_y_fecha():
+    """
+    Test 1: Cambiar nombre o fecha de evaluación no genera una entrada nueva
+    """
+    funcion = FuncionContada()
+    cache = CacheResultados(funcion)
+
+    cache(dict(PROVEEDOR_EXCELENTE, nombre='A', fecha_evaluacion='2025-01-01 10:00:00'))
+    resultado = cache(dict(PROVEEDOR_EXCELENTE, nombre='B', fecha_evaluacion='2025-06-01 12:00:00'))
+
+    assert funcion.llamadas == 1
+    assert resultado['riesgo_final'] == 'BAJO'
+    assert cache.estadisticas()['aciertos'] == 1
+
+
+def test_resultado_cacheado_no_se_puede_corromper():
+    """
+    Test 2: Modificar un resultado devuelto no altera la entrada guardada
+    """
+    cache = CacheResultados(FuncionContada())
+
+    primero = cache(PROVEEDOR_RIESGOSO)
+    primero['explicaciones'].clear()
+    primero['alertas'][0]['nivel'] = 'MANIPULADO'
+    primero['factores_criticos'].append('Falso')
+
+    segundo = cache(PROVEEDOR_RIESGOSO)
+
+    assert len(segundo['explicaciones']) == segundo['total_reglas_activadas']
+    assert all(a['nivel'] != 'MANIPULADO' for a in segundo['alertas'])
+    assert 'Falso' not in segundo['factores_criticos']
+
+
+def test_desalojo_lru():
+    """
+    Test 3: Al superar la capacidad se desaloja la entrada menos usada
+    """
+    funcion = FuncionContada()
+    cache = CacheResultados(funcion, capacidad=1)
+
+    cache(PROVEEDOR_EXCELENTE)
+    cache(PROVEEDOR_RIESGOSO)
+    cache(PROVEEDOR_EXCELENTE)
+
+    stats = cache.estadisticas()
+    assert funcion.llamadas == 3
+    assert stats['desalojos'] == 2
+    assert stats['tamano'] == 1
+
+
+def test_expiracion_ttl(monkeypatch):
+    """
+    Test 4: Una entrada vencida se vuelve a evaluar
+    """
+    reloj = [1000.0]
+    monkeypatch.setattr('engine.cache.time.monotonic', lambda: reloj[0])
+    funcion = FuncionContada()
+    cache = CacheResultados(funcion, ttl=60)
+
+    cache(PROVEEDOR_EXCELENTE)
+    reloj[0] += 30
+    cache(PROVEEDOR_EXCELENTE)
+    reloj[0] += 61
+    cache(PROVEEDOR_EXCELENTE)
+
+    assert funcion.llamadas == 2
+    assert cache.estadisticas()['expirados'] == 1
+
+
+def test_errores_no_se_cachean():
+    """
+    Test 5: Los resultados ERROR y las entradas no memorizables pasan directo
+    """
+    funcion = FuncionContada()
+    cache = CacheResultados(funcion)
+
+    assert cache(None)['riesgo_final'] == 'ERROR'
+    assert cache({'liquidez_corriente': 'x', 'certificacion_calidad': [1]})['riesgo_final'] == 'BAJO'
+    cache({'nombre__x': 1})
+    cache({'nombre__x': 1})
+
+    assert funcion.llamadas == 4
+    assert cache.estadisticas()['tamano'] == 0
@@ -0,0 +1,125 @@
+"""
+Tests de la salida de resultados por columnas
+Valida que el directorio npz y el archivo Parquet contienen lo mismo que la
+salida JSONL, con diccionarios estables entre bloques y escritura por partes
+"""
+
+import json
+import os
+
+import numpy as np
+import pytest
+
+from engine.__main__ import main
+from engine.columnar import EscritorColumnar, leer_columnar
+from engine.flujo import evaluar_archivo, evaluar_columnas, leer_bloques
+from engine.registro import registro_reglas
+from benchmarks.sintetico import GeneradorProveedores
+
+
+@pytest.fixture(scope='module')
+def evaluados(tmp_path_factory):
+    """2500 proveedores sintéticos y su salida JSONL de referencia"""
+    directorio = tmp_path_factory.mktemp('columnar')
+    entrada = str(directorio / 'cartera.csv')
+    GeneradorProveedores(semilla=22).escribir(entrada, 2500, tamano_bloque=1000)
+    referencia = str(directorio / 'referencia.jsonl')
+    evaluar_archivo(entrada, referencia, tamano_bloque=600)
+    with open(referencia, encoding='utf-8') as f:
+        return entrada, [json.loads(linea) for linea in f]
+
+
+def comprobar_paridad(df, referencia):
+    """Cada fila cargada coincide con la fila JSONL equivalente"""
+    evaluador = registro_reglas().actual.evaluador
+    codigos = [p.codigo for p in evaluador.perfiles]
+    reglas = df[[f'regla_{c}' for c in codigos]].to_numpy()
+
+    assert len(df) == len(referencia)
+    assert df['fila'].tolist() == [r['fila'] for r in referencia]
+    assert df['riesgo_final'].astype(str).tolist() == [r['riesgo_final'] for r in referencia]
+    assert df['puntuacion'].tolist() == [r['puntuacion'] for r in referencia]
+    assert df['recomendacion'].astype(str).tolist() == [r['recomendacion'] for r in referencia]
+    assert df['total_reglas_activadas'].tolist() == [r['total_reglas_activadas'] for r in referencia]
+    assert [[c for c, activa in zip(codigos, fila) if activa] for fila in reglas] == \
+        [r['reglas_activadas'] for r in referencia]
+    assert [v.split('|') if v else [] for v in df['factores_criticos'].astype(str)] == \
+        [r['factores_criticos'] for r in referencia]
+    assert set(df['version_reglas'].astype(str)) == {referencia[0]['version_reglas']}
+
+
+def test_npz_equivale_a_jsonl(evaluados, tmp_path):
+    """
+    Test 1: El directorio npz cargado en pandas tiene los mismos resultados que la salida JSONL
+    """
+    entrada, referencia = evaluados
+    salida = str(tmp_path / 'resultados.npz')
+    estadisticas = evaluar_archivo(entrada, salida, tamano_bloque=600)
+    df = leer_columnar(salida)
+
+    assert estadisticas['filas'] == 2500
+    comprobar_paridad(df, referencia)
+    assert df['riesgo_final'].dtype == 'category'
+    assert df['alertas'].dtype == 'category'
+    assert df['puntuacion'].dtype == np.int16
+    assert df['regla_RF-001'].dtype == bool
+
+
+def test_partes_y_diccionarios_globales(evaluados, tmp_path):
+    """
+    Test 2: Cada bloque se vuelca en una parte y los códigos del diccionario son los mismos en todas
+    """
+    entrada, _ = evaluados
+    salida = str(tmp_path / 'resultados.npz')
+    version = registro_reglas().fijar()
+    escritor = EscritorColumnar(salida, version, 'npz')
+    bloques = leer_bloques(entrada, 'csv', tamano_bloque=1000)
+
+    escritor.escribir(evaluar_columnas(next(bloques), version))
+    # Tras el primer bloque ya se puede leer lo escrito
+    assert len(leer_columnar(salida)) == 1000
+    for bloque in bloques:
+        escritor.escribir(evaluar_columnas(bloque, version))
+    escritor.cerrar()
+
+    assert sorted(os.listdir(salida)) == ['esquema.json', 'parte-00000.npz', 'parte-00001.npz', 'parte-00002.npz']
+    with open(os.path.join(salida, 'esquema.json'), encoding='utf-8') as f:
+        esquema = json.load(f)
+    assert esquema['partes'] == 3 and esquema['filas'] == 2500
+    for columna in ('riesgo_final', 'alertas', 'factores_criticos'):
+        valores = esquema['diccionarios'][columna]
+        assert len(valores) == len(set(valores))
+        codigos = np.concatenate([np.load(os.path.join(salida, f'parte-{i:05d}.npz'))[columna] for i in range(3)])
+        assert codigos.max() < len(valores)
+    assert set(esquema['diccionarios']['riesgo_final']) <= {'BAJO', 'MEDIO', 'ALTO'}
+
+
+def test_parquet_equivale_a_jsonl(evaluados, tmp_path):
+    """
+    Test 3: Con pyarrow, el archivo Parquet tiene un grupo de filas por bloque y los mismos resultados
+    """
+    pq = pytest.importorskip('pyarrow.parquet')
+    entrada, referencia = evaluados
+    salida = str(tmp_path / 'resultados.parquet')
+    evaluar_archivo(entrada, salida, tamano_bloque=600)
+
+    assert pq.ParquetFile(salida).metadata.num_row_groups == 5
+    df = leer_columnar(salida)
+    comprobar_paridad(df, referencia)
+    assert df['factores_criticos'].dtype == 'category'
+
+
+def test_linea_de_comandos_columnar(evaluados, tmp_path, capsys):
+    """
+    Test 4: python -m engine evaluar escribe npz por formato o extensión y rechaza la salida estándar
+    """
+    entrada, referencia = evaluados
+    salida = str(tmp_path / 'resultados')
+    assert main(['evaluar', entrada, salida, '--formato-salida', 'npz', '--silencioso']) == 0
+    comprobar_paridad(leer_columnar(salida), referencia)
+
+    assert main(['evaluar', entrada, str(tmp_path / 'otra.npz'), '--silencioso']) == 0
+    assert len(leer_columnar(str(tmp_path / 'otra.npz'), columnas=['fila', 'riesgo_final'])) == 2500
+
+    assert main(['evaluar', entrada, '-', '--formato-salida', 'npz', '--silencioso']) == 1
+    assert 'ruta' in capsys.readouterr().err
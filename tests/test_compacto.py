@@ -0,0 +1,109 @@
+"""
+Tests de la representación compacta de resultados
+Valida la conversión sin pérdidas desde y hacia el diccionario y el formato binario
+"""
+
+import random
+
+import pytest
+
+from engine import evaluar_proveedor, DatosProveedor
+from engine.compacto import (
+    CODIFICADOR_RESULTADOS, CodificadorResultados, NivelRiesgo, ResultadoCompacto
+)
+from engine.compilado import EvaluadorCompilado
+from engine.inference_engine import _resultado_error
+from tests.test_compilado import normalizar, MotorConPredicados
+from benchmarks.sintetico import generar_proveedor
+from tests.test_pool import PROVEEDOR_RIESGOSO, PROVEEDOR_EXCELENTE
+
+
+def evaluar_con_predicados(datos, nivel='full'):
+    """Evalúa con el motor de prueba de reglas P()"""
+    motor = MotorConPredicados(nivel)
+    motor.reset()
+    motor.declare(DatosProveedor(**datos))
+    motor.run()
+    return motor.obtener_resultado()
+
+
+def test_ida_y_vuelta_sin_perdidas():
+    """
+    Test 1: compactar y a_dict reconstruyen el mismo resultado, textos y hora incluidos
+    """
+    for datos in (PROVEEDOR_RIESGOSO, PROVEEDOR_EXCELENTE):
+        resultado = evaluar_proveedor(datos)
+        reconstruido = CODIFICADOR_RESULTADOS.a_dict(CODIFICADOR_RESULTADOS.compactar(resultado), datos)
+        assert normalizar(reconstruido) == normalizar(resultado)
+        assert [e['timestamp'] for e in reconstruido['explicaciones']] == \
+            [e['timestamp'] for e in resultado['explicaciones']]
+
+
+def test_ida_y_vuelta_con_reglas_numericas():
+    """
+    Test 2: Los parámetros numéricos de los textos salen de los datos del proveedor
+    """
+    codificador = CodificadorResultados(EvaluadorCompilado(MotorConPredicados))
+    rng = random.Random(12)
+    for _ in range(40):
+        datos = generar_proveedor(rng)
+        for nivel in ('full', 'ids'):
+            resultado = evaluar_con_predicados(datos, nivel)
+            compacto = codificador.compactar(resultado)
+            directo = codificador.evaluar(datos)
+            directo.segundos = compacto.segundos
+            assert directo == compacto
+            esperado = evaluar_con_predicados(datos, 'full')
+            assert normalizar(codificador.a_dict(compacto, datos)) == normalizar(esperado)
+
+
+def test_evaluar_directo_coincide_con_compactar():
+    """
+    Test 3: evaluar() produce el mismo resultado compacto que el motor, salvo la hora
+    """
+    rng = random.Random(5)
+    for _ in range(30):
+        datos = generar_proveedor(rng)
+        directo = CODIFICADOR_RESULTADOS.evaluar(datos)
+        desde_motor = CODIFICADOR_RESULTADOS.compactar(evaluar_proveedor(datos))
+        directo.segundos = desde_motor.segundos
+        assert directo == desde_motor
+
+
+def test_formato_binario():
+    """
+    Test 4: Registros de 32 bytes que se decodifican igual uno a uno y en lote
+    """
+    compactos = [CODIFICADOR_RESULTADOS.evaluar(generar_proveedor(random.Random(i))) for i in range(50)]
+    registro = CODIFICADOR_RESULTADOS.codificar(compactos[0])
+
+    assert len(registro) == 32
+    assert CodificadorResultados.DTYPE.itemsize == 32
+    assert CODIFICADOR_RESULTADOS.decodificar(registro) == compactos[0]
+
+    lote = CODIFICADOR_RESULTADOS.codificar_lote(compactos)
+    assert lote.tobytes()[:32] == registro
+    assert CODIFICADOR_RESULTADOS.decodificar_lote(lote.tobytes()) == compactos
+
+
+def test_mascaras_de_alertas_y_factores():
+    """
+    Test 5: Las máscaras de alertas y factores permiten filtrar sin reconstruir el diccionario
+    """
+    compacto = CODIFICADOR_RESULTADOS.compactar(evaluar_proveedor(PROVEEDOR_RIESGOSO))
+    bit_legal = 1 << CODIFICADOR_RESULTADOS.factores.index('Problemas legales')
+
+    assert compacto.riesgo is NivelRiesgo.ALTO
+    assert compacto.factores & bit_legal
+    assert compacto.total_reglas_activadas == evaluar_proveedor(PROVEEDOR_RIESGOSO)['total_reglas_activadas']
+
+
+def test_resultados_no_representables():
+    """
+    Test 6: Los resultados de error o sin reglas registradas se rechazan
+    """
+    with pytest.raises(ValueError):
+        CODIFICADOR_RESULTADOS.compactar(_resultado_error(RuntimeError('fallo')))
+    with pytest.raises(ValueError):
+        CODIFICADOR_RESULTADOS.compactar(evaluar_proveedor(PROVEEDOR_RIESGOSO, nivel_explicacion='none'))
+    assert ResultadoCompacto(NivelRiesgo.BAJO, 100) == ResultadoCompacto(0, 100.0)
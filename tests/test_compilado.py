@@ -0,0 +1,107 @@
+"""
+Tests de paridad del evaluador compilado
+Valida que EvaluadorCompilado produzca los mismos resultados que el motor experta
+"""
+
+import random
+
+import pytest
+from engine.reglas import Rule, MATCH, P
+
+from engine import evaluar_proveedor, MotorEvaluacionRiesgo, DatosProveedor
+from engine.compilado import EvaluadorCompilado, evaluar_proveedor_compilado
+from tests.test_pool import PROVEEDOR_RIESGOSO, PROVEEDOR_EXCELENTE
+from benchmarks.sintetico import generar_proveedor
+
+
+def normalizar(resultado):
+    """
+    Normaliza un resultado para compararlo entre motores
+
+    Se descarta la hora de cada explicación y se ordenan las listas: en experta
+    el orden de activación entre reglas con la misma prioridad depende del hash
+    de los nodos Rete y cambia entre procesos. También se descarta
+    'version_reglas', que solo anotan los puntos de entrada (evaluar_proveedor,
+    lotes, cachés), no el motor ni el evaluador.
+    """
+    copia = dict(resultado)
+    copia.pop('version_reglas', None)
+    copia['explicaciones'] = sorted(
+        (exp['regla'], exp['razonamiento'], exp['impacto'])
+        for exp in resultado['explicaciones']
+    )
+    copia['alertas'] = sorted((a['nivel'], a['mensaje']) for a in resultado['alertas'])
+    copia['factores_criticos'] = sorted(resultado['factores_criticos'])
+    return copia
+
+
+def test_paridad_proveedores_aleatorios():
+    """
+    Test 1: 300 proveedores aleatorios dan el mismo resultado en ambos motores
+    """
+    rng = random.Random(2024)
+
+    for _ in range(300):
+        datos = generar_proveedor(rng)
+        assert normalizar(evaluar_proveedor_compilado(datos)) == normalizar(evaluar_proveedor(datos))
+
+
+@pytest.mark.parametrize('datos', [
+    PROVEEDOR_RIESGOSO,
+    PROVEEDOR_EXCELENTE,
+    {},
+    {'certificacion_calidad': False},
+    {'certificacion_ambiental': False, 'industria': 'manufactura'},
+    {'cumplimiento_legal': 0},
+    {'liquidez_corriente': 'abc', 'endeudamiento': None},
+])
+def test_paridad_casos_borde(datos):
+    """
+    Test 2: Datos incompletos o con tipos inesperados se tratan igual que en experta
+    """
+    assert normalizar(evaluar_proveedor_compilado(datos)) == normalizar(evaluar_proveedor(datos))
+
+
+@pytest.mark.parametrize('datos', [None, 42, {'nombre__x': 1}])
+def test_paridad_errores(datos):
+    """
+    Test 3: Las entradas que experta rechaza producen el mismo resultado ERROR
+    """
+    esperado = evaluar_proveedor(datos)
+    resultado = evaluar_proveedor_compilado(datos)
+
+    assert esperado['riesgo_final'] == 'ERROR'
+    assert resultado == esperado
+
+
+class MotorConPredicados(MotorEvaluacionRiesgo):
+    """Motor de prueba con reglas numéricas declaradas mediante P()"""
+
+    @Rule(DatosProveedor(liquidez_corriente=MATCH.lc & P(lambda lc: lc < 1.0)))
+    def liquidez_critica(self, lc):
+        MotorEvaluacionRiesgo.liquidez_critica._wrapped(self, lc)
+
+    @Rule(DatosProveedor(endeudamiento=MATCH.end & P(lambda end: end > 0.7)))
+    def endeudamiento_alto(self, end):
+        MotorEvaluacionRiesgo.endeudamiento_alto._wrapped(self, end)
+
+
+def test_paridad_reglas_con_predicados():
+    """
+    Test 4: El compilador evalúa predicados P() y variables ligadas igual que experta
+    """
+    evaluador = EvaluadorCompilado(MotorConPredicados)
+    rng = random.Random(7)
+
+    for _ in range(100):
+        datos = generar_proveedor(rng)
+        motor = MotorConPredicados()
+        motor.reset()
+        motor.declare(DatosProveedor(**datos))
+        motor.run()
+
+        assert normalizar(evaluador.evaluar(datos)) == normalizar(motor.obtener_resultado())
+
+    resultado = evaluador.evaluar(dict(PROVEEDOR_EXCELENTE, liquidez_corriente=0.5))
+    assert resultado['riesgo_final'] == 'ALTO'
+    assert 'Liquidez crítica' in resultado['factores_criticos']
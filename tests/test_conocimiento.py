@@ -0,0 +1,89 @@
+"""
+Tests del evaluador compilado de la base de conocimiento
+Valida la paridad con las condiciones originales de knowledge/ y las
+optimizaciones del código generado
+"""
+
+import pytest
+
+from engine.conocimiento import EvaluadorConocimiento, evaluador_conocimiento, reglas_de_diccionario
+from benchmarks.sintetico import GeneradorProveedores
+
+
+@pytest.fixture(scope='module')
+def evaluador():
+    return evaluador_conocimiento()
+
+
+def test_paridad_con_condiciones_originales(evaluador):
+    """
+    Test 1: 2000 proveedores sintéticos dan el mismo resultado compilados que interpretados
+    """
+    for datos in GeneradorProveedores(semilla=18).proveedores(2000):
+        for nivel in ('full', 'ids', 'none'):
+            assert evaluador.evaluar(datos, nivel) == evaluador.evaluar_referencia(datos, nivel)
+
+
+@pytest.mark.parametrize('datos', [
+    {},
+    {'liquidez_corriente': 0.5},
+    {'licencias_vigentes': False, 'certificado_tributario': False, 'demandas_legales': 4},
+    {'certificaciones_calidad': ['ISO 9001', 'ISO 14001'], 'anos_operacion': 12, 'cumplimiento_entregas': 97},
+    {'calificacion_mercado': 1.0, 'incidentes_seguridad': 3, 'practicas_eticas': False},
+])
+def test_paridad_campos_ausentes(evaluador, datos):
+    """
+    Test 2: Con campos ausentes se aplica el valor por defecto de cada regla, aunque difieran entre reglas
+    """
+    assert evaluador.condiciones(datos) == tuple(regla.condicion(datos) for regla in evaluador.reglas)
+
+
+def test_codigo_generado_optimizado(evaluador):
+    """
+    Test 3: Los umbrales quedan plegados, cada campo se lee una vez y las reglas compuestas se reutilizan
+    """
+    fuente = evaluador.fuente
+    estadisticas = evaluador.estadisticas
+
+    assert 'UMBRALES' not in fuente and 'CRITERIOS' not in fuente
+    assert estadisticas['sin_compilar'] == 0
+    assert fuente.count("_get('liquidez_corriente'") == 1
+    assert estadisticas['campos_leidos'] < estadisticas['lecturas_originales']
+    assert estadisticas['condiciones_reutilizadas'] > 0
+    assert 'r_crisis_legal = r_licencias_vencidas and r_problemas_tributarios' in fuente
+
+
+def test_reglas_sin_compilar():
+    """
+    Test 4: Las condiciones que no son lambdas o usan nombres desconocidos se llaman tal cual
+    """
+    def condicion_funcion(datos):
+        return datos.get('x', 0) > 1
+
+    reglas = reglas_de_diccionario({
+        'funcion': {'condicion': condicion_funcion, 'impacto': 10, 'categoria': 'a'},
+        'lambda': {'condicion': lambda datos: datos.get('x', 0) > 1, 'impacto': 5, 'categoria': 'a'},
+        'externa': {'condicion': lambda datos: datos.get('x', 0) > UMBRAL_INEXISTENTE, 'impacto': 1,  # noqa: F821
+                    'categoria': 'b'},
+    })
+    evaluador = EvaluadorConocimiento(reglas)
+
+    assert evaluador.estadisticas['sin_compilar'] == 2
+    assert 'r_funcion = _CONDICIONES[0](datos)' in evaluador.fuente
+
+    with pytest.raises(NameError):
+        evaluador.evaluar({'x': 2})
+
+    evaluador = EvaluadorConocimiento(reglas[:2])
+    assert evaluador.evaluar({'x': 2}, 'ids')['explicaciones'] == [('funcion', 10), ('lambda', 5)]
+    assert evaluador.evaluar({'x': 2}, 'ids')['puntuacion'] == 85
+    assert evaluador.evaluar({'x': 0}, 'none')['puntuacion'] == 100
+
+
+def test_reglas_repetidas():
+    """
+    Test 5: Compilar reglas con nombres repetidos es un error
+    """
+    reglas = reglas_de_diccionario({'a': {'condicion': lambda datos: True}})
+    with pytest.raises(ValueError):
+        EvaluadorConocimiento(reglas * 2)
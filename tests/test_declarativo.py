@@ -0,0 +1,225 @@
+"""
+Tests de la base de conocimiento declarativa
+Valida la carga de reglas desde JSON y TOML, su validación y la caché en
+disco del código compilado
+"""
+
+import json
+import os
+import pickle
+import random
+import shutil
+
+import pytest
+
+from engine.conocimiento import EvaluadorConocimiento, evaluador_conocimiento, reglas_base_conocimiento
+from engine import DatosProveedor
+from engine.compilado import EVALUADOR_COMPILADO, EvaluadorCompilado
+from engine.declarativo import (
+    RUTA_BASE_DECLARADA, RUTA_REGLAS_MOTOR, cargar_evaluador, cargar_reglas, cargar_reglas_motor,
+    exportar_base_conocimiento, leer_definicion, motor_declarado, reglas_declaradas
+)
+from benchmarks.sintetico import GeneradorProveedores, generar_proveedor
+from tests.test_compilado import normalizar
+from tests.test_pool import PROVEEDOR_EXCELENTE
+
+
+REGLAS_TOML = '''
+[umbrales]
+LIQUIDEZ = { minima = 1.0 }
+DEMANDAS_MAXIMAS = 2
+
+[reglas.liquidez_baja]
+descripcion = "Liquidez por debajo del mínimo"
+condicion = "datos.get('liquidez_corriente', 0) < LIQUIDEZ['minima']"
+impacto = 25
+categoria = "financiero"
+severidad = "alto"
+
+[reglas.demandas]
+condicion = "datos.get('demandas_legales', 0) > DEMANDAS_MAXIMAS"
+impacto = 15
+categoria = "legal"
+'''
+
+
+def test_archivo_equivale_a_knowledge(tmp_path):
+    """
+    Test 1: knowledge/base_conocimiento.json es la exportación actual de los diccionarios REGLAS_*
+    """
+    exportado = tmp_path / 'base.json'
+    exportar_base_conocimiento(str(exportado))
+    with open(RUTA_BASE_DECLARADA, encoding='utf-8') as f:
+        assert f.read() == exportado.read_text(encoding='utf-8')
+
+    declarado = cargar_reglas(usar_cache=False)
+    original = evaluador_conocimiento()
+    assert declarado.fuente == original.fuente
+    assert ([r[:6] for r in declarado.reglas] == [r[:6] for r in reglas_base_conocimiento()])
+    for datos in GeneradorProveedores(semilla=19).proveedores(500):
+        assert declarado.evaluar(datos) == original.evaluar(datos)
+
+
+def test_cache_por_hash_del_contenido(tmp_path, monkeypatch):
+    """
+    Test 2: La segunda carga usa el artefacto en caché sin compilar; cambiar el archivo lo invalida
+    """
+    ruta = tmp_path / 'reglas.toml'
+    ruta.write_text(REGLAS_TOML, encoding='utf-8')
+    cache = tmp_path / 'cache'
+
+    compilado = cargar_reglas(str(ruta), str(cache))
+    assert len(os.listdir(cache)) == 1
+
+    def sin_compilar(self):
+        raise AssertionError("no debería compilar")
+
+    with monkeypatch.context() as m:
+        m.setattr(EvaluadorConocimiento, '_generar', sin_compilar)
+        cacheado = cargar_reglas(str(ruta), str(cache))
+
+    datos = {'liquidez_corriente': 0.5, 'demandas_legales': 3}
+    assert cacheado.fuente == compilado.fuente
+    assert cacheado.evaluar(datos) == compilado.evaluar(datos)
+    assert cacheado.evaluar(datos)['puntuacion'] == 60
+    assert cacheado.evaluar_referencia(datos) == compilado.evaluar(datos)
+
+    # Un umbral nuevo cambia el hash: se recompila y se sustituye el artefacto
+    ruta.write_text(REGLAS_TOML.replace('minima = 1.0', 'minima = 0.4'), encoding='utf-8')
+    actualizado = cargar_reglas(str(ruta), str(cache))
+    assert actualizado.evaluar(datos)['puntuacion'] == 85
+    assert len(os.listdir(cache)) == 1
+
+
+def test_cache_corrupta_se_recompila(tmp_path):
+    """
+    Test 3: Un artefacto ilegible se ignora y se vuelve a escribir
+    """
+    ruta = tmp_path / 'base_conocimiento.json'
+    shutil.copy(RUTA_BASE_DECLARADA, ruta)
+    cargar_reglas(str(ruta))
+    directorio = tmp_path / '__pycache__'
+    (artefacto,) = os.listdir(directorio)
+    (directorio / artefacto).write_bytes(b'basura')
+
+    evaluador = cargar_reglas(str(ruta))
+    assert evaluador.estadisticas['sin_compilar'] == 0
+    assert (directorio / artefacto).read_bytes() != b'basura'
+
+
+def test_cache_que_no_se_puede_escribir(tmp_path, monkeypatch):
+    """
+    Test 4: Si escribir el artefacto falla no quedan temporales y se compila sin caché
+    """
+    ruta = tmp_path / 'base_conocimiento.json'
+    shutil.copy(RUTA_BASE_DECLARADA, ruta)
+
+    def fallar(*args):
+        raise ValueError("unmarshallable object")
+
+    monkeypatch.setattr('engine.declarativo.marshal.dump', fallar)
+    evaluador = cargar_reglas(str(ruta))
+    assert evaluador.estadisticas['sin_compilar'] == 0
+    assert os.listdir(tmp_path / '__pycache__') == []
+
+
+@pytest.mark.parametrize('condicion', [
+    "__import__('os').system('true')",
+    "datos.__class__",
+    "open('x')",
+    "UMBRAL_DESCONOCIDO > 1",
+    "(lambda: 1)()",
+    "datos.get('x', 0) >",
+    "[x for x in datos]",
+])
+def test_condiciones_no_permitidas(condicion):
+    """
+    Test 5: Las condiciones con nombres, llamadas o construcciones fuera del lenguaje se rechazan
+    """
+    with pytest.raises(ValueError):
+        reglas_declaradas({'reglas': {'r': {'condicion': condicion, 'impacto': 1}}})
+
+
+def test_definiciones_invalidas(tmp_path):
+    """
+    Test 6: Una definición sin reglas, con campos desconocidos o en otro formato es un error
+    """
+    with pytest.raises(ValueError):
+        reglas_declaradas({'umbrales': {}})
+    with pytest.raises(ValueError):
+        reglas_declaradas({'reglas': {'r': {'condicion': 'True', 'peso': 3}}})
+    with pytest.raises(ValueError):
+        reglas_declaradas({'umbrales': {'len': 1}, 'reglas': {'r': {'condicion': 'True'}}})
+    with pytest.raises(ValueError):
+        reglas_declaradas({'reglas': {'r': {'condicion': 'True', 'impacto': '10'}}})
+
+    ruta = tmp_path / 'reglas.yaml'
+    ruta.write_text('reglas: {}', encoding='utf-8')
+    with pytest.raises(ValueError):
+        cargar_reglas(str(ruta))
+
+
+def test_reglas_del_motor_declaradas():
+    """
+    Test 7: knowledge/reglas_motor.json declara las reglas de datos del motor y evalúa igual en ambos backends
+    """
+    evaluador = cargar_reglas_motor()
+    assert isinstance(evaluador, EvaluadorCompilado) and evaluador.formato_resultado == 'motor'
+    assert [(p.codigo, p.impacto, p.alertas, p.factores) for p in evaluador.perfiles] == \
+        [(p.codigo, p.impacto, p.alertas, p.factores) for p in EVALUADOR_COMPILADO.perfiles]
+    assert len(evaluador.reglas_decision) == len(EVALUADOR_COMPILADO.reglas_decision)
+
+    rng = random.Random(11)
+    for _ in range(100):
+        datos = generar_proveedor(rng)
+        motor = evaluador.motor_cls()
+        motor.reset()
+        motor.declare(DatosProveedor(**datos))
+        motor.run()
+        assert normalizar(evaluador.evaluar(datos)) == normalizar(motor.obtener_resultado())
+
+    # A diferencia de MATCH.x & lambda, las condiciones declaradas se cumplen
+    resultado = evaluador.evaluar(dict(PROVEEDOR_EXCELENTE, liquidez_corriente=0.5))
+    assert resultado['riesgo_final'] == 'ALTO'
+    assert 'Liquidez crítica' in resultado['factores_criticos']
+
+
+def test_umbrales_del_motor_y_serializacion(tmp_path):
+    """
+    Test 8: Cambiar un umbral cambia la firma y el resultado; la clase generada se serializa con su definición
+    """
+    definicion = leer_definicion(RUTA_REGLAS_MOTOR)
+    datos = dict(PROVEEDOR_EXCELENTE, endeudamiento=0.6)
+    antes = cargar_reglas_motor()
+
+    definicion['umbrales']['ENDEUDAMIENTO_MAXIMO'] = 0.5
+    ruta = tmp_path / 'reglas_motor.json'
+    ruta.write_text(json.dumps(definicion), encoding='utf-8')
+    despues = cargar_evaluador(str(ruta))
+
+    assert despues.firma != antes.firma
+    assert despues.evaluar(datos)['puntuacion'] == antes.evaluar(datos)['puntuacion'] - 20
+    assert motor_declarado(definicion) is despues.motor_cls
+    assert pickle.loads(pickle.dumps(despues.motor_cls)) is despues.motor_cls
+    assert isinstance(cargar_evaluador(RUTA_BASE_DECLARADA, usar_cache=False), EvaluadorConocimiento)
+
+
+@pytest.mark.parametrize('regla', [
+    {'campos': {'liquidez_corriente': {'variable': 'lc', 'condicion': "__import__('os')"}}},
+    {'campos': {'liquidez_corriente': {'variable': 'lc', 'condicion': 'x < 1'}}},
+    {'campos': {'liquidez_corriente': {'variable': 'lc', 'condicion': 'lc.real < 1'}}},
+    {'campos': {'liquidez_corriente': {'condicion': 'lc < 1'}}},
+    {'campos': {'liquidez_corriente': [1]}},
+    {'campos': {}},
+    {'campos': {'cumplimiento_legal': False}, 'alertas': ['CRÍTICO']},
+    {'campos': {'cumplimiento_legal': False}, 'impacto': 2.5},
+    {'campos': {'cumplimiento_legal': False}, 'prioridad': 1},
+])
+def test_reglas_del_motor_no_validas(regla):
+    """
+    Test 9: Las reglas del formato 'motor' con condiciones o efectos fuera del lenguaje se rechazan
+    """
+    with pytest.raises(ValueError):
+        motor_declarado({'formato': 'motor', 'reglas': {'r': regla}})
+    with pytest.raises(ValueError):
+        motor_declarado({'formato': 'motor', 'reglas': {'reset': {'campos': {'cumplimiento_legal': False}}}})
@@ -0,0 +1,152 @@
+"""
+Tests de la evaluación de archivos en flujo
+Valida la lectura por bloques, la conversión de tipos, la paridad con el
+evaluador compilado y la línea de comandos
+"""
+
+import json
+
+import pandas as pd
+import pytest
+
+from engine.__main__ import main
+from engine.compilado import EVALUADOR_COMPILADO
+from engine.flujo import coercionar_bloque, evaluar_archivo, leer_bloques
+from benchmarks.sintetico import GeneradorProveedores
+
+
+def leer_jsonl(ruta):
+    with open(ruta, encoding='utf-8') as f:
+        return [json.loads(linea) for linea in f]
+
+
+@pytest.fixture(scope='module')
+def cartera(tmp_path_factory):
+    """CSV y JSONL con los mismos 3000 proveedores sintéticos"""
+    directorio = tmp_path_factory.mktemp('cartera')
+    rutas = {formato: str(directorio / f'cartera.{formato}') for formato in ('csv', 'jsonl')}
+    for ruta in rutas.values():
+        GeneradorProveedores(semilla=21).escribir(ruta, 3000, tamano_bloque=1000)
+    return rutas
+
+
+def test_paridad_con_evaluador_compilado(cartera, tmp_path):
+    """
+    Test 1: Cada fila del resultado coincide con evaluar el proveedor con el evaluador compilado
+    """
+    salida = str(tmp_path / 'resultados.jsonl')
+    estadisticas = evaluar_archivo(cartera['jsonl'], salida, tamano_bloque=700)
+    resultados = leer_jsonl(salida)
+
+    assert estadisticas['filas'] == len(resultados) == 3000
+    assert [r['fila'] for r in resultados] == list(range(3000))
+    for datos, resultado in zip(GeneradorProveedores(semilla=21).proveedores(3000, tamano_bloque=1000), resultados):
+        esperado = EVALUADOR_COMPILADO.evaluar(datos, 'ids')
+        assert resultado['riesgo_final'] == esperado['riesgo_final']
+        assert resultado['puntuacion'] == esperado['puntuacion']
+        assert resultado['recomendacion'] == esperado['recomendacion']
+        assert resultado['reglas_activadas'] == [e[0] for e in esperado['explicaciones']]
+        assert resultado['factores_criticos'] == esperado['factores_criticos']
+        assert resultado['version_reglas'] == estadisticas['version_reglas']
+
+
+def test_csv_jsonl_y_backends_equivalentes(cartera, tmp_path):
+    """
+    Test 2: La entrada CSV o JSONL y los backends vectorizado y compilado dan la misma salida
+    """
+    rutas = {}
+    for nombre, entrada, backend in [('jsonl', cartera['jsonl'], 'vectorizado'),
+                                     ('csv', cartera['csv'], 'vectorizado'),
+                                     ('compilado', cartera['csv'], 'compilado')]:
+        rutas[nombre] = str(tmp_path / f'{nombre}.jsonl')
+        evaluar_archivo(entrada, rutas[nombre], tamano_bloque=1000, backend=backend)
+
+    assert leer_jsonl(rutas['jsonl']) == leer_jsonl(rutas['csv']) == leer_jsonl(rutas['compilado'])
+
+
+def test_conversion_de_tipos():
+    """
+    Test 3: Los textos se convierten al tipo de cada campo y los valores inválidos cuentan como ausentes
+    """
+    df = pd.DataFrame({
+        'liquidez_corriente': ['0.8', '1,5', '', '2'],
+        'certificacion_calidad': ['Sí', 'false', 'quizá', None],
+        'seguros_vigentes': ['1', '0', 'TRUE', 'no'],
+        'industria': ['manufactura', None, 'Servicios', 'tecnologia'],
+        'nombre': ['a', 'b', 'c', 'd']
+    })
+    convertido = coercionar_bloque(df)
+
+    assert convertido['liquidez_corriente'].tolist()[0] == 0.8
+    assert convertido['liquidez_corriente'].isna().tolist() == [False, True, True, False]
+    assert convertido['certificacion_calidad'].tolist() == [True, False, None, None]
+    assert convertido['seguros_vigentes'].dtype == bool
+    assert convertido['seguros_vigentes'].tolist() == [True, False, True, False]
+    assert convertido['industria'].tolist() == ['manufactura', None, 'Servicios', 'tecnologia']
+    assert convertido['nombre'].tolist() == ['a', 'b', 'c', 'd']
+
+
+def test_valores_invalidos_como_campos_ausentes(tmp_path):
+    """
+    Test 4: Una fila con valores no convertibles se evalúa como si esos campos faltaran
+    """
+    entrada = tmp_path / 'proveedores.csv'
+    entrada.write_text(
+        "id,liquidez_corriente,endeudamiento,certificacion_calidad,seguros_vigentes,industria\n"
+        "007,abc,0.9,tal vez,no,manufactura\n"
+        "008,0.5,,false,sí,\n",
+        encoding='utf-8'
+    )
+    salida = tmp_path / 'resultados.csv'
+    evaluar_archivo(str(entrada), str(salida), backend='vectorizado')
+    resultados = pd.read_csv(salida, dtype=str, keep_default_na=False)
+
+    assert resultados['id'].tolist() == ['007', '008']
+    esperados = [
+        EVALUADOR_COMPILADO.evaluar({'endeudamiento': 0.9, 'seguros_vigentes': False, 'industria': 'manufactura'}),
+        EVALUADOR_COMPILADO.evaluar({'liquidez_corriente': 0.5, 'certificacion_calidad': False,
+                                     'seguros_vigentes': True}),
+    ]
+    for (_, fila), esperado in zip(resultados.iterrows(), esperados):
+        assert fila['riesgo_final'] == esperado['riesgo_final']
+        assert int(fila['puntuacion']) == esperado['puntuacion']
+        assert fila['factores_criticos'] == '|'.join(esperado['factores_criticos'])
+
+
+def test_linea_de_comandos(cartera, tmp_path, capsys):
+    """
+    Test 5: python -m engine evaluate escribe los resultados e informa filas/s; los errores devuelven 1
+    """
+    salida = tmp_path / 'resultados.csv'
+    assert main(['evaluate', cartera['jsonl'], str(salida), '--tamano-bloque', '500']) == 0
+    assert 'filas/s' in capsys.readouterr().err
+    assert len(pd.read_csv(salida)) == 3000
+
+    erronea = tmp_path / 'erronea.jsonl'
+    erronea.write_text('{"liquidez_corriente": 1.2}\n[1, 2]\n', encoding='utf-8')
+    assert main(['evaluar', str(erronea), str(tmp_path / 'x.jsonl'), '--silencioso']) == 1
+    assert 'Línea 2' in capsys.readouterr().err
+
+    with pytest.raises(ValueError):
+        list(leer_bloques(str(erronea), 'jsonl', tamano_bloque=0))
+
+
+def test_csv_con_identificadores_variables(tmp_path):
+    """
+    Test 6: Si las columnas de identificación cambian entre bloques, las filas del CSV siguen cuadrando con la cabecera
+    """
+    entrada = tmp_path / 'proveedores.jsonl'
+    entrada.write_text(
+        '{"id": "A", "nombre": "Acme", "seguros_vigentes": false}\n'
+        '{"id": "B", "cumplimiento_legal": false}\n'
+        '{"nombre": "Otro", "id_proveedor": "X-1"}\n',
+        encoding='utf-8'
+    )
+    salida = tmp_path / 'resultados.csv'
+    evaluar_archivo(str(entrada), str(salida), tamano_bloque=1)
+
+    resultados = pd.read_csv(salida, keep_default_na=False)
+    assert list(resultados.columns[:3]) == ['fila', 'id', 'nombre']
+    assert resultados[['id', 'nombre']].values.tolist() == [['A', 'Acme'], ['B', ''], ['', 'Otro']]
+    assert set(resultados['riesgo_final']) <= {'BAJO', 'MEDIO', 'ALTO'}
+    assert resultados['version_reglas'].nunique() == 1
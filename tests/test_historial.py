@@ -0,0 +1,119 @@
+"""
+Tests del historial persistente de evaluaciones
+Valida que las evaluaciones sueltas y por lotes se guardan con sus datos,
+versión de reglas y reglas activadas, y que las consultas usan los índices
+"""
+
+import json
+
+import pytest
+
+from engine import evaluar_proveedor
+from engine.__main__ import main
+from engine.compilado import EVALUADOR_COMPILADO
+from engine.flujo import evaluar_archivo
+from engine.historial import HistorialEvaluaciones
+from engine.registro import registro_reglas
+from tests.test_pool import PROVEEDOR_EXCELENTE, PROVEEDOR_RIESGOSO
+
+
+@pytest.fixture
+def historial(tmp_path):
+    with HistorialEvaluaciones(str(tmp_path / 'historial.sqlite3')) as historial:
+        yield historial
+
+
+def test_registrar_y_consultar_proveedor(historial):
+    """
+    Test 1: Una evaluación suelta se guarda con sus datos y se recupera la más reciente primero
+    """
+    historial.registrar(evaluar_proveedor(PROVEEDOR_RIESGOSO), dict(PROVEEDOR_RIESGOSO, nombre='Acme'),
+                        fecha='2026-01-10T09:00:00')
+    historial.registrar(EVALUADOR_COMPILADO.evaluar(PROVEEDOR_EXCELENTE, 'ids'), PROVEEDOR_EXCELENTE,
+                        id_proveedor='Acme', fecha='2026-02-01T09:00:00')
+    historial.registrar(evaluar_proveedor(PROVEEDOR_EXCELENTE), dict(PROVEEDOR_EXCELENTE, nombre='Otro'))
+
+    evaluaciones = historial.historial_proveedor('Acme')
+    assert [e['fecha'] for e in evaluaciones] == ['2026-02-01T09:00:00', '2026-01-10T09:00:00']
+
+    reciente, antigua = evaluaciones
+    esperado = evaluar_proveedor(PROVEEDOR_RIESGOSO)
+    assert antigua['riesgo_final'] == esperado['riesgo_final']
+    assert antigua['puntuacion'] == esperado['puntuacion']
+    assert antigua['reglas_activadas'] == [e['regla'].split(':')[0] for e in esperado['explicaciones']]
+    assert antigua['version_reglas'] == registro_reglas().actual.id == EVALUADOR_COMPILADO.firma[:16]
+    assert antigua['origen'] == 'app'
+    assert antigua['datos'] == {k: v for k, v in PROVEEDOR_RIESGOSO.items() if k in antigua['datos']}
+    assert antigua['datos']['seguros_vigentes'] is False
+    assert reciente['riesgo_final'] == 'BAJO'
+    assert historial.contar() == 3
+
+
+def test_lote_con_historial(tmp_path, historial):
+    """
+    Test 2: evaluar_archivo guarda cada fila del lote con los mismos resultados que la salida
+    """
+    entrada = tmp_path / 'proveedores.csv'
+    entrada.write_text(
+        "id,liquidez_corriente,certificacion_calidad,seguros_vigentes,cumplimiento_legal,industria\n"
+        "A-1,0.8,false,no,true,manufactura\n"
+        "A-2,,sí,,false,\n"
+        "A-3,abc,true,true,true,servicios\n",
+        encoding='utf-8'
+    )
+    salida = tmp_path / 'resultados.jsonl'
+    estadisticas = evaluar_archivo(str(entrada), str(salida), tamano_bloque=2, historial=historial)
+    with open(salida, encoding='utf-8') as f:
+        resultados = {r['id']: r for r in map(json.loads, f)}
+
+    assert historial.contar() == 3
+    for id_proveedor, resultado in resultados.items():
+        (guardada,) = historial.historial_proveedor(id_proveedor)
+        assert guardada['riesgo_final'] == resultado['riesgo_final']
+        assert guardada['puntuacion'] == resultado['puntuacion']
+        assert guardada['reglas_activadas'] == resultado['reglas_activadas']
+        assert guardada['version_reglas'] == estadisticas['version_reglas']
+        assert guardada['origen'] == str(entrada)
+
+    # Los valores vacíos o no convertibles quedan como ausentes
+    assert historial.historial_proveedor('A-2')[0]['datos'] == {'certificacion_calidad': True,
+                                                                 'cumplimiento_legal': False}
+    assert historial.historial_proveedor('A-3')[0]['datos'] == {
+        'certificacion_calidad': True, 'seguros_vigentes': True, 'cumplimiento_legal': True, 'industria': 'servicios'
+    }
+    assert len({e['fecha'] for e in historial.consultar()}) == 1
+    assert [e['id_proveedor'] for e in historial.consultar(riesgo='ALTO')] == \
+        [i for i in ('A-3', 'A-2', 'A-1') if resultados[i]['riesgo_final'] == 'ALTO']
+
+
+def test_wal_e_indices(historial):
+    """
+    Test 3: La base está en modo WAL y las consultas por proveedor, fecha y riesgo usan índices
+    """
+    conexion = historial._conexion
+    assert conexion.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+
+    consultas = {
+        'idx_evaluaciones_proveedor': "SELECT * FROM evaluaciones WHERE id_proveedor = 'x' ORDER BY fecha DESC",
+        'idx_evaluaciones_fecha': "SELECT * FROM evaluaciones WHERE fecha >= '2026-01-01' AND fecha < '2026-02-01'",
+        'idx_evaluaciones_riesgo': "SELECT * FROM evaluaciones WHERE riesgo_final = 'ALTO' ORDER BY fecha DESC",
+    }
+    for indice, sql in consultas.items():
+        plan = ' '.join(str(fila) for fila in conexion.execute('EXPLAIN QUERY PLAN ' + sql))
+        assert indice in plan
+
+
+def test_linea_de_comandos_historial(tmp_path):
+    """
+    Test 4: python -m engine evaluar --historial crea la base y guarda todas las filas
+    """
+    entrada = tmp_path / 'proveedores.jsonl'
+    entrada.write_text(
+        '{"id": 1, "seguros_vigentes": false}\n{"id": 2, "cumplimiento_legal": false}\n', encoding='utf-8'
+    )
+    base = str(tmp_path / 'historial.sqlite3')
+    assert main(['evaluar', str(entrada), str(tmp_path / 'r.csv'), '--historial', base, '--silencioso']) == 0
+
+    with HistorialEvaluaciones(base) as historial:
+        assert historial.contar() == 2
+        assert historial.historial_proveedor('2')[0]['reglas_activadas'] == ['RL-001']
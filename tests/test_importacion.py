@@ -0,0 +1,105 @@
+"""
+Tests del tiempo y alcance de las importaciones
+Comprueba en intérpretes nuevos que la ruta de puntuación no carga pandas,
+plotly, streamlit ni NumPy, y que el resto de nombres se carga bajo demanda
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PESADOS = ('pandas', 'plotly', 'streamlit', 'numpy')
+
+
+def ejecutar(codigo):
+    """Ejecuta código en un intérprete nuevo y devuelve lo que imprime como JSON"""
+    salida = subprocess.run([sys.executable, '-c', 'import fix_collections\n' + codigo],
+                            cwd=RAIZ, check=True, capture_output=True, text=True)
+    return json.loads(salida.stdout.strip().splitlines()[-1])
+
+
+def cargados(*prefijos):
+    """Código que imprime los paquetes de nivel superior cargados de entre los indicados"""
+    return (
+        "import sys, json\n"
+        f"print(json.dumps(sorted({{m.split('.')[0] for m in sys.modules}} & set({list(prefijos)!r}))))"
+    )
+
+
+def test_puntuacion_sin_dependencias_pesadas():
+    """
+    Test 1: Importar engine y evaluar un proveedor no carga pandas, plotly, streamlit ni NumPy
+    """
+    codigo = (
+        "import engine\n"
+        "from tests.test_pool import PROVEEDOR_RIESGOSO\n"
+        "assert engine.evaluar_proveedor(PROVEEDOR_RIESGOSO)['riesgo_final'] == 'ALTO'\n"
+        + cargados(*PESADOS)
+    )
+    assert ejecutar(codigo) == []
+
+
+def test_modulos_perezosos():
+    """
+    Test 2: Los nombres del paquete se cargan al usarlos y siguen disponibles con from-import
+    """
+    codigo = (
+        "import sys, json, engine\n"
+        "antes = 'engine.explicador' in sys.modules\n"
+        "from engine import ExplicadorDecisiones, evaluar_dataframe\n"
+        "print(json.dumps([antes, 'engine.explicador' in sys.modules, 'pandas' in sys.modules,\n"
+        "                  sorted(set(engine.__all__) - set(dir(engine)))]))"
+    )
+    assert ejecutar(codigo) == [False, True, True, []]
+
+    import engine
+    with pytest.raises(AttributeError):
+        engine.no_existe
+
+
+def test_explicador_sin_pandas():
+    """
+    Test 3: El resumen y el plan de mitigación no necesitan pandas
+    """
+    codigo = (
+        "from engine import ExplicadorDecisiones, evaluar_proveedor\n"
+        "from tests.test_pool import PROVEEDOR_RIESGOSO\n"
+        "resultado = evaluar_proveedor(PROVEEDOR_RIESGOSO)\n"
+        "ExplicadorDecisiones.generar_resumen_ejecutivo(resultado)\n"
+        "ExplicadorDecisiones.generar_plan_mitigacion(resultado)\n"
+        + cargados('pandas')
+    )
+    assert ejecutar(codigo) == []
+
+
+def test_knowledge_carga_por_modulo():
+    """
+    Test 4: Importar un nombre de knowledge solo carga su módulo de reglas
+    """
+    codigo = (
+        "import sys, json\n"
+        "from knowledge import INDUSTRIAS\n"
+        "print(json.dumps(sorted(m for m in sys.modules if m.startswith('knowledge.'))))"
+    )
+    assert ejecutar(codigo) == ['knowledge.reglas_operacionales']
+
+
+def test_tiempo_de_importacion():
+    """
+    Test 5: import engine se mantiene por debajo de un presupuesto holgado
+    """
+    codigo = (
+        "import time, json\n"
+        "inicio = time.perf_counter()\n"
+        "import engine\n"
+        "print(json.dumps(time.perf_counter() - inicio))"
+    )
+    tiempos = [ejecutar(codigo) for _ in range(3)]
+    # Con pandas cargado de forma ansiosa la importación tardaba más de 0.3 s
+    assert min(tiempos) < 0.25
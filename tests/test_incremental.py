@@ -0,0 +1,211 @@
+"""
+Tests de la reevaluación incremental de la cartera
+Valida que solo se evalúan los proveedores cuya huella cambió, que la salida
+es la misma que al evaluar toda la cartera y que un cambio de reglas lo
+reevalúa todo
+"""
+
+import json
+import os
+
+import numpy as np
+import pytest
+
+from engine.__main__ import main
+from engine.binario import AUSENTE, DTYPE_PROVEEDOR, convertir_binario
+from engine.compilado import EVALUADOR_COMPILADO
+from engine.flujo import TIPOS_CAMPOS, evaluar_archivo
+from engine.historial import HistorialEvaluaciones
+from engine.incremental import (EstadoIncremental, campos_huella, huellas_registros, reevaluar_archivo,
+                                semilla_huella)
+from engine.registro import VersionReglas, registro_reglas
+from benchmarks.sintetico import GeneradorProveedores
+from tests.test_binario import proveedores_con_ausentes
+
+
+def escribir_jsonl(ruta, proveedores):
+    with open(ruta, 'w', encoding='utf-8') as f:
+        for datos in proveedores:
+            f.write(json.dumps(datos, ensure_ascii=False) + '\n')
+    return str(ruta)
+
+
+def cartera_con_ids(n, semilla):
+    proveedores = proveedores_con_ausentes(n, semilla)
+    for i, datos in enumerate(proveedores):
+        datos['id'] = f'P-{i:04d}'
+    return proveedores
+
+
+def leer(ruta):
+    with open(ruta, encoding='utf-8') as f:
+        return f.read()
+
+
+def test_solo_evalua_los_cambios(tmp_path):
+    """
+    Test 1: Tras cambiar, mover, añadir y retirar proveedores solo se evalúan los cambiados y los nuevos
+    """
+    version = registro_reglas().fijar()
+    proveedores = cartera_con_ids(600, semilla=25)
+    entrada = escribir_jsonl(tmp_path / 'dia1.jsonl', proveedores)
+    estado = str(tmp_path / 'estado')
+
+    r = reevaluar_archivo(entrada, str(tmp_path / 'r1.jsonl'), estado, tamano_bloque=250, version=version)
+    assert (r['filas'], r['evaluadas'], r['nuevas'], r['reutilizadas']) == (600, 600, 600, 0)
+    evaluar_archivo(entrada, str(tmp_path / 'ref1.jsonl'), tamano_bloque=250, version=version)
+    assert leer(tmp_path / 'r1.jsonl') == leer(tmp_path / 'ref1.jsonl')
+
+    nuevos = [dict(datos) for datos in proveedores]
+    nuevos[5]['liquidez_corriente'] = -1.25
+    nuevos[77]['seguros_vigentes'] = not nuevos[77].get('seguros_vigentes', True)
+    if 'industria' in nuevos[300]:
+        del nuevos[300]['industria']
+    else:
+        nuevos[300]['industria'] = 'servicios'
+    # Un campo que no lee ninguna regla no obliga a evaluar (pero sí se ve en la salida)
+    nuevos[10]['nombre'] = 'Renombrado'
+    nuevos[200], nuevos[201] = nuevos[201], nuevos[200]
+    del nuevos[400]
+    nuevos.insert(0, {'id': 'P-NUEVO', 'liquidez_corriente': 0.3})
+    entrada = escribir_jsonl(tmp_path / 'dia2.jsonl', nuevos)
+
+    r = reevaluar_archivo(entrada, str(tmp_path / 'r2.jsonl'), estado, tamano_bloque=170, version=version)
+    assert (r['filas'], r['evaluadas'], r['nuevas'], r['reutilizadas']) == (600, 4, 1, 596)
+    evaluar_archivo(entrada, str(tmp_path / 'ref2.jsonl'), tamano_bloque=170, version=version)
+    assert leer(tmp_path / 'r2.jsonl') == leer(tmp_path / 'ref2.jsonl')
+    assert '"nombre": "Renombrado"' in leer(tmp_path / 'r2.jsonl')
+
+    # Sin cambios no se evalúa nada, también con salida por columnas
+    r = reevaluar_archivo(entrada, str(tmp_path / 'r3.npz'), estado, version=version)
+    assert (r['evaluadas'], r['reutilizadas']) == (0, 600)
+
+    # El archivo binario guarda los id: la cartera del primer día se reconoce por id, no por posición
+    binario = str(tmp_path / 'dia1.prov')
+    convertir_binario(str(tmp_path / 'dia1.jsonl'), binario)
+    r = reevaluar_archivo(binario, str(tmp_path / 'r4.jsonl'), estado, tamano_bloque=170, version=version)
+    assert (r['filas'], r['evaluadas'], r['nuevas']) == (600, 4, 1)
+    assert leer(tmp_path / 'r4.jsonl') == leer(tmp_path / 'ref1.jsonl')
+
+
+def test_huellas(tmp_path):
+    """
+    Test 2: Cambiar un solo campo cambia la huella; el mismo proveedor en CSV o binario tiene la misma huella
+    """
+    version = registro_reglas().fijar()
+    campos = campos_huella(EVALUADOR_COMPILADO)
+    semilla = semilla_huella(version, campos)
+    assert set(campos) <= set(TIPOS_CAMPOS)
+
+    base = np.zeros(1, dtype=DTYPE_PROVEEDOR)
+    variantes = [base]
+    for campo in campos:
+        for valor in ((1.5, np.nan) if TIPOS_CAMPOS[campo] == 'numero' else (1, AUSENTE)):
+            variante = base.copy()
+            variante[campo] = valor
+            variantes.append(variante)
+    registros = np.concatenate(variantes)
+    industrias = ['manufactura', 'servicios']
+    huellas = huellas_registros(registros, industrias, campos, semilla)
+    assert len(set(huellas.tolist())) == len(registros)
+
+    # -0.0 es 0.0 para las reglas; otra versión de reglas da otras huellas
+    negativo = base.copy()
+    negativo['liquidez_corriente'] = -0.0
+    assert huellas_registros(negativo, industrias, campos, semilla)[0] == huellas[0]
+    otra = VersionReglas(2, 'f' * 64, EVALUADOR_COMPILADO, 'test', '')
+    assert huellas_registros(base, industrias, campos, semilla_huella(otra, campos))[0] != huellas[0]
+
+    csv = str(tmp_path / 'cartera.csv')
+    binario = str(tmp_path / 'cartera.prov')
+    GeneradorProveedores(semilla=26).escribir(csv, 1200)
+    convertir_binario(csv, binario)
+    estado = str(tmp_path / 'estado')
+    assert reevaluar_archivo(csv, str(tmp_path / 'csv.jsonl'), estado, tamano_bloque=500)['evaluadas'] == 1200
+    r = reevaluar_archivo(binario, str(tmp_path / 'binario.jsonl'), estado, tamano_bloque=700)
+    assert (r['evaluadas'], r['reutilizadas']) == (0, 1200)
+    assert leer(tmp_path / 'csv.jsonl') == leer(tmp_path / 'binario.jsonl')
+
+
+def test_solo_cambios_historial_y_version(tmp_path):
+    """
+    Test 3: solo_cambios escribe los evaluados, el historial guarda solo esos y otra versión lo reevalúa todo
+    """
+    version = registro_reglas().fijar()
+    proveedores = cartera_con_ids(200, semilla=27)
+    estado = str(tmp_path / 'estado')
+    salida = str(tmp_path / 'cambios.jsonl')
+    with HistorialEvaluaciones(str(tmp_path / 'historial.sqlite3')) as historial:
+        entrada = escribir_jsonl(tmp_path / 'dia1.jsonl', proveedores)
+        reevaluar_archivo(entrada, salida, estado, backend='compilado', version=version, historial=historial)
+        assert historial.contar() == 200
+
+        proveedores[3]['tasa_defectos'] = 0.777
+        proveedores[150]['cumplimiento_legal'] = not proveedores[150].get('cumplimiento_legal', True)
+        entrada = escribir_jsonl(tmp_path / 'dia2.jsonl', proveedores)
+        r = reevaluar_archivo(entrada, salida, estado, backend='compilado', version=version,
+                              historial=historial, solo_cambios=True)
+        escritos = [json.loads(linea) for linea in leer(salida).splitlines()]
+        assert r['evaluadas'] == 2 and [e['id'] for e in escritos] == ['P-0003', 'P-0150']
+        assert [e['fila'] for e in escritos] == [3, 150]
+        assert historial.contar() == 202
+        (ultima, _) = historial.historial_proveedor('P-0150')
+        assert ultima['datos']['cumplimiento_legal'] == proveedores[150]['cumplimiento_legal']
+        assert escritos[1]['reglas_activadas'] == ultima['reglas_activadas']
+
+    otra = VersionReglas(2, 'f' * 64, EVALUADOR_COMPILADO, 'test', '')
+    r = reevaluar_archivo(entrada, salida, estado, version=otra, solo_cambios=True)
+    assert r['evaluadas'] == 200
+    assert {json.loads(linea)['version_reglas'] for linea in leer(salida).splitlines()} == {'ffffffffffffffff'}
+
+
+def test_linea_de_comandos_incremental(tmp_path, capsys):
+    """
+    Test 4: python -m engine evaluar --incremental guarda el estado y lo reutiliza en la siguiente ejecución
+    """
+    entrada = escribir_jsonl(tmp_path / 'cartera.jsonl', cartera_con_ids(50, semilla=28))
+    estado = str(tmp_path / 'estado')
+    argumentos = ['evaluar', entrada, str(tmp_path / 'r.csv'), '--incremental', estado]
+    assert main(argumentos) == 0
+    assert '50 evaluados (50 nuevos), 0 sin cambios' in capsys.readouterr().err
+    assert main(argumentos + ['--solo-cambios']) == 0
+    assert '0 evaluados (0 nuevos), 50 sin cambios' in capsys.readouterr().err
+    assert leer(tmp_path / 'r.csv') == ''
+
+    with pytest.raises(SystemExit):
+        main(['evaluar', entrada, str(tmp_path / 'r.csv'), '--solo-cambios'])
+    (tmp_path / 'roto').write_bytes(b'no es un directorio de estado')
+    assert main(['evaluar', entrada, str(tmp_path / 'r.csv'), '--incremental', str(tmp_path / 'roto'),
+                 '--silencioso']) == 1
+    assert 'no es un estado' in capsys.readouterr().err
+
+
+def test_estado_en_disco(tmp_path):
+    """
+    Test 5: El estado se proyecta en memoria, cada ejecución deja una sola generación de archivos
+    y una ejecución interrumpida conserva el estado anterior
+    """
+    version = registro_reglas().fijar()
+    entrada = escribir_jsonl(tmp_path / 'cartera.jsonl', cartera_con_ids(300, semilla=29))
+    estado = str(tmp_path / 'estado')
+    archivos = ['claves-2.npy', 'estado.json', 'huellas-2.npy', 'reglas-2.npy']
+    for _ in range(2):
+        reevaluar_archivo(entrada, str(tmp_path / 'r.jsonl'), estado, tamano_bloque=100, version=version)
+    assert sorted(os.listdir(estado)) == archivos
+
+    cargado = EstadoIncremental.cargar(estado, version)
+    assert len(cargado) == 300 and cargado.generacion == 2
+    assert all(isinstance(c, np.memmap) for c in (cargado.claves, cargado.huellas, cargado.reglas))
+    assert cargado.reglas.shape == (300, (len(version.evaluador.perfiles) + 7) // 8)
+    del cargado
+
+    def interrumpir(filas, segundos):
+        if filas > 100:
+            raise RuntimeError("interrumpido")
+
+    with pytest.raises(RuntimeError):
+        reevaluar_archivo(entrada, str(tmp_path / 'r.jsonl'), estado, tamano_bloque=100, version=version,
+                          progreso=interrumpir)
+    assert sorted(os.listdir(estado)) == archivos
+    r = reevaluar_archivo(entrada, str(tmp_path / 'r.jsonl'), estado, tamano_bloque=100, version=version)
+    assert (r['evaluadas'], r['reutilizadas']) == (0, 300)
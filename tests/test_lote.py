@@ -0,0 +1,99 @@
+"""
+Tests de evaluación por lotes
+Valida que evaluar_lote produzca los mismos resultados que evaluar_proveedor
+"""
+
+import pytest
+from engine import evaluar_proveedor, evaluar_lote, evaluar_lote_paralelo
+from tests.test_pool import PROVEEDOR_RIESGOSO, PROVEEDOR_EXCELENTE
+
+
+def _sin_timestamp(resultado):
+    """Quita la hora de las explicaciones para comparar resultados"""
+    copia = dict(resultado)
+    copia['explicaciones'] = [
+        {k: v for k, v in exp.items() if k != 'timestamp'}
+        for exp in resultado['explicaciones']
+    ]
+    return copia
+
+
+def test_lote_igual_a_evaluaciones_individuales():
+    """
+    Test 1: Cada resultado del lote coincide con evaluar_proveedor, en orden
+    """
+    proveedores = [PROVEEDOR_RIESGOSO, PROVEEDOR_EXCELENTE] * 3
+
+    resultados = list(evaluar_lote(proveedores))
+
+    assert len(resultados) == len(proveedores)
+    for datos, resultado in zip(proveedores, resultados):
+        esperado = evaluar_proveedor(datos)
+        assert _sin_timestamp(resultado) == _sin_timestamp(esperado)
+
+
+def test_lote_es_perezoso():
+    """
+    Test 2: El lote consume la entrada a medida que se piden resultados
+    """
+    consumidos = []
+
+    def generador():
+        for i in range(1000):
+            consumidos.append(i)
+            yield PROVEEDOR_EXCELENTE
+
+    resultados = evaluar_lote(generador())
+    primero = next(resultados)
+    resultados.close()
+
+    assert primero['riesgo_final'] == 'BAJO'
+    assert len(consumidos) == 1
+
+
+def test_lote_continua_tras_errores():
+    """
+    Test 3: Una fila inválida produce un resultado ERROR sin detener el lote
+    """
+    proveedores = [PROVEEDOR_EXCELENTE, None, PROVEEDOR_RIESGOSO]
+
+    resultados = list(evaluar_lote(proveedores))
+
+    assert [r['riesgo_final'] for r in resultados] == ['BAJO', 'ERROR', 'ALTO']
+    assert resultados[1]['factores_criticos'] == ['Error de ejecución']
+    assert resultados[1]['alertas'][0]['nivel'] == 'CRÍTICO'
+
+
+def test_lote_vacio():
+    """
+    Test 4: Un iterable vacío no produce resultados
+    """
+    assert list(evaluar_lote([])) == []
+
+
+def test_lote_paralelo_conserva_orden():
+    """
+    Test 5: El modo multiproceso devuelve los mismos resultados en el mismo orden
+    """
+    proveedores = [PROVEEDOR_RIESGOSO, PROVEEDOR_EXCELENTE, None] * 7
+
+    secuencial = list(evaluar_lote(proveedores))
+    paralelo = list(evaluar_lote_paralelo(proveedores, procesos=2, tamano_bloque=4))
+
+    assert [_sin_timestamp(r) for r in paralelo] == [_sin_timestamp(r) for r in secuencial]
+
+
+def test_lote_paralelo_tamano_bloque_invalido():
+    """
+    Test 6: Un tamaño de bloque menor a 1 se rechaza
+    """
+    with pytest.raises(ValueError):
+        list(evaluar_lote_paralelo([PROVEEDOR_EXCELENTE], procesos=2, tamano_bloque=0))
+
+
+def test_lote_paralelo_nivel_invalido():
+    """
+    Test 7: Un nivel de explicación no válido se rechaza antes de arrancar los procesos
+    """
+    with pytest.raises(ValueError):
+        list(evaluar_lote_paralelo([PROVEEDOR_EXCELENTE], procesos=2, nivel_explicacion='bogus'))
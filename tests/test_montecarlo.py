@@ -0,0 +1,76 @@
+"""
+Tests de la simulación Monte Carlo
+Valida la clasificación vectorizada de las muestras contra el evaluador compilado
+"""
+
+import numpy as np
+import pytest
+
+from engine import simular_proveedor
+from engine.compilado import EvaluadorCompilado
+from engine.montecarlo import DISTRIBUCIONES_DEFECTO, muestrear_proveedor
+from tests.test_compilado import MotorConPredicados
+from tests.test_pool import PROVEEDOR_EXCELENTE
+
+
+PROVEEDOR_FRONTERA = dict(PROVEEDOR_EXCELENTE, liquidez_corriente=1.1, endeudamiento=0.68)
+
+
+def test_muestras_coinciden_con_evaluador():
+    """
+    Test 1: Cada muestra recibe la misma puntuación que evaluándola por separado
+    """
+    evaluador = EvaluadorCompilado(MotorConPredicados)
+    muestras = muestrear_proveedor(PROVEEDOR_FRONTERA, 400, semilla=3)
+    simulacion = simular_proveedor(PROVEEDOR_FRONTERA, 400, semilla=3, evaluador=evaluador)
+
+    riesgos = []
+    for i in range(400):
+        datos = dict(PROVEEDOR_FRONTERA, **{campo: float(v[i]) for campo, v in muestras.items()})
+        resultado = evaluador.evaluar(datos)
+        assert resultado['puntuacion'] == simulacion['puntuaciones'][i]
+        riesgos.append(resultado['riesgo_final'])
+
+    for nivel, probabilidad in simulacion['probabilidades'].items():
+        assert probabilidad == pytest.approx(riesgos.count(nivel) / 400)
+
+
+def test_sin_incertidumbre_reproduce_resultado_base():
+    """
+    Test 2: Con desviación cero todas las muestras dan el resultado sin perturbar
+    """
+    distribuciones = {'liquidez_corriente': {'tipo': 'normal', 'desviacion': 0.0}}
+    simulacion = simular_proveedor(PROVEEDOR_FRONTERA, 1000, distribuciones,
+                                   evaluador=EvaluadorCompilado(MotorConPredicados))
+
+    assert simulacion['probabilidades'][simulacion['riesgo_base']] == 1.0
+    assert np.all(simulacion['puntuaciones'] == simulacion['puntuacion_base'])
+
+
+def test_cien_mil_muestras_y_semilla():
+    """
+    Test 3: 100.000 muestras en una pasada, reproducibles con la misma semilla
+    """
+    evaluador = EvaluadorCompilado(MotorConPredicados)
+    primera = simular_proveedor(PROVEEDOR_FRONTERA, 100_000, semilla=7, evaluador=evaluador)
+    segunda = simular_proveedor(PROVEEDOR_FRONTERA, 100_000, semilla=7, evaluador=evaluador)
+
+    assert len(primera['puntuaciones']) == 100_000
+    assert sum(primera['probabilidades'].values()) == pytest.approx(1.0)
+    assert 0 < primera['probabilidades']['ALTO'] < 1
+    assert np.array_equal(primera['puntuaciones'], segunda['puntuaciones'])
+    assert sum(primera['distribucion_puntuacion'].values()) == pytest.approx(1.0)
+
+
+def test_campos_sin_efecto_dan_resultado_seguro():
+    """
+    Test 4: Si las reglas de los campos perturbados no pueden activarse, el resultado es seguro
+    """
+    simulacion = simular_proveedor(PROVEEDOR_FRONTERA, 1000, semilla=1)
+    assert simulacion['campos_sin_efecto'] == list(DISTRIBUCIONES_DEFECTO)
+    assert simulacion['probabilidades'][simulacion['riesgo_base']] == 1.0
+
+    simulacion = simular_proveedor(PROVEEDOR_FRONTERA, 1000, semilla=1,
+                                   evaluador=EvaluadorCompilado(MotorConPredicados))
+    assert 'liquidez_corriente' not in simulacion['campos_sin_efecto']
+    assert 'endeudamiento' not in simulacion['campos_sin_efecto']
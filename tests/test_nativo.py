@@ -0,0 +1,186 @@
+"""
+Tests del motor de encadenamiento hacia adelante nativo
+Valida la paridad con experta, la resolución de conflictos, la agenda
+incremental y las validaciones de los hechos
+"""
+
+import json
+import os
+import random
+import subprocess
+import sys
+
+import pytest
+
+from engine import MotorEvaluacionRiesgo, DatosProveedor
+from engine.nativo import KnowledgeEngine, Fact, Rule, MATCH, OR, NOT, P
+from tests.test_compilado import normalizar, MotorConPredicados
+from benchmarks.sintetico import generar_proveedor
+
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def evaluar_normalizados(motor_cls, proveedores):
+    """Evalúa proveedores con un motor de la clase indicada y normaliza los resultados"""
+    motor = motor_cls()
+    resultados = []
+    for datos in proveedores:
+        motor.reset()
+        motor.declare(DatosProveedor(**datos))
+        motor.run()
+        resultados.append(normalizar(motor.obtener_resultado()))
+    return json.loads(json.dumps(resultados))
+
+
+def evaluar_con_experta(motor, proveedores):
+    """Lo mismo que evaluar_normalizados en un intérprete nuevo con MOTOR_INFERENCIA=experta"""
+    codigo = (
+        "import json, sys\n"
+        "from engine.reglas import MOTOR_INFERENCIA\n"
+        "from tests.test_nativo import evaluar_normalizados\n"
+        "from tests.test_compilado import MotorConPredicados\n"
+        "from engine import MotorEvaluacionRiesgo\n"
+        "assert MOTOR_INFERENCIA == 'experta'\n"
+        f"print(json.dumps(evaluar_normalizados({motor}, json.load(sys.stdin))))"
+    )
+    entorno = dict(os.environ, MOTOR_INFERENCIA='experta')
+    salida = subprocess.run([sys.executable, '-c', codigo], input=json.dumps(proveedores),
+                            cwd=RAIZ, env=entorno, check=True, capture_output=True, text=True)
+    return json.loads(salida.stdout.strip().splitlines()[-1])
+
+
+def test_paridad_con_experta():
+    """
+    Test 1: 200 proveedores aleatorios dan el mismo resultado con el motor nativo y con experta
+    """
+    rng = random.Random(17)
+    proveedores = [generar_proveedor(rng) for _ in range(200)]
+
+    assert (evaluar_normalizados(MotorEvaluacionRiesgo, proveedores)
+            == evaluar_con_experta('MotorEvaluacionRiesgo', proveedores))
+
+
+def test_paridad_con_predicados():
+    """
+    Test 2: Las reglas con P() y variables ligadas se disparan igual que en experta
+    """
+    rng = random.Random(18)
+    proveedores = [generar_proveedor(rng) for _ in range(60)]
+
+    assert (evaluar_normalizados(MotorConPredicados, proveedores)
+            == evaluar_con_experta('MotorConPredicados', proveedores))
+
+
+class Pedido(Fact):
+    pass
+
+
+class Stock(Fact):
+    pass
+
+
+class MotorPrueba(KnowledgeEngine):
+    def __init__(self):
+        super().__init__()
+        self.disparos = []
+
+    @Rule(Pedido(id=MATCH.id), salience=10)
+    def urgente(self, id):
+        self.disparos.append(('urgente', id))
+
+    @Rule(Pedido(id=MATCH.id))
+    def normal(self, id):
+        self.disparos.append(('normal', id))
+
+    @Rule(Pedido(producto=MATCH.p), Stock(producto=MATCH.p, unidades=P(lambda u: u > 0)))
+    def servir(self, p):
+        self.disparos.append(('servir', p))
+
+    @Rule(NOT(Stock()))
+    def sin_stock(self):
+        self.disparos.append(('sin_stock', None))
+
+    @Rule(OR(Pedido(id=1), Pedido(id=2)))
+    def prioritario(self):
+        self.disparos.append(('prioritario', None))
+
+
+def test_resolucion_de_conflictos():
+    """
+    Test 3: Se disparan primero las reglas de mayor salience y, a igualdad, los hechos más recientes
+    """
+    motor = MotorPrueba()
+    motor.reset()
+    motor.declare(Pedido(id=1, producto='a'))
+    motor.declare(Pedido(id=2, producto='b'))
+    motor.run()
+
+    assert motor.disparos[:2] == [('urgente', 2), ('urgente', 1)]
+    normales = [d for d in motor.disparos if d[0] == 'normal']
+    assert normales == [('normal', 2), ('normal', 1)]
+    assert motor.disparos.count(('prioritario', None)) == 2
+    assert motor.disparos.count(('sin_stock', None)) == 1
+
+
+def test_activaciones_incrementales():
+    """
+    Test 4: Declarar, modificar y retirar hechos informa las activaciones que aparecen y desaparecen
+    """
+    motor = MotorPrueba()
+    motor.reset()
+    pedido = motor.declare(Pedido(id=3, producto='a'))
+    motor.running = True
+    motor.get_activations()
+
+    stock = motor.declare(Stock(producto='a', unidades=0))
+    agregadas, eliminadas = motor.get_activations()
+    assert [a.rule.__name__ for a in eliminadas] == ['sin_stock']
+    assert agregadas == []
+
+    stock = motor.modify(stock, unidades=5)
+    agregadas, eliminadas = motor.get_activations()
+    assert [(a.rule.__name__, a.context) for a in agregadas] == [('servir', {'p': 'a'})]
+    assert {h.__factid__ for h in agregadas[0].facts} == {pedido.__factid__, stock.__factid__}
+
+    motor.retract(stock)
+    agregadas, eliminadas = motor.get_activations()
+    assert [a.rule.__name__ for a in agregadas] == ['sin_stock']
+    assert [a.rule.__name__ for a in eliminadas] == ['servir']
+    motor.running = False
+
+
+def test_validaciones_de_hechos():
+    """
+    Test 5: Los hechos repetidos, con restricciones o con dobles guiones bajos se tratan como en experta
+    """
+    motor = MotorPrueba()
+    motor.reset()
+
+    declarado = motor.declare(Pedido(id=1))
+    assert declarado.__factid__ == 1
+    assert motor.declare(Pedido(id=1)) is None
+    assert declarado.as_dict() == {'id': 1}
+
+    with pytest.raises(RuntimeError):
+        declarado['id'] = 2
+    with pytest.raises(TypeError):
+        motor.declare(Pedido(id=MATCH.id))
+    with pytest.raises(KeyError):
+        motor.declare(Pedido(mal__nombre=1))
+
+
+def test_importar_engine_no_carga_experta():
+    """
+    Test 6: Con el motor nativo, importar engine y evaluar no carga experta ni el parche de collections
+    """
+    codigo = (
+        "import sys, json, engine\n"
+        "from tests.test_pool import PROVEEDOR_RIESGOSO\n"
+        "engine.evaluar_proveedor(PROVEEDOR_RIESGOSO)\n"
+        "print(json.dumps(sorted({m.split('.')[0] for m in sys.modules} & {'experta', 'fix_collections'})))"
+    )
+    entorno = {k: v for k, v in os.environ.items() if k != 'MOTOR_INFERENCIA'}
+    salida = subprocess.run([sys.executable, '-c', codigo], cwd=RAIZ, env=entorno,
+                            check=True, capture_output=True, text=True)
+    assert json.loads(salida.stdout.strip().splitlines()[-1]) == []
@@ -0,0 +1,85 @@
+"""
+Tests de los niveles de explicación
+Valida los niveles 'none', 'ids' y 'full' y el renderizado perezoso de textos
+"""
+
+import random
+
+import pytest
+
+from engine import evaluar_proveedor, evaluar_lote, ExplicadorDecisiones, DatosProveedor
+from engine.compilado import EvaluadorCompilado, evaluar_proveedor_compilado
+from tests.test_compilado import normalizar, MotorConPredicados
+from benchmarks.sintetico import generar_proveedor
+from tests.test_pool import PROVEEDOR_RIESGOSO, PROVEEDOR_EXCELENTE
+
+
+def evaluar_con_predicados(datos, nivel):
+    """Evalúa con el motor de prueba de reglas P() en el nivel indicado"""
+    motor = MotorConPredicados(nivel)
+    motor.reset()
+    motor.declare(DatosProveedor(**datos))
+    motor.run()
+    return motor.obtener_resultado()
+
+
+def test_full_conserva_textos_y_usa_una_marca_de_tiempo():
+    """
+    Test 1: El nivel 'full' genera los mismos textos de siempre con una sola hora por evaluación
+    """
+    resultado = evaluar_con_predicados(dict(PROVEEDOR_EXCELENTE, liquidez_corriente=0.5, endeudamiento=0.855), 'full')
+    textos = {exp['regla']: exp['razonamiento'] for exp in resultado['explicaciones']}
+
+    assert textos['RF-001: Liquidez Crítica'] == (
+        "Ratio de liquidez corriente de 0.50 está por debajo del mínimo aceptable (1.0). "
+        "El proveedor puede tener dificultades para cumplir obligaciones a corto plazo."
+    )
+    assert textos['RF-004: Endeudamiento Excesivo'].startswith("Nivel de endeudamiento de 85.5% excede")
+    assert len({exp['timestamp'] for exp in resultado['explicaciones']}) == 1
+    assert {'nivel': 'CRÍTICO', 'mensaje': 'Liquidez insuficiente - Alto riesgo de incumplimiento'} in resultado['alertas']
+
+
+def test_ids_se_renderiza_igual_que_full():
+    """
+    Test 2: Un resultado 'ids' es compacto y completar_textos lo convierte en el de 'full'
+    """
+    rng = random.Random(9)
+    for _ in range(100):
+        datos = generar_proveedor(rng)
+        ids = evaluar_con_predicados(datos, 'ids')
+        full = evaluar_con_predicados(datos, 'full')
+
+        assert all(isinstance(exp, tuple) for exp in ids['explicaciones'])
+        assert ids['nivel_explicacion'] == 'ids'
+        assert normalizar(ExplicadorDecisiones.completar_textos(ids)) == normalizar(full)
+
+
+def test_none_solo_puntuacion_y_riesgo():
+    """
+    Test 3: El nivel 'none' no guarda explicaciones ni alertas pero conserva el resultado
+    """
+    for datos in (PROVEEDOR_RIESGOSO, PROVEEDOR_EXCELENTE):
+        full = evaluar_proveedor(datos)
+        for resultado in (evaluar_proveedor(datos, 'none'), evaluar_proveedor_compilado(datos, 'none'),
+                          EvaluadorCompilado(MotorConPredicados).evaluar(datos, 'none')):
+            assert resultado['explicaciones'] == [] and resultado['alertas'] == []
+            assert resultado['nivel_explicacion'] == 'none'
+
+        ninguno = evaluar_proveedor(datos, 'none')
+        for clave in ('riesgo_final', 'puntuacion', 'recomendacion', 'total_reglas_activadas'):
+            assert ninguno[clave] == full[clave]
+
+
+def test_nivel_no_contamina_el_pool():
+    """
+    Test 4: Un lote en 'ids' no cambia el nivel de las evaluaciones posteriores, y un nivel inválido falla
+    """
+    resultados = list(evaluar_lote([PROVEEDOR_RIESGOSO] * 3, nivel_explicacion='ids'))
+    assert all(r['nivel_explicacion'] == 'ids' for r in resultados)
+
+    resultado = evaluar_proveedor(PROVEEDOR_RIESGOSO)
+    assert 'nivel_explicacion' not in resultado
+    assert all(isinstance(exp, dict) for exp in resultado['explicaciones'])
+
+    with pytest.raises(ValueError):
+        evaluar_proveedor(PROVEEDOR_RIESGOSO, 'detallado')
@@ -0,0 +1,94 @@
+"""
+Tests del perfilado del motor
+Valida las estadísticas por regla y por operación y que el perfilado sea opcional
+"""
+
+from engine import MotorEvaluacionRiesgo, DatosProveedor, PoolMotores
+from engine.perfilado import PerfiladorMotor, OPERACIONES_MOTOR
+from tests.test_compilado import normalizar
+from tests.test_pool import PROVEEDOR_RIESGOSO, PROVEEDOR_EXCELENTE
+
+
+def evaluar(motor, datos):
+    """Ciclo completo de evaluación sobre un motor"""
+    motor.reset()
+    motor.declare(DatosProveedor(**datos))
+    motor.run()
+    return motor.obtener_resultado()
+
+
+def test_estadisticas_por_regla():
+    """
+    Test 1: Cada regla activada cuenta sus activaciones, hechos y tiempo
+    """
+    perfilador = PerfiladorMotor()
+    motor = perfilador.crear(MotorEvaluacionRiesgo)
+    for _ in range(3):
+        resultado = evaluar(motor, PROVEEDOR_RIESGOSO)
+
+    reglas = perfilador.estadisticas()['reglas']
+    assert reglas['incumplimiento_legal']['activaciones'] == 3
+    assert reglas['incumplimiento_legal']['hechos_coincidentes'] == 3
+    assert reglas['decision_riesgo_alto']['activaciones'] == 3
+    assert all(r['tiempo_total_s'] > 0 for r in reglas.values())
+    # Cada regla de datos activada deja una explicación
+    de_datos = sum(r['activaciones'] for nombre, r in reglas.items() if not nombre.startswith(('decision', 'evaluar')))
+    assert de_datos == 3 * resultado['total_reglas_activadas']
+
+
+def test_estadisticas_del_motor():
+    """
+    Test 2: Se cronometran construcción, reset, declare, run y obtener_resultado
+    """
+    perfilador = PerfiladorMotor()
+    motor = perfilador.crear(MotorEvaluacionRiesgo)
+    evaluar(motor, PROVEEDOR_EXCELENTE)
+    evaluar(motor, PROVEEDOR_RIESGOSO)
+
+    operaciones = perfilador.estadisticas()['motor']
+    assert set(operaciones) == set(OPERACIONES_MOTOR)
+    assert operaciones['construccion']['llamadas'] == 1
+    assert operaciones['run']['llamadas'] == 2
+    assert operaciones['obtener_resultado']['llamadas'] == 2
+    assert operaciones['run']['minimo_s'] <= operaciones['run']['media_s'] <= operaciones['run']['maximo_s']
+
+    df = perfilador.motor_dataframe()
+    assert 'fase.rhs' in df.index and df.loc['reset', 'llamadas'] == 2
+    assert list(perfilador.reglas_dataframe().columns)[0] == 'activaciones'
+
+    perfilador.reiniciar()
+    assert perfilador.estadisticas()['reglas'] == {}
+
+
+def test_resultados_identicos_y_desinstrumentar():
+    """
+    Test 3: El perfilado no cambia el resultado y puede retirarse del motor
+    """
+    perfilador = PerfiladorMotor()
+    normal = MotorEvaluacionRiesgo()
+    perfilado = perfilador.instrumentar(MotorEvaluacionRiesgo())
+    assert normalizar(evaluar(perfilado, PROVEEDOR_RIESGOSO)) == normalizar(evaluar(normal, PROVEEDOR_RIESGOSO))
+
+    PerfiladorMotor.desinstrumentar(perfilado)
+    antes = perfilador.estadisticas()
+    evaluar(perfilado, PROVEEDOR_RIESGOSO)
+    assert perfilador.estadisticas() == antes
+    assert 'run' not in vars(perfilado)
+
+
+def test_pool_con_fabrica_perfilada():
+    """
+    Test 4: Un pool con fábrica perfilada acumula las estadísticas de todos sus motores
+    """
+    perfilador = PerfiladorMotor()
+    pool = PoolMotores(perfilador.fabrica(MotorEvaluacionRiesgo), capacidad=2)
+    for _ in range(4):
+        with pool.motor() as motor:
+            motor.declare(DatosProveedor(**PROVEEDOR_RIESGOSO))
+            motor.run()
+            motor.obtener_resultado()
+
+    estadisticas = perfilador.estadisticas()
+    assert estadisticas['motor']['construccion']['llamadas'] == 1
+    assert estadisticas['motor']['run']['llamadas'] == 4
+    assert estadisticas['reglas']['sin_seguros']['activaciones'] == 4
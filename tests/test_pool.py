@@ -0,0 +1,142 @@
+"""
+Tests del pool de motores
+Valida que los motores reutilizados no arrastren estado entre evaluaciones
+"""
+
+import threading
+
+import pytest
+from engine import evaluar_proveedor, PoolMotores, MotorEvaluacionRiesgo, DatosProveedor
+
+
+PROVEEDOR_RIESGOSO = {
+    'liquidez_corriente': 0.5,
+    'endeudamiento': 0.85,
+    'rentabilidad': -0.10,
+    'historial_pagos': 40,
+    'certificacion_calidad': False,
+    'tiempo_mercado': 1,
+    'capacidad_produccion': 30,
+    'tasa_defectos': 12,
+    'cumplimiento_entregas': 50,
+    'cumplimiento_legal': False,
+    'industria': 'manufactura',
+    'certificacion_ambiental': False,
+    'seguros_vigentes': False,
+    'calificacion_mercado': 2.0,
+    'quejas_clientes': 20,
+    'referencias_positivas': 0
+}
+
+PROVEEDOR_EXCELENTE = {
+    'liquidez_corriente': 2.5,
+    'endeudamiento': 0.30,
+    'rentabilidad': 0.18,
+    'historial_pagos': 90,
+    'certificacion_calidad': True,
+    'tiempo_mercado': 5,
+    'capacidad_produccion': 80,
+    'tasa_defectos': 2,
+    'cumplimiento_entregas': 98,
+    'cumplimiento_legal': True,
+    'industria': 'servicios',
+    'certificacion_ambiental': True,
+    'seguros_vigentes': True,
+    'calificacion_mercado': 4.8,
+    'quejas_clientes': 3,
+    'referencias_positivas': 5
+}
+
+
+def test_motor_reutilizado_no_arrastra_estado():
+    """
+    Test 1: Un motor reutilizado debe partir de cero en cada evaluación
+    """
+    pool = PoolMotores(MotorEvaluacionRiesgo, capacidad=1)
+
+    with pool.motor() as motor:
+        motor.declare(DatosProveedor(**PROVEEDOR_RIESGOSO))
+        motor.run()
+        resultado_riesgoso = motor.obtener_resultado()
+
+    with pool.motor() as motor:
+        assert motor.explicaciones == []
+        assert motor.alertas == []
+        assert motor.factores_criticos == []
+        assert motor.puntuacion_total == 100
+        assert motor.riesgo_final == "NO DETERMINADO"
+        assert motor.recomendacion == ""
+
+        motor.declare(DatosProveedor(**PROVEEDOR_EXCELENTE))
+        motor.run()
+        resultado_excelente = motor.obtener_resultado()
+
+    assert resultado_riesgoso['riesgo_final'] == 'ALTO'
+    assert resultado_excelente['riesgo_final'] == 'BAJO'
+    assert resultado_excelente['total_reglas_activadas'] == 0
+
+    # El resultado previo no debe verse alterado por la reutilización del motor
+    assert resultado_riesgoso['total_reglas_activadas'] == len(resultado_riesgoso['explicaciones'])
+    assert len(resultado_riesgoso['explicaciones']) > 0
+
+
+def test_contadores_aciertos_fallos():
+    """
+    Test 2: El pool cuenta aciertos (motor reutilizado) y fallos (motor nuevo)
+    """
+    pool = PoolMotores(MotorEvaluacionRiesgo, capacidad=2)
+
+    with pool.motor():
+        with pool.motor():
+            pass
+    with pool.motor():
+        pass
+
+    stats = pool.estadisticas()
+    assert stats['fallos'] == 2
+    assert stats['aciertos'] == 1
+    assert stats['libres'] == 2
+    assert stats['tasa_aciertos'] == pytest.approx(1 / 3)
+
+
+def test_pool_acotado():
+    """
+    Test 3: El pool nunca conserva más motores libres que su capacidad
+    """
+    pool = PoolMotores(MotorEvaluacionRiesgo, capacidad=1)
+    motores = [pool.adquirir() for _ in range(3)]
+    for motor in motores:
+        pool.liberar(motor)
+
+    assert pool.estadisticas()['libres'] == 1
+
+    with pytest.raises(ValueError):
+        PoolMotores(MotorEvaluacionRiesgo, capacidad=0)
+
+
+def test_evaluaciones_concurrentes():
+    """
+    Test 4: Evaluaciones desde varios hilos producen los mismos resultados
+    """
+    esperado_riesgoso = evaluar_proveedor(PROVEEDOR_RIESGOSO)
+    esperado_excelente = evaluar_proveedor(PROVEEDOR_EXCELENTE)
+    errores = []
+
+    def trabajador(datos, esperado):
+        for _ in range(10):
+            resultado = evaluar_proveedor(datos)
+            if (resultado['riesgo_final'], resultado['puntuacion']) != \
+                    (esperado['riesgo_final'], esperado['puntuacion']):
+                errores.append(resultado)
+
+    hilos = [
+        threading.Thread(target=trabajador, args=(datos, esperado))
+        for datos, esperado in [(PROVEEDOR_RIESGOSO, esperado_riesgoso),
+                                (PROVEEDOR_EXCELENTE, esperado_excelente)] * 4
+    ]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    assert errores == []
@@ -0,0 +1,273 @@
+"""
+Tests del registro versionado de bases de reglas
+Valida la publicación atómica, que las evaluaciones en curso terminen con
+su versión y la invalidación de cachés por versión
+"""
+
+import json
+import os
+import shutil
+import threading
+import time
+
+import pytest
+
+from engine import (MotorEvaluacionRiesgo, DatosProveedor, evaluar_proveedor, evaluar_proveedor_cacheado,
+                    evaluar_lote, evaluar_lote_paralelo)
+from engine.compilado import evaluar_proveedor_compilado
+from engine.reglas import Rule, MATCH, P
+from engine.compilado import EvaluadorCompilado
+from engine.__main__ import main
+from engine.declarativo import RUTA_BASE_DECLARADA, RUTA_REGLAS_MOTOR, cargar_reglas, cargar_reglas_motor, leer_definicion
+from engine.registro import RegistroReglas, CacheVersionada, evaluar_proveedor_versionado, registro_reglas
+from tests.test_compilado import MotorConPredicados
+from tests.test_pool import PROVEEDOR_EXCELENTE
+
+
+class MotorEndeudamientoEstricto(MotorConPredicados):
+    """RF-004 con el límite de endeudamiento rebajado de 70% a 50%"""
+
+    @Rule(DatosProveedor(endeudamiento=MATCH.end & P(lambda end: end > 0.5)))
+    def endeudamiento_alto(self, end):
+        MotorEvaluacionRiesgo.endeudamiento_alto._wrapped(self, end)
+
+
+class EvaluadorBloqueado:
+    """Evaluador que espera una señal antes de devolver el resultado del evaluador envuelto"""
+
+    def __init__(self, evaluador):
+        self.evaluador = evaluador
+        self.firma = 'bloqueado-' + evaluador.firma
+        self.formato_resultado = evaluador.formato_resultado
+        self.empezado = threading.Event()
+        self.continuar = threading.Event()
+
+    def evaluar(self, datos, nivel_explicacion='full'):
+        self.empezado.set()
+        assert self.continuar.wait(5)
+        return self.evaluador.evaluar(datos, nivel_explicacion)
+
+
+PROVEEDOR_ENDEUDADO = dict(PROVEEDOR_EXCELENTE, endeudamiento=0.6)
+
+
+def test_publicar_umbral_mas_estricto():
+    """
+    Test 1: Publicar una base con RF-004 más estricto cambia el resultado y la versión anotada
+    """
+    registro = RegistroReglas(EvaluadorCompilado(MotorConPredicados), origen='predicados')
+    antes = registro.evaluar(PROVEEDOR_ENDEUDADO)
+
+    version = registro.publicar(EvaluadorCompilado(MotorEndeudamientoEstricto), origen='estricto')
+    despues = registro.evaluar(PROVEEDOR_ENDEUDADO)
+
+    assert version.numero == 2 and registro.actual is version
+    assert antes['version_reglas'] == registro.versiones()[0].id != despues['version_reglas'] == version.id
+    assert despues['puntuacion'] == antes['puntuacion'] - 20
+    assert any(e['regla'].startswith('RF-004') for e in despues['explicaciones'])
+
+
+def test_evaluacion_en_curso_termina_con_su_version():
+    """
+    Test 2: Una evaluación empezada antes de publicar termina con la versión anterior
+    """
+    bloqueado = EvaluadorBloqueado(EvaluadorCompilado(MotorConPredicados))
+    registro = RegistroReglas(bloqueado)
+    resultados = []
+    hilo = threading.Thread(target=lambda: resultados.append(registro.evaluar(PROVEEDOR_ENDEUDADO)))
+    hilo.start()
+    assert bloqueado.empezado.wait(5)
+
+    nueva = registro.publicar(EvaluadorCompilado(MotorEndeudamientoEstricto))
+    assert registro.evaluar(PROVEEDOR_ENDEUDADO)['version_reglas'] == nueva.id
+
+    bloqueado.continuar.set()
+    hilo.join(5)
+    assert resultados[0]['version_reglas'] == registro.versiones()[0].id
+    assert not any(e['regla'].startswith('RF-004') for e in resultados[0]['explicaciones'])
+
+
+def test_historial_y_restaurar():
+    """
+    Test 3: Publicar la misma firma no crea versión; restaurar vuelve a una versión del historial
+    """
+    base = EvaluadorCompilado(MotorConPredicados)
+    registro = RegistroReglas(base, historial=2)
+
+    assert registro.publicar(EvaluadorCompilado(MotorConPredicados)).numero == 1
+    registro.publicar(EvaluadorCompilado(MotorEndeudamientoEstricto))
+    restaurada = registro.restaurar(1)
+
+    assert restaurada.numero == 3 and restaurada.evaluador is base
+    assert [v.numero for v in registro.versiones()] == [2, 3]
+    with pytest.raises(KeyError):
+        registro.restaurar(1)
+
+
+def test_cache_invalida_solo_la_version_reemplazada():
+    """
+    Test 4: Al publicar se descartan las entradas de la versión anterior y las de otra versión se conservan
+    """
+    registro = RegistroReglas(EvaluadorCompilado(MotorConPredicados))
+    cache = CacheVersionada(registro)
+    v1 = registro.actual
+
+    cache(PROVEEDOR_ENDEUDADO)
+    cache(PROVEEDOR_EXCELENTE)
+    assert cache(PROVEEDOR_ENDEUDADO)['version_reglas'] == v1.id
+    assert cache.aciertos == 1
+
+    # Entrada de otra versión (p. ej. restaurada más tarde) que no debe tocarse
+    ajena = ('otra-version', ())
+    cache._entradas[ajena] = (None, {'version_reglas': 'otra-version'})
+
+    v2 = registro.publicar(EvaluadorCompilado(MotorEndeudamientoEstricto))
+    assert cache.invalidados == 2
+    assert set(cache._entradas) == {ajena}
+
+    resultado = cache(PROVEEDOR_ENDEUDADO)
+    assert resultado['version_reglas'] == v2.id
+    assert any(e['regla'].startswith('RF-004') for e in resultado['explicaciones'])
+
+
+def test_cache_no_guarda_resultados_de_otra_version():
+    """
+    Test 5: Un resultado calculado mientras se publicaba otra versión no se guarda con la clave vieja
+    """
+    bloqueado = EvaluadorBloqueado(EvaluadorCompilado(MotorConPredicados))
+    registro = RegistroReglas(EvaluadorCompilado(MotorConPredicados))
+    cache = CacheVersionada(registro)
+    registro.publicar(bloqueado)
+
+    hilo = threading.Thread(target=cache, args=(PROVEEDOR_ENDEUDADO,))
+    hilo.start()
+    assert bloqueado.empezado.wait(5)
+    registro.publicar(EvaluadorCompilado(MotorEndeudamientoEstricto))
+    bloqueado.continuar.set()
+    hilo.join(5)
+
+    assert len(cache._entradas) == 0
+
+
+def test_recargar_archivo_declarativo(tmp_path):
+    """
+    Test 6: Recargar un archivo de reglas con otro umbral publica una versión nueva
+    """
+    ruta = tmp_path / 'base_conocimiento.json'
+    shutil.copy(RUTA_BASE_DECLARADA, ruta)
+    registro = RegistroReglas(cargar_reglas(str(ruta)), origen=str(ruta))
+    cache = CacheVersionada(registro)
+    datos = {'endeudamiento': 60, 'certificaciones_calidad': ['ISO 9001']}
+    antes = cache(datos)
+    assert cache(datos) == antes and cache.aciertos == 1
+
+    definicion = json.loads(ruta.read_text(encoding='utf-8'))
+    definicion['umbrales']['UMBRALES_FINANCIEROS']['endeudamiento']['alto'] = 50
+    ruta.write_text(json.dumps(definicion), encoding='utf-8')
+    version = registro.recargar(str(ruta))
+
+    despues = cache(datos)
+    assert version.numero == 2 and despues['version_reglas'] == version.id
+    assert despues['impacto_total'] == antes['impacto_total'] + 20
+    assert registro.recargar(str(ruta)) is version
+
+
+def test_publicar_otro_formato_de_resultado(tmp_path):
+    """
+    Test 7: Un registro del motor rechaza una base declarativa y el registro compartido evalúa con su caché
+    """
+    registro = RegistroReglas(EvaluadorCompilado(MotorConPredicados))
+    with pytest.raises(TypeError):
+        registro.recargar(RUTA_BASE_DECLARADA, directorio_cache=str(tmp_path))
+    with pytest.raises(TypeError):
+        registro.publicar(object())
+    assert registro.actual.numero == 1
+    with pytest.raises(TypeError):
+        RegistroReglas(cargar_reglas(usar_cache=False)).publicar(EvaluadorCompilado(MotorConPredicados))
+
+    resultado = evaluar_proveedor_versionado(PROVEEDOR_ENDEUDADO)
+    assert resultado['version_reglas'] == registro_reglas().actual.id
+    assert resultado['riesgo_final'] in ('BAJO', 'MEDIO', 'ALTO')
+    assert evaluar_proveedor_versionado({'liquidez__corriente': 1})['riesgo_final'] == 'ERROR'
+
+
+def test_recargar_y_vigilar_reglas_del_motor(tmp_path):
+    """
+    Test 8: Un registro del motor recarga un archivo en formato 'motor' y lo vuelve a publicar al cambiar
+    """
+    definicion = leer_definicion(RUTA_REGLAS_MOTOR)
+    ruta = tmp_path / 'reglas_motor.json'
+    ruta.write_text(json.dumps(definicion), encoding='utf-8')
+    registro = RegistroReglas(EvaluadorCompilado(MotorConPredicados))
+
+    vigilante = registro.vigilar(str(ruta), intervalo=0.02)
+    try:
+        assert registro.actual.numero == 2 and registro.actual.origen == str(ruta)
+        assert vigilante.error is None and vigilante.recargas == 1
+        antes = registro.evaluar(PROVEEDOR_ENDEUDADO)
+
+        definicion['umbrales']['ENDEUDAMIENTO_MAXIMO'] = 0.5
+        ruta.write_text(json.dumps(definicion, indent=1), encoding='utf-8')
+        limite = time.monotonic() + 5
+        while registro.actual.numero == 2 and time.monotonic() < limite:
+            time.sleep(0.01)
+        despues = registro.evaluar(PROVEEDOR_ENDEUDADO)
+        assert registro.actual.numero == 3
+        assert despues['puntuacion'] == antes['puntuacion'] - 20
+        assert despues['version_reglas'] == registro.actual.id != antes['version_reglas']
+
+        # Un archivo roto no se publica y el error queda a la vista
+        ruta.write_text('{"formato": "motor", "reglas": ', encoding='utf-8')
+        os.utime(ruta, ns=(time.time_ns(), time.time_ns() + 10**9))
+        assert not vigilante.comprobar()
+        assert isinstance(vigilante.error, ValueError) and registro.actual.numero == 3
+    finally:
+        vigilante.detener()
+
+
+def test_cli_publica_reglas_antes_de_evaluar(tmp_path):
+    """
+    Test 9: python -m engine evaluar --reglas publica el archivo y los resultados llevan su versión
+    """
+    entrada = tmp_path / 'proveedores.jsonl'
+    entrada.write_text(json.dumps(PROVEEDOR_ENDEUDADO) + '\n', encoding='utf-8')
+    salida = tmp_path / 'resultados.jsonl'
+    try:
+        assert main(['evaluar', str(entrada), str(salida), '--reglas', RUTA_REGLAS_MOTOR, '--silencioso']) == 0
+        version = registro_reglas().actual
+        assert version.origen == RUTA_REGLAS_MOTOR
+        assert json.loads(salida.read_text(encoding='utf-8'))['version_reglas'] == version.id
+        assert main(['evaluar', str(entrada), str(salida), '--reglas', RUTA_BASE_DECLARADA, '--silencioso']) == 1
+    finally:
+        registro_reglas().restaurar(1)
+
+
+def test_puntos_de_entrada_usan_la_version_vigente():
+    """
+    Test 10: evaluar_proveedor, los lotes y la caché evalúan con la versión vigente y la anotan
+    """
+    liquidez_baja = dict(PROVEEDOR_EXCELENTE, liquidez_corriente=0.5)
+    entradas = {
+        'evaluar_proveedor': evaluar_proveedor,
+        'compilado': evaluar_proveedor_compilado,
+        'cacheado': evaluar_proveedor_cacheado,
+        'lote': lambda datos: next(evaluar_lote([datos])),
+        'paralelo': lambda datos: list(evaluar_lote_paralelo([datos, datos], procesos=2, tamano_bloque=1))[1],
+    }
+    registro = registro_reglas()
+    try:
+        for nombre, evaluar in entradas.items():
+            resultado = evaluar(liquidez_baja)
+            assert resultado['version_reglas'] == registro.actual.id, nombre
+            assert resultado['riesgo_final'] == 'BAJO', nombre
+
+        # Con RF-001 declarado como comparación real, todas las entradas ven la regla nueva
+        version = registro.publicar(cargar_reglas_motor(), origen=RUTA_REGLAS_MOTOR)
+        for nombre, evaluar in entradas.items():
+            resultado = evaluar(liquidez_baja)
+            assert resultado['version_reglas'] == version.id, nombre
+            assert resultado['riesgo_final'] == 'ALTO', nombre
+
+        assert 'version_reglas' not in evaluar_proveedor({'liquidez__corriente': 1})
+    finally:
+        registro.restaurar(1)
@@ -0,0 +1,110 @@
+"""
+Tests del análisis de sensibilidad
+Valida que los puntos de inflexión coincidan con reevaluar el proveedor
+"""
+
+import math
+import random
+
+from engine import evaluar_proveedor, analizar_sensibilidad, ExplicadorDecisiones
+from engine.compilado import EvaluadorCompilado
+from tests.test_compilado import MotorConPredicados
+from benchmarks.sintetico import generar_proveedor
+from tests.test_pool import PROVEEDOR_EXCELENTE
+
+
+def valor_cruzado(punto):
+    """Valor del campo justo al otro lado del umbral indicado por el punto"""
+    operador = punto['condicion'].split()[0]
+    umbral = punto['umbral']
+    if operador == '>':
+        return math.nextafter(umbral, math.inf)
+    if operador == '<':
+        return math.nextafter(umbral, -math.inf)
+    return umbral
+
+
+def test_umbrales_numericos_coinciden_con_reevaluar():
+    """
+    Test 1: Cruzar cada umbral reportado da el riesgo y la puntuación anunciados
+    """
+    evaluador = EvaluadorCompilado(MotorConPredicados)
+    rng = random.Random(5)
+
+    for _ in range(50):
+        datos = generar_proveedor(rng)
+        analisis = analizar_sensibilidad(datos, evaluador)
+        base = evaluador.evaluar(datos)
+        assert (analisis['riesgo_final'], analisis['puntuacion']) == (base['riesgo_final'], base['puntuacion'])
+
+        for punto in analisis['puntos']:
+            cambiado = dict(datos)
+            if punto['umbral'] is None:
+                cambiado[punto['campo']] = 'otra'
+            elif punto['condicion'].startswith('='):
+                cambiado[punto['campo']] = punto['umbral']
+            else:
+                cambiado[punto['campo']] = valor_cruzado(punto)
+            resultado = evaluador.evaluar(cambiado)
+            assert (resultado['riesgo_final'], resultado['puntuacion']) == \
+                (punto['riesgo_final'], punto['puntuacion'])
+
+
+def test_liquidez_critica_sube_a_alto():
+    """
+    Test 2: Con reglas P() se detecta que liquidez_corriente < 1 sube el riesgo a ALTO
+    """
+    analisis = analizar_sensibilidad(PROVEEDOR_EXCELENTE, EvaluadorCompilado(MotorConPredicados))
+    liquidez = [p for p in analisis['puntos'] if p['campo'] == 'liquidez_corriente']
+
+    assert len(liquidez) == 1
+    assert liquidez[0]['condicion'] == '< 1'
+    assert liquidez[0]['riesgo_final'] == 'ALTO'
+    assert liquidez[0]['cambia_riesgo']
+
+
+def test_booleanos_y_seccion_del_explicador():
+    """
+    Test 3: Los atributos booleanos se prueban con el valor contrario y se muestran en el informe
+    """
+    analisis = analizar_sensibilidad(PROVEEDOR_EXCELENTE)
+    legal = next(p for p in analisis['puntos'] if p['campo'] == 'cumplimiento_legal')
+
+    esperado = evaluar_proveedor(dict(PROVEEDOR_EXCELENTE, cumplimiento_legal=False))
+    assert legal['riesgo_final'] == esperado['riesgo_final'] == 'ALTO'
+    assert legal['puntuacion'] == esperado['puntuacion']
+    assert analisis['puntos'][0]['cambia_riesgo']
+
+    seccion = ExplicadorDecisiones.generar_puntos_inflexion(PROVEEDOR_EXCELENTE)
+    assert 'Puntos de Inflexión' in seccion
+    assert legal['descripcion'] in seccion
+
+
+def test_campos_numericos_sin_efecto_se_indican():
+    """
+    Test 4: Los campos cuyas reglas no pueden activarse se listan y se indican en el informe
+    """
+    analisis = analizar_sensibilidad(PROVEEDOR_EXCELENTE)
+    assert 'liquidez_corriente' in analisis['campos_sin_efecto']
+    assert not any(p['campo'] in analisis['campos_sin_efecto'] for p in analisis['puntos'])
+
+    seccion = ExplicadorDecisiones.generar_puntos_inflexion(PROVEEDOR_EXCELENTE)
+    assert 'Sin puntos de inflexión posibles' in seccion
+    assert 'liquidez_corriente' in seccion
+
+    con_predicados = analizar_sensibilidad(PROVEEDOR_EXCELENTE, EvaluadorCompilado(MotorConPredicados))
+    assert 'liquidez_corriente' not in con_predicados['campos_sin_efecto']
+
+
+def test_explicador_usa_el_evaluador_indicado():
+    """
+    Test 5: La sección de puntos de inflexión usa las reglas de la versión con la que se evaluó
+    """
+    evaluador = EvaluadorCompilado(MotorConPredicados)
+    datos = dict(PROVEEDOR_EXCELENTE, liquidez_corriente=1.2)
+
+    seccion = ExplicadorDecisiones.generar_puntos_inflexion(datos, evaluador)
+    liquidez = next(p for p in analizar_sensibilidad(datos, evaluador)['puntos']
+                    if p['campo'] == 'liquidez_corriente')
+    assert liquidez['descripcion'] in seccion
+    assert liquidez['descripcion'] not in ExplicadorDecisiones.generar_puntos_inflexion(datos)
@@ -0,0 +1,76 @@
+"""
+Tests de la sesión de evaluación incremental
+Valida que los cambios campo a campo den el mismo resultado que evaluar desde cero
+"""
+
+import random
+
+import pytest
+
+from engine import evaluar_proveedor, SesionEvaluacion
+from engine.compilado import EvaluadorCompilado
+from tests.test_compilado import normalizar, MotorConPredicados
+from benchmarks.sintetico import generar_proveedor
+from tests.test_pool import PROVEEDOR_RIESGOSO, PROVEEDOR_EXCELENTE
+
+
+def test_cambios_sucesivos_equivalen_a_evaluar_desde_cero():
+    """
+    Test 1: Tras cada cambio de un campo el resultado coincide con una evaluación completa
+    """
+    rng = random.Random(3)
+    sesion = SesionEvaluacion(generar_proveedor(rng))
+
+    for _ in range(150):
+        nuevo = generar_proveedor(rng)
+        campo = rng.choice(list(nuevo))
+        resultado = sesion.cambiar_campos(**{campo: nuevo[campo]})
+
+        assert normalizar(resultado) == normalizar(evaluar_proveedor(sesion.datos))
+
+
+def test_deshace_contribuciones_y_conclusiones():
+    """
+    Test 2: Quitar la causa de un riesgo revierte puntuación, alertas, factores y decisión
+    """
+    sesion = SesionEvaluacion(PROVEEDOR_EXCELENTE)
+    inicial = sesion.resultado()
+
+    legal = sesion.cambiar_campos(cumplimiento_legal=False)
+    assert legal['riesgo_final'] == 'ALTO'
+    assert 'Problemas legales' in legal['factores_criticos']
+
+    restaurado = sesion.cambiar_campos(cumplimiento_legal=True)
+    assert normalizar(restaurado) == normalizar(inicial)
+
+
+def test_solo_redispara_reglas_afectadas():
+    """
+    Test 3: Cambiar un campo solo vuelve a disparar las reglas que lo leen
+    """
+    evaluador = EvaluadorCompilado(MotorConPredicados)
+    sesion = SesionEvaluacion(PROVEEDOR_RIESGOSO, MotorConPredicados)
+    disparadas = sesion.reglas_redisparadas
+
+    resultado = sesion.cambiar_campos(liquidez_corriente=2.5)
+    assert sesion.reglas_redisparadas == disparadas
+    assert normalizar(resultado) == normalizar(evaluador.evaluar(sesion.datos))
+
+    resultado = sesion.cambiar_campos(liquidez_corriente=0.5)
+    assert sesion.reglas_redisparadas == disparadas + 1
+    assert 'Liquidez crítica' in resultado['factores_criticos']
+    assert normalizar(resultado) == normalizar(evaluador.evaluar(sesion.datos))
+
+
+def test_actualizar_y_errores():
+    """
+    Test 4: actualizar() aplica solo diferencias y un error deja la sesión intacta
+    """
+    sesion = SesionEvaluacion(PROVEEDOR_RIESGOSO, MotorConPredicados)
+    resultado = sesion.actualizar(dict(PROVEEDOR_RIESGOSO, cumplimiento_legal=True))
+    assert 'Problemas legales' not in resultado['factores_criticos']
+
+    with pytest.raises(TypeError):
+        sesion.cambiar_campos(liquidez_corriente='abc')
+    assert sesion.datos == dict(PROVEEDOR_RIESGOSO, cumplimiento_legal=True)
+    assert normalizar(sesion.resultado()) == normalizar(resultado)
@@ -0,0 +1,104 @@
+"""
+Tests del generador de proveedores sintéticos
+Valida reproducibilidad, cobertura de campos, correlaciones y escritura por bloques
+"""
+
+import csv
+import inspect
+import json
+import re
+
+import numpy as np
+
+from knowledge import reglas_financieras, reglas_operacionales, reglas_legales, reglas_reputacionales
+from engine import evaluar_proveedor_compilado
+from knowledge import INDUSTRIAS
+from benchmarks.sintetico import GeneradorProveedores, DISTRIBUCIONES_CAMPOS
+
+
+def campos_knowledge():
+    """Campos que leen las reglas de knowledge/ mediante datos.get(...)"""
+    modulos = [reglas_financieras, reglas_operacionales, reglas_legales, reglas_reputacionales]
+    return {campo for m in modulos for campo in re.findall(r"datos\.get\('(\w+)'", inspect.getsource(m))}
+
+
+def test_reproducible_con_semilla():
+    """
+    Test 1: La misma semilla genera la misma cartera
+    """
+    a = GeneradorProveedores(semilla=7).bloque(1000)
+    b = GeneradorProveedores(semilla=7).bloque(1000)
+    c = GeneradorProveedores(semilla=8).bloque(1000)
+    assert all(np.array_equal(a[campo], b[campo]) for campo in a)
+    assert not np.array_equal(a['liquidez_corriente'], c['liquidez_corriente'])
+
+
+def test_cubre_campos_del_motor_y_de_knowledge():
+    """
+    Test 2: Se generan todos los campos del motor y de knowledge/, con industrias del formulario
+    """
+    from engine.cache import campos_reglas
+
+    generador = GeneradorProveedores(semilla=1)
+    assert set(campos_reglas()) <= set(generador.campos)
+    assert campos_knowledge() <= set(generador.campos)
+
+    proveedores = list(generador.proveedores(500, tamano_bloque=128))
+    assert len(proveedores) == 500
+    assert {p['industria'] for p in proveedores} <= set(INDUSTRIAS)
+    assert all(isinstance(p['certificaciones_calidad'], list) for p in proveedores)
+    assert all(p['anos_operacion'] == int(p['tiempo_mercado']) for p in proveedores)
+    assert all(evaluar_proveedor_compilado(p)['riesgo_final'] in ('BAJO', 'MEDIO', 'ALTO') for p in proveedores[:50])
+
+
+def test_correlaciones_y_probabilidades():
+    """
+    Test 3: Liquidez baja va con endeudamiento alto y las proporciones siguen las distribuciones
+    """
+    bloque = GeneradorProveedores(semilla=3).bloque(50_000)
+    assert np.corrcoef(bloque['liquidez_corriente'], bloque['endeudamiento'])[0, 1] < -0.4
+    assert abs(bloque['licencias_vigentes'].mean() - DISTRIBUCIONES_CAMPOS['licencias_vigentes']['p']) < 0.01
+    assert bloque['endeudamiento'].min() >= 0 and bloque['endeudamiento'].max() <= 1
+
+    independiente = GeneradorProveedores(correlaciones={}, semilla=3).bloque(50_000)
+    assert abs(np.corrcoef(independiente['liquidez_corriente'], independiente['endeudamiento'])[0, 1]) < 0.05
+
+
+def test_distribuciones_configurables():
+    """
+    Test 4: Se pueden cambiar o quitar campos
+    """
+    generador = GeneradorProveedores(
+        distribuciones={'industria': {'tipo': 'categorica', 'valores': ['Minería']}, 'incidentes_seguridad': None},
+        semilla=0
+    )
+    bloque = generador.a_registros(generador.bloque(10))
+    assert all(p['industria'] == 'Minería' for p in bloque)
+    assert 'incidentes_seguridad' not in bloque[0]
+
+
+def test_escritura_por_bloques(tmp_path):
+    """
+    Test 5: CSV, JSONL y .npy contienen la misma cartera que la generación en memoria
+    """
+    esperados = list(GeneradorProveedores(semilla=5).proveedores(250, tamano_bloque=100))
+
+    for formato in ('csv', 'jsonl', 'npy'):
+        ruta = str(tmp_path / f"cartera.{formato}")
+        assert GeneradorProveedores(semilla=5).escribir(ruta, 250, tamano_bloque=100) == 250
+
+        if formato == 'csv':
+            with open(ruta, encoding='utf-8') as fichero:
+                filas = list(csv.DictReader(fichero))
+            assert len(filas) == 250
+            assert float(filas[10]['liquidez_corriente']) == esperados[10]['liquidez_corriente']
+            assert filas[10]['industria'] == esperados[10]['industria']
+        elif formato == 'jsonl':
+            with open(ruta, encoding='utf-8') as fichero:
+                filas = [json.loads(linea) for linea in fichero]
+            assert filas == esperados
+        else:
+            registros = np.load(ruta, mmap_mode='r')
+            assert len(registros) == 250
+            assert INDUSTRIAS[registros['industria'][10]] == esperados[10]['industria']
+            assert registros['endeudamiento'][249] == esperados[249]['endeudamiento']
@@ -0,0 +1,80 @@
+"""
+Tests de la tabla de decisión por intervalos
+Valida que la búsqueda en la tabla coincida con el evaluador compilado
+"""
+
+import math
+import random
+
+from engine.reglas import Rule, MATCH, P
+
+from engine import MotorEvaluacionRiesgo, DatosProveedor
+from engine.compilado import EVALUADOR_COMPILADO, EvaluadorCompilado
+from engine.tabla_decision import TablaDecision, tabla_decision
+from tests.test_compilado import MotorConPredicados
+from benchmarks.sintetico import generar_proveedor
+from tests.test_pool import PROVEEDOR_EXCELENTE
+
+
+def resumir(resultado):
+    """Campos comparables entre la tabla y el evaluador, sin depender del orden"""
+    return (
+        resultado['riesgo_final'],
+        resultado['puntuacion'],
+        resultado['recomendacion'],
+        resultado['total_reglas_activadas'],
+        sorted((a['nivel'], a['mensaje']) for a in resultado['alertas']),
+        sorted(resultado['factores_criticos'])
+    )
+
+
+def test_paridad_con_evaluador_compilado():
+    """
+    Test 1: La tabla da el mismo resultado que el evaluador compilado
+    """
+    for evaluador in (EVALUADOR_COMPILADO, EvaluadorCompilado(MotorConPredicados)):
+        tabla = TablaDecision(evaluador)
+        rng = random.Random(11)
+
+        for _ in range(300):
+            datos = generar_proveedor(rng)
+            assert resumir(tabla.consultar(datos)) == resumir(evaluador.evaluar(datos))
+
+
+def test_bordes_de_intervalo():
+    """
+    Test 2: Los valores justo en el umbral y a cada lado caen en la celda correcta
+    """
+    evaluador = EvaluadorCompilado(MotorConPredicados)
+    tabla = TablaDecision(evaluador)
+
+    for valor in (math.nextafter(1.0, 0), 1.0, math.nextafter(1.0, 2), -1e12, 1e12, 1, True):
+        datos = dict(PROVEEDOR_EXCELENTE, liquidez_corriente=valor, endeudamiento=valor)
+        assert resumir(tabla.consultar(datos)) == resumir(evaluador.evaluar(datos))
+
+    datos = {'certificacion_calidad': False, 'industria': 'otra'}
+    assert resumir(tabla.consultar(datos)) == resumir(evaluador.evaluar(datos))
+
+
+class MotorUmbralEstricto(MotorConPredicados):
+    """Motor de prueba con un umbral de liquidez distinto"""
+
+    @Rule(DatosProveedor(liquidez_corriente=MATCH.lc & P(lambda lc: lc < 1.5)))
+    def liquidez_critica(self, lc):
+        MotorEvaluacionRiesgo.liquidez_critica._wrapped(self, lc)
+
+
+def test_reconstruccion_al_cambiar_umbrales():
+    """
+    Test 3: Cambiar un umbral cambia la firma y produce una tabla nueva
+    """
+    base = EvaluadorCompilado(MotorConPredicados)
+    estricto = EvaluadorCompilado(MotorUmbralEstricto)
+
+    assert tabla_decision(base) is tabla_decision(EvaluadorCompilado(MotorConPredicados))
+    assert base.firma != estricto.firma
+    assert tabla_decision(estricto) is not tabla_decision(base)
+
+    datos = dict(PROVEEDOR_EXCELENTE, liquidez_corriente=1.2)
+    assert 'Liquidez crítica' not in tabla_decision(base).consultar(datos)['factores_criticos']
+    assert 'Liquidez crítica' in tabla_decision(estricto).consultar(datos)['factores_criticos']
@@ -0,0 +1,69 @@
+"""
+Tests de evaluación vectorizada
+Valida que evaluar_dataframe coincida fila a fila con el evaluador compilado
+"""
+
+import random
+
+import pandas as pd
+
+from engine.compilado import EvaluadorCompilado, EVALUADOR_COMPILADO
+from engine.vectorizado import evaluar_dataframe
+from tests.test_compilado import MotorConPredicados
+from benchmarks.sintetico import generar_proveedor
+
+
+def comparar_filas(df, resultado, evaluador):
+    """Compara cada fila del resultado vectorizado con evaluador.evaluar"""
+    for i, datos in enumerate(df.to_dict('records')):
+        esperado = evaluador.evaluar(datos)
+        reglas = {exp['regla'].split(':')[0] for exp in esperado['explicaciones']}
+
+        assert resultado['riesgo_final'].iloc[i] == esperado['riesgo_final']
+        assert resultado['recomendacion'].iloc[i] == esperado['recomendacion']
+        assert resultado['puntuacion'].iloc[i] == esperado['puntuacion']
+        assert resultado['total_reglas_activadas'].iloc[i] == esperado['total_reglas_activadas']
+        fila = resultado['reglas_activadas'].iloc[i]
+        assert set(fila[fila].index) == reglas
+        factores = resultado['factores_criticos'].iloc[i]
+        assert set(factores[factores].index) == set(esperado['factores_criticos'])
+
+
+def test_dataframe_igual_a_evaluacion_por_fila():
+    """
+    Test 1: Riesgo, puntuación, reglas y factores coinciden con la evaluación por fila
+    """
+    rng = random.Random(11)
+    df = pd.DataFrame([generar_proveedor(rng) for _ in range(400)])
+
+    resultado = evaluar_dataframe(df)
+
+    assert list(resultado['reglas_activadas'].columns)[:3] == ['RF-001', 'RF-002', 'RF-003']
+    comparar_filas(df, resultado, EVALUADOR_COMPILADO)
+
+
+def test_dataframe_con_predicados():
+    """
+    Test 2: Las reglas declaradas con P() se vectorizan correctamente
+    """
+    evaluador = EvaluadorCompilado(MotorConPredicados)
+    rng = random.Random(5)
+    df = pd.DataFrame([generar_proveedor(rng) for _ in range(300)])
+
+    resultado = evaluar_dataframe(df, evaluador)
+
+    assert resultado['reglas_activadas']['RF-001'].any()
+    comparar_filas(df, resultado, evaluador)
+
+
+def test_dataframe_sin_columnas():
+    """
+    Test 3: Columnas ausentes equivalen a campos ausentes en el hecho
+    """
+    df = pd.DataFrame({'certificacion_calidad': [False, True]}, index=['a', 'b'])
+
+    resultado = evaluar_dataframe(df)
+
+    assert list(resultado['riesgo_final']) == ['MEDIO', 'BAJO']
+    assert list(resultado['puntuacion']) == [85, 100]
+    assert list(resultado['riesgo_final'].index) == ['a', 'b']
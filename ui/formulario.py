@@ -4,6 +4,8 @@ Formulario de entrada de datos del proveedor
 import streamlit as st
 from datetime import datetime
 
+from knowledge import INDUSTRIAS
+
 
 def formulario_proveedor():
     """
@@ -27,11 +29,7 @@ def formulario_proveedor():
     
     datos['industria'] = st.sidebar.selectbox(
         "Industria",
-        [
-            "Manufactura", "Servicios", "Tecnología", "Construcción", "Logística",
-            "Agricultura", "Minería", "Salud", "Educación", "Retail", "Energía",
-            "Transporte", "Finanzas", "Turismo", "Textil"
-        ],
+        INDUSTRIAS,
         help="Selecciona el sector al que pertenece el proveedor."
     )
     
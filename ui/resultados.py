@@ -1,9 +1,13 @@
 """
 Página de resultados de la evaluación
 """
+import sqlite3
+
 import streamlit as st
 import plotly.graph_objects as go
 from engine.explicador import ExplicadorDecisiones
+from engine.historial import historial_evaluaciones
+from engine.montecarlo import simular_proveedor, DISTRIBUCIONES_DEFECTO
 from ui.components import (
     crear_gauge_puntuacion, 
     crear_tarjeta_resultado, 
@@ -12,15 +16,18 @@ from ui.components import (
 )
 
 
-def mostrar_resultados(resultado, datos):
+def mostrar_resultados(resultado, datos, evaluador=None):
     """
     Muestra los resultados de la evaluación de riesgo
     
     Args:
         resultado: Diccionario con los resultados de la evaluación
         datos: Diccionario con los datos del proveedor evaluado
+        evaluador: Evaluador compilado de la versión de reglas con la que se
+            evaluó (por defecto, el de MotorEvaluacionRiesgo)
     """
     explicador = ExplicadorDecisiones()
+    resultado = explicador.completar_textos(resultado)
     
     st.markdown("## 📈 Resultados de la Evaluación")
 
@@ -112,6 +119,15 @@ def mostrar_resultados(resultado, datos):
     plan_mitigacion = explicador.generar_plan_mitigacion(resultado)
     st.markdown(plan_mitigacion)
 
+    # ========== PUNTOS DE INFLEXIÓN ==========
+    st.markdown("---")
+    puntos_inflexion = explicador.generar_puntos_inflexion(datos, evaluador)
+    st.markdown(puntos_inflexion)
+
+    # ========== SIMULACIÓN DE INCERTIDUMBRE ==========
+    st.markdown("---")
+    mostrar_simulacion(datos, evaluador)
+
     # ========== VISUALIZACIÓN DE MÉTRICAS ==========
     st.markdown("---")
     st.markdown("### 📊 Análisis por Categorías")
@@ -162,6 +178,9 @@ def mostrar_resultados(resultado, datos):
             else:
                 st.info("No hay alertas registradas para este proveedor.")
 
+    # ========== HISTORIAL DEL PROVEEDOR ==========
+    mostrar_historial(datos)
+
     # ========== DESCARGA DE INFORME ==========
     st.markdown("---")
 
@@ -181,4 +200,122 @@ def mostrar_resultados(resultado, datos):
     # Botón para nueva evaluación
     if st.button("🔁 Hacer una nueva evaluación...", use_container_width=True):
         st.session_state.clear()
-        st.rerun()
\ No newline at end of file
+        st.rerun()
+
+
+def mostrar_historial(datos):
+    """
+    Muestra las evaluaciones guardadas del proveedor, de la más reciente a la más antigua
+
+    Args:
+        datos: Diccionario con los datos del proveedor evaluado
+    """
+    if not datos.get('nombre'):
+        return
+    try:
+        evaluaciones = historial_evaluaciones().historial_proveedor(datos['nombre'], limite=50)
+    except sqlite3.Error:
+        return
+    with st.expander(f"🗂️ Historial de evaluaciones ({len(evaluaciones)})"):
+        if not evaluaciones:
+            st.info("Todavía no hay evaluaciones guardadas de este proveedor.")
+            return
+        st.dataframe(
+            [
+                {
+                    'Fecha': e['fecha'],
+                    'Riesgo': e['riesgo_final'],
+                    'Puntuación': e['puntuacion'],
+                    'Reglas activadas': ', '.join(e['reglas_activadas']),
+                    'Versión de reglas': e['version_reglas']
+                }
+                for e in evaluaciones
+            ],
+            use_container_width=True,
+            hide_index=True
+        )
+
+
+def mostrar_simulacion(datos, evaluador=None):
+    """
+    Muestra la simulación Monte Carlo de la incertidumbre de los datos financieros
+    
+    Args:
+        datos: Diccionario con los datos del proveedor evaluado
+        evaluador: Evaluador compilado de la versión de reglas usada
+    """
+    st.markdown("### 🎲 Simulación de Incertidumbre")
+    st.caption(
+        "Los indicadores financieros son estimaciones: se evalúan miles de variantes "
+        "perturbadas del proveedor para estimar la probabilidad de cada nivel de riesgo."
+    )
+
+    col_muestras, col_error = st.columns(2)
+    with col_muestras:
+        muestras = st.select_slider(
+            "Número de simulaciones",
+            options=[1000, 10000, 100000],
+            value=100000
+        )
+    with col_error:
+        escala = st.slider(
+            "Escala del error de los datos financieros",
+            0.0,
+            3.0,
+            1.0,
+            0.25
+        )
+
+    distribuciones = {
+        campo: dict(distribucion, desviacion=distribucion['desviacion'] * escala)
+        for campo, distribucion in DISTRIBUCIONES_DEFECTO.items()
+    }
+    datos_motor = {
+        k: v for k, v in datos.items()
+        if k not in ['nombre', 'fecha_evaluacion']
+    }
+    simulacion = simular_proveedor(datos_motor, muestras, distribuciones, semilla=0, evaluador=evaluador)
+
+    sin_efecto = simulacion['campos_sin_efecto']
+    if len(sin_efecto) == len(distribuciones):
+        # Las reglas que leen estos campos no pueden activarse: perturbarlos
+        # no cambia nada y el resultado no es una probabilidad
+        st.info(
+            "Ninguna regla activable usa los indicadores financieros simulados "
+            f"({', '.join(sin_efecto)}), así que su incertidumbre no afecta a la "
+            f"evaluación: el riesgo es {simulacion['riesgo_base']} con puntuación "
+            f"{simulacion['puntuacion_base']} en todas las simulaciones."
+        )
+        return
+    if sin_efecto:
+        st.caption(
+            f"Sin efecto en la simulación (sus reglas no pueden activarse): {', '.join(sin_efecto)}."
+        )
+
+    col_bajo, col_medio, col_alto = st.columns(3)
+    for columna, nivel in zip((col_bajo, col_medio, col_alto), ('BAJO', 'MEDIO', 'ALTO')):
+        with columna:
+            st.metric(f"Probabilidad riesgo {nivel}", f"{simulacion['probabilidades'][nivel]:.1%}")
+
+    distribucion = simulacion['distribucion_puntuacion']
+    fig_puntuacion = go.Figure(data=[
+        go.Bar(
+            x=list(distribucion.keys()),
+            y=list(distribucion.values()),
+            marker_color='#45b7d1'
+        )
+    ])
+    fig_puntuacion.update_layout(
+        xaxis_title="Puntuación",
+        yaxis_title="Frecuencia relativa",
+        height=300,
+        margin=dict(l=20, r=20, t=30, b=20)
+    )
+    st.plotly_chart(fig_puntuacion, use_container_width=True)
+
+    percentiles = simulacion['percentiles']
+    st.caption(
+        f"Puntuación media {simulacion['puntuacion_media']:.1f} "
+        f"(P5 {percentiles[5]:.0f} · P50 {percentiles[50]:.0f} · P95 {percentiles[95]:.0f}) "
+        f"sobre {simulacion['n']:,} simulaciones."
+    )